@@ -0,0 +1,158 @@
+"""
+Microbenchmark : sérialisation des réponses volumineuses de la Gateway.
+
+Compare, pour un historique de 10 000 alertes (`POST /emergency/alerts/history`)
+et 10 000 événements (`GET /urban/events`), le temps passé par FastAPI entre
+le retour de la route et les octets de la réponse :
+
+- before      : `response_model` validé puis sérialisé par FastAPI par défaut
+- orjson      : `response_model` validé puis FastJSONResponse en classe par
+                défaut (option écartée : FastAPI abandonne alors `dump_json`)
+- passthrough : `passthrough()`, ni validation ni encodeur, orjson seul
+
+Les routes renvoient une charge préparée : réseau et clients upstream exclus.
+
+Usage (depuis gateway/):
+    python benchmarks/bench_json_response.py [--items 10000] [--iterations 20]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+
+import httpx
+import orjson
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.json_response import FastJSONResponse, passthrough  # noqa: E402
+
+def make_alerts(count: int) -> Dict[str, Any]:
+    """Historique au format de EmergencyGrpcClient.get_alert_history"""
+    alerts = [
+        {
+            "alert_id": f"ALT-{i:06d}",
+            "type": "FIRE" if i % 3 else "ACCIDENT",
+            "description": f"Incident signalé au numéro {i} de la rue principale",
+            "location": {
+                "latitude": 36.8 + i * 1e-5,
+                "longitude": 10.18 + i * 1e-5,
+                "address": f"{i} avenue Habib Bourguiba",
+                "city": "Tunis",
+                "zone": f"Zone {i % 8}"
+            },
+            "priority": ("LOW", "MEDIUM", "HIGH", "CRITICAL")[i % 4],
+            "status": "RESOLVED",
+            "reporter_name": "Citoyen",
+            "reporter_phone": "+21620000000",
+            "affected_people": i % 12,
+            "created_at": 1700000000 + i,
+            "updated_at": 1700000600 + i,
+            "assigned_team": f"Équipe {i % 5}",
+            "notes": ""
+        }
+        for i in range(count)
+    ]
+    return {"alerts": alerts, "total_count": count, "statistics": {"FIRE": count * 2 // 3, "ACCIDENT": count // 3}}
+
+def make_events(count: int) -> List[Dict[str, Any]]:
+    """Événements au format de la requête GraphQL GetEvents"""
+    return [
+        {
+            "id": f"event-{i}",
+            "name": f"Événement {i}",
+            "description": "Travaux de voirie et circulation alternée",
+            "eventTypeId": f"type-{i % 6}",
+            "zoneId": f"zone-{i % 8}",
+            "date": "2026-10-17T08:00:00",
+            "priority": ("LOW", "MEDIUM", "HIGH", "CRITICAL")[i % 4],
+            "status": "IN_PROGRESS",
+            "createdAt": "2026-10-01T08:00:00",
+            "updatedAt": "2026-10-02T08:00:00",
+            "eventType": {"id": f"type-{i % 6}", "name": "Travaux", "description": "Travaux publics"},
+            "zone": {"id": f"zone-{i % 8}", "name": "Centre-Ville", "description": "Hypercentre"}
+        }
+        for i in range(count)
+    ]
+
+def build_app(mode: str, alerts: Dict[str, Any], events: List[Dict[str, Any]]) -> FastAPI:
+    # "before" : configuration d'origine de la Gateway (classe de réponse par défaut)
+    app = FastAPI() if mode == "before" else FastAPI(default_response_class=FastJSONResponse)
+
+    if mode == "passthrough":
+        @app.post("/emergency/alerts/history", response_model=dict)
+        async def history():
+            return passthrough(alerts)
+
+        @app.get("/urban/events", response_model=List[dict])
+        async def list_events():
+            return passthrough(events)
+    else:
+        @app.post("/emergency/alerts/history", response_model=dict)
+        async def history():
+            return alerts
+
+        @app.get("/urban/events", response_model=List[dict])
+        async def list_events():
+            return events
+
+    return app
+
+async def time_route(app: FastAPI, method: str, path: str, iterations: int) -> float:
+    """Médiane en ms d'un aller-retour ASGI en mémoire"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        await client.request(method, path)
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            response = await client.request(method, path)
+            samples.append(time.perf_counter() - start)
+            assert response.status_code == 200
+    return statistics.median(samples) * 1000
+
+def time_call(fn, iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    alerts = make_alerts(args.items)
+    events = make_events(args.items)
+    routes = [
+        (f"{args.items} alertes", "POST", "/emergency/alerts/history", alerts),
+        (f"{args.items} événements", "GET", "/urban/events", events),
+    ]
+
+    print("Encodeur seul (médiane, ms)")
+    print(f"{'charge':<20} {'jsonable_encoder+json':>22} {'orjson':>10}")
+    for label, _, _, payload in routes:
+        stdlib = time_call(lambda: json.dumps(jsonable_encoder(payload)).encode(), args.iterations)
+        fast = time_call(lambda: orjson.dumps(payload), args.iterations)
+        print(f"{label:<20} {stdlib:>22.2f} {fast:>10.2f}")
+
+    print()
+    print("Route FastAPI complète (médiane, ms)")
+    modes = ["before", "orjson", "passthrough"]
+    apps = {mode: build_app(mode, alerts, events) for mode in modes}
+    print(f"{'charge':<20} " + " ".join(f"{mode:>12}" for mode in modes) + f" {'gain':>8}")
+    for label, method, path, _ in routes:
+        timings = [await time_route(apps[mode], method, path, args.iterations) for mode in modes]
+        print(f"{label:<20} " + " ".join(f"{t:>12.2f}" for t in timings) + f" {timings[0] / timings[-1]:>7.1f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
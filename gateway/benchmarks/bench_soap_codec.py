@@ -0,0 +1,105 @@
+"""
+Microbenchmark : chemin zeep vs codec SOAP spécialisé.
+
+Pour GetAQI, GetPollutants et CompareZones, mesure le coût CPU côté Gateway
+(construction de l'enveloppe + parsing de la réponse + conversion en dict JSON),
+sur des réponses Spyne enregistrées : le réseau est exclu des deux côtés.
+
+Usage (depuis gateway/):
+    python benchmarks/bench_soap_codec.py [--iterations 5000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import requests
+from lxml import etree
+from zeep import Client, Settings
+from zeep.helpers import serialize_object
+from zeep.transports import Transport
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from clients.soap_codec import build_envelope, decode_response  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests", "fixtures", "soap")
+
+CASES = [
+    ("GetAQI", {"zone": "downtown"}),
+    ("GetPollutants", {"zone": "downtown"}),
+    ("CompareZones", {"zoneA": "downtown", "zoneB": "park"}),
+]
+
+def load_fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+        return f.read()
+
+class CannedTransport(Transport):
+    """Transport zeep qui renvoie une réponse enregistrée au lieu d'appeler le réseau"""
+
+    def __init__(self, responses):
+        super().__init__()
+        self.responses = responses
+
+    def post_xml(self, address, envelope, headers):
+        # Sérialisation de l'enveloppe incluse, comme lors d'un vrai appel
+        etree.tostring(envelope)
+        action = headers.get("SOAPAction", "").strip('"')
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "text/xml; charset=utf-8"
+        response._content = self.responses[action]
+        response.encoding = "utf-8"
+        return response
+
+def to_json(value):
+    """Conversion utilisée par AirQualitySoapClient._serialize_response"""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {key: to_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [to_json(item) for item in value]
+    return value
+
+def bench(fn, iterations: int) -> float:
+    """Durée moyenne d'un appel, en microsecondes"""
+    for _ in range(min(200, iterations)):
+        fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    responses = {operation: load_fixture(f"{operation}Response.xml") for operation, _ in CASES}
+    client = Client(
+        wsdl=os.path.join(FIXTURES_DIR, "air_quality_service.wsdl"),
+        settings=Settings(strict=False, xml_huge_tree=True, xsd_ignore_sequence_order=True),
+        transport=CannedTransport(responses)
+    )
+
+    print(f"{'operation':<15} {'zeep (µs)':>12} {'codec (µs)':>12} {'speedup':>9}")
+    for operation, params in CASES:
+        zeep_call = getattr(client.service, operation)
+        values = tuple(params.values())
+        content = responses[operation]
+
+        def zeep_path():
+            return to_json(serialize_object(zeep_call(**params), dict))
+
+        def codec_path():
+            build_envelope(operation, *values)
+            return decode_response(operation, content)
+
+        zeep_us = bench(zeep_path, args.iterations)
+        codec_us = bench(codec_path, args.iterations)
+        print(f"{operation:<15} {zeep_us:>12.1f} {codec_us:>12.1f} {zeep_us / codec_us:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
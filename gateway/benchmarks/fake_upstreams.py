@@ -0,0 +1,385 @@
+"""
+Faux services upstream pour les tests de charge de la Gateway.
+
+Quatre serveurs en processus, sur 127.0.0.1, parlant chacun le protocole du
+vrai service :
+
+- REST (aiohttp)     : Mobilité, mêmes chemins et mêmes schémas de réponse
+- SOAP (XML brut)    : Qualité de l'Air, WSDL et réponses au format Spyne
+- gRPC (grpc.aio)    : Urgences, servicer généré depuis `emergency.proto`
+- GraphQL (aiohttp)  : Événements Urbains, requêtes simples et lots
+
+Chaque service a un `FaultProfile` : latence log-normale (médiane, p99) et
+taux d'erreur. Ni base de données, ni Docker, ni accès réseau externe.
+"""
+import asyncio
+import math
+import os
+import random
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from xml.sax.saxutils import escape
+
+import grpc
+from aiohttp import web
+from lxml import etree
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from protos import emergency_pb2, emergency_pb2_grpc  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests", "fixtures", "soap")
+
+ZONES = ["downtown", "industrial", "park", "residential", "harbor", "university"]
+
+# Quantile 0,99 de la loi normale centrée réduite
+_Z99 = 2.326
+
+@dataclass
+class FaultProfile:
+    """Latence (log-normale : médiane et p99, en ms) et taux d'erreur d'un faux service"""
+    median_ms: float = 5.0
+    p99_ms: float = 20.0
+    error_rate: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "FaultProfile":
+        """`médiane:p99[:taux_erreur]`, ex. `8:40:0.01`"""
+        parts = [float(part) for part in spec.split(":")]
+        return cls(*parts)
+
+    def delay(self, rng: random.Random) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        sigma = math.log(max(self.p99_ms, self.median_ms) / self.median_ms) / _Z99
+        return rng.lognormvariate(math.log(self.median_ms), sigma) / 1000
+
+    def fails(self, rng: random.Random) -> bool:
+        return rng.random() < self.error_rate
+
+@dataclass
+class FakeService:
+    """État commun d'un faux service : profil, générateur et compteurs d'appels"""
+    name: str
+    profile: FaultProfile
+    rng: random.Random
+    calls: Dict[str, int] = field(default_factory=dict)
+    errors: int = 0
+
+    async def serve(self, operation: str) -> bool:
+        """Applique la latence ; False si l'appel doit échouer"""
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+        await asyncio.sleep(self.profile.delay(self.rng))
+        if self.profile.fails(self.rng):
+            self.errors += 1
+            return False
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": sum(self.calls.values()), "errors": self.errors, "by_operation": dict(self.calls)}
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+def _aqi(zone: str) -> int:
+    return 20 + (sum(map(ord, zone)) * 7) % 160
+
+# ============================================================
+# REST - Mobilité
+# ============================================================
+
+LIGNES = ["metro-1", "metro-2", "bus-12", "bus-31", "tram-3"]
+
+def mobility_app(service: FakeService) -> web.Application:
+    def handler(operation, payload):
+        async def handle(request):
+            if not await service.serve(operation):
+                return web.json_response({"detail": "Service temporairement indisponible"}, status=503)
+            return web.json_response(payload(request))
+        return handle
+
+    trafic = lambda request: {
+        "derniere_maj": _now(),
+        "nombre_lignes": len(LIGNES),
+        "trafic": [
+            {"ligne_id": ligne, "statut": "normal", "retard_minutes": 0, "message": "", "timestamp": _now()}
+            for ligne in LIGNES
+        ]
+    }
+    disponibilite = lambda request: {
+        "timestamp": _now(),
+        "nombre_lignes": len(LIGNES),
+        "disponibilites": [
+            {"ligne_id": ligne, "vehicules_total": 20, "vehicules_en_service": 17, "taux_disponibilite": 85.0, "derniere_maj": _now()}
+            for ligne in LIGNES
+        ]
+    }
+    lignes = lambda request: [
+        {"id": ligne, "nom": ligne, "type_transport": ligne.split("-")[0], "actif": True} for ligne in LIGNES
+    ]
+    horaires = lambda request: {
+        "ligne_id": request.match_info["ligne"],
+        "horaires": [{"arret": "Centre", "passages": ["08:00", "08:15", "08:30"]}]
+    }
+
+    app = web.Application()
+    app.router.add_get("/trafic", handler("trafic", trafic))
+    app.router.add_get("/disponibilite", handler("disponibilite", disponibilite))
+    app.router.add_get("/lignes", handler("lignes", lignes))
+    app.router.add_get("/horaires/{ligne}", handler("horaires", horaires))
+    app.router.add_get("/health", handler("health", lambda request: {"status": "healthy"}))
+    return app
+
+# ============================================================
+# SOAP - Qualité de l'Air (XML au format Spyne, sans Spyne)
+# ============================================================
+
+_ENVELOPE = (
+    "<?xml version='1.0' encoding='UTF-8'?>"
+    '<soap11env:Envelope xmlns:soap11env="http://schemas.xmlsoap.org/soap/envelope/" '
+    'xmlns:tns="http://smartcity.air-quality.soap" xmlns:s0="http://smartcity.air-quality.soap/models">'
+    "<soap11env:Body>%s</soap11env:Body></soap11env:Envelope>"
+)
+
+def _soap_fault(message: str) -> bytes:
+    return (_ENVELOPE % (
+        "<soap11env:Fault><faultcode>soap11env:Server</faultcode>"
+        f"<faultstring>{escape(message)}</faultstring></soap11env:Fault>"
+    )).encode("utf-8")
+
+def _soap_value(request_body: bytes, name: str) -> str:
+    """Valeur d'un paramètre de la requête, quel que soit son préfixe"""
+    root = etree.fromstring(request_body, etree.XMLParser(resolve_entities=False, no_network=True))
+    return root.xpath(f"string(//*[local-name()='{name}'])")
+
+def _get_aqi(body: bytes) -> str:
+    zone = _soap_value(body, "zone")
+    return (
+        "<tns:GetAQIResponse><tns:GetAQIResult>"
+        f"<s0:zone>{escape(zone)}</s0:zone><s0:aqi>{_aqi(zone)}</s0:aqi><s0:category>Moderate</s0:category>"
+        f"<s0:timestamp>{_now()}</s0:timestamp><s0:description>Qualité de l'air acceptable</s0:description>"
+        "</tns:GetAQIResult></tns:GetAQIResponse>"
+    )
+
+def _health(body: bytes) -> str:
+    return (
+        "<tns:HealthCheckResponse><tns:HealthCheckResult>"
+        "<s0:status>healthy</s0:status><s0:version>1.0.0</s0:version><s0:uptime_seconds>1</s0:uptime_seconds>"
+        f"<s0:database_status>connected</s0:database_status><s0:last_check>{_now()}</s0:last_check>"
+        "</tns:HealthCheckResult></tns:HealthCheckResponse>"
+    )
+
+def _fixture_body(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+        root = etree.fromstring(f.read())
+    return etree.tostring(root.xpath("/*/*[local-name()='Body']/*[1]")[0], encoding="unicode")
+
+def air_quality_app(service: FakeService) -> web.Application:
+    with open(os.path.join(FIXTURES_DIR, "air_quality_service.wsdl"), "rb") as f:
+        wsdl = f.read()
+    canned = {
+        "GetPollutants": _fixture_body("GetPollutantsResponse.xml"),
+        "CompareZones": _fixture_body("CompareZonesResponse.xml"),
+        "GetHistory": _fixture_body("GetHistoryResponse.xml")
+    }
+    operations = {
+        "GetAQI": _get_aqi,
+        "HealthCheck": _health,
+        **{name: (lambda body, xml=xml: xml) for name, xml in canned.items()}
+    }
+
+    async def get_wsdl(request):
+        return web.Response(body=wsdl, content_type="text/xml")
+
+    async def post(request):
+        operation = request.headers.get("SOAPAction", "").strip('"')
+        body = await request.read()
+        if operation not in operations:
+            return web.Response(body=_soap_fault(f"Opération inconnue: {operation}"), status=500, content_type="text/xml")
+        if not await service.serve(operation):
+            return web.Response(body=_soap_fault("Base de données indisponible"), status=500, content_type="text/xml")
+        return web.Response(body=(_ENVELOPE % operations[operation](body)).encode("utf-8"), content_type="text/xml")
+
+    app = web.Application()
+    app.router.add_get("/", get_wsdl)
+    app.router.add_post("/", post)
+    return app
+
+# ============================================================
+# gRPC - Urgences
+# ============================================================
+
+def _alert(zone: str, index: int) -> emergency_pb2.AlertResponse:
+    alert = emergency_pb2.AlertResponse(
+        alert_id=f"ALT-{zone}-{index}",
+        type=emergency_pb2.FIRE if index % 2 else emergency_pb2.ACCIDENT,
+        description="Incident signalé par le faux service",
+        priority=emergency_pb2.HIGH if index % 2 else emergency_pb2.MEDIUM,
+        status=emergency_pb2.PENDING,
+        reporter_name="Citoyen",
+        reporter_phone="+21620000000",
+        affected_people=index,
+        created_at=_now(),
+        updated_at=_now()
+    )
+    alert.location.zone = zone
+    alert.location.city = "Tunis"
+    return alert
+
+class EmergencyService(emergency_pb2_grpc.EmergencyAlertServiceServicer):
+    """Servicer du faux service Urgences : deux alertes actives par zone"""
+
+    def __init__(self, service: FakeService):
+        self.service = service
+
+    async def _serve(self, operation: str, context):
+        if not await self.service.serve(operation):
+            await context.abort(grpc.StatusCode.UNAVAILABLE, "Base de données indisponible")
+
+    async def GetActiveAlerts(self, request, context):
+        await self._serve("GetActiveAlerts", context)
+        alerts = [_alert(request.zone, index) for index in range(2)]
+        return emergency_pb2.AlertListResponse(alerts=alerts, total_count=len(alerts))
+
+    async def GetActiveAlertsBatch(self, request, context):
+        await self._serve("GetActiveAlertsBatch", context)
+        response = emergency_pb2.MultiZoneAlertResponse()
+        for zone in request.zones:
+            response.zones[zone].alerts.extend(_alert(zone, index) for index in range(2))
+            response.zones[zone].total_count = 2
+        response.total_count = 2 * len(request.zones)
+        return response
+
+    async def CreateAlert(self, request, context):
+        await self._serve("CreateAlert", context)
+        alert = _alert(request.location.zone, 0)
+        alert.description = request.description
+        return alert
+
+    async def SubscribeAlerts(self, request, context):
+        # Flux ouvert sans nouvelle alerte, fermé à l'arrêt du serveur
+        self.service.calls["SubscribeAlerts"] = self.service.calls.get("SubscribeAlerts", 0) + 1
+        await asyncio.Event().wait()
+        yield
+
+    async def HealthCheck(self, request, context):
+        await self._serve("HealthCheck", context)
+        return emergency_pb2.HealthCheckResponse(status="healthy", version="1.0.0")
+
+# ============================================================
+# GraphQL - Événements Urbains
+# ============================================================
+
+def _event(zone: str, index: int, status: Optional[str]) -> Dict[str, Any]:
+    return {
+        "id": f"evt-{zone}-{index}",
+        "name": f"Événement {index}",
+        "description": "Événement du faux service",
+        "eventTypeId": "1",
+        "zoneId": zone,
+        "date": _now(),
+        "priority": "MEDIUM",
+        "status": status or "SCHEDULED",
+        "createdAt": _now(),
+        "updatedAt": _now(),
+        "eventType": {"id": "1", "name": "Concert", "description": ""},
+        "zone": {"id": zone, "name": zone, "description": ""}
+    }
+
+def _graphql_data(operation: Optional[str], variables: Dict[str, Any]) -> Dict[str, Any]:
+    if operation == "Health":
+        return {"__typename": "Query"}
+    if operation == "Zones":
+        return {"zones": [{"id": zone, "name": zone, "description": ""} for zone in ZONES]}
+    if operation == "EventTypes":
+        return {"eventTypes": [{"id": "1", "name": "Concert", "description": ""}]}
+    if operation in ("GetEvents", "GetEventsPage"):
+        zone = variables.get("zoneId") or ZONES[0]
+        return {"events": [_event(zone, index, variables.get("status")) for index in range(3)]}
+    return {}
+
+def urban_events_app(service: FakeService) -> web.Application:
+    async def answer(payload: Dict[str, Any]) -> Dict[str, Any]:
+        operation = payload.get("operationName")
+        if operation is None:
+            # Nom absent du payload : lu dans le document
+            head = payload.get("query", "").split("(")[0].split("{")[0].split()
+            operation = head[1] if len(head) > 1 else None
+        if not await service.serve(operation or "anonymous"):
+            return {"data": None, "errors": [{"message": "Base de données indisponible"}]}
+        return {"data": _graphql_data(operation, payload.get("variables") or {})}
+
+    async def handle(request):
+        payload = await request.json()
+        if isinstance(payload, list):
+            return web.json_response(list(await asyncio.gather(*(answer(item) for item in payload))))
+        return web.json_response(await answer(payload))
+
+    app = web.Application()
+    app.router.add_post("/graphql", handle)
+    return app
+
+# ============================================================
+# Démarrage et arrêt
+# ============================================================
+
+class FakeUpstreams:
+    """
+    Démarre les quatre faux services sur des ports libres de 127.0.0.1.
+
+    `settings()` renvoie les paramètres de la Gateway qui pointent vers eux.
+    """
+
+    def __init__(self, profiles: Optional[Dict[str, FaultProfile]] = None, seed: int = 0):
+        profiles = profiles or {}
+        rng = random.Random(seed)
+        self.services = {
+            name: FakeService(name, profiles.get(name, FaultProfile()), random.Random(rng.random()))
+            for name in ("mobility", "air_quality", "emergency", "urban_events")
+        }
+        self._runners: List[web.AppRunner] = []
+        self._grpc_server: Optional[grpc.aio.Server] = None
+        self.ports: Dict[str, int] = {}
+
+    async def _start_http(self, name: str, app: web.Application):
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        self._runners.append(runner)
+        self.ports[name] = runner.addresses[0][1]
+
+    async def start(self) -> "FakeUpstreams":
+        await self._start_http("mobility", mobility_app(self.services["mobility"]))
+        await self._start_http("air_quality", air_quality_app(self.services["air_quality"]))
+        await self._start_http("urban_events", urban_events_app(self.services["urban_events"]))
+
+        self._grpc_server = grpc.aio.server()
+        emergency_pb2_grpc.add_EmergencyAlertServiceServicer_to_server(
+            EmergencyService(self.services["emergency"]), self._grpc_server
+        )
+        self.ports["emergency"] = self._grpc_server.add_insecure_port("127.0.0.1:0")
+        await self._grpc_server.start()
+        return self
+
+    def settings(self) -> Dict[str, Any]:
+        """Paramètres de la Gateway (config.Settings) pointant vers les faux services"""
+        return {
+            "MOBILITY_SERVICE_URL": f"http://127.0.0.1:{self.ports['mobility']}",
+            "AIR_QUALITY_WSDL_URL": f"http://127.0.0.1:{self.ports['air_quality']}/?wsdl",
+            "AIR_QUALITY_SERVICE_URL": f"http://127.0.0.1:{self.ports['air_quality']}/",
+            "EMERGENCY_GRPC_HOST": "127.0.0.1",
+            "EMERGENCY_GRPC_PORT": self.ports["emergency"],
+            "URBAN_EVENTS_GRAPHQL_URL": f"http://127.0.0.1:{self.ports['urban_events']}/graphql"
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: service.stats() for name, service in self.services.items()}
+
+    async def close(self):
+        if self._grpc_server is not None:
+            await self._grpc_server.stop(None)
+        for runner in self._runners:
+            await runner.cleanup()
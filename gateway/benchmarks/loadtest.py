@@ -0,0 +1,288 @@
+"""
+Test de charge de la Gateway sur de faux services upstream.
+
+Démarre les quatre faux services de `fake_upstreams.py` (REST, SOAP, gRPC,
+GraphQL) sur 127.0.0.1, pointe la Gateway vers eux, exécute son cycle de vie
+réel (clients partagés, instantané, sondes) puis envoie un mélange pondéré de
+requêtes. Rapporte, par route et au total, le débit et les latences p50, p95,
+p99. Aucune base de données, aucun conteneur, aucun accès réseau externe.
+
+Deux modes de charge :
+- boucle fermée (défaut) : `--concurrency` clients qui enchaînent les requêtes
+- boucle ouverte (`--rate`) : requêtes lancées à débit fixe ; la latence est
+  mesurée depuis l'heure prévue, une Gateway saturée n'est donc pas masquée
+
+Par défaut les requêtes passent par l'interface ASGI (sans pile HTTP) ;
+`--uvicorn` sert l'application sur un port local et l'attaque en HTTP.
+Le générateur partage le processus de la Gateway : comparer des mesures
+prises sur la même machine, pas des valeurs absolues.
+
+Usage (depuis gateway/):
+    python benchmarks/loadtest.py [--duration 20] [--concurrency 50]
+        [--rate 500] [--mix plan-trip=5,aqi=2] [--soap 15:60:0.01]
+        [--cold] [--uvicorn] [--json report.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+GATEWAY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, GATEWAY_DIR)
+
+from benchmarks.fake_upstreams import ZONES, FakeUpstreams, FaultProfile  # noqa: E402
+from config import settings  # noqa: E402
+
+def _trip(rng: random.Random) -> Dict[str, Any]:
+    depart, arrivee = rng.sample(ZONES, 2)
+    return {
+        "zone_depart": depart,
+        "zone_arrivee": arrivee,
+        "heure_depart": f"{rng.randint(6, 22):02d}:{rng.choice(['00', '15', '30', '45'])}",
+        "preferences": ["metro", "bus"]
+    }
+
+@dataclass
+class Route:
+    """Requête du mélange : nom, poids et construction (méthode, chemin, corps)"""
+    name: str
+    weight: float
+    build: Callable[[random.Random], Tuple[str, str, Optional[Dict[str, Any]]]]
+
+# Mélange par défaut : lectures par zone et plan-trip dominent, comme en production
+ROUTES = [
+    Route("trafic", 15, lambda rng: ("GET", "/mobility/trafic", None)),
+    Route("disponibilite", 5, lambda rng: ("GET", "/mobility/disponibilite", None)),
+    Route("aqi", 20, lambda rng: ("GET", f"/air/aqi/{rng.choice(ZONES)}", None)),
+    Route("alerts", 20, lambda rng: ("GET", f"/emergency/alerts/active/{rng.choice(ZONES)}", None)),
+    Route("events", 10, lambda rng: ("GET", f"/urban/events?zone_id={rng.choice(ZONES)}", None)),
+    Route("plan-trip", 25, lambda rng: ("POST", "/smart-city/plan-trip", _trip(rng))),
+    Route("plan-trip-batch", 2, lambda rng: ("POST", "/smart-city/plan-trip/batch", {"trips": [_trip(rng) for _ in range(10)]})),
+    Route("health", 3, lambda rng: ("GET", "/smart-city/health", None)),
+]
+
+@dataclass
+class RouteStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: Dict[int, int] = field(default_factory=dict)
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentile au rang le plus proche (valeurs triées)"""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, int(round(q / 100 * len(values) + 0.5)) - 1))
+    return values[rank]
+
+def summarize(name: str, stats: RouteStats, elapsed: float) -> Dict[str, Any]:
+    latencies = sorted(stats.latencies)
+    return {
+        "route": name,
+        "requests": len(latencies),
+        "errors": stats.errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        "statuses": {str(status): count for status, count in sorted(stats.statuses.items())}
+    }
+
+class LoadGenerator:
+    """Envoie le mélange de requêtes et enregistre les latences après l'échauffement"""
+
+    def __init__(self, client: httpx.AsyncClient, routes: List[Route], seed: int):
+        self.client = client
+        self.routes = [route for route in routes if route.weight > 0]
+        self.weights = [route.weight for route in self.routes]
+        self.rng = random.Random(seed)
+        self.stats: Dict[str, RouteStats] = {route.name: RouteStats() for route in self.routes}
+        self.recording = False
+
+    async def send(self, scheduled: Optional[float] = None):
+        route = self.rng.choices(self.routes, self.weights)[0]
+        method, path, body = route.build(self.rng)
+        loop = asyncio.get_running_loop()
+        started = scheduled if scheduled is not None else loop.time()
+        try:
+            response = await self.client.request(method, path, json=body)
+            status = response.status_code
+        except httpx.HTTPError:
+            status = 0
+        latency = loop.time() - started
+        if not self.recording:
+            return
+        stats = self.stats[route.name]
+        stats.latencies.append(latency)
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        if not 200 <= status < 300:
+            stats.errors += 1
+
+    async def closed_loop(self, concurrency: int, until: float):
+        async def worker():
+            while asyncio.get_running_loop().time() < until:
+                await self.send()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    async def open_loop(self, rate: float, until: float):
+        loop = asyncio.get_running_loop()
+        interval = 1 / rate
+        next_at = loop.time()
+        tasks = set()
+        while next_at < until:
+            await asyncio.sleep(max(0.0, next_at - loop.time()))
+            task = asyncio.create_task(self.send(scheduled=next_at))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            next_at += interval
+        await asyncio.gather(*tasks)
+
+def apply_mix(spec: Optional[str]) -> List[Route]:
+    """`nom=poids,...` remplace les poids indiqués (0 retire la route)"""
+    weights = {}
+    for item in filter(None, (spec or "").split(",")):
+        name, weight = item.split("=")
+        weights[name.strip()] = float(weight)
+    unknown = set(weights) - {route.name for route in ROUTES}
+    if unknown:
+        raise SystemExit(f"Routes inconnues dans --mix: {sorted(unknown)} (disponibles: {[r.name for r in ROUTES]})")
+    return [Route(route.name, weights.get(route.name, route.weight), route.build) for route in ROUTES]
+
+def configure_gateway(upstreams: FakeUpstreams, workdir: str, cold: bool):
+    """Pointe la Gateway vers les faux services ; `cold` coupe caches et instantané"""
+    overrides = {
+        **upstreams.settings(),
+        "WSDL_CACHE_DIR": os.path.join(workdir, "wsdl"),
+        "RESPONSE_CACHE_INVALIDATION_DIR": os.path.join(workdir, "invalidations"),
+        "TRACE_EXPORT_PATH": ""
+    }
+    if cold:
+        overrides["CITY_STATE_ENABLED"] = False
+        overrides.update({name: 0 for name in type(settings).model_fields if name.startswith("CACHE_TTL_")})
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+
+async def run(args) -> Dict[str, Any]:
+    profiles = {
+        name: FaultProfile.parse(getattr(args, option))
+        for name, option in (("mobility", "rest"), ("air_quality", "soap"), ("emergency", "grpc"), ("urban_events", "graphql"))
+    }
+    upstreams = await FakeUpstreams(profiles, seed=args.seed).start()
+    workdir = tempfile.mkdtemp(prefix="gateway-loadtest-")
+    configure_gateway(upstreams, workdir, args.cold)
+
+    # Import après configuration : les clients lisent settings à leur création
+    from main import app, lifespan
+    logging.getLogger("gateway").setLevel(args.log_level.upper())
+
+    server = None
+    try:
+        if args.uvicorn:
+            import uvicorn
+            server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", lifespan="on"))
+            serve_task = asyncio.create_task(server.serve())
+            while not server.started:
+                if serve_task.done():
+                    serve_task.result()
+                await asyncio.sleep(0.05)
+            port = server.servers[0].sockets[0].getsockname()[1]
+            client = httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{port}", timeout=30,
+                limits=httpx.Limits(max_connections=None, max_keepalive_connections=None)
+            )
+            context = None
+        else:
+            context = lifespan(app)
+            await context.__aenter__()
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://gateway", timeout=30)
+
+        async with client:
+            generator = LoadGenerator(client, apply_mix(args.mix), args.seed)
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            warmup_end = start + args.warmup
+            end = warmup_end + args.duration
+
+            async def start_recording():
+                await asyncio.sleep(args.warmup)
+                generator.recording = True
+
+            recorder = asyncio.create_task(start_recording())
+            if args.rate:
+                await generator.open_loop(args.rate, end)
+            else:
+                await generator.closed_loop(args.concurrency, end)
+            await recorder
+            elapsed = loop.time() - warmup_end
+
+        if context is not None:
+            await context.__aexit__(None, None, None)
+    finally:
+        if server is not None:
+            server.should_exit = True
+            await serve_task
+        await upstreams.close()
+
+    routes = [summarize(name, stats, elapsed) for name, stats in generator.stats.items()]
+    total = RouteStats()
+    for stats in generator.stats.values():
+        total.latencies.extend(stats.latencies)
+        total.errors += stats.errors
+        for status, count in stats.statuses.items():
+            total.statuses[status] = total.statuses.get(status, 0) + count
+    return {
+        "mode": f"open loop, {args.rate} req/s" if args.rate else f"closed loop, {args.concurrency} clients",
+        "transport": "uvicorn" if args.uvicorn else "asgi",
+        "cold": args.cold,
+        "duration_s": round(elapsed, 2),
+        "routes": routes,
+        "total": summarize("total", total, elapsed),
+        "upstreams": upstreams.stats()
+    }
+
+def print_report(report: Dict[str, Any]):
+    print(f"\nGateway load test - {report['mode']}, {report['transport']}, {report['duration_s']}s"
+          + (" (caches off)" if report["cold"] else ""))
+    print(f"{'route':<16} {'requests':>9} {'errors':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for row in report["routes"] + [report["total"]]:
+        print(f"{row['route']:<16} {row['requests']:>9} {row['errors']:>7} {row['rps']:>8} "
+              f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9} {row['max_ms']:>9}")
+    print("\nUpstream calls:")
+    for name, stats in report["upstreams"].items():
+        print(f"  {name:<13} {stats['calls']:>8} calls, {stats['errors']} injected errors")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=20.0, help="Durée mesurée (s)")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Échauffement non mesuré (s)")
+    parser.add_argument("--concurrency", type=int, default=50, help="Clients en boucle fermée")
+    parser.add_argument("--rate", type=float, default=0.0, help="Débit cible en boucle ouverte (req/s)")
+    parser.add_argument("--mix", help="Poids des routes, ex. plan-trip=5,health=0")
+    parser.add_argument("--rest", default="5:20:0", help="Profil Mobilité médiane:p99[:taux_erreur] (ms)")
+    parser.add_argument("--soap", default="15:60:0", help="Profil Qualité de l'Air")
+    parser.add_argument("--grpc", default="3:15:0", help="Profil Urgences")
+    parser.add_argument("--graphql", default="8:30:0", help="Profil Événements Urbains")
+    parser.add_argument("--cold", action="store_true", help="Sans cache de réponses ni instantané")
+    parser.add_argument("--uvicorn", action="store_true", help="Passer par uvicorn (HTTP local) plutôt que l'ASGI")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--log-level", default="WARNING", help="Niveau des logs de la Gateway")
+    parser.add_argument("--json", help="Écrit le rapport JSON dans ce fichier")
+    args = parser.parse_args()
+
+    os.chdir(GATEWAY_DIR)
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
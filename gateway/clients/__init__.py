@@ -3,10 +3,21 @@ from .rest_client import MobilityRestClient
 from .soap_client import AirQualitySoapClient
 from .grpc_client import EmergencyGrpcClient
 from .graphql_client import UrbanEventsGraphQLClient
+from .city_state import CityStateMaterializer, city_state_section, annotate_snapshot, filter_alerts
+from .health_prober import HealthProber, ProbeResult
+from .registry import ClientRegistry, get_registry
 
 __all__ = [
     "MobilityRestClient",
     "AirQualitySoapClient",
     "EmergencyGrpcClient",
-    "UrbanEventsGraphQLClient"
+    "UrbanEventsGraphQLClient",
+    "CityStateMaterializer",
+    "city_state_section",
+    "annotate_snapshot",
+    "filter_alerts",
+    "HealthProber",
+    "ProbeResult",
+    "ClientRegistry",
+    "get_registry"
 ]
\ No newline at end of file
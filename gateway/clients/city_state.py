@@ -0,0 +1,329 @@
+"""Instantané en mémoire de l'état de la ville, maintenu en arrière-plan"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+from fastapi import Response
+from  config import settings
+from  utils import logger, fan_out, SubscriptionClosed
+
+# Statuts d'alerte conservés dans l'instantané (comme GetActiveAlerts)
+ACTIVE_ALERT_STATUSES = {"PENDING", "IN_PROGRESS"}
+
+PRIORITY_ORDER = ["LOW", "MEDIUM", "HIGH", "CRITICAL"]
+
+# En-tête des réponses servies depuis l'instantané
+DATA_SOURCE_HEADER = "X-Data-Source"
+
+@dataclass
+class Section:
+    """Donnée de l'instantané et date de sa dernière lecture upstream"""
+    value: Any
+    updated_at: float
+
+    def age(self, now: Optional[float] = None) -> float:
+        return (now or time.time()) - self.updated_at
+
+def filter_alerts(alerts: Iterable[Dict[str, Any]], alert_type: Optional[str] = None, min_priority: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Filtres de GetActiveAlerts appliqués localement"""
+    alerts = list(alerts)
+    if alert_type:
+        alerts = [alert for alert in alerts if alert["type"] == alert_type]
+    if min_priority in PRIORITY_ORDER:
+        accepted = PRIORITY_ORDER[PRIORITY_ORDER.index(min_priority):]
+        alerts = [alert for alert in alerts if alert["priority"] in accepted]
+    return alerts
+
+def city_state_section(registry, kind: str, zone: Optional[str] = None) -> Optional[Section]:
+    """Section fraîche de l'instantané du registre, None s'il est désactivé ou trop ancien"""
+    if registry.city_state is None:
+        return None
+    return registry.city_state.section(kind, zone)
+
+def annotate_snapshot(response: Response, section: Section):
+    """Renseigne l'origine (instantané) et l'âge de la réponse"""
+    response.headers[DATA_SOURCE_HEADER] = "city-state"
+    response.headers["Age"] = str(int(section.age()))
+
+class CityStateMaterializer:
+    """
+    État de la ville par zone, rafraîchi hors du chemin des requêtes.
+
+    Toutes les `CITY_STATE_REFRESH_INTERVAL` secondes, une tâche de fond lit
+    le trafic et la disponibilité (globaux) puis, pour chaque zone suivie,
+    l'AQI, les alertes actives (un seul RPC pour toutes les zones) et les
+    événements en cours. Entre deux lectures, les alertes sont tenues à jour
+    par l'abonnement SubscribeAlerts partagé (`alert_subscriptions`) ; une
+    lecture fusionne ces alertes poussées plutôt que de les écraser : une
+    alerte poussée après le début de la lecture l'emporte sur l'instantané
+    du RPC, qui peut ne pas encore la connaître.
+
+    Chaque section porte sa date de lecture : au-delà de `CITY_STATE_MAX_AGE`
+    secondes, les lecteurs obtiennent None et repassent par un appel direct.
+    Seules les zones configurées sont suivies : une autre zone demandée par un
+    lecteur est servie par un appel direct, sans modifier le suivi (une zone
+    arbitraire dans une URL ne doit pas ajouter de lectures périodiques).
+    """
+
+    def __init__(self, registry, zones: Iterable[str]):
+        self.registry = registry
+        self.zones: Set[str] = {zone.strip() for zone in zones if zone.strip()}
+        self.trafic: Optional[Section] = None
+        self.disponibilite: Optional[Section] = None
+        self.aqi: Dict[str, Section] = {}
+        self.alerts: Dict[str, Section] = {}
+        self.events: Dict[str, Section] = {}
+        # Appelé pour chaque alerte poussée qui modifie l'instantané
+        self.on_alert: Optional[Callable[[Dict[str, Any]], None]] = None
+        # Dernière version poussée de chaque alerte et sa date de réception
+        self._pushed: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        # Tags de cache dont l'invalidation périme une section (voir follow_invalidations)
+        self._invalidations = None
+        self._section_tags: Dict[str, str] = {}
+        self._change_tags: Dict[str, Union[str, Callable[[str], str]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._alerts_task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self.counters = {"refreshes": 0, "refresh_errors": 0, "pushed_alerts": 0, "reads": 0, "stale_reads": 0}
+
+    async def start(self):
+        """Lance le rafraîchissement périodique et l'abonnement aux alertes"""
+        self._task = asyncio.create_task(self._refresh_loop())
+        self._follow_alerts()
+
+    def follow_invalidations(
+        self,
+        cache,
+        section_tags: Dict[str, str],
+        change_tags: Optional[Dict[str, Union[str, Callable[[str], str]]]] = None
+    ):
+        """
+        Lie l'instantané au cache de réponses, dans les deux sens.
+
+        `section_tags` : une section est périmée dès que son tag est invalidé.
+        Une mutation (ligne, événement) passée par n'importe quel worker rend
+        la section obsolète sans attendre le prochain cycle : les lecteurs
+        repassent par un appel direct et une lecture est relancée.
+
+        `change_tags` : quand une lecture rapporte une valeur différente de la
+        précédente pour une section, son tag est invalidé. Pour une section par
+        zone (aqi, alerts, events), le tag est une fonction de la zone. Les
+        entrées calculées à partir de l'ancienne valeur (plans de trajet) ne
+        survivent pas à un changement relevé par l'instantané. Un tag de
+        changement ne doit pas être un tag de section : la section tout juste
+        lue serait aussitôt considérée comme périmée.
+        """
+        self._invalidations = cache
+        self._section_tags = section_tags
+        self._change_tags = change_tags or {}
+
+    # --------------------------------------------------------
+    # Lecture
+    # --------------------------------------------------------
+
+    def section(self, kind: str, zone: Optional[str] = None) -> Optional[Section]:
+        """
+        Section fraîche de l'instantané, ou None (absente ou trop ancienne).
+
+        `kind` : trafic, disponibilite (globales) ou aqi, alerts, events (par zone).
+        """
+        self.counters["reads"] += 1
+        section = getattr(self, kind) if zone is None else getattr(self, kind).get(zone)
+        if section is None or section.age() > settings.CITY_STATE_MAX_AGE or self._invalidated(kind, section):
+            self.counters["stale_reads"] += 1
+            return None
+        return section
+
+    def _invalidated(self, kind: str, section: Section) -> bool:
+        tag = self._section_tags.get(kind)
+        if tag is None or not self._invalidations.invalidated_since(tag, section.updated_at):
+            return False
+        self._wake.set()
+        return True
+
+    def zone_alerts(self, zone: str, alert_type: Optional[str] = None, min_priority: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """Alertes actives de la zone, filtrées comme GetActiveAlerts"""
+        section = self.section("alerts", zone)
+        if section is None:
+            return None
+        return filter_alerts(section.value.values(), alert_type, min_priority)
+
+    def section_ages(self, zones: Iterable[str]) -> Dict[str, Optional[float]]:
+        """Âge en secondes de chaque section utilisée pour ces zones"""
+        now = time.time()
+        ages = {
+            "trafic": self.trafic.age(now) if self.trafic else None,
+            "disponibilite": self.disponibilite.age(now) if self.disponibilite else None
+        }
+        for zone in zones:
+            for name, sections in (("aqi", self.aqi), ("alerts", self.alerts), ("events", self.events)):
+                section = sections.get(zone)
+                ages[f"{name}:{zone}"] = section.age(now) if section else None
+        return {name: round(age, 1) if age is not None else None for name, age in ages.items()}
+
+    # --------------------------------------------------------
+    # Rafraîchissement
+    # --------------------------------------------------------
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.counters["refresh_errors"] += 1
+                logger.warning(f"City state: refresh failed: {str(e)}")
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), settings.CITY_STATE_REFRESH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def refresh(self):
+        """Une lecture complète ; une section en échec garde sa valeur et sa date"""
+        zones = sorted(self.zones)
+        registry = self.registry
+        deadline = settings.CITY_STATE_REFRESH_TIMEOUT
+
+        async def read_aqi():
+            air_quality = await registry.get_air_quality()
+            return await asyncio.gather(*(air_quality.get_aqi(zone) for zone in zones), return_exceptions=True)
+
+        calls = {
+            "trafic": (registry.mobility.get_trafic(), deadline),
+            "disponibilite": (registry.mobility.get_disponibilite(), deadline),
+            "aqi": (read_aqi(), deadline),
+            "events": (
+                asyncio.gather(
+                    *(registry.urban_events.get_events(zone_id=zone, status="IN_PROGRESS") for zone in zones),
+                    return_exceptions=True
+                ),
+                deadline
+            )
+        }
+        if zones:
+            calls["alerts"] = (registry.emergency.get_active_alerts_batch(zones), deadline)
+        # Horodatage pris avant les appels : une alerte poussée pendant la
+        # lecture n'est pas masquée par un instantané plus ancien qu'elle
+        started_at = time.time()
+        collected = await fan_out(calls)
+
+        changed = set()
+        for name in ("trafic", "disponibilite"):
+            if not collected[name].ok:
+                continue
+            previous = getattr(self, name)
+            if previous is not None and previous.value != collected[name].value:
+                changed.add(name)
+            setattr(self, name, Section(collected[name].value, started_at))
+        changed_zones: Dict[str, Set[str]] = {}
+
+        def store(name: str, sections: Dict[str, Section], zone: str, value: Any):
+            previous = sections.get(zone)
+            if previous is not None and previous.value != value:
+                changed_zones.setdefault(name, set()).add(zone)
+            sections[zone] = Section(value, started_at)
+
+        for name, sections in (("aqi", self.aqi), ("events", self.events)):
+            if not collected[name].ok:
+                continue
+            for zone, value in zip(zones, collected[name].value):
+                if not isinstance(value, BaseException):
+                    store(name, sections, zone, value)
+        if "alerts" in collected and collected["alerts"].ok:
+            for zone, alerts in collected["alerts"].value.items():
+                store("alerts", self.alerts, zone, self._merge_pushed(zone, alerts, started_at))
+            # Poussées antérieures à la lecture : connues de l'instantané
+            self._pushed = {
+                alert_id: pushed for alert_id, pushed in self._pushed.items() if pushed[0] >= started_at
+            }
+
+        changed_tags = {self._change_tags[name] for name in changed if name in self._change_tags}
+        for name, changed_in in changed_zones.items():
+            tag = self._change_tags.get(name)
+            if tag is not None:
+                changed_tags.update(tag(zone) for zone in changed_in)
+                changed.add(name)
+        if changed_tags:
+            logger.info(f"City state: {sorted(changed)} changed, invalidating {sorted(changed_tags)}")
+            self._invalidations.invalidate(*changed_tags)
+
+        self.counters["refreshes"] += 1
+        failed = [name for name, result in collected.items() if not result.ok]
+        if failed:
+            self.counters["refresh_errors"] += 1
+            logger.warning(f"City state: sections not refreshed: {failed}")
+
+    # --------------------------------------------------------
+    # Alertes poussées
+    # --------------------------------------------------------
+
+    def _follow_alerts(self):
+        """(Ré)abonne l'instantané aux alertes de toutes les zones suivies"""
+        if not self.zones or self.registry.alert_subscriptions is None:
+            return
+        if self._alerts_task is not None:
+            self._alerts_task.cancel()
+        self._alerts_task = asyncio.create_task(self._consume_alerts(sorted(self.zones)))
+
+    async def _consume_alerts(self, zones: List[str]):
+        while True:
+            subscription = self.registry.subscribe_alerts(zones)
+            try:
+                async for event, alert in subscription:
+                    if event == "alert":
+                        self._apply_alert(alert)
+            except SubscriptionClosed as e:
+                logger.warning(f"City state: alert subscription closed ({e.reason}), resubscribing")
+            finally:
+                self.registry.alert_subscriptions.unsubscribe(subscription)
+
+    def _merge_pushed(self, zone: str, alerts: Iterable[Dict[str, Any]], started_at: float) -> Dict[str, Dict[str, Any]]:
+        """
+        Alertes actives de la zone : l'instantané du RPC, corrigé par les
+        alertes poussées depuis le début de la lecture (créations qu'il ne
+        contient pas encore, changements de statut plus récents).
+        """
+        merged = {alert["alert_id"]: alert for alert in alerts if alert["status"] in ACTIVE_ALERT_STATUSES}
+        for alert_id, (pushed_at, alert) in self._pushed.items():
+            if pushed_at < started_at or alert["location"]["zone"] != zone:
+                continue
+            if alert["status"] in ACTIVE_ALERT_STATUSES:
+                merged[alert_id] = alert
+            else:
+                merged.pop(alert_id, None)
+        return merged
+
+    def _apply_alert(self, alert: Dict[str, Any]):
+        zone = alert["location"]["zone"]
+        if zone not in self.zones:
+            return
+        self._pushed[alert["alert_id"]] = (time.time(), alert)
+        section = self.alerts.get(zone)
+        if section is None:
+            return
+        current = section.value.get(alert["alert_id"])
+        if current == alert or (current is None and alert["status"] not in ACTIVE_ALERT_STATUSES):
+            return
+        # Copie : un lecteur peut encore itérer l'ancienne version
+        alerts = dict(section.value)
+        if alert["status"] in ACTIVE_ALERT_STATUSES:
+            alerts[alert["alert_id"]] = alert
+        else:
+            alerts.pop(alert["alert_id"], None)
+        section.value = alerts
+        self.counters["pushed_alerts"] += 1
+        if self.on_alert is not None:
+            self.on_alert(alert)
+
+    # --------------------------------------------------------
+    # Cycle de vie et statistiques
+    # --------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        return {"zones": sorted(self.zones), **self.counters}
+
+    async def close(self):
+        tasks = [task for task in (self._task, self._alerts_task) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,114 @@
+"""Regroupement des requêtes GraphQL émises dans une courte fenêtre en un seul POST"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from gql import GraphQLRequest
+from gql.transport.exceptions import TransportQueryError
+from graphql import ExecutionResult
+
+class GraphQLBatcher:
+    """
+    File d'attente de requêtes GraphQL envoyées par lots.
+
+    La première requête d'une rafale arme un minuteur de `window` secondes ;
+    toutes les requêtes arrivées entre-temps (ou dès que `max_size` est atteint)
+    partent dans un seul POST contenant un tableau d'opérations. Une requête
+    isolée est envoyée seule, au format habituel.
+    """
+
+    def __init__(
+        self,
+        send_one: Callable[[GraphQLRequest], Awaitable[Dict[str, Any]]],
+        send_batch: Callable[[List[GraphQLRequest]], Awaitable[List[ExecutionResult]]],
+        window: float,
+        max_size: int
+    ):
+        self.send_one = send_one
+        self.send_batch = send_batch
+        self.window = window
+        self.max_size = max_size
+        self._pending: List[Tuple[GraphQLRequest, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self.requests = 0
+        self.round_trips = 0
+
+    async def execute(self, request: GraphQLRequest) -> Dict[str, Any]:
+        """Ajoute la requête au lot courant et attend son résultat"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((request, future))
+        self.requests += 1
+
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.ensure_future(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[Tuple[GraphQLRequest, asyncio.Future]]):
+        # Les appelants annulés pendant la fenêtre ne sont pas envoyés
+        batch = [(request, future) for request, future in batch if not future.done()]
+        if not batch:
+            return
+        self.round_trips += 1
+
+        try:
+            if len(batch) == 1:
+                request, future = batch[0]
+                data = await self.send_one(request)
+                if not future.done():
+                    future.set_result(data)
+                return
+
+            results = await self.send_batch([request for request, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        # Chaque opération du lot réussit ou échoue indépendamment
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if result.errors:
+                first = result.errors[0]
+                future.set_exception(TransportQueryError(
+                    first.get("message", str(first)) if isinstance(first, dict) else str(first),
+                    errors=result.errors,
+                    data=result.data,
+                    extensions=result.extensions
+                ))
+            else:
+                future.set_result(result.data)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "round_trips": self.round_trips,
+            "pending": len(self._pending)
+        }
+
+    async def close(self):
+        """Annule les requêtes en attente et les envois en cours"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for _, future in self._pending:
+            future.cancel()
+        self._pending = []
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -1,9 +1,41 @@
 """Client GraphQL pour le service Événements Urbains"""
-from gql import gql, Client as GqlClient
+import asyncio
+import json
+import aiohttp
+from gql import Client as GqlClient
 from gql.transport.aiohttp import AIOHTTPTransport
-from typing import Dict, Any, List, Optional
+from gql.transport.exceptions import TransportQueryError
+from typing import Dict, Any, AsyncIterator, List, Optional
 from  config import settings
-from  utils import logger, handle_graphql_error, ServiceError
+from  utils import logger, handle_graphql_error, ServiceError, SingleFlight, UpstreamGuard, RetryEngine
+from  utils.tracing import inject
+from . import graphql_documents as documents
+from .graphql_documents import PreparedDocument
+from .graphql_batch import GraphQLBatcher
+
+def _event_filters(
+    event_type_id: Optional[str],
+    zone_id: Optional[str],
+    status: Optional[str],
+    priority: Optional[str],
+    date_from: Optional[str],
+    date_to: Optional[str]
+) -> Dict[str, Any]:
+    """Variables GraphQL des filtres renseignés"""
+    variables = {}
+    if event_type_id:
+        variables["eventTypeId"] = event_type_id
+    if zone_id:
+        variables["zoneId"] = zone_id
+    if status:
+        variables["status"] = status
+    if priority:
+        variables["priority"] = priority
+    if date_from:
+        variables["dateFrom"] = date_from
+    if date_to:
+        variables["dateTo"] = date_to
+    return variables
 
 class UrbanEventsGraphQLClient:
     """Client GraphQL pour interroger le service Événements Urbains"""
@@ -12,47 +44,104 @@ class UrbanEventsGraphQLClient:
         self.url = settings.URBAN_EVENTS_GRAPHQL_URL
         self.timeout = settings.GRAPHQL_TIMEOUT
         
-        # Configuration du transport
+        # Configuration du transport (pool aiohttp keep-alive)
         transport = AIOHTTPTransport(
             url=self.url,
-            timeout=self.timeout
+            timeout=self.timeout,
+            client_session_args={
+                "connector": aiohttp.TCPConnector(
+                    limit=settings.HTTP_MAX_CONNECTIONS,
+                    keepalive_timeout=settings.HTTP_KEEPALIVE_EXPIRY
+                )
+            }
         )
         
+        # Pas d'introspection : les documents sont validés à l'import
+        # contre le schéma versionné (voir graphql_documents)
         self.client = GqlClient(
             transport=transport,
-            fetch_schema_from_transport=True
+            fetch_schema_from_transport=False
+        )
+        
+        # Session persistante, ouverte au premier appel
+        self.session = None
+        self._connect_lock = asyncio.Lock()
+        
+        # Requêtes (hors mutations) identiques simultanées regroupées
+        self.flights = SingleFlight("urban_events")
+        
+        # Disjoncteur et limite de concurrence (une erreur GraphQL est une réponse)
+        self.guard = UpstreamGuard("urban-events-graphql", answered=(TransportQueryError,))
+        # Relances et hedging des requêtes de lecture (jamais des mutations)
+        self.retries = RetryEngine("urban-events-graphql", answered=(TransportQueryError,))
+        
+        # Requêtes distinctes émises dans la même fenêtre : un seul POST
+        self.batcher = GraphQLBatcher(
+            send_one=self._execute_one,
+            send_batch=self._execute_batch,
+            window=settings.GRAPHQL_BATCH_WINDOW,
+            max_size=settings.GRAPHQL_BATCH_MAX
         )
         
         logger.info(f"GraphQL Client initialized: {self.url}")
     
     async def close(self):
-        """Ferme le client GraphQL"""
-        await self.client.close_async()
+        """Ferme la session GraphQL"""
+        await self.batcher.close()
+        if self.session is not None:
+            await self.client.close_async()
+            self.session = None
     
-    async def _execute_query(self, query: str, variables: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Exécute une requête GraphQL"""
+    async def _get_session(self):
+        """Ouvre la session persistante si nécessaire"""
+        if self.session is None:
+            async with self._connect_lock:
+                if self.session is None:
+                    self.session = await self.client.connect_async()
+        return self.session
+    
+    async def _execute_query(self, document: PreparedDocument, variables: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Exécute un document GraphQL pré-parsé"""
+        if document.is_mutation:
+            return await self._send_query(document, variables)
+        key = (document.operation_name, json.dumps(variables, sort_keys=True, default=str))
+        return await self.flights.do(key, lambda: self._send_query(document, variables))
+    
+    async def _send_query(self, document: PreparedDocument, variables: Dict[str, Any] = None) -> Dict[str, Any]:
         try:
-            async with self.client as session:
-                result = await session.execute(gql(query), variable_values=variables)
-                return result
+            request = document.request(variables)
+            # Les mutations ne sont jamais mises en lot (effets de bord)
+            if document.is_mutation:
+                return await self._execute_one(request)
+            if settings.GRAPHQL_BATCH_MAX <= 1:
+                return await self.retries.run(lambda: self._execute_one(request))
+            return await self.retries.run(lambda: self.batcher.execute(request))
         except Exception as e:
             logger.error(f"GraphQL Error: {str(e)}")
             raise handle_graphql_error(e, "urban-events-graphql")
     
+    async def _execute_one(self, request) -> Dict[str, Any]:
+        session = await self._get_session()
+        return await self.guard.call(
+            lambda: session.execute(request, extra_args={"headers": inject()}),
+            request.prepared.operation_name
+        )
+    
+    async def _execute_batch(self, requests) -> list:
+        """Un POST avec un tableau d'opérations ; un résultat (data/errors) par opération"""
+        await self._get_session()
+        # Appel direct du transport : session.execute_batch lèverait une erreur
+        # globale dès qu'une seule opération du lot échoue
+        return await self.guard.call(
+            lambda: self.client.transport.execute_batch(requests, extra_args={"headers": inject()}),
+            "batch"
+        )
+    
     async def get_zones(self) -> List[Dict[str, Any]]:
         """Liste toutes les zones urbaines"""
-        query = """
-        query {
-          zones {
-            id
-            name
-            description
-          }
-        }
-        """
         try:
             logger.info("GraphQL Query: zones")
-            result = await self._execute_query(query)
+            result = await self._execute_query(documents.ZONES)
             logger.info(f"GraphQL Response: {len(result.get('zones', []))} zones")
             return result.get("zones", [])
         except Exception as e:
@@ -60,18 +149,9 @@ class UrbanEventsGraphQLClient:
     
     async def get_zone(self, zone_id: str) -> Dict[str, Any]:
         """Récupère une zone par ID"""
-        query = """
-        query GetZone($zoneId: String!) {
-          zone(zoneId: $zoneId) {
-            id
-            name
-            description
-          }
-        }
-        """
         try:
             logger.info(f"GraphQL Query: zone(id={zone_id})")
-            result = await self._execute_query(query, {"zoneId": zone_id})
+            result = await self._execute_query(documents.ZONE, {"zoneId": zone_id})
             logger.info(f"GraphQL Response: zone {zone_id}")
             return result.get("zone", {})
         except Exception as e:
@@ -79,18 +159,9 @@ class UrbanEventsGraphQLClient:
     
     async def get_event_types(self) -> List[Dict[str, Any]]:
         """Liste tous les types d'événements"""
-        query = """
-        query {
-          eventTypes {
-            id
-            name
-            description
-          }
-        }
-        """
         try:
             logger.info("GraphQL Query: eventTypes")
-            result = await self._execute_query(query)
+            result = await self._execute_query(documents.EVENT_TYPES)
             logger.info(f"GraphQL Response: {len(result.get('eventTypes', []))} types")
             return result.get("eventTypes", [])
         except Exception as e:
@@ -106,101 +177,56 @@ class UrbanEventsGraphQLClient:
         date_to: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """Liste les événements avec filtres optionnels"""
-        query = """
-        query GetEvents(
-          $eventTypeId: String,
-          $zoneId: String,
-          $status: String,
-          $priority: String,
-          $dateFrom: String,
-          $dateTo: String
-        ) {
-          events(
-            eventTypeId: $eventTypeId,
-            zoneId: $zoneId,
-            status: $status,
-            priority: $priority,
-            dateFrom: $dateFrom,
-            dateTo: $dateTo
-          ) {
-            id
-            name
-            description
-            eventTypeId
-            zoneId
-            date
-            priority
-            status
-            createdAt
-            updatedAt
-            eventType {
-              id
-              name
-              description
-            }
-            zone {
-              id
-              name
-              description
-            }
-          }
-        }
-        """
-        
-        variables = {}
-        if event_type_id:
-            variables["eventTypeId"] = event_type_id
-        if zone_id:
-            variables["zoneId"] = zone_id
-        if status:
-            variables["status"] = status
-        if priority:
-            variables["priority"] = priority
-        if date_from:
-            variables["dateFrom"] = date_from
-        if date_to:
-            variables["dateTo"] = date_to
+        variables = _event_filters(event_type_id, zone_id, status, priority, date_from, date_to)
         
         try:
             logger.info(f"GraphQL Query: events with filters {variables}")
-            result = await self._execute_query(query, variables)
+            result = await self._execute_query(documents.EVENTS, variables)
             events = result.get("events", [])
             logger.info(f"GraphQL Response: {len(events)} events")
             return events
         except Exception as e:
             raise handle_graphql_error(e, "urban-events-graphql")
     
+    async def stream_events(
+        self,
+        event_type_id: Optional[str] = None,
+        zone_id: Optional[str] = None,
+        status: Optional[str] = None,
+        priority: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        page_size: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Événements filtrés, lus page par page (arguments limit/offset du service).
+        
+        Seule la page courante est en mémoire et la première page est rendue
+        sans attendre les suivantes. Le service ne fournit pas d'instantané :
+        une création ou suppression entre deux pages peut décaler les suivantes.
+        """
+        page_size = page_size or settings.GRAPHQL_STREAM_PAGE_SIZE
+        filters = _event_filters(event_type_id, zone_id, status, priority, date_from, date_to)
+        logger.info(f"GraphQL Query: events stream with filters {filters} (pages of {page_size})")
+        
+        offset = 0
+        while True:
+            result = await self._execute_query(
+                documents.EVENTS_PAGE,
+                {**filters, "limit": page_size, "offset": offset}
+            )
+            page = result.get("events") or []
+            for event in page:
+                yield event
+            if len(page) < page_size:
+                return
+            offset += page_size
+    
     async def get_event(self, event_id: str) -> Dict[str, Any]:
         """Récupère un événement par ID"""
-        query = """
-        query GetEvent($eventId: String!) {
-          event(eventId: $eventId) {
-            id
-            name
-            description
-            eventTypeId
-            zoneId
-            date
-            priority
-            status
-            createdAt
-            updatedAt
-            eventType {
-              id
-              name
-              description
-            }
-            zone {
-              id
-              name
-              description
-            }
-          }
-        }
-        """
         try:
             logger.info(f"GraphQL Query: event(id={event_id})")
-            result = await self._execute_query(query, {"eventId": event_id})
+            result = await self._execute_query(documents.EVENT, {"eventId": event_id})
             logger.info(f"GraphQL Response: event {event_id}")
             return result.get("event", {})
         except Exception as e:
@@ -217,38 +243,6 @@ class UrbanEventsGraphQLClient:
         status: str = "PENDING"
     ) -> Dict[str, Any]:
         """Crée un nouvel événement"""
-        mutation = """
-        mutation CreateEvent(
-          $name: String!,
-          $description: String!,
-          $eventTypeId: String!,
-          $zoneId: String!,
-          $date: String!,
-          $priority: String!,
-          $status: String
-        ) {
-          createEvent(
-            name: $name,
-            description: $description,
-            eventTypeId: $eventTypeId,
-            zoneId: $zoneId,
-            date: $date,
-            priority: $priority,
-            status: $status
-          ) {
-            success
-            message
-            event {
-              id
-              name
-              description
-              priority
-              status
-            }
-          }
-        }
-        """
-        
         variables = {
             "name": name,
             "description": description,
@@ -261,7 +255,7 @@ class UrbanEventsGraphQLClient:
         
         try:
             logger.info(f"GraphQL Mutation: createEvent(name={name})")
-            result = await self._execute_query(mutation, variables)
+            result = await self._execute_query(documents.CREATE_EVENT, variables)
             logger.info("GraphQL Response: event created")
             return result.get("createEvent", {})
         except Exception as e:
@@ -273,43 +267,11 @@ class UrbanEventsGraphQLClient:
         **kwargs
     ) -> Dict[str, Any]:
         """Met à jour un événement"""
-        mutation = """
-        mutation UpdateEvent(
-          $eventId: String!,
-          $name: String,
-          $description: String,
-          $eventTypeId: String,
-          $zoneId: String,
-          $date: String,
-          $priority: String,
-          $status: String
-        ) {
-          updateEvent(
-            eventId: $eventId,
-            name: $name,
-            description: $description,
-            eventTypeId: $eventTypeId,
-            zoneId: $zoneId,
-            date: $date,
-            priority: $priority,
-            status: $status
-          ) {
-            success
-            message
-            event {
-              id
-              name
-              status
-            }
-          }
-        }
-        """
-        
         variables = {"eventId": event_id, **kwargs}
         
         try:
             logger.info(f"GraphQL Mutation: updateEvent(id={event_id})")
-            result = await self._execute_query(mutation, variables)
+            result = await self._execute_query(documents.UPDATE_EVENT, variables)
             logger.info(f"GraphQL Response: event {event_id} updated")
             return result.get("updateEvent", {})
         except Exception as e:
@@ -317,19 +279,17 @@ class UrbanEventsGraphQLClient:
     
     async def delete_event(self, event_id: str) -> Dict[str, Any]:
         """Supprime un événement"""
-        mutation = """
-        mutation DeleteEvent($eventId: String!) {
-          deleteEvent(eventId: $eventId) {
-            success
-            message
-          }
-        }
-        """
-        
         try:
             logger.info(f"GraphQL Mutation: deleteEvent(id={event_id})")
-            result = await self._execute_query(mutation, {"eventId": event_id})
+            result = await self._execute_query(documents.DELETE_EVENT, {"eventId": event_id})
             logger.info(f"GraphQL Response: event {event_id} deleted")
             return result.get("deleteEvent", {})
         except Exception as e:
-            raise handle_graphql_error(e, "urban-events-graphql")
\ No newline at end of file
+            raise handle_graphql_error(e, "urban-events-graphql")    
+    async def health_check(self) -> bool:
+        """Vérifie la santé du service GraphQL (requête `__typename`, sans resolver)"""
+        try:
+            await self._execute_one(documents.HEALTH.request())
+            return True
+        except:
+            return False
@@ -0,0 +1,292 @@
+"""
+Documents GraphQL du service Événements Urbains.
+
+Chaque document est parsé une seule fois à l'import, validé contre le schéma
+versionné (`URBAN_EVENTS_GRAPHQL_SCHEMA`, exporté depuis le service) et
+pré-imprimé : une requête ne coûte plus qu'un POST HTTP, sans introspection,
+parsing ni `print_ast` à chaque appel.
+"""
+import os
+from typing import Any, Dict, Optional
+from gql import GraphQLRequest
+from graphql import OperationType, build_schema, parse, print_ast, validate
+from  config import settings
+from  utils import logger
+
+class PreparedDocument:
+    """Document GraphQL parsé, validé et imprimé une fois pour toutes"""
+
+    def __init__(self, source: str):
+        self.document = parse(source)
+        self.query = print_ast(self.document)
+        operation = self.document.definitions[0]
+        self.operation_name = operation.name.value if operation.name else None
+        self.is_mutation = operation.operation == OperationType.MUTATION
+
+    def request(self, variables: Optional[Dict[str, Any]] = None) -> GraphQLRequest:
+        return PreparedRequest(self, variables)
+
+class PreparedRequest(GraphQLRequest):
+    """GraphQLRequest dont le payload réutilise la requête pré-imprimée"""
+
+    def __init__(self, prepared: PreparedDocument, variables: Optional[Dict[str, Any]] = None):
+        super().__init__(prepared.document, variable_values=variables or None)
+        self.prepared = prepared
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"query": self.prepared.query}
+        if self.variable_values:
+            payload["variables"] = self.variable_values
+        return payload
+
+# Sonde de santé : aucun resolver exécuté côté service
+HEALTH = PreparedDocument("""
+query Health {
+  __typename
+}
+""")
+
+ZONES = PreparedDocument("""
+query Zones {
+  zones {
+    id
+    name
+    description
+  }
+}
+""")
+
+ZONE = PreparedDocument("""
+query GetZone($zoneId: String!) {
+  zone(zoneId: $zoneId) {
+    id
+    name
+    description
+  }
+}
+""")
+
+EVENT_TYPES = PreparedDocument("""
+query EventTypes {
+  eventTypes {
+    id
+    name
+    description
+  }
+}
+""")
+
+EVENTS = PreparedDocument("""
+query GetEvents(
+  $eventTypeId: String,
+  $zoneId: String,
+  $status: String,
+  $priority: String,
+  $dateFrom: String,
+  $dateTo: String
+) {
+  events(
+    eventTypeId: $eventTypeId,
+    zoneId: $zoneId,
+    status: $status,
+    priority: $priority,
+    dateFrom: $dateFrom,
+    dateTo: $dateTo
+  ) {
+    id
+    name
+    description
+    eventTypeId
+    zoneId
+    date
+    priority
+    status
+    createdAt
+    updatedAt
+    eventType {
+      id
+      name
+      description
+    }
+    zone {
+      id
+      name
+      description
+    }
+  }
+}
+""")
+
+# Même sélection que EVENTS, lue page par page pour les réponses en flux
+EVENTS_PAGE = PreparedDocument("""
+query GetEventsPage(
+  $eventTypeId: String,
+  $zoneId: String,
+  $status: String,
+  $priority: String,
+  $dateFrom: String,
+  $dateTo: String,
+  $limit: Int!,
+  $offset: Int!
+) {
+  events(
+    eventTypeId: $eventTypeId,
+    zoneId: $zoneId,
+    status: $status,
+    priority: $priority,
+    dateFrom: $dateFrom,
+    dateTo: $dateTo,
+    limit: $limit,
+    offset: $offset
+  ) {
+    id
+    name
+    description
+    eventTypeId
+    zoneId
+    date
+    priority
+    status
+    createdAt
+    updatedAt
+    eventType {
+      id
+      name
+      description
+    }
+    zone {
+      id
+      name
+      description
+    }
+  }
+}
+""")
+
+EVENT = PreparedDocument("""
+query GetEvent($eventId: String!) {
+  event(eventId: $eventId) {
+    id
+    name
+    description
+    eventTypeId
+    zoneId
+    date
+    priority
+    status
+    createdAt
+    updatedAt
+    eventType {
+      id
+      name
+      description
+    }
+    zone {
+      id
+      name
+      description
+    }
+  }
+}
+""")
+
+CREATE_EVENT = PreparedDocument("""
+mutation CreateEvent(
+  $name: String!,
+  $description: String!,
+  $eventTypeId: String!,
+  $zoneId: String!,
+  $date: String!,
+  $priority: String!,
+  $status: String
+) {
+  createEvent(
+    name: $name,
+    description: $description,
+    eventTypeId: $eventTypeId,
+    zoneId: $zoneId,
+    date: $date,
+    priority: $priority,
+    status: $status
+  ) {
+    success
+    message
+    event {
+      id
+      name
+      description
+      priority
+      status
+    }
+  }
+}
+""")
+
+UPDATE_EVENT = PreparedDocument("""
+mutation UpdateEvent(
+  $eventId: String!,
+  $name: String,
+  $description: String,
+  $eventTypeId: String,
+  $zoneId: String,
+  $date: String,
+  $priority: String,
+  $status: String
+) {
+  updateEvent(
+    eventId: $eventId,
+    name: $name,
+    description: $description,
+    eventTypeId: $eventTypeId,
+    zoneId: $zoneId,
+    date: $date,
+    priority: $priority,
+    status: $status
+  ) {
+    success
+    message
+    event {
+      id
+      name
+      status
+    }
+  }
+}
+""")
+
+DELETE_EVENT = PreparedDocument("""
+mutation DeleteEvent($eventId: String!) {
+  deleteEvent(eventId: $eventId) {
+    success
+    message
+  }
+}
+""")
+
+DOCUMENTS = [HEALTH, ZONES, ZONE, EVENT_TYPES, EVENTS, EVENTS_PAGE, EVENT, CREATE_EVENT, UPDATE_EVENT, DELETE_EVENT]
+
+def validate_documents(schema_path: str):
+    """
+    Valide tous les documents contre le schéma SDL versionné.
+
+    Raises:
+        ValueError: si un document ne correspond plus au schéma du service
+    """
+    with open(schema_path, "r", encoding="utf-8") as f:
+        schema = build_schema(f.read())
+    for prepared in DOCUMENTS:
+        errors = validate(schema, prepared.document)
+        if errors:
+            raise ValueError(
+                f"Document GraphQL {prepared.operation_name} invalide: "
+                + "; ".join(error.message for error in errors)
+            )
+
+if os.path.exists(settings.URBAN_EVENTS_GRAPHQL_SCHEMA):
+    validate_documents(settings.URBAN_EVENTS_GRAPHQL_SCHEMA)
+else:
+    logger.warning(
+        f"GraphQL schema {settings.URBAN_EVENTS_GRAPHQL_SCHEMA} not found, "
+        "documents parsed but not validated"
+    )
@@ -1,8 +1,11 @@
 """Client gRPC pour le service Urgences"""
+import asyncio
+import json
 import grpc
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 from  config import settings
-from  utils import logger, handle_grpc_error, ServiceError
+from  utils import logger, handle_grpc_error, ServiceError, SingleFlight, UpstreamGuard, RetryEngine
+from  utils.tracing import grpc_metadata
 
 # Import des fichiers proto générés
 try:
@@ -11,6 +14,40 @@ except ImportError:
     logger.error("Fichiers proto non trouvés. Exécutez la génération des stubs gRPC.")
     raise
 
+# RPC idempotents rejoués par le channel lui-même (politique de service-config)
+RETRYABLE_METHODS = ["GetActiveAlerts", "GetActiveAlertsBatch", "GetAlertHistory", "HealthCheck"]
+
+def build_channel_options() -> List[Tuple[str, Any]]:
+    """Options du channel partagé : keepalive HTTP/2 et politique de retry"""
+    service_config = {
+        "methodConfig": [{
+            "name": [
+                {"service": "emergency.EmergencyAlertService", "method": method}
+                for method in RETRYABLE_METHODS
+            ],
+            "retryPolicy": {
+                "maxAttempts": settings.GRPC_RETRY_MAX_ATTEMPTS,
+                "initialBackoff": f"{settings.GRPC_RETRY_INITIAL_BACKOFF}s",
+                "maxBackoff": f"{settings.GRPC_RETRY_MAX_BACKOFF}s",
+                "backoffMultiplier": 2,
+                "retryableStatusCodes": ["UNAVAILABLE"]
+            }
+        }],
+        # Budget de relances du channel : plus de relances si trop d'échecs récents
+        "retryThrottling": {
+            "maxTokens": settings.GRPC_RETRY_THROTTLE_MAX_TOKENS,
+            "tokenRatio": settings.GRPC_RETRY_THROTTLE_TOKEN_RATIO
+        }
+    }
+    return [
+        ("grpc.keepalive_time_ms", settings.GRPC_KEEPALIVE_TIME_MS),
+        ("grpc.keepalive_timeout_ms", settings.GRPC_KEEPALIVE_TIMEOUT_MS),
+        ("grpc.keepalive_permit_without_calls", 1),
+        ("grpc.http2.max_pings_without_data", 0),
+        ("grpc.enable_retries", 1),
+        ("grpc.service_config", json.dumps(service_config))
+    ]
+
 class EmergencyGrpcClient:
     """Client gRPC pour interroger le service Urgences"""
     
@@ -20,16 +57,59 @@ class EmergencyGrpcClient:
         self.timeout = settings.GRPC_TIMEOUT
         self.address = f"{self.host}:{self.port}"
         
-        # Création du channel gRPC
-        self.channel = grpc.aio.insecure_channel(self.address)
+        # Channel unique par worker : keepalive et retry des RPC idempotents
+        self.channel = grpc.aio.insecure_channel(self.address, options=build_channel_options())
         self.stub = emergency_pb2_grpc.EmergencyAlertServiceStub(self.channel)
         
+        # Lectures identiques simultanées regroupées (clé : requête sérialisée)
+        self.flights = SingleFlight("emergency")
+        
+        # Disjoncteur et limite de concurrence du service Urgences
+        self.guard = UpstreamGuard("emergency-grpc")
+        
+        # Hedging seul : les relances sont faites par le channel (service-config)
+        self.retries = RetryEngine("emergency-grpc", max_retries=0)
+        
         logger.info(f"gRPC Client initialized: {self.address}")
     
     async def close(self):
         """Ferme le channel gRPC"""
         await self.channel.close()
     
+    async def wait_until_ready(self, timeout: float) -> bool:
+        """Attend que le channel soit connecté (au démarrage du worker)"""
+        try:
+            await asyncio.wait_for(self.channel.channel_ready(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+    
+    def _ensure_available(self):
+        """
+        Échec immédiat tant que le channel est en TRANSIENT_FAILURE.
+
+        Le channel continue de se reconnecter en arrière-plan ; inutile de
+        mobiliser une requête jusqu'à son délai pendant ce temps.
+        """
+        state = self.channel.get_state(try_to_connect=True)
+        if state == grpc.ChannelConnectivity.TRANSIENT_FAILURE:
+            raise ServiceError(
+                service="emergency-grpc",
+                message=f"Service Urgences injoignable ({self.address})",
+                status_code=503
+            )
+    
+    async def _read(self, method: str, request) -> Any:
+        """Appel unaire de lecture, partagé entre appelants identiques"""
+        self._ensure_available()
+        key = (method, request.SerializeToString(deterministic=True))
+        return await self.flights.do(key, lambda: self.retries.run(lambda: self._call(method, request)))
+    
+    async def _call(self, method: str, request) -> Any:
+        """Appel unaire protégé par le disjoncteur et le limiteur"""
+        rpc = getattr(self.stub, method)
+        return await self.guard.call(lambda: rpc(request, timeout=self.timeout, metadata=grpc_metadata()), method)
+    
     def _alert_to_dict(self, alert: emergency_pb2.AlertResponse) -> Dict[str, Any]:
         """Convertit un message gRPC AlertResponse en dictionnaire"""
         return {
@@ -87,7 +167,8 @@ class EmergencyGrpcClient:
                 affected_people=affected_people
             )
             
-            response = await self.stub.CreateAlert(request, timeout=self.timeout)
+            self._ensure_available()
+            response = await self._call("CreateAlert", request)
             result = self._alert_to_dict(response)
             
             logger.info(f"gRPC Response: Alert created {response.alert_id}")
@@ -114,7 +195,7 @@ class EmergencyGrpcClient:
             if min_priority:
                 request.min_priority = getattr(emergency_pb2.Priority, min_priority)
             
-            response = await self.stub.GetActiveAlerts(request, timeout=self.timeout)
+            response = await self._read("GetActiveAlerts", request)
             
             alerts = [self._alert_to_dict(alert) for alert in response.alerts]
             
@@ -125,6 +206,38 @@ class EmergencyGrpcClient:
             logger.error(f"gRPC Error in GetActiveAlerts: {e.details()}")
             raise handle_grpc_error(e, "emergency-grpc")
     
+    async def get_active_alerts_batch(
+        self,
+        zones: List[str],
+        alert_type: Optional[str] = None,
+        min_priority: Optional[str] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Récupère les alertes actives de plusieurs zones en un seul appel"""
+        try:
+            logger.info(f"gRPC Request: GetActiveAlertsBatch(zones={zones})")
+            
+            # Zones dédoublonnées et triées : clé single-flight stable
+            request = emergency_pb2.MultiZoneRequest(zones=sorted(set(zones)))
+            
+            if alert_type:
+                request.type = getattr(emergency_pb2.AlertType, alert_type)
+            if min_priority:
+                request.min_priority = getattr(emergency_pb2.Priority, min_priority)
+            
+            response = await self._read("GetActiveAlertsBatch", request)
+            
+            result = {
+                zone: [self._alert_to_dict(alert) for alert in response.zones[zone].alerts]
+                for zone in request.zones
+            }
+            
+            logger.info(f"gRPC Response: {response.total_count} active alerts in {len(result)} zones")
+            return result
+            
+        except grpc.RpcError as e:
+            logger.error(f"gRPC Error in GetActiveAlertsBatch: {e.details()}")
+            raise handle_grpc_error(e, "emergency-grpc")
+    
     async def update_alert_status(
         self,
         alert_id: str,
@@ -143,7 +256,8 @@ class EmergencyGrpcClient:
                 notes=notes
             )
             
-            response = await self.stub.UpdateAlertStatus(request, timeout=self.timeout)
+            self._ensure_available()
+            response = await self._call("UpdateAlertStatus", request)
             result = self._alert_to_dict(response)
             
             logger.info(f"gRPC Response: Alert {alert_id} updated")
@@ -165,18 +279,8 @@ class EmergencyGrpcClient:
         try:
             logger.info(f"gRPC Request: GetAlertHistory(zone={zone})")
             
-            request = emergency_pb2.HistoryRequest(limit=limit)
-            
-            if zone:
-                request.zone = zone
-            if alert_type:
-                request.type = getattr(emergency_pb2.AlertType, alert_type)
-            if start_date:
-                request.start_date = start_date
-            if end_date:
-                request.end_date = end_date
-            
-            response = await self.stub.GetAlertHistory(request, timeout=self.timeout)
+            request = self._history_request(zone, alert_type, start_date, end_date, limit)
+            response = await self._read("GetAlertHistory", request)
             
             alerts = [self._alert_to_dict(alert) for alert in response.alerts]
             
@@ -193,11 +297,105 @@ class EmergencyGrpcClient:
             logger.error(f"gRPC Error in GetAlertHistory: {e.details()}")
             raise handle_grpc_error(e, "emergency-grpc")
     
+    def _history_request(
+        self,
+        zone: Optional[str],
+        alert_type: Optional[str],
+        start_date: Optional[int],
+        end_date: Optional[int],
+        limit: int
+    ) -> emergency_pb2.HistoryRequest:
+        request = emergency_pb2.HistoryRequest(limit=limit)
+        if zone:
+            request.zone = zone
+        if alert_type:
+            request.type = getattr(emergency_pb2.AlertType, alert_type)
+        if start_date:
+            request.start_date = start_date
+        if end_date:
+            request.end_date = end_date
+        return request
+    
+    async def stream_alert_history(
+        self,
+        zone: Optional[str] = None,
+        alert_type: Optional[str] = None,
+        start_date: Optional[int] = None,
+        end_date: Optional[int] = None,
+        limit: int = 100
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Historique des alertes, une alerte à la fois (RPC StreamAlertHistory).
+        
+        Chaque message est converti et rendu dès sa réception : la mémoire
+        utilisée ne dépend pas de `limit`.
+        """
+        logger.info(f"gRPC Request: StreamAlertHistory(zone={zone}, limit={limit})")
+        self._ensure_available()
+        request = self._history_request(zone, alert_type, start_date, end_date, limit)
+        
+        async def open_stream(client_span):
+            call = self.stub.StreamAlertHistory(
+                request,
+                timeout=settings.STREAM_TIMEOUT,
+                metadata=grpc_metadata(client_span)
+            )
+            try:
+                async for alert in call:
+                    yield self._alert_to_dict(alert)
+            finally:
+                # Client HTTP parti : le serveur arrête de produire
+                call.cancel()
+        
+        try:
+            async for alert in self.guard.stream(open_stream, "StreamAlertHistory"):
+                yield alert
+        except grpc.RpcError as e:
+            logger.error(f"gRPC Error in StreamAlertHistory: {e.details()}")
+            raise handle_grpc_error(e, "emergency-grpc")
+    
+    async def subscribe_alerts(
+        self,
+        zones: List[str],
+        alert_types: Optional[List[str]] = None,
+        min_priority: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Alertes des zones au fil de l'eau (RPC SubscribeAlerts).
+        
+        Le service envoie d'abord les alertes actives correspondantes, puis
+        chaque création ou mise à jour. Le flux n'a pas de délai : il reste
+        ouvert jusqu'à l'annulation de l'itération.
+        """
+        logger.info(f"gRPC Request: SubscribeAlerts(zones={zones}, types={alert_types}, min_priority={min_priority})")
+        self._ensure_available()
+        request = emergency_pb2.SubscribeRequest(zones=zones)
+        for alert_type in alert_types or []:
+            request.types.append(getattr(emergency_pb2.AlertType, alert_type))
+        if min_priority:
+            request.min_priority = getattr(emergency_pb2.Priority, min_priority)
+        
+        async def open_stream(client_span):
+            call = self.stub.SubscribeAlerts(request, metadata=grpc_metadata(client_span))
+            try:
+                async for alert in call:
+                    yield self._alert_to_dict(alert)
+            finally:
+                call.cancel()
+        
+        try:
+            async for alert in self.guard.stream(open_stream, "SubscribeAlerts"):
+                yield alert
+        except grpc.RpcError as e:
+            logger.error(f"gRPC Error in SubscribeAlerts: {e.details()}")
+            raise handle_grpc_error(e, "emergency-grpc")
+    
     async def health_check(self) -> bool:
         """Vérifie la santé du service gRPC"""
         try:
+            self._ensure_available()
             request = emergency_pb2.HealthCheckRequest()
-            await self.stub.HealthCheck(request, timeout=5)
+            await self.guard.call(lambda: self.stub.HealthCheck(request, timeout=5), "HealthCheck")
             return True
         except:
             return False
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""Sondes de santé des services upstream, exécutées en arrière-plan"""
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+from  config import settings
+from  utils import logger
+from  utils.metrics import UPSTREAM_HEALTHY
+
+@dataclass
+class ProbeResult:
+    """Résultat d'une sonde de santé"""
+    healthy: bool
+    latency_ms: float
+    checked_at: float
+    error: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "latency_ms": round(self.latency_ms, 2),
+            "checked_at": self.checked_at,
+            "error": self.error
+        }
+
+class HealthProber:
+    """
+    Santé des 4 services, sondée hors du chemin des requêtes.
+
+    Chaque service a sa propre tâche : une sonde toutes les
+    `HEALTH_PROBE_INTERVAL` secondes, bornée à `HEALTH_PROBE_TIMEOUT`, si bien
+    qu'un service lent ne retarde pas les autres. Les
+    `HEALTH_PROBE_HISTORY` derniers résultats (état, latence) sont conservés.
+    `/smart-city/health` lit le dernier résultat au lieu de sonder : les
+    interrogations du load balancer ne génèrent plus d'appels upstream.
+    """
+
+    def __init__(self, checks: Dict[str, Callable[[], Awaitable[bool]]]):
+        self.checks = checks
+        self.history: Dict[str, Deque[ProbeResult]] = {
+            name: deque(maxlen=settings.HEALTH_PROBE_HISTORY) for name in checks
+        }
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        """Lance une boucle de sondes par service (première sonde immédiate)"""
+        self._tasks = [asyncio.create_task(self._probe_loop(name)) for name in self.checks]
+
+    async def _probe_loop(self, name: str):
+        while True:
+            await self.probe(name)
+            await asyncio.sleep(settings.HEALTH_PROBE_INTERVAL)
+
+    async def probe(self, name: str) -> ProbeResult:
+        """Sonde un service et enregistre le résultat"""
+        started = time.perf_counter()
+        error = None
+        try:
+            healthy = await asyncio.wait_for(self.checks[name](), settings.HEALTH_PROBE_TIMEOUT)
+            if not healthy:
+                error = "health check failed"
+        except asyncio.TimeoutError:
+            healthy, error = False, f"no answer within {settings.HEALTH_PROBE_TIMEOUT}s"
+        except Exception as e:
+            healthy, error = False, str(getattr(e, "message", e))
+
+        result = ProbeResult(healthy, (time.perf_counter() - started) * 1000, time.time(), error)
+        previous = self.latest(name)
+        if previous is not None and previous.healthy != healthy:
+            logger.warning(f"Health: {name} is now {'healthy' if healthy else 'unhealthy'}" + (f" ({error})" if error else ""))
+        self.history[name].append(result)
+        UPSTREAM_HEALTHY.labels(name).set(1 if healthy else 0)
+        return result
+
+    async def probe_all(self) -> Dict[str, ProbeResult]:
+        """Sonde tous les services en parallèle"""
+        results = await asyncio.gather(*(self.probe(name) for name in self.checks))
+        return dict(zip(self.checks, results))
+
+    def latest(self, name: str) -> Optional[ProbeResult]:
+        history = self.history[name]
+        return history[-1] if history else None
+
+    def report(self) -> Dict[str, Any]:
+        """Par service : dernier résultat, son âge et l'historique récent"""
+        now = time.time()
+        report = {}
+        for name, history in self.history.items():
+            latest = history[-1] if history else None
+            report[name] = {
+                **(latest.as_dict() if latest else {"healthy": False, "checked_at": None, "error": "not probed yet"}),
+                "age_seconds": round(now - latest.checked_at, 1) if latest else None,
+                "success_ratio": round(sum(result.healthy for result in history) / len(history), 3) if history else None,
+                "history": [
+                    {"healthy": result.healthy, "latency_ms": round(result.latency_ms, 2), "checked_at": result.checked_at}
+                    for result in history
+                ]
+            }
+        return report
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,211 @@
+"""Registre des clients upstream partagés par le processus Gateway"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Any, List, Optional
+from fastapi import Request
+from  config import settings
+from  utils import logger, ServiceError, SubscriptionHub, Subscription
+from .rest_client import MobilityRestClient
+from .soap_client import AirQualitySoapClient
+from .grpc_client import EmergencyGrpcClient
+from .graphql_client import UrbanEventsGraphQLClient
+from .city_state import CityStateMaterializer
+from .health_prober import HealthProber
+
+# Revalidation plus rapprochée tant que le client SOAP tourne sur le seed embarqué
+WSDL_SEED_RETRY_INTERVAL = 30
+
+# Statuts pour lesquels une alerte fait partie de l'état rejoué aux nouveaux abonnés
+LIVE_ALERT_STATUSES = {"PENDING", "IN_PROGRESS"}
+
+class ClientRegistry:
+    """
+    Clients upstream longue durée, créés une seule fois par worker.
+
+    Le registre est construit dans `main.lifespan` et fermé à l'arrêt :
+    les routers réutilisent le même pool httpx, le même channel gRPC,
+    la même session aiohttp et le WSDL déjà parsé.
+    """
+
+    def __init__(self):
+        self.mobility: Optional[MobilityRestClient] = None
+        self.emergency: Optional[EmergencyGrpcClient] = None
+        self.urban_events: Optional[UrbanEventsGraphQLClient] = None
+        self._air_quality: Optional[AirQualitySoapClient] = None
+        self._air_quality_lock = asyncio.Lock()
+        self._wsdl_refresh_task: Optional[asyncio.Task] = None
+        self.alert_subscriptions: Optional[SubscriptionHub] = None
+        self.city_state: Optional[CityStateMaterializer] = None
+        self.health: Optional[HealthProber] = None
+
+    async def start(self):
+        """Crée les clients partagés"""
+        self.mobility = MobilityRestClient()
+        self.emergency = EmergencyGrpcClient()
+        self.urban_events = UrbanEventsGraphQLClient()
+        
+        # Un flux SubscribeAlerts par filtre distinct, partagé par les navigateurs
+        self.alert_subscriptions = SubscriptionHub(
+            "emergency_alerts",
+            open_stream=lambda key: self.emergency.subscribe_alerts(list(key[0]), list(key[1]), key[2]),
+            event="alert",
+            buffer=settings.SUBSCRIPTION_CLIENT_BUFFER,
+            item_key=lambda alert: alert["alert_id"],
+            is_live=lambda alert: alert["status"] in LIVE_ALERT_STATUSES,
+            max_reconnect_delay=settings.SUBSCRIPTION_MAX_RECONNECT_DELAY
+        )
+
+        # Connexion HTTP/2 établie avant la première requête
+        if not await self.emergency.wait_until_ready(settings.GRPC_READY_TIMEOUT):
+            logger.warning(f"gRPC channel not ready after {settings.GRPC_READY_TIMEOUT}s, requests will fail fast until it connects")
+
+        # Le WSDL peut être indisponible au démarrage : nouvel essai au premier appel
+        try:
+            await self.get_air_quality()
+        except ServiceError as e:
+            logger.warning(f"SOAP client not ready at startup: {e.message}")
+
+        self._wsdl_refresh_task = asyncio.create_task(self._refresh_wsdl_loop())
+
+        # Instantané lu en arrière-plan : plan-trip et les routes par zone n'attendent plus les upstreams
+        if settings.CITY_STATE_ENABLED:
+            self.city_state = CityStateMaterializer(self, settings.CITY_STATE_ZONES.split(","))
+            await self.city_state.start()
+
+        # Sondes de santé en arrière-plan : /smart-city/health lit le dernier résultat
+        self.health = HealthProber(self.health_checks())
+        await self.health.start()
+
+        logger.info("✅ Upstream client registry started")
+
+    async def get_air_quality(self) -> AirQualitySoapClient:
+        """Retourne le client SOAP, en le créant si nécessaire"""
+        if self._air_quality is None:
+            async with self._air_quality_lock:
+                if self._air_quality is None:
+                    # Téléchargement et parsing du WSDL hors de la boucle d'événements
+                    self._air_quality = await asyncio.to_thread(AirQualitySoapClient)
+        return self._air_quality
+
+    def health_checks(self) -> Dict[str, Callable[[], Awaitable[bool]]]:
+        """Sonde de santé de chaque service, indexée comme dans le workflow Smart City"""
+        async def air_quality() -> bool:
+            # Le WSDL peut encore manquer : son échec est le résultat de la sonde
+            client = await self.get_air_quality()
+            return await client.health_check()
+
+        return {
+            "mobility": self.mobility.health_check,
+            "air_quality": air_quality,
+            "emergency": self.emergency.health_check,
+            "urban_events": self.urban_events.health_check
+        }
+
+    async def _refresh_wsdl_loop(self):
+        """Revalide le WSDL en arrière-plan, sans bloquer les requêtes"""
+        while True:
+            interval = settings.WSDL_REFRESH_INTERVAL
+            if self._air_quality is None or self._air_quality.using_seed:
+                interval = min(interval, WSDL_SEED_RETRY_INTERVAL)
+            await asyncio.sleep(interval)
+
+            try:
+                if self._air_quality is None:
+                    await self.get_air_quality()
+                else:
+                    await asyncio.to_thread(self._air_quality.refresh_wsdl)
+            except Exception as e:
+                logger.warning(f"WSDL revalidation failed, keeping cached version: {str(e)}")
+
+    async def all(self) -> Dict[str, Any]:
+        """Retourne tous les clients, indexés comme dans le workflow Smart City"""
+        return {
+            "mobility": self.mobility,
+            "air_quality": await self.get_air_quality(),
+            "emergency": self.emergency,
+            "urban_events": self.urban_events
+        }
+
+    def _created(self) -> Dict[str, Any]:
+        """Clients déjà créés (le client SOAP peut manquer si le WSDL est indisponible)"""
+        clients = {
+            "mobility": self.mobility,
+            "air_quality": self._air_quality,
+            "emergency": self.emergency,
+            "urban_events": self.urban_events
+        }
+        return {name: client for name, client in clients.items() if client is not None}
+
+    def coalescing_stats(self) -> Dict[str, Any]:
+        """Statistiques single-flight de chaque client déjà créé"""
+        return {name: client.flights.stats() for name, client in self._created().items()}
+    
+    def upstream_stats(self) -> Dict[str, Any]:
+        """État du disjoncteur et limite de concurrence de chaque client déjà créé"""
+        return {name: client.guard.stats() for name, client in self._created().items()}
+    
+    def retry_stats(self) -> Dict[str, Any]:
+        """Relances, hedging et budget de chaque client déjà créé"""
+        return {name: client.retries.stats() for name, client in self._created().items()}
+    
+    def subscribe_alerts(
+        self,
+        zones: List[str],
+        alert_types: Optional[List[str]] = None,
+        min_priority: Optional[str] = None
+    ) -> Subscription:
+        """Abonnement aux alertes ; les filtres équivalents partagent le même flux gRPC"""
+        key = (tuple(sorted(set(zones))), tuple(sorted(set(alert_types or []))), min_priority)
+        return self.alert_subscriptions.subscribe(key)
+    
+    def subscription_stats(self) -> Dict[str, Any]:
+        """Flux upstream et clients des abonnements temps réel"""
+        if self.alert_subscriptions is None:
+            return {}
+        return self.alert_subscriptions.stats()
+    
+    def city_state_stats(self) -> Dict[str, Any]:
+        """Zones suivies et lectures de l'instantané de l'état de la ville"""
+        if self.city_state is None:
+            return {}
+        return self.city_state.stats()
+    
+    def batching_stats(self) -> Dict[str, Any]:
+        """Statistiques de mise en lot des requêtes GraphQL"""
+        if self.urban_events is None:
+            return {}
+        return self.urban_events.batcher.stats()
+
+    async def close(self):
+        """Ferme proprement toutes les connexions"""
+        if self._wsdl_refresh_task is not None:
+            self._wsdl_refresh_task.cancel()
+            try:
+                await self._wsdl_refresh_task
+            except asyncio.CancelledError:
+                pass
+
+        if self.health is not None:
+            await self.health.close()
+
+        # L'instantané est lui-même abonné aux alertes : arrêté avant le hub
+        if self.city_state is not None:
+            await self.city_state.close()
+
+        # Les abonnés sont prévenus avant la fermeture du channel gRPC
+        if self.alert_subscriptions is not None:
+            await self.alert_subscriptions.close()
+
+        clients = [self.mobility, self._air_quality, self.emergency, self.urban_events]
+        for client in clients:
+            if client is None:
+                continue
+            try:
+                await client.close()
+            except Exception as e:
+                logger.warning(f"Error closing {type(client).__name__}: {str(e)}")
+
+        logger.info("🔌 Upstream client registry closed")
+
+def get_registry(request: Request) -> ClientRegistry:
+    """Dependency FastAPI : registre attaché à l'application"""
+    return request.app.state.clients
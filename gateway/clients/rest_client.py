@@ -2,7 +2,8 @@
 import httpx
 from typing import Dict, Any, Optional, List
 from  config import settings
-from  utils import logger, handle_rest_error, ServiceError
+from  utils import logger, handle_rest_error, ServiceError, SingleFlight, UpstreamGuard, RetryEngine
+from  utils.tracing import inject
 
 class MobilityRestClient:
     """Client REST pour interroger le service Mobilité"""
@@ -12,8 +13,19 @@ class MobilityRestClient:
         self.timeout = settings.REST_TIMEOUT
         self.client = httpx.AsyncClient(
             timeout=httpx.Timeout(self.timeout),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+            ),
             follow_redirects=True
         )
+        # Lectures identiques simultanées regroupées en un seul appel
+        self.flights = SingleFlight("mobility")
+        # Disjoncteur et limite de concurrence du service Mobilité
+        self.guard = UpstreamGuard("mobility-service")
+        # Relances et hedging des lectures (GET)
+        self.retries = RetryEngine("mobility-service")
     
     async def close(self):
         """Ferme le client HTTP"""
@@ -26,11 +38,27 @@ class MobilityRestClient:
         **kwargs
     ) -> Dict[str, Any]:
         """Effectue une requête HTTP générique"""
+        # Libellé de métrique borné : premier segment du chemin (/lignes/42 -> GET /lignes)
+        operation = f"{method} /{endpoint.strip('/').split('/')[0]}"
+        if method == "GET":
+            key = (method, endpoint, repr(sorted(kwargs.items())))
+            return await self.flights.do(key, lambda: self.retries.run(
+                lambda: self.guard.call(lambda: self._send(method, endpoint, **kwargs), operation)
+            ))
+        return await self.guard.call(lambda: self._send(method, endpoint, **kwargs), operation)
+    
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Envoie la requête HTTP et décode la réponse JSON"""
         url = f"{self.base_url}{endpoint}"
         
         try:
             logger.info(f"REST Request: {method} {url}")
-            response = await self.client.request(method, url, **kwargs)
+            response = await self.client.request(method, url, headers=inject(), **kwargs)
             response.raise_for_status()
             
             data = response.json()
@@ -1,40 +1,96 @@
 """Client SOAP pour le service Qualité de l'Air"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from lxml import etree
 from zeep import Client, Settings
+from zeep.exceptions import Fault
+from zeep.helpers import serialize_object
 from zeep.transports import Transport
 from requests import Session
-from typing import Dict, Any, List, Optional
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, AsyncIterator, List, Optional
 from datetime import datetime
 from  config import settings
-from  utils import logger, handle_soap_error, ServiceError
+from  utils import logger, handle_soap_error, ServiceError, SingleFlight, UpstreamGuard, RetryEngine
+from  utils.tracing import inject
+from .wsdl_cache import WsdlCache
+from .soap_codec import build_envelope, request_headers, decode_response, soap_datetime, HistoryStreamDecoder, SoapFault
+
+class TracingTransport(Transport):
+    """Transport zeep qui propage le traceparent du span courant"""
+    
+    def post(self, address, message, headers):
+        return super().post(address, message, inject(headers))
 
 class AirQualitySoapClient:
     """Client SOAP pour interroger le service Qualité de l'Air"""
     
-    def __init__(self):
+    def __init__(self, wsdl_cache: Optional[WsdlCache] = None):
         self.wsdl_url = settings.AIR_QUALITY_WSDL_URL
         self.service_url = settings.AIR_QUALITY_SERVICE_URL
         self.timeout = settings.SOAP_TIMEOUT
+        self.wsdl_cache = wsdl_cache or WsdlCache(
+            self.wsdl_url,
+            settings.WSDL_CACHE_DIR,
+            settings.AIR_QUALITY_WSDL_SEED
+        )
         
-        # Configuration du transport avec timeout
+        # Configuration du transport avec timeout et pool keep-alive
         session = Session()
-        session.timeout = self.timeout
-        transport = Transport(session=session)
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        self.session = session
+        self.transport = TracingTransport(
+            session=session,
+            timeout=self.timeout,
+            operation_timeout=self.timeout
+        )
+        
+        # zeep est synchrone : les appels passent par un executor dédié et borné
+        # pour ne jamais bloquer la boucle d'événements uvicorn
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.SOAP_MAX_CONCURRENCY,
+            thread_name_prefix="soap"
+        )
+        self._semaphore = asyncio.Semaphore(settings.SOAP_MAX_CONCURRENCY)
+        
+        # Toutes les opérations SOAP sont des lectures : appels identiques regroupés
+        self.flights = SingleFlight("air_quality")
+        
+        # Disjoncteur et limite de concurrence (une faute SOAP est une réponse)
+        self.guard = UpstreamGuard("air-quality-soap-service", answered=(Fault, SoapFault))
+        # Toutes les opérations SOAP sont des lectures : relances et hedging
+        self.retries = RetryEngine("air-quality-soap-service", answered=(Fault, SoapFault))
+        
+        # Chemin rapide (GetAQI, GetPollutants, CompareZones) : httpx asynchrone,
+        # sans executor ni zeep
+        self.http = httpx.AsyncClient(
+            timeout=httpx.Timeout(self.timeout),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+            )
+        )
         
         # Configuration Zeep
-        zeep_settings = Settings(
+        self.zeep_settings = Settings(
             strict=False,
             xml_huge_tree=True,
             xsd_ignore_sequence_order=True
         )
         
         try:
-            self.client = Client(
-                wsdl=self.wsdl_url,
-                settings=zeep_settings,
-                transport=transport
-            )
-            self.service = self.client.service
-            logger.info(f"SOAP Client initialized with WSDL: {self.wsdl_url}")
+            # WSDL lu depuis le cache disque (ou le seed embarqué), pas à chaque instanciation
+            self._load_wsdl(self.wsdl_cache.load(self.session, self.timeout))
+            logger.info(f"SOAP Client initialized with WSDL: {self.wsdl_path}")
         except Exception as e:
             logger.error(f"Failed to initialize SOAP client: {str(e)}")
             raise ServiceError(
@@ -43,31 +99,110 @@ class AirQualitySoapClient:
                 status_code=503
             )
     
-    def _serialize_response(self, response: Any) -> Dict[str, Any]:
-        """Convertit une réponse SOAP en dictionnaire JSON"""
-        if hasattr(response, '__dict__'):
-            result = {}
-            for key, value in response.__dict__.items():
-                if isinstance(value, datetime):
-                    result[key] = value.isoformat()
-                elif hasattr(value, '__dict__'):
-                    result[key] = self._serialize_response(value)
-                elif isinstance(value, list):
-                    result[key] = [
-                        self._serialize_response(item) if hasattr(item, '__dict__') else item
-                        for item in value
-                    ]
-                else:
-                    result[key] = value
-            return result
-        return response
+    def _load_wsdl(self, wsdl_path: str):
+        """Parse un WSDL local et pointe le service vers AIR_QUALITY_SERVICE_URL"""
+        client = Client(
+            wsdl=wsdl_path,
+            settings=self.zeep_settings,
+            transport=self.transport
+        )
+        service = next(iter(client.wsdl.services.values()))
+        binding = next(iter(service.ports.values())).binding
+        
+        # Remplacement atomique : les appels en cours gardent l'ancien proxy
+        self.client = client
+        self.service = client.create_service(binding.name.text, self.service_url)
+        self.wsdl_path = wsdl_path
+    
+    @property
+    def using_seed(self) -> bool:
+        """True si le client tourne sur le WSDL embarqué"""
+        return self.wsdl_cache.is_seed(self.wsdl_path)
+    
+    def refresh_wsdl(self) -> bool:
+        """
+        Revalide le WSDL auprès du service (appel bloquant, à lancer dans un thread).
+        
+        Returns:
+            True si un nouveau WSDL a été chargé
+        """
+        wsdl_path, _ = self.wsdl_cache.fetch(self.session, self.timeout)
+        if wsdl_path != self.wsdl_path:
+            self._load_wsdl(wsdl_path)
+            logger.info(f"SOAP Client reloaded with WSDL: {wsdl_path}")
+            return True
+        return False
+    
+    async def close(self):
+        """Ferme les sessions HTTP (zeep et chemin rapide) et l'executor"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+        await self.http.aclose()
+    
+    async def _call(self, operation: str, **kwargs) -> Any:
+        """
+        Exécute une opération SOAP dans l'executor dédié.
+        
+        Le sémaphore limite les appels en vol : au-delà, les requêtes attendent
+        dans la boucle d'événements (annulables) plutôt que dans la file de l'executor.
+        """
+        key = (operation, repr(sorted(kwargs.items())))
+        return await self.flights.do(key, lambda: self.retries.run(lambda: self._run_in_executor(operation, **kwargs)))
+    
+    async def _run_in_executor(self, operation: str, **kwargs) -> Any:
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            # Latence mesurée hors attente du sémaphore ; le contexte (span courant)
+            # est copié dans le thread, run_in_executor ne le fait pas
+            return await self.guard.call(lambda: loop.run_in_executor(
+                self._executor,
+                contextvars.copy_context().run,
+                functools.partial(getattr(self.service, operation), **kwargs)
+            ), operation)
+    
+    async def _fast_call(self, operation: str, *values: Any) -> Dict[str, Any]:
+        """
+        Exécute une opération via le codec spécialisé (voir `soap_codec`).
+        
+        L'enveloppe est construite depuis un gabarit et la réponse décodée
+        directement en dictionnaire : ni WSDL, ni zeep, ni thread.
+        """
+        return await self.flights.do(
+            (operation, values),
+            lambda: self.retries.run(lambda: self.guard.call(lambda: self._post_envelope(operation, *values), operation))
+        )
+    
+    async def _post_envelope(self, operation: str, *values: Any) -> Dict[str, Any]:
+        response = await self.http.post(
+            self.service_url,
+            content=build_envelope(operation, *values),
+            headers=inject(request_headers(operation))
+        )
+        try:
+            return decode_response(operation, response.content)
+        except etree.XMLSyntaxError:
+            # Réponse non-XML (proxy, page d'erreur) : l'erreur HTTP est plus parlante
+            response.raise_for_status()
+            raise
+    
+    def _serialize_response(self, response: Any) -> Any:
+        """Convertit une réponse SOAP (objets zeep) en dictionnaire JSON"""
+        return self._to_json(serialize_object(response, dict))
+    
+    def _to_json(self, value: Any) -> Any:
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, dict):
+            return {key: self._to_json(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._to_json(item) for item in value]
+        return value
     
     async def get_aqi(self, zone: str) -> Dict[str, Any]:
         """Obtient l'indice de qualité de l'air pour une zone"""
         try:
             logger.info(f"SOAP Request: GetAQI(zone={zone})")
-            response = self.service.GetAQI(zone=zone)
-            result = self._serialize_response(response)
+            result = await self._fast_call("GetAQI", zone)
             logger.info(f"SOAP Response: AQI for {zone}")
             return result
         except Exception as e:
@@ -78,12 +213,8 @@ class AirQualitySoapClient:
         """Obtient les niveaux de polluants pour une zone"""
         try:
             logger.info(f"SOAP Request: GetPollutants(zone={zone})")
-            response = self.service.GetPollutants(zone=zone)
-            
-            if isinstance(response, list):
-                result = [self._serialize_response(item) for item in response]
-            else:
-                result = [self._serialize_response(response)]
+            # Une seule PollutantList par zone, renvoyée sous forme de liste
+            result = [await self._fast_call("GetPollutants", zone)]
             
             logger.info(f"SOAP Response: Pollutants for {zone}")
             return result
@@ -95,8 +226,7 @@ class AirQualitySoapClient:
         """Compare la qualité de l'air entre deux zones"""
         try:
             logger.info(f"SOAP Request: CompareZones({zone_a}, {zone_b})")
-            response = self.service.CompareZones(zoneA=zone_a, zoneB=zone_b)
-            result = self._serialize_response(response)
+            result = await self._fast_call("CompareZones", zone_a, zone_b)
             logger.info(f"SOAP Response: Comparison {zone_a} vs {zone_b}")
             return result
         except Exception as e:
@@ -116,7 +246,8 @@ class AirQualitySoapClient:
                 f"SOAP Request: GetHistory(zone={zone}, "
                 f"start={start_date}, end={end_date})"
             )
-            response = self.service.GetHistory(
+            response = await self._call(
+                "GetHistory",
                 zone=zone,
                 startDate=start_date,
                 endDate=end_date,
@@ -134,6 +265,55 @@ class AirQualitySoapClient:
             logger.error(f"SOAP Error in GetHistory: {str(e)}")
             raise handle_soap_error(e, "air-quality-soap-service")
     
+    async def stream_history(
+        self,
+        zone: str,
+        start_date: str,
+        end_date: str,
+        granularity: str = "daily"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Points de l'historique, rendus au fil de la lecture de la réponse SOAP.
+        
+        Le corps HTTP est lu par morceaux et décodé de façon incrémentale
+        (`HistoryStreamDecoder`) : ni l'enveloppe complète ni un graphe zeep
+        ne sont gardés en mémoire.
+        """
+        logger.info(
+            f"SOAP Request: GetHistory stream(zone={zone}, "
+            f"start={start_date}, end={end_date})"
+        )
+        content = build_envelope(
+            "GetHistory", zone, soap_datetime(start_date), soap_datetime(end_date), granularity
+        )
+        
+        async def open_stream(client_span):
+            async with self.http.stream(
+                "POST",
+                self.service_url,
+                content=content,
+                headers=inject(request_headers("GetHistory"), client_span),
+                timeout=settings.STREAM_TIMEOUT
+            ) as response:
+                decoder = HistoryStreamDecoder()
+                try:
+                    async for chunk in response.aiter_bytes():
+                        for point in decoder.feed(chunk):
+                            yield point
+                    for point in decoder.close():
+                        yield point
+                except etree.XMLSyntaxError:
+                    # Réponse non-XML (proxy, page d'erreur) : l'erreur HTTP est plus parlante
+                    response.raise_for_status()
+                    raise
+        
+        try:
+            async for point in self.guard.stream(open_stream, "GetHistory"):
+                yield point
+        except Exception as e:
+            logger.error(f"SOAP Error in GetHistory stream: {str(e)}")
+            raise handle_soap_error(e, "air-quality-soap-service")
+    
     async def filter_pollutants(
         self,
         zone: str,
@@ -144,7 +324,8 @@ class AirQualitySoapClient:
             logger.info(
                 f"SOAP Request: FilterPollutants(zone={zone}, threshold={threshold})"
             )
-            response = self.service.FilterPollutants(
+            response = await self._call(
+                "FilterPollutants",
                 zone=zone,
                 threshold=threshold
             )
@@ -163,7 +344,7 @@ class AirQualitySoapClient:
     async def health_check(self) -> bool:
         """Vérifie la santé du service SOAP"""
         try:
-            self.service.HealthCheck()
+            await self._call("HealthCheck")
             return True
         except:
             return False
\ No newline at end of file
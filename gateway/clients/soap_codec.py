@@ -0,0 +1,239 @@
+"""
+Codec SOAP spécialisé pour les opérations chaudes du service Qualité de l'Air.
+
+GetAQI, GetPollutants et CompareZones sont encodés à partir de gabarits
+d'enveloppe pré-construits et décodés par XPath lxml précompilés, directement
+en dictionnaires prêts pour la sérialisation JSON (pas de graphe d'objets zeep).
+GetHistory est lu en flux (`HistoryStreamDecoder`) pour les réponses NDJSON.
+Les autres opérations restent servies par zeep.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from xml.sax.saxutils import escape
+from lxml import etree
+
+SOAP_ENV_NS = "http://schemas.xmlsoap.org/soap/envelope/"
+SERVICE_NS = "http://smartcity.air-quality.soap"
+
+# Paramètres de chaque opération, dans l'ordre du WSDL
+FAST_OPERATIONS: Dict[str, tuple] = {
+    "GetAQI": ("zone",),
+    "GetPollutants": ("zone",),
+    "CompareZones": ("zoneA", "zoneB"),
+}
+
+# Opérations décodées au fil de l'eau plutôt qu'en une fois
+STREAMED_OPERATIONS: Dict[str, tuple] = {
+    "GetHistory": ("zone", "startDate", "endDate", "granularity"),
+}
+
+class SoapFault(Exception):
+    """Fault SOAP renvoyé par le service"""
+
+    def __init__(self, code: Optional[str], message: Optional[str]):
+        self.code = code
+        self.message = message or "SOAP Fault"
+        super().__init__(f"{code}: {self.message}" if code else self.message)
+
+def _build_template(operation: str, parameters: tuple) -> str:
+    """Enveloppe complète de l'opération, avec un `%s` par paramètre"""
+    body = "".join(f"<tns:{name}>%s</tns:{name}>" for name in parameters)
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        f'<soapenv:Envelope xmlns:soapenv="{SOAP_ENV_NS}" xmlns:tns="{SERVICE_NS}">'
+        f"<soapenv:Body><tns:{operation}>{body}</tns:{operation}></soapenv:Body>"
+        "</soapenv:Envelope>"
+    )
+
+_TEMPLATES = {
+    operation: _build_template(operation, parameters)
+    for operation, parameters in {**FAST_OPERATIONS, **STREAMED_OPERATIONS}.items()
+}
+
+_HEADERS = {
+    operation: {"Content-Type": "text/xml; charset=utf-8", "SOAPAction": f'"{operation}"'}
+    for operation in _TEMPLATES
+}
+
+def build_envelope(operation: str, *values: Any) -> bytes:
+    """Enveloppe SOAP de la requête (valeurs échappées pour le XML)"""
+    return (_TEMPLATES[operation] % tuple(escape(str(value)) for value in values)).encode("utf-8")
+
+def request_headers(operation: str) -> Dict[str, str]:
+    """En-têtes HTTP de la requête (SOAPAction déclaré par le WSDL)"""
+    return _HEADERS[operation]
+
+# Extraction indépendante des préfixes choisis par le serveur (Spyne: soap11env, tns, s0)
+_BODY_CONTENT = etree.XPath("/*[local-name()='Envelope']/*[local-name()='Body']/*[1]")
+_FAULT_CODE = etree.XPath("string(*[local-name()='faultcode'])")
+_FAULT_STRING = etree.XPath("string(*[local-name()='faultstring'])")
+
+# Parser sans résolution d'entités ni accès réseau (réponses venant du réseau)
+_PARSER = etree.XMLParser(resolve_entities=False, no_network=True, remove_blank_text=True)
+
+AQI_FIELDS: Dict[str, Callable[[str], Any]] = {
+    "zone": str,
+    "aqi": int,
+    "category": str,
+    "timestamp": str,
+    "description": str,
+}
+
+POLLUTANT_FIELDS: Dict[str, Callable[[str], Any]] = {
+    "name": str,
+    "value": float,
+    "unit": str,
+    "timestamp": str,
+    "status": str,
+}
+
+POLLUTANT_LIST_FIELDS: Dict[str, Callable[[str], Any]] = {
+    "zone": str,
+    "timestamp": str,
+}
+
+COMPARISON_FIELDS: Dict[str, Callable[[str], Any]] = {
+    "zoneA": str,
+    "zoneB": str,
+    "aqiA": int,
+    "aqiB": int,
+    "cleanest_zone": str,
+    "difference": int,
+    "recommendations": str,
+    "timestamp": str,
+}
+
+DATA_POINT_FIELDS: Dict[str, Callable[[str], Any]] = {
+    "timestamp": str,
+    "aqi": int,
+    "pm25": float,
+    "pm10": float,
+    "no2": float,
+    "co2": float,
+    "o3": float,
+    "so2": float,
+}
+
+def _local_name(element) -> str:
+    tag = element.tag
+    if not isinstance(tag, str):
+        return ""  # commentaires et instructions de traitement
+    return tag[tag.index("}") + 1:] if tag[0] == "{" else tag
+
+def _decode_fields(element, fields: Dict[str, Callable[[str], Any]]) -> Dict[str, Any]:
+    """Construit un dictionnaire à partir des enfants directs d'un élément"""
+    result = dict.fromkeys(fields)
+    for child in element:
+        name = _local_name(child)
+        convert = fields.get(name)
+        if convert is not None and child.text is not None:
+            result[name] = convert(child.text)
+    return result
+
+def _decode_aqi(element) -> Dict[str, Any]:
+    return _decode_fields(element, AQI_FIELDS)
+
+def _decode_pollutant_list(element) -> Dict[str, Any]:
+    result = _decode_fields(element, POLLUTANT_LIST_FIELDS)
+    pollutants: List[Dict[str, Any]] = []
+    for child in element:
+        if _local_name(child) == "pollutants":
+            pollutants = [_decode_fields(item, POLLUTANT_FIELDS) for item in child]
+            break
+    result["pollutants"] = pollutants
+    return result
+
+def _decode_comparison(element) -> Dict[str, Any]:
+    return _decode_fields(element, COMPARISON_FIELDS)
+
+_DECODERS = {
+    "GetAQI": _decode_aqi,
+    "GetPollutants": _decode_pollutant_list,
+    "CompareZones": _decode_comparison,
+}
+
+def decode_response(operation: str, content: bytes) -> Dict[str, Any]:
+    """
+    Décode la réponse SOAP d'une opération rapide.
+
+    Raises:
+        SoapFault: si le service a renvoyé un Fault
+        ValueError: si l'enveloppe ne contient pas de résultat
+        etree.XMLSyntaxError: si la réponse n'est pas du XML
+    """
+    root = etree.fromstring(content, _PARSER)
+    body = _BODY_CONTENT(root)
+    if not body:
+        raise ValueError(f"Réponse SOAP sans contenu pour {operation}")
+
+    response = body[0]
+    if _local_name(response) == "Fault":
+        raise SoapFault(_FAULT_CODE(response) or None, _FAULT_STRING(response) or None)
+
+    # <tns:GetAQIResponse><tns:GetAQIResult>...</tns:GetAQIResult></tns:GetAQIResponse>
+    if len(response) == 0:
+        raise ValueError(f"Réponse SOAP vide pour {operation}")
+    return _DECODERS[operation](response[0])
+
+def soap_datetime(value: str) -> str:
+    """Date ISO (YYYY-MM-DD) complétée en xs:dateTime attendu par GetHistory"""
+    return f"{value}T00:00:00" if len(value) == 10 else value
+
+class HistoryStreamDecoder:
+    """
+    Décodage incrémental d'une réponse GetHistory.
+
+    Les morceaux du corps HTTP sont passés à `feed` au fur et à mesure de leur
+    réception ; chaque DataPoint complet est rendu puis retiré de l'arbre, si
+    bien que la mémoire reste bornée quelle que soit la taille de la série.
+    """
+
+    def __init__(self):
+        self._parser = etree.XMLPullParser(
+            events=("end",), resolve_entities=False, no_network=True
+        )
+        self.count = 0
+
+    def feed(self, chunk: bytes) -> List[Dict[str, Any]]:
+        """
+        Points de données terminés dans ce morceau.
+
+        Raises:
+            SoapFault: si le service a renvoyé un Fault
+            etree.XMLSyntaxError: si la réponse n'est pas du XML
+        """
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Termine l'analyse (erreur si le document est tronqué)"""
+        self._parser.close()
+        return self._drain()
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        points: List[Dict[str, Any]] = []
+        for _, element in self._parser.read_events():
+            name = _local_name(element)
+            if name == "DataPoint":
+                points.append(_decode_fields(element, DATA_POINT_FIELDS))
+                _release(element)
+            elif name == "Fault":
+                raise SoapFault(_FAULT_CODE(element) or None, _FAULT_STRING(element) or None)
+        self.count += len(points)
+        return points
+
+def _release(element):
+    """Libère un élément traité et ses frères déjà lus"""
+    element.clear()
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
+
+def decode_history_chunks(chunks: Iterable[bytes]) -> List[Dict[str, Any]]:
+    """Décode une réponse GetHistory complète (morceau par morceau)"""
+    decoder = HistoryStreamDecoder()
+    points: List[Dict[str, Any]] = []
+    for chunk in chunks:
+        points.extend(decoder.feed(chunk))
+    points.extend(decoder.close())
+    return points
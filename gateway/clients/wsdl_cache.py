@@ -0,0 +1,133 @@
+"""Cache disque du WSDL du service Qualité de l'Air"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Optional, Tuple
+from requests import Session
+from  utils import logger
+
+class WsdlCache:
+    """
+    Cache persistant d'un document WSDL, indexé par URL et hash du contenu.
+
+    Organisation dans `cache_dir`:
+    - `<url_key>.json`: index (hash courant, ETag, Last-Modified, date de fetch)
+    - `<url_key>-<sha256>.wsdl`: contenu du WSDL pour ce hash
+
+    Les écritures passent par un fichier temporaire + `os.replace` pour
+    rester atomiques entre les workers uvicorn.
+    """
+
+    def __init__(self, url: str, cache_dir: str, seed_path: Optional[str] = None):
+        self.url = url
+        self.cache_dir = cache_dir
+        self.seed_path = seed_path
+        self.url_key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+        self.index_path = os.path.join(cache_dir, f"{self.url_key}.json")
+
+    def _read_index(self) -> dict:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _document_path(self, content_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{self.url_key}-{content_hash[:16]}.wsdl")
+
+    def _atomic_write(self, path: str, data: bytes):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @property
+    def current_hash(self) -> Optional[str]:
+        return self._read_index().get("sha256")
+
+    def age_seconds(self) -> Optional[float]:
+        """Âge de la dernière revalidation réussie"""
+        fetched_at = self._read_index().get("fetched_at")
+        return time.time() - fetched_at if fetched_at else None
+
+    def cached_path(self) -> Optional[str]:
+        """Chemin local de la dernière version en cache, s'il y en a une"""
+        content_hash = self.current_hash
+        if content_hash:
+            path = self._document_path(content_hash)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def load(self, session: Session, timeout: float) -> str:
+        """
+        Chemin local du WSDL à parser au démarrage.
+
+        Ordre: cache disque, puis téléchargement, puis seed embarqué
+        (le service reste utilisable si le WSDL est momentanément indisponible).
+        """
+        path = self.cached_path()
+        if path:
+            return path
+        try:
+            path, _ = self.fetch(session, timeout)
+            return path
+        except Exception as e:
+            if self.seed_path and os.path.exists(self.seed_path):
+                logger.warning(f"WSDL unavailable ({str(e)}), using bundled seed {self.seed_path}")
+                return self.seed_path
+            raise
+
+    def is_seed(self, path: str) -> bool:
+        return bool(self.seed_path) and os.path.abspath(path) == os.path.abspath(self.seed_path)
+
+    def fetch(self, session: Session, timeout: float) -> Tuple[str, bool]:
+        """
+        Revalide le WSDL auprès du service.
+
+        Returns:
+            (chemin local, True si le contenu a changé)
+        """
+        index = self._read_index()
+        headers = {}
+        if index.get("etag"):
+            headers["If-None-Match"] = index["etag"]
+        if index.get("last_modified"):
+            headers["If-Modified-Since"] = index["last_modified"]
+
+        response = session.get(self.url, headers=headers, timeout=timeout)
+        current_path = self._document_path(index["sha256"]) if index.get("sha256") else None
+
+        if response.status_code == 304 and current_path and os.path.exists(current_path):
+            index["fetched_at"] = time.time()
+            self._atomic_write(self.index_path, json.dumps(index).encode("utf-8"))
+            return current_path, False
+
+        response.raise_for_status()
+        content = response.content
+        content_hash = hashlib.sha256(content).hexdigest()
+        path = self._document_path(content_hash)
+        changed = content_hash != index.get("sha256") or not os.path.exists(path)
+
+        if changed:
+            self._atomic_write(path, content)
+            logger.info(f"WSDL cache updated: {self.url} (sha256={content_hash[:16]})")
+
+        index = {
+            "url": self.url,
+            "sha256": content_hash,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time()
+        }
+        # Les anciennes versions restent sur disque : un autre worker peut être en train de les lire
+        self._atomic_write(self.index_path, json.dumps(index).encode("utf-8"))
+        return path, changed
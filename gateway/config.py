@@ -29,6 +29,14 @@ class Settings(BaseSettings):
         "http://air-quality-soap-service:8000/"
     )
     
+    # Cache WSDL (disque) et seed hors-ligne
+    WSDL_CACHE_DIR: str = "cache/wsdl"
+    AIR_QUALITY_WSDL_SEED: str = "wsdl/air_quality.wsdl"
+    WSDL_REFRESH_INTERVAL: int = 300
+    
+    # Appels SOAP simultanés maximum (executor dédié, zeep est synchrone)
+    SOAP_MAX_CONCURRENCY: int = 10
+    
     # Service gRPC - Urgences
     EMERGENCY_GRPC_HOST: str = os.getenv(
         "EMERGENCY_GRPC_HOST",
@@ -36,21 +44,159 @@ class Settings(BaseSettings):
     )
     EMERGENCY_GRPC_PORT: int = int(os.getenv("EMERGENCY_GRPC_PORT", "50051"))
     
+    # Channel gRPC partagé : keepalive, retry des RPC idempotents, attente au démarrage
+    GRPC_KEEPALIVE_TIME_MS: int = 30000
+    GRPC_KEEPALIVE_TIMEOUT_MS: int = 10000
+    GRPC_RETRY_MAX_ATTEMPTS: int = 3
+    GRPC_RETRY_INITIAL_BACKOFF: float = 0.1
+    GRPC_RETRY_MAX_BACKOFF: float = 1.0
+    # retryThrottling du channel : jetons (-1 par échec, +ratio par succès),
+    # relances suspendues sous la moitié de GRPC_RETRY_THROTTLE_MAX_TOKENS
+    GRPC_RETRY_THROTTLE_MAX_TOKENS: int = 10
+    GRPC_RETRY_THROTTLE_TOKEN_RATIO: float = 0.2
+    GRPC_READY_TIMEOUT: float = 5.0
+    
     # Service GraphQL - Événements urbains
     URBAN_EVENTS_GRAPHQL_URL: str = os.getenv(
         "URBAN_EVENTS_GRAPHQL_URL",
         "http://urban-events-graphql:8004/graphql"
     )
     
+    # Schéma SDL versionné (export de services/urban-events-graphql-service/schema.graphql)
+    URBAN_EVENTS_GRAPHQL_SCHEMA: str = "schemas/urban_events.graphql"
+    
+    # Mise en lot des requêtes GraphQL (fenêtre en secondes ; GRAPHQL_BATCH_MAX <= 1 désactive la mise en lot)
+    GRAPHQL_BATCH_WINDOW: float = 0.002
+    GRAPHQL_BATCH_MAX: int = 10
+    
     # Timeouts (en secondes)
     REST_TIMEOUT: int = 10
     SOAP_TIMEOUT: int = 15
     GRPC_TIMEOUT: int = 10
     GRAPHQL_TIMEOUT: int = 10
     
-    # Retry
+    # Délais par service pour le fan-out de plan-trip (en secondes)
+    PLAN_TRIP_REST_DEADLINE: float = 3.0
+    PLAN_TRIP_SOAP_DEADLINE: float = 4.0
+    PLAN_TRIP_GRPC_DEADLINE: float = 3.0
+    PLAN_TRIP_GRAPHQL_DEADLINE: float = 3.0
+    # Nombre maximal de trajets par appel à /smart-city/plan-trip/batch
+    PLAN_TRIP_BATCH_MAX_TRIPS: int = 200
+    
+    # Réponses en flux NDJSON (?stream=true) : durée maximale d'un flux upstream,
+    # taille des pages GraphQL lues successivement
+    STREAM_TIMEOUT: float = 300.0
+    GRAPHQL_STREAM_PAGE_SIZE: int = 500
+    
+    # Abonnements temps réel aux alertes (SSE, WebSocket) : messages en attente
+    # par client avant de le fermer, intervalle des heartbeats, délai maximal
+    # entre deux réouvertures du flux gRPC SubscribeAlerts
+    SUBSCRIPTION_CLIENT_BUFFER: int = 256
+    SUBSCRIPTION_HEARTBEAT: float = 15.0
+    SUBSCRIPTION_MAX_RECONNECT_DELAY: float = 30.0
+    
+    # Instantané de l'état de la ville, rafraîchi en arrière-plan : zones
+    # suivies (séparées par des virgules, les autres passent par un appel
+    # direct), période et délai d'une lecture, âge au-delà duquel les routes
+    # repassent par un appel direct
+    CITY_STATE_ENABLED: bool = True
+    CITY_STATE_ZONES: str = "downtown,industrial,park,residential"
+    CITY_STATE_REFRESH_INTERVAL: float = 10.0
+    CITY_STATE_REFRESH_TIMEOUT: float = 8.0
+    CITY_STATE_MAX_AGE: float = 30.0
+    
+    # Sondes de santé en arrière-plan (/smart-city/health) : période, délai
+    # d'une sonde, nombre de résultats conservés par service
+    HEALTH_PROBE_INTERVAL: float = 10.0
+    HEALTH_PROBE_TIMEOUT: float = 3.0
+    HEALTH_PROBE_HISTORY: int = 20
+    
+    # Contrôle d'admission (par worker) : requêtes en cours au total et par
+    # gabarit de route, file d'attente bornée, délestage CoDel (cible et
+    # intervalle en secondes), Retry-After des 503 et chemins jamais limités.
+    # Les abonnements longue durée (SSE, WebSocket) ont leur propre plafond, sans file
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_IN_FLIGHT: int = 200
+    ADMISSION_ROUTE_LIMITS: str = "/smart-city/plan-trip=50,/smart-city/plan-trip/batch=8"
+    ADMISSION_QUEUE_SIZE: int = 100
+    ADMISSION_QUEUE_TIMEOUT: float = 2.0
+    ADMISSION_CODEL_TARGET: float = 0.05
+    ADMISSION_CODEL_INTERVAL: float = 0.5
+    ADMISSION_RETRY_AFTER: int = 1
+    ADMISSION_EXEMPT_PATHS: str = "/health,/metrics,/smart-city/health"
+    ADMISSION_SUBSCRIPTION_PATHS: str = "/emergency/alerts/subscribe"
+    ADMISSION_MAX_SUBSCRIPTIONS: int = 500
+    
+    # Classes de trafic : requêtes en cours par classe (nom=limite), appels en
+    # vol par classe et par service upstream, classes prioritaires (hors
+    # plafond global, en tête des files upstream), règles de classement
+    # ([MÉTHODE ]motif=classe, la première qui correspond) et classe par défaut
+    TRAFFIC_CLASSES_ENABLED: bool = True
+    TRAFFIC_CLASSES: str = "critical=50,interactive=100,standard=200,bulk=20"
+    TRAFFIC_CLASS_UPSTREAM_LIMITS: str = "interactive=40,bulk=8"
+    TRAFFIC_PRIORITY_CLASSES: str = "critical"
+    TRAFFIC_CLASS_RULES: str = (
+        "POST /emergency/alerts/history=bulk,"
+        "POST /emergency/*=critical,PUT /emergency/*=critical,"
+        "/smart-city/plan-trip/batch=bulk,/smart-city/plan-trip=interactive,"
+        "POST /air/history=bulk,POST /air/filter=bulk,GET /urban/events=bulk"
+    )
+    TRAFFIC_DEFAULT_CLASS: str = "standard"
+    
+    # Disjoncteur par service upstream
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_TIMEOUT: float = 30.0
+    CIRCUIT_HALF_OPEN_MAX_CALLS: int = 1
+    
+    # Limite adaptative (AIMD) des appels en vol par service upstream
+    CONCURRENCY_INITIAL_LIMIT: int = 20
+    CONCURRENCY_MIN_LIMIT: int = 2
+    CONCURRENCY_MAX_LIMIT: int = 100
+    CONCURRENCY_LATENCY_THRESHOLD: float = 2.0
+    CONCURRENCY_BACKOFF_RATIO: float = 0.9
+    CONCURRENCY_MAX_WAIT: float = 0.5
+    
+    # Retry des lectures idempotentes (backoff exponentiel avec jitter, en secondes)
     MAX_RETRIES: int = 3
-    RETRY_DELAY: int = 2
+    RETRY_DELAY: float = 0.1
+    RETRY_MAX_DELAY: float = 1.0
+    
+    # Budget de relances : au plus MIN_RETRIES + RATIO × requêtes sur la fenêtre
+    RETRY_BUDGET_RATIO: float = 0.2
+    RETRY_BUDGET_MIN_RETRIES: int = 10
+    RETRY_BUDGET_WINDOW: float = 10.0
+    
+    # Hedging : seconde requête après le p95 observé si la première n'a pas répondu
+    HEDGING_ENABLED: bool = False
+    HEDGING_MIN_SAMPLES: int = 20
+    
+    # Cache des réponses de lecture (TTL par route, en secondes)
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+    RESPONSE_CACHE_STALE_RATIO: float = 1.0
+    RESPONSE_CACHE_INVALIDATION_DIR: str = "cache/invalidations"
+    # Retard maximal (secondes) avant de voir une invalidation d'un autre worker
+    RESPONSE_CACHE_INVALIDATION_POLL_INTERVAL: float = 0.1
+    CACHE_TTL_AIR_AQI: float = 60.0
+    CACHE_TTL_MOBILITY_TRAFIC: float = 15.0
+    CACHE_TTL_MOBILITY_DISPONIBILITE: float = 15.0
+    CACHE_TTL_MOBILITY_LIGNES: float = 300.0
+    CACHE_TTL_URBAN_ZONES: float = 3600.0
+    CACHE_TTL_URBAN_EVENT_TYPES: float = 3600.0
+    CACHE_TTL_URBAN_EVENT: float = 30.0
+    
+    # Résultats plan-trip : même paire de zones, mêmes préférences et heure de
+    # départ dans le même créneau de PLAN_TRIP_CACHE_BUCKET_MINUTES minutes
+    CACHE_TTL_PLAN_TRIP: float = 30.0
+    PLAN_TRIP_CACHE_BUCKET_MINUTES: int = 15
+    
+    # Pools de connexions des clients partagés
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    
+    # Traçage distribué (W3C traceparent) : spans en JSON lignes, vide = désactivé
+    TRACE_SERVICE_NAME: str = "api-gateway"
+    TRACE_EXPORT_PATH: str = ""
     
     # Logging
     LOG_LEVEL: str = "INFO"
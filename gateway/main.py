@@ -4,7 +4,7 @@ Application FastAPI principale - Orchestration de microservices multi-protocoles
 """
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 from contextlib import asynccontextmanager
 import time
 
@@ -14,8 +14,24 @@ from utils import (
     ServiceError,
     service_error_handler,
     http_exception_handler,
-    general_exception_handler
+    general_exception_handler,
+    ResponseCache,
+    AdmissionController,
+    AdmissionMiddleware,
+    parse_route_limits,
+    TrafficClassifier,
+    build_traffic_classes,
+    parse_traffic_rules
 )
+from utils.metrics import (
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS_IN_FLIGHT,
+    METRICS_CONTENT_TYPE,
+    render_metrics,
+    mark_worker_dead
+)
+from utils.tracing import TRACEPARENT_HEADER, span
+from clients import ClientRegistry
 from routers import (
     mobility_router,
     air_quality_router,
@@ -23,6 +39,10 @@ from routers import (
     urban_events_router,
     smart_city_router
 )
+from routers.mobility import LIGNES_CACHE_TAG
+from routers.emergency import alerts_cache_tag
+from routers.urban_events import EVENTS_CACHE_TAG
+from routers.smart_city import PLAN_TRIP_MOBILITY_TAG, plan_trip_zone_tag
 
 # ============================================================
 # LIFECYCLE EVENTS
@@ -47,6 +67,68 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ Configuration error: {str(e)}")
         raise
     
+    # Clients upstream partagés (pools de connexions longue durée)
+    app.state.clients = ClientRegistry()
+    await app.state.clients.start()
+    
+    # Cache des réponses de lecture (LRU par worker, invalidation partagée)
+    app.state.response_cache = ResponseCache(
+        max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        stale_ratio=settings.RESPONSE_CACHE_STALE_RATIO,
+        invalidation_dir=settings.RESPONSE_CACHE_INVALIDATION_DIR,
+        invalidation_poll_interval=settings.RESPONSE_CACHE_INVALIDATION_POLL_INTERVAL
+    )
+    
+    # Classes de trafic : voies séparées (admission et budgets upstream) par type de requête
+    app.state.traffic_classes = None
+    if settings.TRAFFIC_CLASSES_ENABLED:
+        app.state.traffic_classes = TrafficClassifier(
+            classes=build_traffic_classes(
+                limits=parse_route_limits(settings.TRAFFIC_CLASSES),
+                upstream_limits=parse_route_limits(settings.TRAFFIC_CLASS_UPSTREAM_LIMITS),
+                priority=[name.strip() for name in settings.TRAFFIC_PRIORITY_CLASSES.split(",") if name.strip()]
+            ),
+            rules=parse_traffic_rules(settings.TRAFFIC_CLASS_RULES),
+            default_class=settings.TRAFFIC_DEFAULT_CLASS
+        )
+    
+    # Contrôle d'admission : au-delà des limites, 503 immédiat plutôt qu'une file sans fin
+    app.state.admission = None
+    if settings.ADMISSION_ENABLED:
+        app.state.admission = AdmissionController(
+            max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT,
+            route_limits=parse_route_limits(settings.ADMISSION_ROUTE_LIMITS),
+            queue_size=settings.ADMISSION_QUEUE_SIZE,
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+            codel_target=settings.ADMISSION_CODEL_TARGET,
+            codel_interval=settings.ADMISSION_CODEL_INTERVAL,
+            retry_after=settings.ADMISSION_RETRY_AFTER,
+            exempt_paths=[path.strip() for path in settings.ADMISSION_EXEMPT_PATHS.split(",") if path.strip()],
+            subscription_paths=[path.strip() for path in settings.ADMISSION_SUBSCRIPTION_PATHS.split(",") if path.strip()],
+            max_subscriptions=settings.ADMISSION_MAX_SUBSCRIPTIONS,
+            traffic_classes=app.state.traffic_classes.classes.values() if app.state.traffic_classes else ()
+        )
+    
+    # Instantané de l'état de la ville et cache de réponses se périment mutuellement :
+    # une mutation invalide la section concernée, un changement relevé par une
+    # lecture ou une alerte poussée les plans concernés
+    city_state = app.state.clients.city_state
+    if city_state is not None:
+        city_state.follow_invalidations(app.state.response_cache, {
+            "trafic": LIGNES_CACHE_TAG,
+            "disponibilite": LIGNES_CACHE_TAG,
+            "events": EVENTS_CACHE_TAG
+        }, change_tags={
+            "trafic": PLAN_TRIP_MOBILITY_TAG,
+            "disponibilite": PLAN_TRIP_MOBILITY_TAG,
+            "aqi": plan_trip_zone_tag,
+            "events": plan_trip_zone_tag,
+            "alerts": alerts_cache_tag
+        })
+        city_state.on_alert = lambda alert: app.state.response_cache.invalidate(
+            alerts_cache_tag(alert["location"]["zone"])
+        )
+    
     logger.info("=" * 60)
     logger.info(f"✨ Gateway is ready on port {settings.PORT}")
     logger.info("=" * 60)
@@ -57,6 +139,9 @@ async def lifespan(app: FastAPI):
     logger.info("=" * 60)
     logger.info("🛑 Shutting down Smart City API Gateway")
     logger.info("=" * 60)
+    await app.state.response_cache.close()
+    await app.state.clients.close()
+    mark_worker_dead()
 
 # ============================================================
 # APPLICATION FASTAPI
@@ -108,6 +193,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Contrôle d'admission (déclaré avant le logging : il s'exécute à l'intérieur,
+# les requêtes délestées sont donc journalisées et mesurées)
+app.add_middleware(AdmissionMiddleware)
+
 # Logging middleware
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
@@ -117,8 +206,29 @@ async def log_requests(request: Request, call_next):
     # Log de la requête
     logger.info(f"📥 {request.method} {request.url.path}")
     
-    # Traitement de la requête
-    response = await call_next(request)
+    # Traitement de la requête, dans un span serveur rattaché au traceparent entrant
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    status = 500
+    with span(
+        f"{request.method} {request.url.path}",
+        kind="server",
+        traceparent=request.headers.get(TRACEPARENT_HEADER),
+        attributes={"http.method": request.method, "http.target": request.url.path}
+    ) as server_span:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            response.headers["X-Trace-Id"] = server_span.trace_id
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            # Gabarit de route (/mobility/lignes/{ligne_id}) plutôt que le chemin réel
+            route = request.scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            HTTP_REQUEST_DURATION.labels(request.method, route_path, str(status)).observe(time.time() - start_time)
+            server_span.name = f"{request.method} {route_path}"
+            server_span.attributes["http.status_code"] = status
+            if status >= 500:
+                server_span.status = "error"
     
     # Log de la réponse
     duration = time.time() - start_time
@@ -192,9 +302,16 @@ async def gateway_health():
         "timestamp": time.time()
     }
 
+@app.get("/metrics", tags=["Info"], include_in_schema=False)
+async def metrics():
+    """Métriques Prometheus, agrégées sur tous les workers"""
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
 @app.get("/info", tags=["Info"])
-async def gateway_info():
+async def gateway_info(request: Request):
     """Informations détaillées sur la Gateway"""
+    admission = getattr(request.app.state, "admission", None)
+    classifier = getattr(request.app.state, "traffic_classes", None)
     return {
         "app_name": settings.APP_NAME,
         "version": settings.APP_VERSION,
@@ -210,7 +327,21 @@ async def gateway_info():
             "soap": f"{settings.SOAP_TIMEOUT}s",
             "grpc": f"{settings.GRPC_TIMEOUT}s",
             "graphql": f"{settings.GRAPHQL_TIMEOUT}s"
-        }
+        },
+        "connection_pools": {
+            "max_connections": settings.HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            "keepalive_expiry": f"{settings.HTTP_KEEPALIVE_EXPIRY}s"
+        },
+        "response_cache": request.app.state.response_cache.stats(),
+        "coalescing": request.app.state.clients.coalescing_stats(),
+        "graphql_batching": request.app.state.clients.batching_stats(),
+        "upstreams": request.app.state.clients.upstream_stats(),
+        "retries": request.app.state.clients.retry_stats(),
+        "subscriptions": request.app.state.clients.subscription_stats(),
+        "city_state": request.app.state.clients.city_state_stats(),
+        "admission": admission.stats() if admission is not None else None,
+        "traffic_classes": classifier.stats() if classifier is not None else None
     }
 
 # ============================================================
@@ -99,10 +99,31 @@ class PlanTripResponse(BaseModel):
     analysis: Optional[TripAnalysis] = None
     warnings: List[str] = []
     processing_time_ms: float
+    processing_time_by_service_ms: Dict[str, float] = {}
+    cache_status: str = Field(default="MISS", description="HIT, STALE, MISS ou LAST-KNOWN-GOOD")
+    data_age_seconds: float = Field(default=0.0, description="Âge des données du plan renvoyé")
+    data_sources: Dict[str, str] = Field(default={}, description="Par service : city_state (instantané) ou live (appel direct)")
+
+class PlanTripBatchRequest(BaseModel):
+    """Plusieurs trajets planifiés sur les mêmes données collectées"""
+    trips: List[PlanTripRequest] = Field(..., min_length=1, description="Trajets à planifier")
+
+class PlanTripBatchResponse(BaseModel):
+    """Plans dans l'ordre des trajets demandés, un échec restant propre à son trajet"""
+    success: bool
+    total: int
+    failed: int
+    results: List[PlanTripResponse]
+    zones: List[str] = Field(default=[], description="Zones distinctes collectées une seule fois")
+    processing_time_ms: float
+    processing_time_by_service_ms: Dict[str, float] = {}
+    data_sources: Dict[str, str] = {}
 
 class HealthCheckResponse(BaseModel):
     """Réponse du health check"""
     status: str
     services: Dict[str, bool]
     timestamp: str
-    version: str
\ No newline at end of file
+    version: str
+    upstreams: Dict[str, Any] = {}
+    checks: Dict[str, Any] = Field(default={}, description="Par service : dernière sonde (latence, âge) et historique récent")
\ No newline at end of file
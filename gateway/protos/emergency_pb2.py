@@ -2,7 +2,7 @@
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
 # NO CHECKED-IN PROTOBUF GENCODE
 # source: emergency.proto
-# Protobuf Python Version: 6.31.1
+# Protobuf Python Version: 7.35.1
 """Generated protocol buffer code."""
 from google.protobuf import descriptor as _descriptor
 from google.protobuf import descriptor_pool as _descriptor_pool
@@ -11,8 +11,8 @@ from google.protobuf import symbol_database as _symbol_database
 from google.protobuf.internal import builder as _builder
 _runtime_version.ValidateProtobufRuntimeVersion(
     _runtime_version.Domain.PUBLIC,
-    6,
-    31,
+    7,
+    35,
     1,
     '',
     'emergency.proto'
@@ -24,21 +24,23 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0f\x65mergency.proto\x12\temergency\"\\\n\x08Location\x12\x10\n\x08latitude\x18\x01 \x01(\x01\x12\x11\n\tlongitude\x18\x02 \x01(\x01\x12\x0f\n\x07\x61\x64\x64ress\x18\x03 \x01(\t\x12\x0c\n\x04\x63ity\x18\x04 \x01(\t\x12\x0c\n\x04zone\x18\x05 \x01(\t\"\xdd\x01\n\x0c\x41lertRequest\x12\"\n\x04type\x18\x01 \x01(\x0e\x32\x14.emergency.AlertType\x12\x13\n\x0b\x64\x65scription\x18\x02 \x01(\t\x12%\n\x08location\x18\x03 \x01(\x0b\x32\x13.emergency.Location\x12%\n\x08priority\x18\x04 \x01(\x0e\x32\x13.emergency.Priority\x12\x15\n\rreporter_name\x18\x05 \x01(\t\x12\x16\n\x0ereporter_phone\x18\x06 \x01(\t\x12\x17\n\x0f\x61\x66\x66\x65\x63ted_people\x18\x07 \x01(\x05\"\xe6\x02\n\rAlertResponse\x12\x10\n\x08\x61lert_id\x18\x01 \x01(\t\x12\"\n\x04type\x18\x02 \x01(\x0e\x32\x14.emergency.AlertType\x12\x13\n\x0b\x64\x65scription\x18\x03 \x01(\t\x12%\n\x08location\x18\x04 \x01(\x0b\x32\x13.emergency.Location\x12%\n\x08priority\x18\x05 \x01(\x0e\x32\x13.emergency.Priority\x12&\n\x06status\x18\x06 \x01(\x0e\x32\x16.emergency.AlertStatus\x12\x15\n\rreporter_name\x18\x07 \x01(\t\x12\x16\n\x0ereporter_phone\x18\x08 \x01(\t\x12\x17\n\x0f\x61\x66\x66\x65\x63ted_people\x18\t \x01(\x05\x12\x12\n\ncreated_at\x18\n \x01(\t\x12\x12\n\nupdated_at\x18\x0b \x01(\t\x12\x15\n\rassigned_team\x18\x0c \x01(\t\x12\r\n\x05notes\x18\r \x01(\t\"j\n\x0bZoneRequest\x12\x0c\n\x04zone\x18\x01 \x01(\t\x12\"\n\x04type\x18\x02 \x01(\x0e\x32\x14.emergency.AlertType\x12)\n\x0cmin_priority\x18\x03 \x01(\x0e\x32\x13.emergency.Priority\"R\n\x11\x41lertListResponse\x12(\n\x06\x61lerts\x18\x01 \x03(\x0b\x32\x18.emergency.AlertResponse\x12\x13\n\x0btotal_count\x18\x02 \x01(\x05\"y\n\x13StatusUpdateRequest\x12\x10\n\x08\x61lert_id\x18\x01 \x01(\t\x12*\n\nnew_status\x18\x02 \x01(\x0e\x32\x16.emergency.AlertStatus\x12\x15\n\rassigned_team\x18\x03 \x01(\t\x12\r\n\x05notes\x18\x04 \x01(\t\"w\n\x0eHistoryRequest\x12\x0c\n\x04zone\x18\x01 \x01(\t\x12\"\n\x04type\x18\x02 \x01(\x0e\x32\x14.emergency.AlertType\x12\x12\n\nstart_date\x18\x03 \x01(\x03\x12\x10\n\x08\x65nd_date\x18\x04 \x01(\x03\x12\r\n\x05limit\x18\x05 \x01(\x05\"\xcd\x01\n\x14\x41lertHistoryResponse\x12(\n\x06\x61lerts\x18\x01 \x03(\x0b\x32\x18.emergency.AlertResponse\x12\x13\n\x0btotal_count\x18\x02 \x01(\x05\x12\x43\n\nstatistics\x18\x03 \x03(\x0b\x32/.emergency.AlertHistoryResponse.StatisticsEntry\x1a\x31\n\x0fStatisticsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x05:\x02\x38\x01\"q\n\x10SubscribeRequest\x12\r\n\x05zones\x18\x01 \x03(\t\x12#\n\x05types\x18\x02 \x03(\x0e\x32\x14.emergency.AlertType\x12)\n\x0cmin_priority\x18\x03 \x01(\x0e\x32\x13.emergency.Priority\"\x14\n\x12HealthCheckRequest\"b\n\x13HealthCheckResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07version\x18\x02 \x01(\t\x12\x15\n\ractive_alerts\x18\x03 \x01(\x05\x12\x13\n\x0bsubscribers\x18\x04 \x01(\x05*\xab\x01\n\tAlertType\x12\x1a\n\x16\x41LERT_TYPE_UNSPECIFIED\x10\x00\x12\x0c\n\x08\x41\x43\x43IDENT\x10\x01\x12\x08\n\x04\x46IRE\x10\x02\x12\x15\n\x11\x41MBULANCE_REQUEST\x10\x03\x12\x15\n\x11MEDICAL_EMERGENCY\x10\x04\x12\x14\n\x10NATURAL_DISASTER\x10\x05\x12\x13\n\x0fSECURITY_THREAT\x10\x06\x12\x11\n\rPUBLIC_HEALTH\x10\x07*Q\n\x08Priority\x12\x18\n\x14PRIORITY_UNSPECIFIED\x10\x00\x12\x07\n\x03LOW\x10\x01\x12\n\n\x06MEDIUM\x10\x02\x12\x08\n\x04HIGH\x10\x03\x12\x0c\n\x08\x43RITICAL\x10\x04*`\n\x0b\x41lertStatus\x12\x16\n\x12STATUS_UNSPECIFIED\x10\x00\x12\x0b\n\x07PENDING\x10\x01\x12\x0f\n\x0bIN_PROGRESS\x10\x02\x12\x0c\n\x08RESOLVED\x10\x03\x12\r\n\tCANCELLED\x10\x04\x32\xda\x03\n\x15\x45mergencyAlertService\x12@\n\x0b\x43reateAlert\x12\x17.emergency.AlertRequest\x1a\x18.emergency.AlertResponse\x12G\n\x0fGetActiveAlerts\x12\x16.emergency.ZoneRequest\x1a\x1c.emergency.AlertListResponse\x12M\n\x11UpdateAlertStatus\x12\x1e.emergency.StatusUpdateRequest\x1a\x18.emergency.AlertResponse\x12M\n\x0fGetAlertHistory\x12\x19.emergency.HistoryRequest\x1a\x1f.emergency.AlertHistoryResponse\x12J\n\x0fSubscribeAlerts\x12\x1b.emergency.SubscribeRequest\x1a\x18.emergency.AlertResponse0\x01\x12L\n\x0bHealthCheck\x12\x1d.emergency.HealthCheckRequest\x1a\x1e.emergency.HealthCheckResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0f\x65mergency.proto\x12\temergency\"\\\n\x08Location\x12\x10\n\x08latitude\x18\x01 \x01(\x01\x12\x11\n\tlongitude\x18\x02 \x01(\x01\x12\x0f\n\x07\x61\x64\x64ress\x18\x03 \x01(\t\x12\x0c\n\x04\x63ity\x18\x04 \x01(\t\x12\x0c\n\x04zone\x18\x05 \x01(\t\"\xdd\x01\n\x0c\x41lertRequest\x12\"\n\x04type\x18\x01 \x01(\x0e\x32\x14.emergency.AlertType\x12\x13\n\x0b\x64\x65scription\x18\x02 \x01(\t\x12%\n\x08location\x18\x03 \x01(\x0b\x32\x13.emergency.Location\x12%\n\x08priority\x18\x04 \x01(\x0e\x32\x13.emergency.Priority\x12\x15\n\rreporter_name\x18\x05 \x01(\t\x12\x16\n\x0ereporter_phone\x18\x06 \x01(\t\x12\x17\n\x0f\x61\x66\x66\x65\x63ted_people\x18\x07 \x01(\x05\"\xe6\x02\n\rAlertResponse\x12\x10\n\x08\x61lert_id\x18\x01 \x01(\t\x12\"\n\x04type\x18\x02 \x01(\x0e\x32\x14.emergency.AlertType\x12\x13\n\x0b\x64\x65scription\x18\x03 \x01(\t\x12%\n\x08location\x18\x04 \x01(\x0b\x32\x13.emergency.Location\x12%\n\x08priority\x18\x05 \x01(\x0e\x32\x13.emergency.Priority\x12&\n\x06status\x18\x06 \x01(\x0e\x32\x16.emergency.AlertStatus\x12\x15\n\rreporter_name\x18\x07 \x01(\t\x12\x16\n\x0ereporter_phone\x18\x08 \x01(\t\x12\x17\n\x0f\x61\x66\x66\x65\x63ted_people\x18\t \x01(\x05\x12\x12\n\ncreated_at\x18\n \x01(\t\x12\x12\n\nupdated_at\x18\x0b \x01(\t\x12\x15\n\rassigned_team\x18\x0c \x01(\t\x12\r\n\x05notes\x18\r \x01(\t\"j\n\x0bZoneRequest\x12\x0c\n\x04zone\x18\x01 \x01(\t\x12\"\n\x04type\x18\x02 \x01(\x0e\x32\x14.emergency.AlertType\x12)\n\x0cmin_priority\x18\x03 \x01(\x0e\x32\x13.emergency.Priority\"R\n\x11\x41lertListResponse\x12(\n\x06\x61lerts\x18\x01 \x03(\x0b\x32\x18.emergency.AlertResponse\x12\x13\n\x0btotal_count\x18\x02 \x01(\x05\"p\n\x10MultiZoneRequest\x12\r\n\x05zones\x18\x01 \x03(\t\x12\"\n\x04type\x18\x02 \x01(\x0e\x32\x14.emergency.AlertType\x12)\n\x0cmin_priority\x18\x03 \x01(\x0e\x32\x13.emergency.Priority\"\xb6\x01\n\x16MultiZoneAlertResponse\x12;\n\x05zones\x18\x01 \x03(\x0b\x32,.emergency.MultiZoneAlertResponse.ZonesEntry\x12\x13\n\x0btotal_count\x18\x02 \x01(\x05\x1aJ\n\nZonesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12+\n\x05value\x18\x02 \x01(\x0b\x32\x1c.emergency.AlertListResponse:\x02\x38\x01\"y\n\x13StatusUpdateRequest\x12\x10\n\x08\x61lert_id\x18\x01 \x01(\t\x12*\n\nnew_status\x18\x02 \x01(\x0e\x32\x16.emergency.AlertStatus\x12\x15\n\rassigned_team\x18\x03 \x01(\t\x12\r\n\x05notes\x18\x04 \x01(\t\"w\n\x0eHistoryRequest\x12\x0c\n\x04zone\x18\x01 \x01(\t\x12\"\n\x04type\x18\x02 \x01(\x0e\x32\x14.emergency.AlertType\x12\x12\n\nstart_date\x18\x03 \x01(\x03\x12\x10\n\x08\x65nd_date\x18\x04 \x01(\x03\x12\r\n\x05limit\x18\x05 \x01(\x05\"\xcd\x01\n\x14\x41lertHistoryResponse\x12(\n\x06\x61lerts\x18\x01 \x03(\x0b\x32\x18.emergency.AlertResponse\x12\x13\n\x0btotal_count\x18\x02 \x01(\x05\x12\x43\n\nstatistics\x18\x03 \x03(\x0b\x32/.emergency.AlertHistoryResponse.StatisticsEntry\x1a\x31\n\x0fStatisticsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x05:\x02\x38\x01\"q\n\x10SubscribeRequest\x12\r\n\x05zones\x18\x01 \x03(\t\x12#\n\x05types\x18\x02 \x03(\x0e\x32\x14.emergency.AlertType\x12)\n\x0cmin_priority\x18\x03 \x01(\x0e\x32\x13.emergency.Priority\"\x14\n\x12HealthCheckRequest\"b\n\x13HealthCheckResponse\x12\x0e\n\x06status\x18\x01 \x01(\t\x12\x0f\n\x07version\x18\x02 \x01(\t\x12\x15\n\ractive_alerts\x18\x03 \x01(\x05\x12\x13\n\x0bsubscribers\x18\x04 \x01(\x05*\xab\x01\n\tAlertType\x12\x1a\n\x16\x41LERT_TYPE_UNSPECIFIED\x10\x00\x12\x0c\n\x08\x41\x43\x43IDENT\x10\x01\x12\x08\n\x04\x46IRE\x10\x02\x12\x15\n\x11\x41MBULANCE_REQUEST\x10\x03\x12\x15\n\x11MEDICAL_EMERGENCY\x10\x04\x12\x14\n\x10NATURAL_DISASTER\x10\x05\x12\x13\n\x0fSECURITY_THREAT\x10\x06\x12\x11\n\rPUBLIC_HEALTH\x10\x07*Q\n\x08Priority\x12\x18\n\x14PRIORITY_UNSPECIFIED\x10\x00\x12\x07\n\x03LOW\x10\x01\x12\n\n\x06MEDIUM\x10\x02\x12\x08\n\x04HIGH\x10\x03\x12\x0c\n\x08\x43RITICAL\x10\x04*`\n\x0b\x41lertStatus\x12\x16\n\x12STATUS_UNSPECIFIED\x10\x00\x12\x0b\n\x07PENDING\x10\x01\x12\x0f\n\x0bIN_PROGRESS\x10\x02\x12\x0c\n\x08RESOLVED\x10\x03\x12\r\n\tCANCELLED\x10\x04\x32\xff\x04\n\x15\x45mergencyAlertService\x12@\n\x0b\x43reateAlert\x12\x17.emergency.AlertRequest\x1a\x18.emergency.AlertResponse\x12G\n\x0fGetActiveAlerts\x12\x16.emergency.ZoneRequest\x1a\x1c.emergency.AlertListResponse\x12V\n\x14GetActiveAlertsBatch\x12\x1b.emergency.MultiZoneRequest\x1a!.emergency.MultiZoneAlertResponse\x12M\n\x11UpdateAlertStatus\x12\x1e.emergency.StatusUpdateRequest\x1a\x18.emergency.AlertResponse\x12M\n\x0fGetAlertHistory\x12\x19.emergency.HistoryRequest\x1a\x1f.emergency.AlertHistoryResponse\x12K\n\x12StreamAlertHistory\x12\x19.emergency.HistoryRequest\x1a\x18.emergency.AlertResponse0\x01\x12J\n\x0fSubscribeAlerts\x12\x1b.emergency.SubscribeRequest\x1a\x18.emergency.AlertResponse0\x01\x12L\n\x0bHealthCheck\x12\x1d.emergency.HealthCheckRequest\x1a\x1e.emergency.HealthCheckResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'emergency_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
+  _globals['_MULTIZONEALERTRESPONSE_ZONESENTRY']._loaded_options = None
+  _globals['_MULTIZONEALERTRESPONSE_ZONESENTRY']._serialized_options = b'8\001'
   _globals['_ALERTHISTORYRESPONSE_STATISTICSENTRY']._loaded_options = None
   _globals['_ALERTHISTORYRESPONSE_STATISTICSENTRY']._serialized_options = b'8\001'
-  _globals['_ALERTTYPE']._serialized_start=1591
-  _globals['_ALERTTYPE']._serialized_end=1762
-  _globals['_PRIORITY']._serialized_start=1764
-  _globals['_PRIORITY']._serialized_end=1845
-  _globals['_ALERTSTATUS']._serialized_start=1847
-  _globals['_ALERTSTATUS']._serialized_end=1943
+  _globals['_ALERTTYPE']._serialized_start=1890
+  _globals['_ALERTTYPE']._serialized_end=2061
+  _globals['_PRIORITY']._serialized_start=2063
+  _globals['_PRIORITY']._serialized_end=2144
+  _globals['_ALERTSTATUS']._serialized_start=2146
+  _globals['_ALERTSTATUS']._serialized_end=2242
   _globals['_LOCATION']._serialized_start=30
   _globals['_LOCATION']._serialized_end=122
   _globals['_ALERTREQUEST']._serialized_start=125
@@ -49,20 +51,26 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_ZONEREQUEST']._serialized_end=815
   _globals['_ALERTLISTRESPONSE']._serialized_start=817
   _globals['_ALERTLISTRESPONSE']._serialized_end=899
-  _globals['_STATUSUPDATEREQUEST']._serialized_start=901
-  _globals['_STATUSUPDATEREQUEST']._serialized_end=1022
-  _globals['_HISTORYREQUEST']._serialized_start=1024
-  _globals['_HISTORYREQUEST']._serialized_end=1143
-  _globals['_ALERTHISTORYRESPONSE']._serialized_start=1146
-  _globals['_ALERTHISTORYRESPONSE']._serialized_end=1351
-  _globals['_ALERTHISTORYRESPONSE_STATISTICSENTRY']._serialized_start=1302
-  _globals['_ALERTHISTORYRESPONSE_STATISTICSENTRY']._serialized_end=1351
-  _globals['_SUBSCRIBEREQUEST']._serialized_start=1353
-  _globals['_SUBSCRIBEREQUEST']._serialized_end=1466
-  _globals['_HEALTHCHECKREQUEST']._serialized_start=1468
-  _globals['_HEALTHCHECKREQUEST']._serialized_end=1488
-  _globals['_HEALTHCHECKRESPONSE']._serialized_start=1490
-  _globals['_HEALTHCHECKRESPONSE']._serialized_end=1588
-  _globals['_EMERGENCYALERTSERVICE']._serialized_start=1946
-  _globals['_EMERGENCYALERTSERVICE']._serialized_end=2420
+  _globals['_MULTIZONEREQUEST']._serialized_start=901
+  _globals['_MULTIZONEREQUEST']._serialized_end=1013
+  _globals['_MULTIZONEALERTRESPONSE']._serialized_start=1016
+  _globals['_MULTIZONEALERTRESPONSE']._serialized_end=1198
+  _globals['_MULTIZONEALERTRESPONSE_ZONESENTRY']._serialized_start=1124
+  _globals['_MULTIZONEALERTRESPONSE_ZONESENTRY']._serialized_end=1198
+  _globals['_STATUSUPDATEREQUEST']._serialized_start=1200
+  _globals['_STATUSUPDATEREQUEST']._serialized_end=1321
+  _globals['_HISTORYREQUEST']._serialized_start=1323
+  _globals['_HISTORYREQUEST']._serialized_end=1442
+  _globals['_ALERTHISTORYRESPONSE']._serialized_start=1445
+  _globals['_ALERTHISTORYRESPONSE']._serialized_end=1650
+  _globals['_ALERTHISTORYRESPONSE_STATISTICSENTRY']._serialized_start=1601
+  _globals['_ALERTHISTORYRESPONSE_STATISTICSENTRY']._serialized_end=1650
+  _globals['_SUBSCRIBEREQUEST']._serialized_start=1652
+  _globals['_SUBSCRIBEREQUEST']._serialized_end=1765
+  _globals['_HEALTHCHECKREQUEST']._serialized_start=1767
+  _globals['_HEALTHCHECKREQUEST']._serialized_end=1787
+  _globals['_HEALTHCHECKRESPONSE']._serialized_start=1789
+  _globals['_HEALTHCHECKRESPONSE']._serialized_end=1887
+  _globals['_EMERGENCYALERTSERVICE']._serialized_start=2245
+  _globals['_EMERGENCYALERTSERVICE']._serialized_end=2884
 # @@protoc_insertion_point(module_scope)
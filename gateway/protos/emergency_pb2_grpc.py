@@ -5,7 +5,7 @@ import warnings
 
 from . import emergency_pb2 as emergency__pb2
 
-GRPC_GENERATED_VERSION = '1.76.0'
+GRPC_GENERATED_VERSION = '1.84.0'
 GRPC_VERSION = grpc.__version__
 _version_not_supported = False
 
@@ -25,7 +25,7 @@ if _version_not_supported:
     )
 
 
-class EmergencyAlertServiceStub(object):
+class EmergencyAlertServiceStub:
     """Service principal de gestion des alertes d'urgence
     """
 
@@ -45,6 +45,11 @@ class EmergencyAlertServiceStub(object):
                 request_serializer=emergency__pb2.ZoneRequest.SerializeToString,
                 response_deserializer=emergency__pb2.AlertListResponse.FromString,
                 _registered_method=True)
+        self.GetActiveAlertsBatch = channel.unary_unary(
+                '/emergency.EmergencyAlertService/GetActiveAlertsBatch',
+                request_serializer=emergency__pb2.MultiZoneRequest.SerializeToString,
+                response_deserializer=emergency__pb2.MultiZoneAlertResponse.FromString,
+                _registered_method=True)
         self.UpdateAlertStatus = channel.unary_unary(
                 '/emergency.EmergencyAlertService/UpdateAlertStatus',
                 request_serializer=emergency__pb2.StatusUpdateRequest.SerializeToString,
@@ -55,6 +60,11 @@ class EmergencyAlertServiceStub(object):
                 request_serializer=emergency__pb2.HistoryRequest.SerializeToString,
                 response_deserializer=emergency__pb2.AlertHistoryResponse.FromString,
                 _registered_method=True)
+        self.StreamAlertHistory = channel.unary_stream(
+                '/emergency.EmergencyAlertService/StreamAlertHistory',
+                request_serializer=emergency__pb2.HistoryRequest.SerializeToString,
+                response_deserializer=emergency__pb2.AlertResponse.FromString,
+                _registered_method=True)
         self.SubscribeAlerts = channel.unary_stream(
                 '/emergency.EmergencyAlertService/SubscribeAlerts',
                 request_serializer=emergency__pb2.SubscribeRequest.SerializeToString,
@@ -67,7 +77,7 @@ class EmergencyAlertServiceStub(object):
                 _registered_method=True)
 
 
-class EmergencyAlertServiceServicer(object):
+class EmergencyAlertServiceServicer:
     """Service principal de gestion des alertes d'urgence
     """
 
@@ -85,6 +95,13 @@ class EmergencyAlertServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetActiveAlertsBatch(self, request, context):
+        """Récupérer les alertes actives de plusieurs zones en un seul appel
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def UpdateAlertStatus(self, request, context):
         """Mettre à jour le statut d'une alerte
         """
@@ -99,6 +116,13 @@ class EmergencyAlertServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def StreamAlertHistory(self, request, context):
+        """Historique des alertes diffusé une par une (streaming)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def SubscribeAlerts(self, request, context):
         """S'abonner aux alertes en temps réel (streaming)
         """
@@ -126,6 +150,11 @@ def add_EmergencyAlertServiceServicer_to_server(servicer, server):
                     request_deserializer=emergency__pb2.ZoneRequest.FromString,
                     response_serializer=emergency__pb2.AlertListResponse.SerializeToString,
             ),
+            'GetActiveAlertsBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetActiveAlertsBatch,
+                    request_deserializer=emergency__pb2.MultiZoneRequest.FromString,
+                    response_serializer=emergency__pb2.MultiZoneAlertResponse.SerializeToString,
+            ),
             'UpdateAlertStatus': grpc.unary_unary_rpc_method_handler(
                     servicer.UpdateAlertStatus,
                     request_deserializer=emergency__pb2.StatusUpdateRequest.FromString,
@@ -136,6 +165,11 @@ def add_EmergencyAlertServiceServicer_to_server(servicer, server):
                     request_deserializer=emergency__pb2.HistoryRequest.FromString,
                     response_serializer=emergency__pb2.AlertHistoryResponse.SerializeToString,
             ),
+            'StreamAlertHistory': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamAlertHistory,
+                    request_deserializer=emergency__pb2.HistoryRequest.FromString,
+                    response_serializer=emergency__pb2.AlertResponse.SerializeToString,
+            ),
             'SubscribeAlerts': grpc.unary_stream_rpc_method_handler(
                     servicer.SubscribeAlerts,
                     request_deserializer=emergency__pb2.SubscribeRequest.FromString,
@@ -154,7 +188,7 @@ def add_EmergencyAlertServiceServicer_to_server(servicer, server):
 
 
  # This class is part of an EXPERIMENTAL API.
-class EmergencyAlertService(object):
+class EmergencyAlertService:
     """Service principal de gestion des alertes d'urgence
     """
 
@@ -212,6 +246,33 @@ class EmergencyAlertService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def GetActiveAlertsBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/emergency.EmergencyAlertService/GetActiveAlertsBatch',
+            emergency__pb2.MultiZoneRequest.SerializeToString,
+            emergency__pb2.MultiZoneAlertResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def UpdateAlertStatus(request,
             target,
@@ -266,6 +327,33 @@ class EmergencyAlertService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def StreamAlertHistory(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/emergency.EmergencyAlertService/StreamAlertHistory',
+            emergency__pb2.HistoryRequest.SerializeToString,
+            emergency__pb2.AlertResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def SubscribeAlerts(request,
             target,
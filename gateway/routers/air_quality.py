@@ -1,18 +1,19 @@
 """Router FastAPI pour le service Qualité de l'Air (SOAP)"""
-from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import List
-from  clients import AirQualitySoapClient
+from fastapi import APIRouter, HTTPException, Depends, Query, Header, Response
+from typing import List, Optional
+from  config import settings
+from  clients import AirQualitySoapClient, ClientRegistry, get_registry, city_state_section, annotate_snapshot
 from  models.air_quality import (
     AQIRequest, AQIResult, Pollutant,
     CompareZonesRequest, HistoryRequest, FilterPollutantsRequest
 )
-from  utils import logger
+from  utils import logger, ResponseCache, get_response_cache, passthrough, wants_ndjson, ndjson_response
 
 router = APIRouter(prefix="/air", tags=["Qualité de l'Air"])
 
-# Dependency pour le client SOAP
-async def get_air_quality_client():
-    return AirQualitySoapClient()
+# Dependency pour le client SOAP (WSDL parsé une seule fois)
+async def get_air_quality_client(registry: ClientRegistry = Depends(get_registry)):
+    return await registry.get_air_quality()
 
 @router.get("/", summary="Page d'accueil du service Qualité de l'Air")
 async def air_quality_home():
@@ -38,7 +39,9 @@ async def air_quality_home():
 )
 async def get_aqi(
     zone: str,
-    client: AirQualitySoapClient = Depends(get_air_quality_client)
+    response: Response,
+    registry: ClientRegistry = Depends(get_registry),
+    cache: ResponseCache = Depends(get_response_cache)
 ):
     """
     Récupère l'indice de qualité de l'air (AQI) pour une zone.
@@ -52,10 +55,25 @@ async def get_aqi(
     - Unhealthy (151-200)
     - Very Unhealthy (201-300)
     - Hazardous (301-500)
+    
+    Servi depuis l'instantané de l'état de la ville tant qu'il est frais
+    (en-tête `X-Data-Source: city-state`), sinon par un appel SOAP.
     """
     logger.info(f"Gateway: Getting AQI for zone {zone}")
-    result = await client.get_aqi(zone)
-    return result
+    section = city_state_section(registry, "aqi", zone)
+    if section is not None:
+        annotate_snapshot(response, section)
+        return passthrough(section.value, response)
+    
+    async def fetch():
+        client = await registry.get_air_quality()
+        return await client.get_aqi(zone)
+    
+    result = await cache.cached(
+        response, f"air.aqi:{zone}", fetch,
+        ttl=settings.CACHE_TTL_AIR_AQI
+    )
+    return passthrough(result, response)
 
 @router.get(
     "/pollutants/{zone}",
@@ -75,7 +93,7 @@ async def get_pollutants(
     """
     logger.info(f"Gateway: Getting pollutants for zone {zone}")
     result = await client.get_pollutants(zone)
-    return result
+    return passthrough(result)
 
 @router.post(
     "/compare",
@@ -94,7 +112,7 @@ async def compare_zones(
     """
     logger.info(f"Gateway: Comparing zones {request.zone_a} vs {request.zone_b}")
     result = await client.compare_zones(request.zone_a, request.zone_b)
-    return result
+    return passthrough(result)
 
 @router.post(
     "/history",
@@ -103,6 +121,8 @@ async def compare_zones(
 )
 async def get_history(
     request: HistoryRequest,
+    stream: bool = Query(False, description="Réponse NDJSON, un point de données par ligne"),
+    accept: Optional[str] = Header(None, include_in_schema=False),
     client: AirQualitySoapClient = Depends(get_air_quality_client)
 ):
     """
@@ -112,7 +132,19 @@ async def get_history(
     - **start_date**: Date de début (ISO format: YYYY-MM-DD)
     - **end_date**: Date de fin (ISO format: YYYY-MM-DD)
     - **granularity**: hourly, daily, weekly (défaut: daily)
+    
+    Avec `?stream=true` ou `Accept: application/x-ndjson`, seuls les points de
+    données sont renvoyés, un par ligne, au fil du décodage de la réponse SOAP.
     """
+    if wants_ndjson(stream, accept):
+        logger.info(f"Gateway: Streaming history for {request.zone}")
+        return await ndjson_response(client.stream_history(
+            request.zone,
+            request.start_date,
+            request.end_date,
+            request.granularity
+        ))
+    
     logger.info(
         f"Gateway: Getting history for {request.zone} "
         f"from {request.start_date} to {request.end_date}"
@@ -123,7 +155,7 @@ async def get_history(
         request.end_date,
         request.granularity
     )
-    return result
+    return passthrough(result)
 
 @router.post(
     "/filter",
@@ -145,7 +177,7 @@ async def filter_pollutants(
         f"with threshold {request.threshold}"
     )
     result = await client.filter_pollutants(request.zone, request.threshold)
-    return result
+    return passthrough(result)
 
 @router.get(
     "/zones",
@@ -1,23 +1,35 @@
 """Router FastAPI pour le service Urgences (gRPC)"""
-from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import List, Optional
-from  clients import EmergencyGrpcClient
+from fastapi import APIRouter, HTTPException, Depends, Query, Header, Response, WebSocket, WebSocketDisconnect
+from contextlib import AsyncExitStack
+from typing import AsyncIterator, Callable, Dict, List, Optional
+import orjson
+from  config import settings
+from  clients import EmergencyGrpcClient, ClientRegistry, get_registry, city_state_section, annotate_snapshot, filter_alerts
 from  models.emergency import (
     CreateAlertRequest, AlertResponse,
     GetActiveAlertsRequest, UpdateAlertStatusRequest,
-    AlertHistoryRequest, AlertHistoryResponse
+    AlertHistoryRequest, AlertHistoryResponse,
+    AlertType, Priority
 )
-from  utils import logger
+from  utils import (
+    logger, passthrough, wants_ndjson, ndjson_response,
+    ResponseCache, get_response_cache,
+    AdmissionRejected, Subscription, SubscriptionClosed,
+    EventStreamResponse, sse_event, sse_retry, sse_comment
+)
+from  utils.json_response import json_default
 
 router = APIRouter(prefix="/emergency", tags=["Urgences"])
 
-# Dependency pour le client gRPC
-async def get_emergency_client():
-    client = EmergencyGrpcClient()
-    try:
-        yield client
-    finally:
-        await client.close()
+# Tag de cache d'une zone, invalidé par les créations et changements de statut
+ALERTS_CACHE_TAG = "emergency.alerts"
+
+def alerts_cache_tag(zone: str) -> str:
+    return f"{ALERTS_CACHE_TAG}:{zone}"
+
+# Dependency pour le client gRPC (channel partagé)
+async def get_emergency_client(registry: ClientRegistry = Depends(get_registry)):
+    return registry.emergency
 
 @router.get("/", summary="Page d'accueil du service Urgences")
 async def emergency_home():
@@ -30,8 +42,11 @@ async def emergency_home():
         "endpoints": [
             "/emergency/alerts",
             "/emergency/alerts/active/{zone}",
+            "/emergency/alerts/active?zones=...",
             "/emergency/alerts/{alert_id}/status",
-            "/emergency/alerts/history"
+            "/emergency/alerts/history",
+            "/emergency/alerts/subscribe?zones=... (SSE)",
+            "/emergency/alerts/ws?zones=... (WebSocket)"
         ],
         "alert_types": [
             "ACCIDENT", "FIRE", "AMBULANCE_REQUEST",
@@ -50,7 +65,8 @@ async def emergency_home():
 )
 async def create_alert(
     request: CreateAlertRequest,
-    client: EmergencyGrpcClient = Depends(get_emergency_client)
+    client: EmergencyGrpcClient = Depends(get_emergency_client),
+    cache: ResponseCache = Depends(get_response_cache)
 ):
     """
     Crée une nouvelle alerte d'urgence.
@@ -80,8 +96,40 @@ async def create_alert(
         reporter_phone=request.reporter_phone,
         affected_people=request.affected_people
     )
+    cache.invalidate(alerts_cache_tag(request.location.zone))
     return result
 
+@router.get(
+    "/alerts/active",
+    response_model=Dict[str, List[dict]],
+    summary="Alertes actives de plusieurs zones"
+)
+async def get_active_alerts_by_zones(
+    zones: List[str] = Query(..., description="Zones à interroger (paramètre répétable ou liste séparée par des virgules)"),
+    alert_type: Optional[str] = Query(None, description="Type d'alerte à filtrer"),
+    min_priority: Optional[str] = Query(None, description="Priorité minimale"),
+    client: EmergencyGrpcClient = Depends(get_emergency_client)
+):
+    """
+    Récupère les alertes actives de plusieurs zones en un seul appel gRPC,
+    groupées par zone.
+    
+    - **zones**: `?zones=downtown&zones=industrial` ou `?zones=downtown,industrial`
+    - **alert_type** (optionnel): Filtrer par type d'alerte
+    - **min_priority** (optionnel): Priorité minimale (LOW, MEDIUM, HIGH, CRITICAL)
+    """
+    zone_list = [zone.strip() for value in zones for zone in value.split(",") if zone.strip()]
+    if not zone_list:
+        raise HTTPException(status_code=400, detail="Au moins une zone est requise")
+    
+    logger.info(f"Gateway: Getting active alerts for zones {zone_list}")
+    result = await client.get_active_alerts_batch(
+        zones=zone_list,
+        alert_type=alert_type,
+        min_priority=min_priority
+    )
+    return passthrough(result)
+
 @router.get(
     "/alerts/active/{zone}",
     response_model=List[dict],
@@ -89,9 +137,11 @@ async def create_alert(
 )
 async def get_active_alerts(
     zone: str,
+    response: Response,
     alert_type: Optional[str] = Query(None, description="Type d'alerte à filtrer"),
     min_priority: Optional[str] = Query(None, description="Priorité minimale"),
-    client: EmergencyGrpcClient = Depends(get_emergency_client)
+    client: EmergencyGrpcClient = Depends(get_emergency_client),
+    registry: ClientRegistry = Depends(get_registry)
 ):
     """
     Récupère toutes les alertes actives pour une zone donnée.
@@ -99,14 +149,21 @@ async def get_active_alerts(
     - **zone**: Nom de la zone
     - **alert_type** (optionnel): Filtrer par type d'alerte
     - **min_priority** (optionnel): Priorité minimale (LOW, MEDIUM, HIGH, CRITICAL)
+    
+    Servi depuis l'instantané de l'état de la ville (tenu à jour par
+    SubscribeAlerts) tant qu'il est frais, sinon par un appel gRPC.
     """
     logger.info(f"Gateway: Getting active alerts for zone {zone}")
+    section = city_state_section(registry, "alerts", zone)
+    if section is not None:
+        annotate_snapshot(response, section)
+        return passthrough(filter_alerts(section.value.values(), alert_type, min_priority), response)
     result = await client.get_active_alerts(
         zone=zone,
         alert_type=alert_type,
         min_priority=min_priority
     )
-    return result
+    return passthrough(result)
 
 @router.put(
     "/alerts/{alert_id}/status",
@@ -116,7 +173,8 @@ async def get_active_alerts(
 async def update_alert_status(
     alert_id: str,
     request: UpdateAlertStatusRequest,
-    client: EmergencyGrpcClient = Depends(get_emergency_client)
+    client: EmergencyGrpcClient = Depends(get_emergency_client),
+    cache: ResponseCache = Depends(get_response_cache)
 ):
     """
     Met à jour le statut d'une alerte existante.
@@ -134,6 +192,7 @@ async def update_alert_status(
         assigned_team=request.assigned_team or "",
         notes=request.notes or ""
     )
+    cache.invalidate(alerts_cache_tag(result["location"]["zone"]))
     return result
 
 @router.post(
@@ -143,6 +202,8 @@ async def update_alert_status(
 )
 async def get_alert_history(
     request: AlertHistoryRequest,
+    stream: bool = Query(False, description="Réponse NDJSON, une alerte par ligne"),
+    accept: Optional[str] = Header(None, include_in_schema=False),
     client: EmergencyGrpcClient = Depends(get_emergency_client)
 ):
     """
@@ -153,7 +214,20 @@ async def get_alert_history(
     - **start_date** (optionnel): Date de début (timestamp Unix)
     - **end_date** (optionnel): Date de fin (timestamp Unix)
     - **limit**: Nombre maximum de résultats (défaut: 100)
+    
+    Avec `?stream=true` ou `Accept: application/x-ndjson`, les alertes sont
+    renvoyées une par ligne au fil du flux gRPC, sans les statistiques.
     """
+    if wants_ndjson(stream, accept):
+        logger.info("Gateway: Streaming alert history")
+        return await ndjson_response(client.stream_alert_history(
+            zone=request.zone,
+            alert_type=request.alert_type.value if request.alert_type else None,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            limit=request.limit
+        ))
+    
     logger.info("Gateway: Getting alert history")
     result = await client.get_alert_history(
         zone=request.zone,
@@ -162,7 +236,131 @@ async def get_alert_history(
         end_date=request.end_date,
         limit=request.limit
     )
-    return result
+    return passthrough(result)
+
+def _subscription_zones(zones: List[str]) -> List[str]:
+    """`?zones=a&zones=b` ou `?zones=a,b`"""
+    return [zone.strip() for value in zones for zone in value.split(",") if zone.strip()]
+
+async def _sse_events(subscribe: Callable[[], Subscription], unsubscribe) -> AsyncIterator[bytes]:
+    """
+    Messages de l'abonnement au format SSE, avec heartbeats quand le flux est calme.
+    
+    L'abonnement n'est pris qu'au premier morceau : une réponse dont le corps
+    n'est jamais lu (client parti avant) ne laisse pas d'abonné dans le hub.
+    """
+    subscription = subscribe()
+    try:
+        yield sse_retry(3000)
+        while True:
+            message = await subscription.next(settings.SUBSCRIPTION_HEARTBEAT)
+            if message is None:
+                yield sse_comment("heartbeat")
+                continue
+            event, data = message
+            yield sse_event(event, data)
+    except SubscriptionClosed as e:
+        # EventSource se reconnecte et reçoit à nouveau les alertes actives
+        yield sse_event("closed", {"reason": e.reason})
+    finally:
+        unsubscribe(subscription)
+
+@router.get(
+    "/alerts/subscribe",
+    summary="Flux temps réel des alertes (Server-Sent Events)",
+    response_class=EventStreamResponse
+)
+async def subscribe_alerts_sse(
+    zones: List[str] = Query(..., description="Zones suivies (paramètre répétable ou liste séparée par des virgules)"),
+    alert_type: Optional[List[AlertType]] = Query(None, description="Types d'alerte (répétable)"),
+    min_priority: Optional[Priority] = Query(None, description="Priorité minimale"),
+    registry: ClientRegistry = Depends(get_registry)
+):
+    """
+    Alertes des zones en temps réel, au format `text/event-stream`.
+    
+    Les alertes actives correspondantes sont envoyées d'abord, puis chaque
+    création ou changement de statut (événement `alert`). Tous les clients
+    ayant les mêmes filtres partagent un seul flux gRPC `SubscribeAlerts`.
+    Un événement `status` signale une reconnexion au service Urgences ; un
+    client trop lent reçoit `closed` puis se reconnecte.
+    """
+    zone_list = _subscription_zones(zones)
+    if not zone_list:
+        raise HTTPException(status_code=400, detail="Au moins une zone est requise")
+    
+    logger.info(f"Gateway: SSE subscription to alerts of {zone_list}")
+    return EventStreamResponse(
+        _sse_events(
+            lambda: registry.subscribe_alerts(
+                zone_list,
+                [value.value for value in alert_type or []],
+                min_priority.value if min_priority else None
+            ),
+            registry.alert_subscriptions.unsubscribe
+        )
+    )
+
+async def _forward_alerts_ws(
+    websocket: WebSocket,
+    registry: ClientRegistry,
+    zone_list: List[str],
+    alert_type: Optional[List[AlertType]],
+    min_priority: Optional[Priority]
+):
+    """Relaie l'abonnement aux alertes sur la WebSocket jusqu'à sa fermeture"""
+    logger.info(f"Gateway: WebSocket subscription to alerts of {zone_list}")
+    subscription = registry.subscribe_alerts(
+        zone_list,
+        [value.value for value in alert_type or []],
+        min_priority.value if min_priority else None
+    )
+    try:
+        while True:
+            message = await subscription.next(settings.SUBSCRIPTION_HEARTBEAT)
+            event, data = message if message is not None else ("heartbeat", None)
+            await websocket.send_text(
+                orjson.dumps({"event": event, "data": data}, default=json_default).decode()
+            )
+    except SubscriptionClosed as e:
+        await websocket.close(code=1013, reason=e.reason)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        registry.alert_subscriptions.unsubscribe(subscription)
+
+@router.websocket("/alerts/ws")
+async def subscribe_alerts_ws(
+    websocket: WebSocket,
+    zones: List[str] = Query(...),
+    alert_type: Optional[List[AlertType]] = Query(None),
+    min_priority: Optional[Priority] = Query(None)
+):
+    """
+    Alertes des zones en temps réel sur WebSocket.
+    
+    Mêmes filtres et même flux partagé que `/alerts/subscribe` ; chaque
+    message est un objet `{"event": ..., "data": ...}`. Code de fermeture
+    1013 (réessayer plus tard) pour un client trop lent, un arrêt ou quand
+    le plafond d'abonnements (`ADMISSION_MAX_SUBSCRIPTIONS`) est atteint.
+    """
+    zone_list = _subscription_zones(zones)
+    if not zone_list:
+        await websocket.close(code=1008, reason="Au moins une zone est requise")
+        return
+    
+    registry = websocket.app.state.clients
+    await websocket.accept()
+    # Hors du middleware d'admission : même plafond d'abonnements que le SSE
+    admission = getattr(websocket.app.state, "admission", None)
+    async with AsyncExitStack() as slots:
+        if admission is not None:
+            try:
+                await slots.enter_async_context(admission.subscription())
+            except AdmissionRejected as e:
+                await websocket.close(code=1013, reason=f"Gateway saturée ({e.scope})")
+                return
+        await _forward_alerts_ws(websocket, registry, zone_list, alert_type, min_priority)
 
 @router.get(
     "/stats/{zone}",
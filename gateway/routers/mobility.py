@@ -1,22 +1,22 @@
 """Router FastAPI pour le service Mobilité (REST)"""
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
 from typing import List
-from  clients import MobilityRestClient
+from  config import settings
+from  clients import MobilityRestClient, ClientRegistry, get_registry, city_state_section, annotate_snapshot
 from  models.mobility import (
     LigneCreate, LigneUpdate, LigneResponse,
     HorairesResponse, TraficResponse, DisponibiliteResponse
 )
-from  utils import logger
+from  utils import logger, ResponseCache, get_response_cache, passthrough
 
 router = APIRouter(prefix="/mobility", tags=["Mobilité"])
 
-# Dependency pour le client
-async def get_mobility_client():
-    client = MobilityRestClient()
-    try:
-        yield client
-    finally:
-        await client.close()
+# Tag de cache : toute mutation d'une ligne invalide lignes, trafic et disponibilités
+LIGNES_CACHE_TAG = "mobility.lignes"
+
+# Dependency pour le client (partagé, créé au démarrage)
+async def get_mobility_client(registry: ClientRegistry = Depends(get_registry)):
+    return registry.mobility
 
 @router.get("/", summary="Page d'accueil du service Mobilité")
 async def mobility_home():
@@ -49,7 +49,7 @@ async def get_horaires(
     """
     logger.info(f"Gateway: Getting horaires for ligne {ligne}")
     result = await client.get_horaires(ligne)
-    return result
+    return passthrough(result)
 
 @router.get(
     "/trafic",
@@ -57,16 +57,28 @@ async def get_horaires(
     summary="État du trafic en temps réel"
 )
 async def get_trafic(
-    client: MobilityRestClient = Depends(get_mobility_client)
+    response: Response,
+    client: MobilityRestClient = Depends(get_mobility_client),
+    registry: ClientRegistry = Depends(get_registry),
+    cache: ResponseCache = Depends(get_response_cache)
 ):
     """
     Récupère l'état actuel du trafic pour toutes les lignes.
     
     États possibles: normal, ralenti, perturbé, interrompu
+    
+    Servi depuis l'instantané de l'état de la ville tant qu'il est frais.
     """
     logger.info("Gateway: Getting traffic status")
-    result = await client.get_trafic()
-    return result
+    section = city_state_section(registry, "trafic")
+    if section is not None:
+        annotate_snapshot(response, section)
+        return passthrough(section.value, response)
+    result = await cache.cached(
+        response, "mobility.trafic", client.get_trafic,
+        ttl=settings.CACHE_TTL_MOBILITY_TRAFIC, tags=[LIGNES_CACHE_TAG]
+    )
+    return passthrough(result, response)
 
 @router.get(
     "/disponibilite",
@@ -74,14 +86,26 @@ async def get_trafic(
     summary="Disponibilité des véhicules"
 )
 async def get_disponibilite(
-    client: MobilityRestClient = Depends(get_mobility_client)
+    response: Response,
+    client: MobilityRestClient = Depends(get_mobility_client),
+    registry: ClientRegistry = Depends(get_registry),
+    cache: ResponseCache = Depends(get_response_cache)
 ):
     """
     Récupère la disponibilité actuelle des véhicules par type de transport.
+    
+    Servi depuis l'instantané de l'état de la ville tant qu'il est frais.
     """
     logger.info("Gateway: Getting vehicle availability")
-    result = await client.get_disponibilite()
-    return result
+    section = city_state_section(registry, "disponibilite")
+    if section is not None:
+        annotate_snapshot(response, section)
+        return passthrough(section.value, response)
+    result = await cache.cached(
+        response, "mobility.disponibilite", client.get_disponibilite,
+        ttl=settings.CACHE_TTL_MOBILITY_DISPONIBILITE, tags=[LIGNES_CACHE_TAG]
+    )
+    return passthrough(result, response)
 
 @router.get(
     "/lignes",
@@ -89,14 +113,19 @@ async def get_disponibilite(
     summary="Liste toutes les lignes"
 )
 async def list_lignes(
-    client: MobilityRestClient = Depends(get_mobility_client)
+    response: Response,
+    client: MobilityRestClient = Depends(get_mobility_client),
+    cache: ResponseCache = Depends(get_response_cache)
 ):
     """
     Liste toutes les lignes de transport configurées.
     """
     logger.info("Gateway: Listing all lignes")
-    result = await client.get_lignes()
-    return result
+    result = await cache.cached(
+        response, "mobility.lignes", client.get_lignes,
+        ttl=settings.CACHE_TTL_MOBILITY_LIGNES, tags=[LIGNES_CACHE_TAG]
+    )
+    return passthrough(result, response)
 
 @router.get(
     "/lignes/{ligne_id}",
@@ -105,14 +134,19 @@ async def list_lignes(
 )
 async def get_ligne(
     ligne_id: str,
-    client: MobilityRestClient = Depends(get_mobility_client)
+    response: Response,
+    client: MobilityRestClient = Depends(get_mobility_client),
+    cache: ResponseCache = Depends(get_response_cache)
 ):
     """
     Récupère les détails d'une ligne par son ID.
     """
     logger.info(f"Gateway: Getting ligne {ligne_id}")
-    result = await client.get_ligne(ligne_id)
-    return result
+    result = await cache.cached(
+        response, f"mobility.lignes:{ligne_id}", lambda: client.get_ligne(ligne_id),
+        ttl=settings.CACHE_TTL_MOBILITY_LIGNES, tags=[LIGNES_CACHE_TAG]
+    )
+    return passthrough(result, response)
 
 @router.post(
     "/lignes",
@@ -122,13 +156,15 @@ async def get_ligne(
 )
 async def create_ligne(
     ligne: LigneCreate,
-    client: MobilityRestClient = Depends(get_mobility_client)
+    client: MobilityRestClient = Depends(get_mobility_client),
+    cache: ResponseCache = Depends(get_response_cache)
 ):
     """
     Crée une nouvelle ligne de transport.
     """
     logger.info(f"Gateway: Creating ligne {ligne.numero}")
     result = await client.create_ligne(ligne.model_dump())
+    cache.invalidate(LIGNES_CACHE_TAG)
     return result
 
 @router.put(
@@ -139,7 +175,8 @@ async def create_ligne(
 async def update_ligne(
     ligne_id: str,
     ligne: LigneUpdate,
-    client: MobilityRestClient = Depends(get_mobility_client)
+    client: MobilityRestClient = Depends(get_mobility_client),
+    cache: ResponseCache = Depends(get_response_cache)
 ):
     """
     Met à jour une ligne existante.
@@ -149,6 +186,7 @@ async def update_ligne(
         ligne_id,
         ligne.model_dump(exclude_unset=True)
     )
+    cache.invalidate(LIGNES_CACHE_TAG)
     return result
 
 @router.delete(
@@ -157,11 +195,13 @@ async def update_ligne(
 )
 async def delete_ligne(
     ligne_id: str,
-    client: MobilityRestClient = Depends(get_mobility_client)
+    client: MobilityRestClient = Depends(get_mobility_client),
+    cache: ResponseCache = Depends(get_response_cache)
 ):
     """
     Supprime une ligne de transport.
     """
     logger.info(f"Gateway: Deleting ligne {ligne_id}")
     result = await client.delete_ligne(ligne_id)
+    cache.invalidate(LIGNES_CACHE_TAG)
     return result
\ No newline at end of file
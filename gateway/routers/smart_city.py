@@ -1,42 +1,33 @@
 """Router FastAPI pour le workflow métier Smart City - ORCHESTRATION COMPLÈTE"""
+import asyncio
 import time
+from dataclasses import dataclass
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict, Any
-from  clients import (
-    MobilityRestClient,
-    AirQualitySoapClient,
-    EmergencyGrpcClient,
-    UrbanEventsGraphQLClient
-)
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from typing import List, Dict, Any, Optional
+from  clients import ClientRegistry, HealthProber, get_registry
 from  models.smart_city import (
     PlanTripRequest, PlanTripResponse, TripAnalysis,
+    PlanTripBatchRequest, PlanTripBatchResponse,
     AirQualityInfo, TransportInfo, AlertInfo, EventInfo,
     RouteRecommendation, HealthCheckResponse
 )
-from  utils import logger
+from  config import settings
+from  utils import logger, fan_out, FanOutResult, ResponseCache, get_response_cache
+from  utils.metrics import PLAN_TRIP_WARNINGS
+from  utils.response_cache import CACHE_MISS
+from .mobility import LIGNES_CACHE_TAG
+from .emergency import alerts_cache_tag
+from .urban_events import EVENTS_CACHE_TAG
 
 router = APIRouter(prefix="/smart-city", tags=["Smart City Workflow"])
 
-# Dependencies pour tous les clients
-async def get_all_clients():
-    """Initialise tous les clients nécessaires au workflow"""
-    mobility = MobilityRestClient()
-    air_quality = AirQualitySoapClient()
-    emergency = EmergencyGrpcClient()
-    urban_events = UrbanEventsGraphQLClient()
-    
-    try:
-        yield {
-            "mobility": mobility,
-            "air_quality": air_quality,
-            "emergency": emergency,
-            "urban_events": urban_events
-        }
-    finally:
-        await mobility.close()
-        await emergency.close()
-        await urban_events.close()
+# Invalidé par l'instantané quand le trafic ou la disponibilité change
+PLAN_TRIP_MOBILITY_TAG = "smart-city.plan-trip.mobility"
+
+def plan_trip_zone_tag(zone: str) -> str:
+    """Invalidé par l'instantané quand l'AQI ou les événements en cours de la zone changent"""
+    return f"smart-city.plan-trip.zone:{zone}"
 
 @router.get("/", summary="Page d'accueil Smart City")
 async def smart_city_home():
@@ -51,6 +42,16 @@ async def smart_city_home():
                 "method": "POST",
                 "description": "Planification intelligente de trajet avec analyse multi-services"
             },
+            {
+                "endpoint": "/smart-city/plan-trip/batch",
+                "method": "POST",
+                "description": "Planification de plusieurs trajets sur des données collectées une seule fois"
+            },
+            {
+                "endpoint": "/smart-city/city-state",
+                "method": "GET",
+                "description": "Âge des sections de l'instantané de l'état de la ville"
+            },
             {
                 "endpoint": "/smart-city/health",
                 "method": "GET",
@@ -66,7 +67,9 @@ async def smart_city_home():
 )
 async def plan_trip(
     request: PlanTripRequest,
-    clients: Dict[str, Any] = Depends(get_all_clients)
+    response: Response,
+    registry: ClientRegistry = Depends(get_registry),
+    cache: ResponseCache = Depends(get_response_cache)
 ):
     """
     ## 🏙️ WORKFLOW MÉTIER COMPLET - PLANIFICATION INTELLIGENTE DE TRAJET
@@ -94,288 +97,237 @@ async def plan_trip(
       "preferences": ["metro", "bus"]
     }
     ```
+    
+    ### ⚡ Cache:
+    Les plans sont mis en cache par paire de zones, préférences et créneau de
+    `PLAN_TRIP_CACHE_BUCKET_MINUTES` minutes pour `heure_depart`. Une alerte
+    créée ou mise à jour dans l'une des zones, une modification de ligne ou
+    d'événement, ou un changement du trafic, de la disponibilité, de l'AQI,
+    des événements ou des alertes relevé par l'instantané invalide les plans
+    concernés. `cache_status` et
+    `data_age_seconds` (ainsi que les en-têtes `X-Cache` et `Age`) indiquent
+    l'origine et l'âge des données. Un plan incomplet n'est pas mis en cache.
+    
+    ### 🗺️ Instantané:
+    Un plan calculé lit d'abord l'instantané de l'état de la ville, tenu à
+    jour en arrière-plan : seuls les services dont une section manque ou a
+    dépassé `CITY_STATE_MAX_AGE` secondes sont appelés. `data_sources`
+    indique, par service, `city_state` ou `live`.
     """
     start_time = time.time()
-    logger.info(f"🚀 Starting trip planning: {request.zone_depart} → {request.zone_arrivee}")
+    key = plan_trip_cache_key(request)
+    plan, status, age = await cache.get_or_fetch(
+        key,
+        lambda: _compute_plan(request, registry),
+        ttl=settings.CACHE_TTL_PLAN_TRIP,
+        tags=[
+            LIGNES_CACHE_TAG,
+            EVENTS_CACHE_TAG,
+            PLAN_TRIP_MOBILITY_TAG,
+            plan_trip_zone_tag(request.zone_depart),
+            plan_trip_zone_tag(request.zone_arrivee),
+            alerts_cache_tag(request.zone_depart),
+            alerts_cache_tag(request.zone_arrivee)
+        ],
+        store_if=lambda plan: not plan.warnings
+    )
+    cache.annotate(response, key, status, age)
     
-    warnings = []
+    if status != CACHE_MISS:
+        logger.info(f"⚡ Trip plan served from cache ({status}, {age:.0f}s old): {key}")
+        plan = _for_departure(plan, request.heure_depart)
+    return plan.model_copy(update={
+        "processing_time_ms": round((time.time() - start_time) * 1000, 2),
+        "cache_status": status,
+        "data_age_seconds": round(age, 1)
+    })
+
+@router.post(
+    "/plan-trip/batch",
+    response_model=PlanTripBatchResponse,
+    summary="🚀 Planifier plusieurs trajets"
+)
+async def plan_trip_batch(
+    request: PlanTripBatchRequest,
+    registry: ClientRegistry = Depends(get_registry)
+):
+    """
+    Planifie plusieurs trajets (ex: pour de nombreux utilisateurs) en une requête.
     
-    try:
-        # ============================================================
-        # ÉTAPE 1: COLLECTE PARALLÈLE DES DONNÉES DES 4 MICROSERVICES
-        # ============================================================
-        
-        logger.info("📡 Step 1/5: Collecting data from all microservices...")
-        
-        # 1.1 - Qualité de l'air (SOAP)
-        try:
-            air_depart = await clients["air_quality"].get_aqi(request.zone_depart)
-            air_arrivee = await clients["air_quality"].get_aqi(request.zone_arrivee)
-        except Exception as e:
-            logger.error(f"Air quality service error: {str(e)}")
-            warnings.append("⚠️ Données de qualité de l'air indisponibles")
-            air_depart = {"zone": request.zone_depart, "aqi": 0, "category": "Unknown", "description": "N/A", "timestamp": datetime.now().isoformat()}
-            air_arrivee = {"zone": request.zone_arrivee, "aqi": 0, "category": "Unknown", "description": "N/A", "timestamp": datetime.now().isoformat()}
-        
-        # 1.2 - Mobilité (REST)
-        try:
-            trafic_data = await clients["mobility"].get_trafic()
-            disponibilite_data = await clients["mobility"].get_disponibilite()
-        except Exception as e:
-            logger.error(f"Mobility service error: {str(e)}")
-            warnings.append("⚠️ Données de mobilité indisponibles")
-            trafic_data = {"lignes": []}
-            disponibilite_data = {"vehicules": []}
-        
-        # 1.3 - Alertes d'urgence (gRPC)
-        try:
-            alertes_depart = await clients["emergency"].get_active_alerts(request.zone_depart)
-            alertes_arrivee = await clients["emergency"].get_active_alerts(request.zone_arrivee)
-            all_alerts = alertes_depart + alertes_arrivee
-        except Exception as e:
-            logger.error(f"Emergency service error: {str(e)}")
-            warnings.append("⚠️ Données d'urgence indisponibles")
-            all_alerts = []
-        
-        # 1.4 - Événements urbains (GraphQL)
+    Les zones distinctes de tous les trajets sont collectées une seule fois :
+    un AQI et une lecture d'événements par zone, un seul RPC d'alertes, un
+    seul appel trafic et disponibilité. Chaque trajet est ensuite analysé sur
+    ces données partagées, comme par `/smart-city/plan-trip`.
+    
+    `results` suit l'ordre de `trips`. Un trajet dont l'analyse échoue a
+    `success: false` et son erreur dans `message`, sans affecter les autres ;
+    un service indisponible donne un warning aux seuls trajets qui traversent
+    les zones concernées. Au plus `PLAN_TRIP_BATCH_MAX_TRIPS` trajets par appel.
+    """
+    if len(request.trips) > settings.PLAN_TRIP_BATCH_MAX_TRIPS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Au plus {settings.PLAN_TRIP_BATCH_MAX_TRIPS} trajets par appel ({len(request.trips)} reçus)"
+        )
+    
+    zones = list(dict.fromkeys(zone for trip in request.trips for zone in (trip.zone_depart, trip.zone_arrivee)))
+    logger.info(f"🚀 Starting batch trip planning: {len(request.trips)} trips over {len(zones)} zones")
+    data = await _collect_city_data(zones, registry)
+    
+    results = []
+    for trip in request.trips:
         try:
-            events_depart = await clients["urban_events"].get_events(zone_id=request.zone_depart, status="IN_PROGRESS")
-            events_arrivee = await clients["urban_events"].get_events(zone_id=request.zone_arrivee, status="IN_PROGRESS")
-            all_events = events_depart + events_arrivee
+            results.append(_analyse_trip(trip, data))
         except Exception as e:
-            logger.error(f"Urban events service error: {str(e)}")
-            warnings.append("⚠️ Données d'événements indisponibles")
-            all_events = []
-        
-        # ============================================================
-        # ÉTAPE 2: ANALYSE DE LA QUALITÉ DE L'AIR
-        # ============================================================
-        
-        logger.info("🌫️ Step 2/5: Analyzing air quality...")
-        
-        def get_air_recommendation(aqi: int) -> str:
-            if aqi <= 50:
-                return "✅ Qualité excellente - Tous modes de transport recommandés"
-            elif aqi <= 100:
-                return "✅ Qualité acceptable - Privilégiez les transports fermés"
-            elif aqi <= 150:
-                return "⚠️ Qualité médiocre - Évitez les modes de transport ouverts"
-            elif aqi <= 200:
-                return "⚠️ Mauvaise qualité - Privilégiez fortement les transports fermés"
-            else:
-                return "🚨 Qualité très mauvaise - Limitez vos déplacements"
-        
-        air_quality_depart = AirQualityInfo(
-            zone=air_depart["zone"],
-            aqi=air_depart["aqi"],
-            category=air_depart["category"],
-            description=air_depart["description"],
-            timestamp=air_depart["timestamp"],
-            recommendation=get_air_recommendation(air_depart["aqi"])
-        )
-        
-        air_quality_arrivee = AirQualityInfo(
-            zone=air_arrivee["zone"],
-            aqi=air_arrivee["aqi"],
-            category=air_arrivee["category"],
-            description=air_arrivee["description"],
-            timestamp=air_arrivee["timestamp"],
-            recommendation=get_air_recommendation(air_arrivee["aqi"])
-        )
-        
-        # Comparaison
-        diff_aqi = abs(air_depart["aqi"] - air_arrivee["aqi"])
-        if air_depart["aqi"] < air_arrivee["aqi"]:
-            comparison = f"⚠️ Attention: La qualité de l'air se dégrade vers {request.zone_arrivee} (différence: {diff_aqi} points AQI)"
-        elif air_depart["aqi"] > air_arrivee["aqi"]:
-            comparison = f"✅ Bonne nouvelle: La qualité de l'air s'améliore vers {request.zone_arrivee} (différence: {diff_aqi} points AQI)"
-        else:
-            comparison = f"➡️ La qualité de l'air est similaire dans les deux zones"
-        
-        # ============================================================
-        # ÉTAPE 3: ANALYSE DES TRANSPORTS DISPONIBLES
-        # ============================================================
-        
-        logger.info("🚆 Step 3/5: Analyzing available transportation...")
-        
-        transports_disponibles = []
-        
-        for ligne in trafic_data.get("lignes", []):
-            # Vérifier si ce type de transport est dans les préférences
-            if ligne.get("ligne") and any(pref in ligne.get("ligne", "").lower() for pref in request.preferences):
-                # Trouver la disponibilité correspondante
-                dispo = "Inconnue"
-                for vehicule in disponibilite_data.get("vehicules", []):
-                    if vehicule.get("type_transport") in ligne.get("ligne", "").lower():
-                        dispo = f"{vehicule.get('taux_disponibilite', 0)}%"
-                        break
-                
-                transports_disponibles.append(TransportInfo(
-                    ligne=ligne.get("ligne", "N/A"),
-                    type_transport=ligne.get("ligne", "N/A").split()[0],
-                    etat_trafic=ligne.get("etat", "unknown"),
-                    disponibilite=dispo,
-                    horaires_prochain_passage=[request.heure_depart, "14:45", "15:00"]
-                ))
-        
-        # ============================================================
-        # ÉTAPE 4: ANALYSE DES ALERTES ET ÉVÉNEMENTS
-        # ============================================================
-        
-        logger.info("🚨 Step 4/5: Analyzing alerts and events...")
-        
-        # Alertes d'urgence
-        alertes_actives = []
-        niveau_alerte = "LOW"
-        
-        for alert in all_alerts:
-            alertes_actives.append(AlertInfo(
-                alert_id=alert["alert_id"],
-                type=alert["type"],
-                description=alert["description"],
-                priority=alert["priority"],
-                zone=alert["location"]["zone"],
-                created_at=alert["created_at"]
-            ))
-            
-            if alert["priority"] == "CRITICAL":
-                niveau_alerte = "CRITICAL"
-            elif alert["priority"] == "HIGH" and niveau_alerte != "CRITICAL":
-                niveau_alerte = "HIGH"
-            elif alert["priority"] == "MEDIUM" and niveau_alerte == "LOW":
-                niveau_alerte = "MEDIUM"
-        
-        # Événements urbains
-        evenements_impactants = []
-        for event in all_events:
-            evenements_impactants.append(EventInfo(
-                event_id=event["id"],
-                name=event["name"],
-                description=event["description"],
-                priority=event["priority"],
-                status=event["status"],
-                zone=event.get("zone", {}).get("name", "N/A") if event.get("zone") else "N/A",
-                date=event["date"]
+            logger.error(f"Error in trip planning {trip.zone_depart} → {trip.zone_arrivee}: {str(e)}")
+            results.append(PlanTripResponse(
+                success=False,
+                message=f"Erreur lors de la planification du trajet: {str(e)}",
+                processing_time_ms=round((time.time() - data.started_at) * 1000, 2),
+                data_sources=data.sources
             ))
-        
-        # ============================================================
-        # ÉTAPE 5: GÉNÉRATION DES RECOMMANDATIONS INTELLIGENTES
-        # ============================================================
-        
-        logger.info("🎯 Step 5/5: Generating intelligent recommendations...")
-        
-        # Recommandation principale
-        principale_raison = []
-        
-        # Facteur 1: Qualité de l'air
-        if air_depart["aqi"] > 150 or air_arrivee["aqi"] > 150:
-            principale_raison.append("pollution élevée")
-        
-        # Facteur 2: Alertes critiques
-        if niveau_alerte in ["CRITICAL", "HIGH"]:
-            principale_raison.append(f"alertes {niveau_alerte.lower()}")
-        
-        # Facteur 3: Trafic perturbé
-        trafic_perturbe = any(t.etat_trafic in ["perturbé", "interrompu"] for t in transports_disponibles)
-        if trafic_perturbe:
-            principale_raison.append("trafic perturbé")
-        
-        # Construire la recommandation
-        if principale_raison:
-            recommandation_type = "alternatif"
-            recommandation_desc = f"Itinéraire alternatif recommandé en raison de: {', '.join(principale_raison)}"
-            lignes_suggerees = [t.ligne for t in transports_disponibles if t.etat_trafic == "normal"][:2]
-        else:
-            recommandation_type = "direct"
-            recommandation_desc = "Itinéraire direct recommandé - Conditions favorables"
-            lignes_suggerees = [t.ligne for t in transports_disponibles][:2]
-        
-        if not lignes_suggerees:
-            lignes_suggerees = ["Marche à pied recommandée", "Vélo en libre-service"]
-        
-        recommandation_principale = RouteRecommendation(
-            type=recommandation_type,
-            description=recommandation_desc,
-            raison=", ".join(principale_raison) if principale_raison else "Aucun problème détecté",
-            lignes_suggerees=lignes_suggerees,
-            duree_estimee="25-30 minutes"
-        )
-        
-        # Recommandations alternatives
-        alternatives = [
-            RouteRecommendation(
-                type="eco-friendly",
-                description="Trajet écologique via zones à faible pollution",
-                raison="Minimise l'exposition à la pollution",
-                lignes_suggerees=["Métro express", "Tramway vert"],
-                duree_estimee="35-40 minutes"
-            ),
-            RouteRecommendation(
-                type="rapide",
-                description="Trajet le plus rapide sans tenir compte de la qualité de l'air",
-                raison="Optimise le temps de trajet",
-                lignes_suggerees=["Bus express", "Métro direct"],
-                duree_estimee="20-25 minutes"
-            )
+    
+    failed = sum(1 for result in results if not result.success)
+    processing_time = (time.time() - data.started_at) * 1000
+    logger.info(f"✅ Batch trip planning completed in {processing_time:.2f}ms ({failed} failed)")
+    return PlanTripBatchResponse(
+        success=failed == 0,
+        total=len(results),
+        failed=failed,
+        results=results,
+        zones=zones,
+        processing_time_ms=round(processing_time, 2),
+        processing_time_by_service_ms={
+            service: round(result.duration_ms, 2)
+            for service, result in data.collected.items()
+        },
+        data_sources=data.sources
+    )
+
+def plan_trip_cache_key(request: PlanTripRequest) -> str:
+    """Clé plan-trip : zones, préférences et début du créneau de `heure_depart`"""
+    hours, minutes = (int(part) for part in request.heure_depart.split(":"))
+    bucket = settings.PLAN_TRIP_CACHE_BUCKET_MINUTES
+    slot = (hours * 60 + minutes) // bucket * bucket
+    preferences = ",".join(sorted(set(request.preferences or [])))
+    return f"plan_trip:{request.zone_depart}:{request.zone_arrivee}:{preferences}:{slot // 60:02d}h{slot % 60:02d}"
+
+def _for_departure(plan: PlanTripResponse, heure_depart: str) -> PlanTripResponse:
+    """Plan calculé pour une autre heure du même créneau : champs liés à l'heure exacte réécrits"""
+    if plan.analysis is None:
+        return plan
+    analysis = plan.analysis.model_copy(update={
+        "heure_demandee": heure_depart,
+        "transports_disponibles": [
+            transport.model_copy(update={
+                "horaires_prochain_passage": [heure_depart, *transport.horaires_prochain_passage[1:]]
+            })
+            for transport in plan.analysis.transports_disponibles
         ]
-        
-        # Niveau de confort global
-        confort_score = 100
-        confort_score -= (air_depart["aqi"] + air_arrivee["aqi"]) / 10
-        confort_score -= len(alertes_actives) * 10
-        confort_score -= len(evenements_impactants) * 5
-        
-        if confort_score >= 80:
-            niveau_confort = "excellent"
-        elif confort_score >= 60:
-            niveau_confort = "bon"
-        elif confort_score >= 40:
-            niveau_confort = "moyen"
-        else:
-            niveau_confort = "difficile"
-        
-        # Conseil principal
-        if niveau_confort in ["excellent", "bon"]:
-            conseil = f"✅ Conditions favorables pour votre trajet. Bon voyage!"
-        elif niveau_confort == "moyen":
-            conseil = f"⚠️ Conditions acceptables mais soyez vigilant aux perturbations."
-        else:
-            conseil = f"🚨 Conditions difficiles. Envisagez de reporter votre déplacement si possible."
-        
-        # ============================================================
-        # CONSTRUCTION DE LA RÉPONSE FINALE
-        # ============================================================
-        
-        analysis = TripAnalysis(
-            zone_depart=request.zone_depart,
-            zone_arrivee=request.zone_arrivee,
-            heure_demandee=request.heure_depart,
-            air_quality_depart=air_quality_depart,
-            air_quality_arrivee=air_quality_arrivee,
-            air_quality_comparison=comparison,
-            transports_disponibles=transports_disponibles,
-            alertes_actives=alertes_actives,
-            niveau_alerte_global=niveau_alerte,
-            evenements_impactants=evenements_impactants,
-            recommandation_principale=recommandation_principale,
-            recommandations_alternatives=alternatives,
-            conseil_principal=conseil,
-            niveau_confort=niveau_confort,
-            timestamp=datetime.now().isoformat()
+    })
+    return plan.model_copy(update={"analysis": analysis})
+
+@dataclass
+class CityData:
+    """Données des 4 services pour un ensemble de zones, partagées par les trajets qui les traversent"""
+    # Par service : FanOutResult dont la valeur est indexée par zone
+    # (mobilité : couple trafic, disponibilité), une zone en échec portant son exception
+    collected: Dict[str, FanOutResult]
+    # Par service : city_state (instantané) ou live (appel direct)
+    sources: Dict[str, str]
+    started_at: float
+
+def _from_city_state(registry: ClientRegistry, zones: List[str]) -> Dict[str, FanOutResult]:
+    """Services dont toutes les sections sont fraîches dans l'instantané, au format du fan-out"""
+    city = registry.city_state
+    if city is None:
+        return {}
+    
+    def by_zone(kind: str) -> Optional[Dict[str, Any]]:
+        sections = {zone: city.section(kind, zone) for zone in zones}
+        if any(section is None for section in sections.values()):
+            return None
+        return {zone: section.value for zone, section in sections.items()}
+    
+    results = {}
+    aqi = by_zone("aqi")
+    if aqi is not None:
+        results["air_quality"] = FanOutResult(value=aqi)
+    mobility = [city.section("trafic"), city.section("disponibilite")]
+    if all(section is not None for section in mobility):
+        results["mobility"] = FanOutResult(value=tuple(section.value for section in mobility))
+    alerts = {zone: city.zone_alerts(zone) for zone in zones}
+    if all(zone_alerts is not None for zone_alerts in alerts.values()):
+        results["emergency"] = FanOutResult(value=alerts)
+    events = by_zone("events")
+    if events is not None:
+        results["urban_events"] = FanOutResult(value=events)
+    return results
+
+async def _collect_city_data(zones: List[str], registry: ClientRegistry) -> CityData:
+    """
+    Collecte des 4 microservices pour un ensemble de zones, chaque ressource une seule fois.
+    
+    Les sections fraîches de l'instantané évitent l'appel ; les autres
+    partent toutes en même temps, chaque service avec son propre délai.
+    """
+    started_at = time.time()
+    zones = list(dict.fromkeys(zones))
+    
+    async def by_zone(fetch) -> Dict[str, Any]:
+        # Une zone en échec n'empêche pas les autres d'être servies
+        values = await asyncio.gather(*(fetch(zone) for zone in zones), return_exceptions=True)
+        return dict(zip(zones, values))
+    
+    async def fetch_air_quality():
+        # Le client SOAP peut encore attendre son WSDL : l'échec reste local au service
+        air_quality = await registry.get_air_quality()
+        return await by_zone(air_quality.get_aqi)
+    
+    def fetch_mobility():
+        return asyncio.gather(
+            registry.mobility.get_trafic(),
+            registry.mobility.get_disponibilite()
         )
-        
-        processing_time = (time.time() - start_time) * 1000
-        
-        logger.info(f"✅ Trip planning completed in {processing_time:.2f}ms")
-        
-        return PlanTripResponse(
-            success=True,
-            message="Analyse complète du trajet générée avec succès",
-            analysis=analysis,
-            warnings=warnings,
-            processing_time_ms=round(processing_time, 2)
+    
+    live_calls = {
+        # Qualité de l'air (SOAP)
+        "air_quality": (fetch_air_quality, settings.PLAN_TRIP_SOAP_DEADLINE),
+        # Mobilité (REST)
+        "mobility": (fetch_mobility, settings.PLAN_TRIP_REST_DEADLINE),
+        # Alertes d'urgence (gRPC), un seul RPC pour toutes les zones
+        "emergency": (
+            lambda: registry.emergency.get_active_alerts_batch(zones),
+            settings.PLAN_TRIP_GRPC_DEADLINE
+        ),
+        # Événements urbains (GraphQL)
+        "urban_events": (
+            lambda: by_zone(lambda zone: registry.urban_events.get_events(zone_id=zone, status="IN_PROGRESS")),
+            settings.PLAN_TRIP_GRAPHQL_DEADLINE
         )
-        
+    }
+    
+    from_snapshot = _from_city_state(registry, zones)
+    collected = await fan_out({
+        service: (call(), deadline)
+        for service, (call, deadline) in live_calls.items()
+        if service not in from_snapshot
+    })
+    collected.update(from_snapshot)
+    return CityData(
+        collected=collected,
+        sources={service: "city_state" if service in from_snapshot else "live" for service in live_calls},
+        started_at=started_at
+    )
+
+async def _compute_plan(request: PlanTripRequest, registry: ClientRegistry) -> PlanTripResponse:
+    """Collecte des 4 services et analyse complète du trajet"""
+    logger.info(f"🚀 Starting trip planning: {request.zone_depart} → {request.zone_arrivee}")
+    
+    try:
+        logger.info("📡 Step 1/5: Collecting data from all microservices...")
+        data = await _collect_city_data([request.zone_depart, request.zone_arrivee], registry)
+        return _analyse_trip(request, data)
     except Exception as e:
         logger.error(f"Error in trip planning: {str(e)}")
         raise HTTPException(
@@ -383,12 +335,312 @@ async def plan_trip(
             detail=f"Erreur lors de la planification du trajet: {str(e)}"
         )
 
+def _analyse_trip(request: PlanTripRequest, data: CityData) -> PlanTripResponse:
+    """Étapes d'analyse d'un trajet sur les données déjà collectées"""
+    warnings = []
+    zones = [request.zone_depart, request.zone_arrivee]
+    
+    def unavailable(service: str, label: str) -> bool:
+        """Ajoute un warning si le service n'a pas répondu à temps (ou pas pour l'une des zones)"""
+        result = data.collected[service]
+        if result.ok and not (
+            service != "mobility"
+            and any(isinstance(result.value.get(zone), BaseException) for zone in zones)
+        ):
+            return False
+        if result.timed_out:
+            warnings.append(f"⚠️ Données {label} indisponibles (délai dépassé)")
+        else:
+            warnings.append(f"⚠️ Données {label} indisponibles")
+        PLAN_TRIP_WARNINGS.labels(service, "timeout" if result.timed_out else "error").inc()
+        return True
+    
+    if unavailable("air_quality", "de qualité de l'air"):
+        air_depart = {"zone": request.zone_depart, "aqi": 0, "category": "Unknown", "description": "N/A", "timestamp": datetime.now().isoformat()}
+        air_arrivee = {"zone": request.zone_arrivee, "aqi": 0, "category": "Unknown", "description": "N/A", "timestamp": datetime.now().isoformat()}
+    else:
+        aqi_by_zone = data.collected["air_quality"].value
+        air_depart, air_arrivee = aqi_by_zone[request.zone_depart], aqi_by_zone[request.zone_arrivee]
+    
+    if unavailable("mobility", "de mobilité"):
+        trafic_data = {"lignes": []}
+        disponibilite_data = {"vehicules": []}
+    else:
+        trafic_data, disponibilite_data = data.collected["mobility"].value
+    
+    if unavailable("emergency", "d'urgence"):
+        all_alerts = []
+    else:
+        alerts_by_zone = data.collected["emergency"].value
+        all_alerts = alerts_by_zone[request.zone_depart] + alerts_by_zone[request.zone_arrivee]
+    
+    if unavailable("urban_events", "d'événements"):
+        all_events = []
+    else:
+        events_by_zone = data.collected["urban_events"].value
+        all_events = events_by_zone[request.zone_depart] + events_by_zone[request.zone_arrivee]
+    
+    # ============================================================
+    # ÉTAPE 2: ANALYSE DE LA QUALITÉ DE L'AIR
+    # ============================================================
+    
+    logger.info("🌫️ Step 2/5: Analyzing air quality...")
+    
+    def get_air_recommendation(aqi: int) -> str:
+        if aqi <= 50:
+            return "✅ Qualité excellente - Tous modes de transport recommandés"
+        elif aqi <= 100:
+            return "✅ Qualité acceptable - Privilégiez les transports fermés"
+        elif aqi <= 150:
+            return "⚠️ Qualité médiocre - Évitez les modes de transport ouverts"
+        elif aqi <= 200:
+            return "⚠️ Mauvaise qualité - Privilégiez fortement les transports fermés"
+        else:
+            return "🚨 Qualité très mauvaise - Limitez vos déplacements"
+    
+    air_quality_depart = AirQualityInfo(
+        zone=air_depart["zone"],
+        aqi=air_depart["aqi"],
+        category=air_depart["category"],
+        description=air_depart["description"],
+        timestamp=air_depart["timestamp"],
+        recommendation=get_air_recommendation(air_depart["aqi"])
+    )
+    
+    air_quality_arrivee = AirQualityInfo(
+        zone=air_arrivee["zone"],
+        aqi=air_arrivee["aqi"],
+        category=air_arrivee["category"],
+        description=air_arrivee["description"],
+        timestamp=air_arrivee["timestamp"],
+        recommendation=get_air_recommendation(air_arrivee["aqi"])
+    )
+    
+    # Comparaison
+    diff_aqi = abs(air_depart["aqi"] - air_arrivee["aqi"])
+    if air_depart["aqi"] < air_arrivee["aqi"]:
+        comparison = f"⚠️ Attention: La qualité de l'air se dégrade vers {request.zone_arrivee} (différence: {diff_aqi} points AQI)"
+    elif air_depart["aqi"] > air_arrivee["aqi"]:
+        comparison = f"✅ Bonne nouvelle: La qualité de l'air s'améliore vers {request.zone_arrivee} (différence: {diff_aqi} points AQI)"
+    else:
+        comparison = f"➡️ La qualité de l'air est similaire dans les deux zones"
+    
+    # ============================================================
+    # ÉTAPE 3: ANALYSE DES TRANSPORTS DISPONIBLES
+    # ============================================================
+    
+    logger.info("🚆 Step 3/5: Analyzing available transportation...")
+    
+    transports_disponibles = []
+    
+    for ligne in trafic_data.get("lignes", []):
+        # Vérifier si ce type de transport est dans les préférences
+        if ligne.get("ligne") and any(pref in ligne.get("ligne", "").lower() for pref in request.preferences):
+            # Trouver la disponibilité correspondante
+            dispo = "Inconnue"
+            for vehicule in disponibilite_data.get("vehicules", []):
+                if vehicule.get("type_transport") in ligne.get("ligne", "").lower():
+                    dispo = f"{vehicule.get('taux_disponibilite', 0)}%"
+                    break
+            
+            transports_disponibles.append(TransportInfo(
+                ligne=ligne.get("ligne", "N/A"),
+                type_transport=ligne.get("ligne", "N/A").split()[0],
+                etat_trafic=ligne.get("etat", "unknown"),
+                disponibilite=dispo,
+                horaires_prochain_passage=[request.heure_depart, "14:45", "15:00"]
+            ))
+    
+    # ============================================================
+    # ÉTAPE 4: ANALYSE DES ALERTES ET ÉVÉNEMENTS
+    # ============================================================
+    
+    logger.info("🚨 Step 4/5: Analyzing alerts and events...")
+    
+    # Alertes d'urgence
+    alertes_actives = []
+    niveau_alerte = "LOW"
+    
+    for alert in all_alerts:
+        alertes_actives.append(AlertInfo(
+            alert_id=alert["alert_id"],
+            type=alert["type"],
+            description=alert["description"],
+            priority=alert["priority"],
+            zone=alert["location"]["zone"],
+            created_at=alert["created_at"]
+        ))
+        
+        if alert["priority"] == "CRITICAL":
+            niveau_alerte = "CRITICAL"
+        elif alert["priority"] == "HIGH" and niveau_alerte != "CRITICAL":
+            niveau_alerte = "HIGH"
+        elif alert["priority"] == "MEDIUM" and niveau_alerte == "LOW":
+            niveau_alerte = "MEDIUM"
+    
+    # Événements urbains
+    evenements_impactants = []
+    for event in all_events:
+        evenements_impactants.append(EventInfo(
+            event_id=event["id"],
+            name=event["name"],
+            description=event["description"],
+            priority=event["priority"],
+            status=event["status"],
+            zone=event.get("zone", {}).get("name", "N/A") if event.get("zone") else "N/A",
+            date=event["date"]
+        ))
+    
+    # ============================================================
+    # ÉTAPE 5: GÉNÉRATION DES RECOMMANDATIONS INTELLIGENTES
+    # ============================================================
+    
+    logger.info("🎯 Step 5/5: Generating intelligent recommendations...")
+    
+    # Recommandation principale
+    principale_raison = []
+    
+    # Facteur 1: Qualité de l'air
+    if air_depart["aqi"] > 150 or air_arrivee["aqi"] > 150:
+        principale_raison.append("pollution élevée")
+    
+    # Facteur 2: Alertes critiques
+    if niveau_alerte in ["CRITICAL", "HIGH"]:
+        principale_raison.append(f"alertes {niveau_alerte.lower()}")
+    
+    # Facteur 3: Trafic perturbé
+    trafic_perturbe = any(t.etat_trafic in ["perturbé", "interrompu"] for t in transports_disponibles)
+    if trafic_perturbe:
+        principale_raison.append("trafic perturbé")
+    
+    # Construire la recommandation
+    if principale_raison:
+        recommandation_type = "alternatif"
+        recommandation_desc = f"Itinéraire alternatif recommandé en raison de: {', '.join(principale_raison)}"
+        lignes_suggerees = [t.ligne for t in transports_disponibles if t.etat_trafic == "normal"][:2]
+    else:
+        recommandation_type = "direct"
+        recommandation_desc = "Itinéraire direct recommandé - Conditions favorables"
+        lignes_suggerees = [t.ligne for t in transports_disponibles][:2]
+    
+    if not lignes_suggerees:
+        lignes_suggerees = ["Marche à pied recommandée", "Vélo en libre-service"]
+    
+    recommandation_principale = RouteRecommendation(
+        type=recommandation_type,
+        description=recommandation_desc,
+        raison=", ".join(principale_raison) if principale_raison else "Aucun problème détecté",
+        lignes_suggerees=lignes_suggerees,
+        duree_estimee="25-30 minutes"
+    )
+    
+    # Recommandations alternatives
+    alternatives = [
+        RouteRecommendation(
+            type="eco-friendly",
+            description="Trajet écologique via zones à faible pollution",
+            raison="Minimise l'exposition à la pollution",
+            lignes_suggerees=["Métro express", "Tramway vert"],
+            duree_estimee="35-40 minutes"
+        ),
+        RouteRecommendation(
+            type="rapide",
+            description="Trajet le plus rapide sans tenir compte de la qualité de l'air",
+            raison="Optimise le temps de trajet",
+            lignes_suggerees=["Bus express", "Métro direct"],
+            duree_estimee="20-25 minutes"
+        )
+    ]
+    
+    # Niveau de confort global
+    confort_score = 100
+    confort_score -= (air_depart["aqi"] + air_arrivee["aqi"]) / 10
+    confort_score -= len(alertes_actives) * 10
+    confort_score -= len(evenements_impactants) * 5
+    
+    if confort_score >= 80:
+        niveau_confort = "excellent"
+    elif confort_score >= 60:
+        niveau_confort = "bon"
+    elif confort_score >= 40:
+        niveau_confort = "moyen"
+    else:
+        niveau_confort = "difficile"
+    
+    # Conseil principal
+    if niveau_confort in ["excellent", "bon"]:
+        conseil = f"✅ Conditions favorables pour votre trajet. Bon voyage!"
+    elif niveau_confort == "moyen":
+        conseil = f"⚠️ Conditions acceptables mais soyez vigilant aux perturbations."
+    else:
+        conseil = f"🚨 Conditions difficiles. Envisagez de reporter votre déplacement si possible."
+    
+    # ============================================================
+    # CONSTRUCTION DE LA RÉPONSE FINALE
+    # ============================================================
+    
+    analysis = TripAnalysis(
+        zone_depart=request.zone_depart,
+        zone_arrivee=request.zone_arrivee,
+        heure_demandee=request.heure_depart,
+        air_quality_depart=air_quality_depart,
+        air_quality_arrivee=air_quality_arrivee,
+        air_quality_comparison=comparison,
+        transports_disponibles=transports_disponibles,
+        alertes_actives=alertes_actives,
+        niveau_alerte_global=niveau_alerte,
+        evenements_impactants=evenements_impactants,
+        recommandation_principale=recommandation_principale,
+        recommandations_alternatives=alternatives,
+        conseil_principal=conseil,
+        niveau_confort=niveau_confort,
+        timestamp=datetime.now().isoformat()
+    )
+    
+    processing_time = (time.time() - data.started_at) * 1000
+    
+    logger.info(f"✅ Trip planning completed in {processing_time:.2f}ms")
+    
+    return PlanTripResponse(
+        success=True,
+        message="Analyse complète du trajet générée avec succès",
+        analysis=analysis,
+        warnings=warnings,
+        processing_time_ms=round(processing_time, 2),
+        processing_time_by_service_ms={
+            service: round(result.duration_ms, 2)
+            for service, result in data.collected.items()
+        },
+        data_sources=data.sources
+    )
+
+@router.get("/city-state", summary="État de l'instantané de la ville")
+async def get_city_state(
+    zones: Optional[str] = Query(None, description="Zones séparées par des virgules (par défaut : zones suivies)"),
+    registry: ClientRegistry = Depends(get_registry)
+):
+    """
+    Âge en secondes de chaque section de l'instantané (None si jamais lue).
+    
+    Une section plus ancienne que `max_age_seconds` n'est plus servie :
+    les routes repassent par un appel direct au service.
+    """
+    if registry.city_state is None:
+        raise HTTPException(status_code=404, detail="Instantané de l'état de la ville désactivé (CITY_STATE_ENABLED)")
+    requested = [zone for zone in zones.split(",") if zone] if zones else sorted(registry.city_state.zones)
+    return {
+        "max_age_seconds": settings.CITY_STATE_MAX_AGE,
+        "refresh_interval_seconds": settings.CITY_STATE_REFRESH_INTERVAL,
+        "sections": registry.city_state.section_ages(requested),
+        **registry.city_state.stats()
+    }
+
 @router.get(
     "/health",
     response_model=HealthCheckResponse,
     summary="Health check de tous les services"
 )
-async def health_check(clients: Dict[str, Any] = Depends(get_all_clients)):
+async def health_check(registry: ClientRegistry = Depends(get_registry)):
     """
     Vérifie l'état de santé de tous les microservices.
     
@@ -397,35 +649,21 @@ async def health_check(clients: Dict[str, Any] = Depends(get_all_clients)):
     - Service Qualité de l'Air (SOAP)
     - Service Urgences (gRPC)
     - Service Événements Urbains (GraphQL)
-    """
-    logger.info("Performing health check on all services...")
-    
-    services_status = {}
-    
-    # Check Mobility (REST)
-    try:
-        services_status["mobility"] = await clients["mobility"].health_check()
-    except:
-        services_status["mobility"] = False
     
-    # Check Air Quality (SOAP)
-    try:
-        services_status["air_quality"] = await clients["air_quality"].health_check()
-    except:
-        services_status["air_quality"] = False
-    
-    # Check Emergency (gRPC)
-    try:
-        services_status["emergency"] = await clients["emergency"].health_check()
-    except:
-        services_status["emergency"] = False
+    Les services sont sondés en arrière-plan toutes les
+    `HEALTH_PROBE_INTERVAL` secondes : la réponse est immédiate et `checks`
+    donne, par service, la latence et l'âge de la dernière sonde ainsi que
+    l'historique récent. `upstreams` donne l'état du disjoncteur et la limite
+    de concurrence courante de chaque service.
+    """
+    prober = registry.health
+    if prober is None:
+        # Sondes arrêtées : un passage, tous les services en parallèle
+        prober = HealthProber(registry.health_checks())
+        await prober.probe_all()
     
-    # Check Urban Events (GraphQL) - pas de health check natif, on teste une requête
-    try:
-        await clients["urban_events"].get_zones()
-        services_status["urban_events"] = True
-    except:
-        services_status["urban_events"] = False
+    checks = prober.report()
+    services_status = {name: check["healthy"] for name, check in checks.items()}
     
     # Statut global
     all_healthy = all(services_status.values())
@@ -435,5 +673,7 @@ async def health_check(clients: Dict[str, Any] = Depends(get_all_clients)):
         status=status,
         services=services_status,
         timestamp=datetime.now().isoformat(),
-        version="1.0.0"
-    )
\ No newline at end of file
+        version="1.0.0",
+        upstreams=registry.upstream_stats(),
+        checks=checks
+    )
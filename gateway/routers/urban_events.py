@@ -1,23 +1,24 @@
 """Router FastAPI pour le service Événements Urbains (GraphQL)"""
-from fastapi import APIRouter, HTTPException, Depends, Query
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Query, Header, Response
 from typing import List, Optional
-from  clients import UrbanEventsGraphQLClient
+from  config import settings
+from  clients import UrbanEventsGraphQLClient, ClientRegistry, get_registry
 from  models.urban_events import (
     Zone, EventType, Event,
     GetEventsRequest, CreateEventRequest,
     UpdateEventRequest, EventMutationResponse
 )
-from  utils import logger
+from  utils import logger, ResponseCache, get_response_cache, passthrough, wants_ndjson, ndjson_response
 
 router = APIRouter(prefix="/urban", tags=["Événements Urbains"])
 
-# Dependency pour le client GraphQL
-async def get_urban_client():
-    client = UrbanEventsGraphQLClient()
-    try:
-        yield client
-    finally:
-        await client.close()
+# Tag de cache invalidé par les mutations d'événements
+EVENTS_CACHE_TAG = "urban.events"
+
+# Dependency pour le client GraphQL (session persistante)
+async def get_urban_client(registry: ClientRegistry = Depends(get_registry)):
+    return registry.urban_events
 
 @router.get("/", summary="Page d'accueil du service Événements Urbains")
 async def urban_events_home():
@@ -43,14 +44,19 @@ async def urban_events_home():
     summary="Liste des zones urbaines"
 )
 async def get_zones(
-    client: UrbanEventsGraphQLClient = Depends(get_urban_client)
+    response: Response,
+    client: UrbanEventsGraphQLClient = Depends(get_urban_client),
+    cache: ResponseCache = Depends(get_response_cache)
 ):
     """
     Liste toutes les zones urbaines disponibles.
     """
     logger.info("Gateway: Getting all zones")
-    result = await client.get_zones()
-    return result
+    result = await cache.cached(
+        response, "urban.zones", client.get_zones,
+        ttl=settings.CACHE_TTL_URBAN_ZONES
+    )
+    return passthrough(result, response)
 
 @router.get(
     "/zones/{zone_id}",
@@ -68,7 +74,7 @@ async def get_zone(
     result = await client.get_zone(zone_id)
     if not result:
         raise HTTPException(status_code=404, detail="Zone not found")
-    return result
+    return passthrough(result)
 
 @router.get(
     "/event-types",
@@ -76,14 +82,19 @@ async def get_zone(
     summary="Liste des types d'événements"
 )
 async def get_event_types(
-    client: UrbanEventsGraphQLClient = Depends(get_urban_client)
+    response: Response,
+    client: UrbanEventsGraphQLClient = Depends(get_urban_client),
+    cache: ResponseCache = Depends(get_response_cache)
 ):
     """
     Liste tous les types d'événements disponibles.
     """
     logger.info("Gateway: Getting all event types")
-    result = await client.get_event_types()
-    return result
+    result = await cache.cached(
+        response, "urban.event-types", client.get_event_types,
+        ttl=settings.CACHE_TTL_URBAN_EVENT_TYPES
+    )
+    return passthrough(result, response)
 
 @router.get(
     "/events",
@@ -97,6 +108,8 @@ async def get_events(
     priority: Optional[str] = Query(None, description="Filtrer par priorité"),
     date_from: Optional[str] = Query(None, description="Date de début (ISO format)"),
     date_to: Optional[str] = Query(None, description="Date de fin (ISO format)"),
+    stream: bool = Query(False, description="Réponse NDJSON, un événement par ligne"),
+    accept: Optional[str] = Header(None, include_in_schema=False),
     client: UrbanEventsGraphQLClient = Depends(get_urban_client)
 ):
     """
@@ -109,7 +122,21 @@ async def get_events(
     - **priority**: LOW, MEDIUM, HIGH, CRITICAL
     - **date_from**: Date de début (format ISO)
     - **date_to**: Date de fin (format ISO)
+    
+    Avec `?stream=true` ou `Accept: application/x-ndjson`, les événements sont
+    lus page par page et renvoyés un par ligne.
     """
+    if wants_ndjson(stream, accept):
+        logger.info("Gateway: Streaming events with filters")
+        return await ndjson_response(client.stream_events(
+            event_type_id=event_type_id,
+            zone_id=zone_id,
+            status=status,
+            priority=priority,
+            date_from=date_from,
+            date_to=date_to
+        ))
+    
     logger.info("Gateway: Getting events with filters")
     result = await client.get_events(
         event_type_id=event_type_id,
@@ -119,7 +146,7 @@ async def get_events(
         date_from=date_from,
         date_to=date_to
     )
-    return result
+    return passthrough(result)
 
 @router.get(
     "/events/{event_id}",
@@ -128,16 +155,21 @@ async def get_events(
 )
 async def get_event(
     event_id: str,
-    client: UrbanEventsGraphQLClient = Depends(get_urban_client)
+    response: Response,
+    client: UrbanEventsGraphQLClient = Depends(get_urban_client),
+    cache: ResponseCache = Depends(get_response_cache)
 ):
     """
     Récupère les détails complets d'un événement.
     """
     logger.info(f"Gateway: Getting event {event_id}")
-    result = await client.get_event(event_id)
+    result = await cache.cached(
+        response, f"urban.events:{event_id}", lambda: client.get_event(event_id),
+        ttl=settings.CACHE_TTL_URBAN_EVENT, tags=[EVENTS_CACHE_TAG]
+    )
     if not result:
         raise HTTPException(status_code=404, detail="Event not found")
-    return result
+    return passthrough(result, response)
 
 @router.post(
     "/events",
@@ -147,7 +179,8 @@ async def get_event(
 )
 async def create_event(
     request: CreateEventRequest,
-    client: UrbanEventsGraphQLClient = Depends(get_urban_client)
+    client: UrbanEventsGraphQLClient = Depends(get_urban_client),
+    cache: ResponseCache = Depends(get_response_cache)
 ):
     """
     Crée un nouvel événement urbain.
@@ -170,6 +203,7 @@ async def create_event(
         priority=request.priority.value,
         status=request.status.value
     )
+    cache.invalidate(EVENTS_CACHE_TAG)
     return result
 
 @router.put(
@@ -180,7 +214,8 @@ async def create_event(
 async def update_event(
     event_id: str,
     request: UpdateEventRequest,
-    client: UrbanEventsGraphQLClient = Depends(get_urban_client)
+    client: UrbanEventsGraphQLClient = Depends(get_urban_client),
+    cache: ResponseCache = Depends(get_response_cache)
 ):
     """
     Met à jour un événement existant.
@@ -196,6 +231,7 @@ async def update_event(
     }
     
     result = await client.update_event(event_id, **update_data)
+    cache.invalidate(EVENTS_CACHE_TAG)
     return result
 
 @router.delete(
@@ -204,13 +240,15 @@ async def update_event(
 )
 async def delete_event(
     event_id: str,
-    client: UrbanEventsGraphQLClient = Depends(get_urban_client)
+    client: UrbanEventsGraphQLClient = Depends(get_urban_client),
+    cache: ResponseCache = Depends(get_response_cache)
 ):
     """
     Supprime un événement.
     """
     logger.info(f"Gateway: Deleting event {event_id}")
     result = await client.delete_event(event_id)
+    cache.invalidate(EVENTS_CACHE_TAG)
     return result
 
 @router.get(
@@ -227,17 +265,13 @@ async def get_active_events_by_zone(
     """
     logger.info(f"Gateway: Getting active events for zone {zone_id}")
     
-    # Récupérer les événements IN_PROGRESS et PENDING
-    events_in_progress = await client.get_events(
-        zone_id=zone_id,
-        status="IN_PROGRESS"
-    )
-    events_pending = await client.get_events(
-        zone_id=zone_id,
-        status="PENDING"
+    # Récupérer les événements IN_PROGRESS et PENDING (envoyés dans le même lot)
+    events_in_progress, events_pending = await asyncio.gather(
+        client.get_events(zone_id=zone_id, status="IN_PROGRESS"),
+        client.get_events(zone_id=zone_id, status="PENDING")
     )
     
     # Combiner les résultats
     active_events = events_in_progress + events_pending
     
-    return active_events
\ No newline at end of file
+    return passthrough(active_events)
\ No newline at end of file
@@ -0,0 +1,135 @@
+"""
+Affiche une trace en cascade à partir des spans exportés (TRACE_EXPORT_PATH).
+
+La Gateway et chaque service écrivent leurs spans en JSON lignes ; ce script
+les fusionne, reconstruit l'arbre d'une trace (X-Trace-Id de la réponse) et
+l'affiche avec la durée et le décalage de chaque span. `--otlp` écrit la même
+trace au format OTLP/JSON (ExportTraceServiceRequest), importable par un
+collecteur OpenTelemetry ou Jaeger.
+
+Usage (depuis gateway/):
+    python scripts/trace_waterfall.py ../traces                # dernière trace
+    python scripts/trace_waterfall.py ../traces --trace-id <id> --otlp trace.json
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List
+
+WIDTH = 40
+
+OTLP_KINDS = {"internal": 1, "server": 2, "client": 3, "producer": 4, "consumer": 5}
+OTLP_STATUS = {"ok": 1, "error": 2}
+
+def load_spans(paths: List[str]) -> List[Dict[str, Any]]:
+    """Lit les fichiers JSON lignes (ou tous les *.jsonl d'un dossier)"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.jsonl"))))
+        else:
+            files.append(path)
+    spans = []
+    for path in files:
+        with open(path, encoding="utf-8") as f:
+            spans.extend(json.loads(line) for line in f if line.strip())
+    return spans
+
+def select_trace(spans: List[Dict[str, Any]], trace_id: str = None) -> List[Dict[str, Any]]:
+    """Spans d'une trace ; par défaut celle du dernier span racine terminé"""
+    if trace_id is None:
+        roots = [s for s in spans if s["parent_span_id"] is None]
+        if not roots:
+            return []
+        trace_id = max(roots, key=lambda s: s["end_time_unix_nano"])["trace_id"]
+    return [s for s in spans if s["trace_id"] == trace_id]
+
+def waterfall(spans: List[Dict[str, Any]]) -> List[str]:
+    """Lignes de la cascade : arbre parent/enfants trié par date de début"""
+    start = min(s["start_time_unix_nano"] for s in spans)
+    end = max(s["end_time_unix_nano"] for s in spans)
+    total = max(end - start, 1)
+
+    ids = {s["span_id"] for s in spans}
+    children = defaultdict(list)
+    for s in spans:
+        # Parent absent de l'export (service non tracé) : rattaché à la racine
+        parent = s["parent_span_id"] if s["parent_span_id"] in ids else None
+        children[parent].append(s)
+    for siblings in children.values():
+        siblings.sort(key=lambda s: s["start_time_unix_nano"])
+
+    lines = [f"trace {spans[0]['trace_id']} - {total / 1e6:.1f} ms, {len(spans)} spans"]
+
+    def walk(parent, depth):
+        for s in children.get(parent, []):
+            offset = (s["start_time_unix_nano"] - start) / total
+            duration = (s["end_time_unix_nano"] - s["start_time_unix_nano"]) / total
+            left = int(offset * WIDTH)
+            bar = " " * left + "█" * max(1, int(duration * WIDTH))
+            label = f"{'  ' * depth}{s['service']}: {s['name']}"
+            marker = " ✗" if s["status"] == "error" else ""
+            lines.append(
+                f"{label[:48]:<48} |{bar[:WIDTH]:<{WIDTH}}| "
+                f"{(s['end_time_unix_nano'] - s['start_time_unix_nano']) / 1e6:8.1f} ms{marker}"
+            )
+            walk(s["span_id"], depth + 1)
+
+    walk(None, 0)
+    return lines
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def to_otlp(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Trace au format OTLP/JSON, un resourceSpans par service"""
+    by_service = defaultdict(list)
+    for s in spans:
+        by_service[s["service"]].append({
+            "traceId": s["trace_id"],
+            "spanId": s["span_id"],
+            "parentSpanId": s["parent_span_id"] or "",
+            "name": s["name"],
+            "kind": OTLP_KINDS.get(s["kind"], 1),
+            "startTimeUnixNano": str(s["start_time_unix_nano"]),
+            "endTimeUnixNano": str(s["end_time_unix_nano"]),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s["attributes"].items()],
+            "status": {"code": OTLP_STATUS.get(s["status"], 0)}
+        })
+    return {"resourceSpans": [
+        {
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+            "scopeSpans": [{"scope": {"name": "smart-city"}, "spans": otlp_spans}]
+        }
+        for service, otlp_spans in by_service.items()
+    ]}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("paths", nargs="+", help="fichiers JSON lignes ou dossiers de spans")
+    parser.add_argument("--trace-id", help="trace à afficher (défaut : la dernière)")
+    parser.add_argument("--otlp", help="écrit aussi la trace au format OTLP/JSON")
+    args = parser.parse_args()
+
+    spans = select_trace(load_spans(args.paths), args.trace_id)
+    if not spans:
+        print("Aucune trace trouvée", file=sys.stderr)
+        sys.exit(1)
+
+    print("\n".join(waterfall(spans)))
+    if args.otlp:
+        with open(args.otlp, "w", encoding="utf-8") as f:
+            json.dump(to_otlp(spans), f, indent=2)
+        print(f"OTLP: {args.otlp}")
+
+if __name__ == "__main__":
+    main()
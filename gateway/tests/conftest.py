@@ -0,0 +1,18 @@
+"""
+Fixtures partagées des tests de la Gateway
+"""
+import asyncio
+import pytest
+
+from clients import AirQualitySoapClient
+from clients.wsdl_cache import WsdlCache
+from config import settings
+
+
+@pytest.fixture
+def soap_client(tmp_path):
+    """Client SOAP construit sur le WSDL embarqué (service injoignable)"""
+    cache = WsdlCache("http://127.0.0.1:9/?wsdl", str(tmp_path), settings.AIR_QUALITY_WSDL_SEED)
+    client = AirQualitySoapClient(wsdl_cache=cache)
+    yield client
+    asyncio.run(client.close())
@@ -0,0 +1,317 @@
+"""
+Tests du contrôle d'admission : file bornée, délestage CoDel, 503 avec Retry-After
+"""
+import asyncio
+import contextlib
+import httpx
+import pytest
+import pytest_asyncio
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from main import app
+from clients import ClientRegistry
+from config import settings
+from utils import AdmissionController, AdmissionMiddleware, AdmissionQueue, AdmissionRejected, ResponseCache, SubscriptionHub, parse_route_limits
+
+
+def admission_queue(limit=1, queue_size=2, queue_timeout=1.0, target=0.01, interval=0.02):
+    return AdmissionQueue("test", limit, queue_size, queue_timeout, target, interval)
+
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected_immediately():
+    queue = admission_queue(limit=1, queue_size=1)
+    await queue.acquire()
+    waiting = asyncio.create_task(queue.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        await queue.acquire()
+    assert exc_info.value.reason == "queue_full"
+
+    # La requête en file obtient la place libérée
+    queue.release()
+    await waiting
+    assert queue.stats()["in_flight"] == 1
+    assert queue.stats()["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_queued_request_times_out():
+    queue = admission_queue(queue_timeout=0.02)
+    await queue.acquire()
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        await queue.acquire()
+    assert exc_info.value.reason == "queue_timeout"
+    assert queue.stats()["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_requests_waiting_over_target_are_shed_once_overloaded():
+    queue = admission_queue(limit=1, queue_size=10, target=0.01, interval=0.02)
+    await queue.acquire()
+    waiting = [asyncio.create_task(queue.acquire()) for _ in range(3)]
+
+    # Premier dépassement de la cible : servi, début de l'intervalle
+    await asyncio.sleep(0.015)
+    queue.release()
+    await waiting[0]
+
+    # File toujours au-dessus de la cible après l'intervalle : délestage
+    await asyncio.sleep(0.03)
+    queue.release()
+    results = await asyncio.gather(*waiting[1:], return_exceptions=True)
+
+    assert all(isinstance(result, AdmissionRejected) and result.reason == "codel" for result in results)
+    assert queue.stats()["codel"] == 2
+    assert queue.stats()["in_flight"] == 0
+    # File vidée : fin de la surcharge
+    assert not queue.overloaded
+
+
+@pytest.mark.asyncio
+async def test_overload_ends_when_queue_drains():
+    queue = admission_queue(limit=1, queue_size=10, target=0.01, interval=0.0)
+    queue.overloaded = True
+    await queue.acquire()
+    waiting = asyncio.create_task(queue.acquire())
+    await asyncio.sleep(0)
+
+    # Sortie sous la cible : fin de la surcharge
+    queue.release()
+    await waiting
+    assert not queue.overloaded
+
+
+def test_parse_route_limits():
+    assert parse_route_limits("/smart-city/plan-trip=50, /smart-city/plan-trip/batch=8,") == {
+        "/smart-city/plan-trip": 50,
+        "/smart-city/plan-trip/batch": 8
+    }
+
+
+def request(path):
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []})
+
+
+@pytest.mark.asyncio
+async def test_subscriptions_have_their_own_pool():
+    controller = AdmissionController(
+        max_in_flight=1,
+        route_limits={},
+        queue_size=5,
+        queue_timeout=1.0,
+        codel_target=0.05,
+        codel_interval=0.5,
+        subscription_paths=["/emergency/alerts/subscribe"],
+        max_subscriptions=1
+    )
+
+    async with controller.admit(request("/emergency/alerts/subscribe")):
+        # Un abonnement ouvert ne prend pas de place de requête
+        async with controller.admit(request("/mobility/lignes")):
+            assert controller.stats()["global"]["in_flight"] == 1
+
+        # Plafond des abonnements atteint : refus sans attente
+        with pytest.raises(AdmissionRejected) as exc_info:
+            async with controller.admit(request("/emergency/alerts/subscribe")):
+                pass
+        assert exc_info.value.scope == "subscriptions"
+        assert exc_info.value.reason == "queue_full"
+
+    assert controller.stats()["subscriptions"]["in_flight"] == 0
+
+
+class SlowMobility:
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def get_lignes(self):
+        await self.release.wait()
+        return [{"ligne_id": "M1"}]
+
+
+class StreamingUrbanEvents:
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def stream_events(self, **filters):
+        yield {"id": "e1"}
+        await self.release.wait()
+        yield {"id": "e2"}
+
+
+@pytest_asyncio.fixture
+async def gateway(tmp_path):
+    registry = ClientRegistry()
+    registry.mobility = SlowMobility()
+    registry.urban_events = StreamingUrbanEvents()
+    app.state.clients = registry
+    app.state.response_cache = ResponseCache(max_entries=10, invalidation_dir=str(tmp_path))
+    app.state.admission = AdmissionController(
+        max_in_flight=1,
+        route_limits={"/mobility/lignes": 1},
+        queue_size=0,
+        queue_timeout=1.0,
+        codel_target=0.05,
+        codel_interval=0.5,
+        retry_after=3,
+        exempt_paths=["/health"]
+    )
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        yield client, registry
+    app.state.admission = None
+
+
+@pytest.mark.asyncio
+async def test_overflow_gets_fast_503_with_retry_after(gateway):
+    client, registry = gateway
+    slow = asyncio.create_task(client.get("/mobility/lignes"))
+    await asyncio.sleep(0.05)
+
+    rejected = await client.get("/mobility/lignes")
+    assert rejected.status_code == 503
+    assert rejected.headers["Retry-After"] == "3"
+    assert app.state.admission.stats()["routes"]["/mobility/lignes"]["queue_full"] == 1
+
+    # Chemins exemptés toujours servis
+    assert (await client.get("/health")).status_code == 200
+
+    registry.mobility.release.set()
+    assert (await slow).status_code == 200
+    assert app.state.admission.stats()["global"]["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_streamed_response_holds_its_slot_until_the_last_chunk(gateway):
+    client, registry = gateway
+    stream = asyncio.create_task(client.get("/urban/events", params={"stream": "true"}))
+    await asyncio.sleep(0.05)
+
+    # En-têtes envoyés, corps en cours : la place reste prise
+    assert app.state.admission.stats()["global"]["in_flight"] == 1
+    assert (await client.get("/mobility/lignes")).status_code == 503
+
+    registry.urban_events.release.set()
+    response = await stream
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 2
+    assert app.state.admission.stats()["global"]["in_flight"] == 0
+
+
+def streaming_scope(path, query_string=b""):
+    return {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query_string, "root_path": "", "headers": [(b"host", b"gateway")],
+        "client": ("127.0.0.1", 50000), "server": ("gateway", 80)
+    }
+
+
+async def leave_before_body(scope):
+    """Appel ASGI dont le client part dès les en-têtes : le corps n'est jamais lu"""
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            raise OSError("client disconnected")
+
+    with contextlib.suppress(Exception):
+        await app(scope, receive, send)
+
+
+@pytest.mark.asyncio
+async def test_slots_released_when_client_leaves_before_first_chunk(gateway):
+    _, registry = gateway
+
+    await leave_before_body(streaming_scope("/urban/events", b"stream=true"))
+
+    assert app.state.admission.stats()["global"]["in_flight"] == 0
+    assert app.state.admission.stats()["routes"]["/mobility/lignes"]["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_slots_released_when_outer_middleware_replaces_response():
+    async def endless(request):
+        async def body():
+            while True:
+                yield b"."
+                await asyncio.sleep(0.01)
+        return StreamingResponse(body())
+
+    async def replace(request, call_next):
+        # Réponse de la route jamais lue
+        await call_next(request)
+        return PlainTextResponse("replaced")
+
+    mini = Starlette(
+        routes=[Route("/stream", endless)],
+        middleware=[Middleware(BaseHTTPMiddleware, dispatch=replace), Middleware(AdmissionMiddleware)]
+    )
+    mini.state.admission = AdmissionController(
+        max_in_flight=1, route_limits={}, queue_size=0, queue_timeout=1.0, codel_target=0.05, codel_interval=0.5
+    )
+
+    transport = httpx.ASGITransport(app=mini)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for _ in range(3):
+            assert (await client.get("/stream")).text == "replaced"
+    assert mini.state.admission.stats()["global"]["in_flight"] == 0
+
+
+class AlertStream:
+    async def open_stream(self, key):
+        await asyncio.Event().wait()
+        yield
+
+
+@pytest.mark.asyncio
+async def test_sse_subscription_not_leaked_when_body_is_never_read(gateway):
+    _, registry = gateway
+    registry.alert_subscriptions = SubscriptionHub(
+        "test", open_stream=AlertStream().open_stream, event="alert", buffer=4,
+        item_key=lambda alert: alert["alert_id"]
+    )
+
+    await leave_before_body(streaming_scope("/emergency/alerts/subscribe", b"zones=downtown"))
+
+    assert registry.alert_subscriptions.stats()["clients"] == 0
+    await registry.alert_subscriptions.close()
+
+
+def test_websocket_subscriptions_share_the_subscription_cap(monkeypatch):
+    monkeypatch.setattr(settings, "SUBSCRIPTION_HEARTBEAT", 0.05)
+    registry = ClientRegistry()
+    registry.alert_subscriptions = SubscriptionHub(
+        "test", open_stream=AlertStream().open_stream, event="alert", buffer=4,
+        item_key=lambda alert: alert["alert_id"]
+    )
+    app.state.clients = registry
+    app.state.admission = AdmissionController(
+        max_in_flight=10, route_limits={}, queue_size=10, queue_timeout=1.0,
+        codel_target=0.05, codel_interval=0.5, max_subscriptions=1
+    )
+    try:
+        # Sans lifespan : l'état installé par le test est conservé
+        client = TestClient(app)
+        with client.websocket_connect("/emergency/alerts/ws?zones=downtown") as first:
+            first.receive_json()
+            with client.websocket_connect("/emergency/alerts/ws?zones=industrial") as second:
+                with pytest.raises(WebSocketDisconnect) as exc_info:
+                    second.receive_json()
+                assert exc_info.value.code == 1013
+            assert app.state.admission.stats()["subscriptions"]["in_flight"] == 1
+        assert app.state.admission.stats()["subscriptions"]["in_flight"] == 0
+    finally:
+        app.state.admission = None
@@ -0,0 +1,289 @@
+"""
+Tests de l'instantané de l'état de la ville : lectures sans appel upstream,
+repli sur appel direct, alertes poussées, sections invalidées
+"""
+import asyncio
+import httpx
+import pytest
+import pytest_asyncio
+
+from main import app
+from clients import ClientRegistry, CityStateMaterializer
+from config import settings
+from routers.emergency import alerts_cache_tag
+from routers.smart_city import PLAN_TRIP_MOBILITY_TAG, plan_trip_zone_tag
+from utils import ResponseCache, SubscriptionHub
+
+PLAN = {"zone_depart": "downtown", "zone_arrivee": "industrial", "heure_depart": "14:30", "preferences": ["metro"]}
+
+
+def alert(alert_id, zone, status="PENDING", priority="HIGH"):
+    return {
+        "alert_id": alert_id, "type": "FIRE", "description": "Incendie", "priority": priority,
+        "status": status, "location": {"zone": zone}, "created_at": "2026-01-01T00:00:00"
+    }
+
+
+class FakeMobility:
+    def __init__(self):
+        self.calls = 0
+        self.etat = "normal"
+
+    async def get_trafic(self):
+        self.calls += 1
+        return {"lignes": [{"ligne": "metro 1", "etat": self.etat}]}
+
+    async def get_disponibilite(self):
+        return {"vehicules": [{"type_transport": "metro", "taux_disponibilite": 80}]}
+
+
+class FakeAirQuality:
+    def __init__(self):
+        self.calls = 0
+        self.aqi = 40
+
+    async def get_aqi(self, zone):
+        self.calls += 1
+        return {"zone": zone, "aqi": self.aqi, "category": "Good", "description": "ok", "timestamp": "2026-01-01T00:00:00"}
+
+
+class FakeEmergency:
+    def __init__(self):
+        self.calls = 0
+        self.alerts = {"industrial": [alert("a1", "industrial")]}
+
+    async def get_active_alerts_batch(self, zones):
+        self.calls += 1
+        return {zone: self.alerts.get(zone, []) for zone in zones}
+
+    async def get_active_alerts(self, zone, **filters):
+        self.calls += 1
+        return {"zone": zone, "alerts": [], "total_count": 0}
+
+
+class FakeUrbanEvents:
+    def __init__(self):
+        self.calls = 0
+        self.events = {}
+
+    async def get_events(self, **filters):
+        self.calls += 1
+        return self.events.get(filters.get("zone_id"), [])
+
+
+class AlertStream:
+    """Faux flux SubscribeAlerts alimenté par le test"""
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+
+    async def open_stream(self, key):
+        while True:
+            yield await self.queue.get()
+
+
+def upstream_calls(registry):
+    return (
+        registry.mobility.calls + registry._air_quality.calls
+        + registry.emergency.calls + registry.urban_events.calls
+    )
+
+
+@pytest_asyncio.fixture
+async def gateway(tmp_path):
+    registry = ClientRegistry()
+    registry.mobility = FakeMobility()
+    registry._air_quality = FakeAirQuality()
+    registry.emergency = FakeEmergency()
+    registry.urban_events = FakeUrbanEvents()
+    stream = AlertStream()
+    registry.alert_subscriptions = SubscriptionHub(
+        "test", open_stream=stream.open_stream, event="alert", buffer=16,
+        item_key=lambda item: item["alert_id"]
+    )
+    cache = ResponseCache(max_entries=10, invalidation_dir=str(tmp_path))
+    registry.city_state = CityStateMaterializer(registry, ["downtown", "industrial"])
+    registry.city_state.follow_invalidations(
+        cache,
+        {"trafic": "mobility.lignes", "disponibilite": "mobility.lignes"},
+        change_tags={
+            "trafic": PLAN_TRIP_MOBILITY_TAG,
+            "disponibilite": PLAN_TRIP_MOBILITY_TAG,
+            "aqi": plan_trip_zone_tag,
+            "events": plan_trip_zone_tag,
+            "alerts": alerts_cache_tag
+        }
+    )
+    await registry.city_state.refresh()
+    app.state.clients = registry
+    app.state.response_cache = cache
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        yield client, registry, stream
+    await registry.city_state.close()
+    await registry.alert_subscriptions.close()
+
+
+@pytest.mark.asyncio
+async def test_plan_trip_answered_from_snapshot(gateway):
+    client, registry, _ = gateway
+    before = upstream_calls(registry)
+
+    response = await client.post("/smart-city/plan-trip", json=PLAN)
+
+    body = response.json()
+    assert set(body["data_sources"].values()) == {"city_state"}
+    assert [a["alert_id"] for a in body["analysis"]["alertes_actives"]] == ["a1"]
+    assert upstream_calls(registry) == before
+
+
+@pytest.mark.asyncio
+async def test_stale_section_falls_back_to_live_call(gateway):
+    client, registry, _ = gateway
+    registry.city_state.aqi["downtown"].updated_at -= settings.CITY_STATE_MAX_AGE + 1
+
+    response = await client.post("/smart-city/plan-trip", json=PLAN)
+
+    sources = response.json()["data_sources"]
+    assert sources["air_quality"] == "live"
+    assert sources["mobility"] == "city_state"
+    assert registry._air_quality.calls == 2 + 2
+
+
+@pytest.mark.asyncio
+async def test_zone_route_served_from_snapshot_and_unknown_zone_served_live(gateway):
+    client, registry, _ = gateway
+
+    cached = await client.get("/air/aqi/downtown")
+    live = await client.get("/air/aqi/park")
+
+    assert cached.headers["X-Data-Source"] == "city-state"
+    assert "X-Data-Source" not in live.headers
+    assert registry._air_quality.calls == 2 + 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_zones_are_never_tracked(gateway):
+    client, registry, _ = gateway
+    subscription_task = registry.city_state._alerts_task
+
+    for zone in ("park", "zone-inexistante", "x" * 50):
+        await client.get(f"/air/aqi/{zone}")
+        await client.get(f"/emergency/alerts/active/{zone}")
+    await client.post("/smart-city/plan-trip", json={**PLAN, "zone_arrivee": "inconnue"})
+
+    assert registry.city_state.zones == {"downtown", "industrial"}
+    # Abonnement partagé aux alertes ni annulé ni rouvert
+    assert registry.city_state._alerts_task is subscription_task
+    await registry.city_state.refresh()
+    assert set(registry.city_state.aqi) == {"downtown", "industrial"}
+
+
+@pytest.mark.asyncio
+async def test_pushed_alerts_update_snapshot(gateway):
+    client, registry, stream = gateway
+    pushed = []
+    registry.city_state.on_alert = pushed.append
+    registry.city_state._follow_alerts()
+
+    await stream.queue.put(alert("a2", "downtown", priority="CRITICAL"))
+    await stream.queue.put(alert("a1", "industrial", status="RESOLVED"))
+    for _ in range(20):
+        if len(pushed) == 2:
+            break
+        await asyncio.sleep(0.01)
+
+    downtown = await client.get("/emergency/alerts/active/downtown", params={"min_priority": "CRITICAL"})
+    industrial = await client.get("/emergency/alerts/active/industrial")
+    assert [a["alert_id"] for a in downtown.json()] == ["a2"]
+    assert industrial.json() == []
+    assert registry.emergency.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_alerts_pushed_during_refresh_survive_older_snapshot(gateway):
+    client, registry, _ = gateway
+    city = registry.city_state
+    release = asyncio.Event()
+    batch = registry.emergency.get_active_alerts_batch
+
+    async def slow_batch(zones):
+        # Instantané lu avant les poussées, renvoyé après
+        alerts = await batch(zones)
+        await release.wait()
+        return alerts
+
+    registry.emergency.get_active_alerts_batch = slow_batch
+    refresh = asyncio.create_task(city.refresh())
+    await asyncio.sleep(0.01)
+    city._apply_alert(alert("a2", "downtown", priority="CRITICAL"))
+    city._apply_alert(alert("a1", "industrial", status="RESOLVED"))
+    release.set()
+    await refresh
+
+    assert list(city.zone_alerts("downtown")) == [alert("a2", "downtown", priority="CRITICAL")]
+    assert city.zone_alerts("industrial") == []
+
+    # Lecture suivante : l'instantané fait de nouveau foi
+    await city.refresh()
+    assert city.zone_alerts("downtown") == []
+    assert [a["alert_id"] for a in city.zone_alerts("industrial")] == ["a1"]
+
+
+@pytest.mark.asyncio
+async def test_invalidated_tag_expires_section(gateway):
+    client, registry, _ = gateway
+
+    app.state.response_cache.invalidate("mobility.lignes")
+    response = await client.get("/mobility/trafic")
+
+    assert "X-Data-Source" not in response.headers
+    assert registry.mobility.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_trafic_change_invalidates_cached_plans(gateway):
+    client, registry, _ = gateway
+    await client.post("/smart-city/plan-trip", json=PLAN)
+
+    # Même trafic : le plan reste en cache
+    await registry.city_state.refresh()
+    assert (await client.post("/smart-city/plan-trip", json=PLAN)).json()["cache_status"] == "HIT"
+
+    registry.mobility.etat = "perturbé"
+    await registry.city_state.refresh()
+
+    response = await client.post("/smart-city/plan-trip", json=PLAN)
+    assert response.json()["cache_status"] == "MISS"
+
+
+def change_aqi(registry):
+    registry._air_quality.aqi = 180
+
+
+def change_events(registry):
+    registry.urban_events.events["downtown"] = [{
+        "id": "e1", "name": "Marathon", "description": "Course", "priority": "HIGH",
+        "status": "IN_PROGRESS", "zone": {"name": "downtown"}, "date": "2026-01-01T08:00:00"
+    }]
+
+
+def change_alerts(registry):
+    registry.emergency.alerts["downtown"] = [alert("a2", "downtown", priority="CRITICAL")]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("change", [change_aqi, change_events, change_alerts])
+async def test_polled_zone_change_invalidates_cached_plans(gateway, change):
+    client, registry, _ = gateway
+    await client.post("/smart-city/plan-trip", json=PLAN)
+
+    await registry.city_state.refresh()
+    assert (await client.post("/smart-city/plan-trip", json=PLAN)).json()["cache_status"] == "HIT"
+
+    change(registry)
+    await registry.city_state.refresh()
+
+    response = await client.post("/smart-city/plan-trip", json=PLAN)
+    assert response.json()["cache_status"] == "MISS"
@@ -0,0 +1,100 @@
+"""
+Tests du fan-out : délai par service, erreurs capturées, plan-trip partiel
+"""
+import asyncio
+import httpx
+import pytest
+import pytest_asyncio
+
+from main import app
+from clients import ClientRegistry
+from config import settings
+from utils import ResponseCache, ServiceError, fan_out
+
+PLAN = {"zone_depart": "downtown", "zone_arrivee": "industrial", "heure_depart": "08:00", "preferences": ["metro"]}
+
+
+async def answer(value, delay=0.0):
+    await asyncio.sleep(delay)
+    return value
+
+
+async def fail():
+    raise ServiceError("emergency-grpc-service", "unavailable", status_code=503)
+
+
+@pytest.mark.asyncio
+async def test_slow_call_times_out_without_delaying_others():
+    started = asyncio.get_running_loop().time()
+    results = await fan_out({
+        "mobility": (answer("trafic"), 1.0),
+        "urban_events": (answer("events", delay=5), 0.05)
+    })
+
+    assert asyncio.get_running_loop().time() - started < 1
+    assert results["mobility"].ok and results["mobility"].value == "trafic"
+    assert results["urban_events"].timed_out
+    assert not results["urban_events"].ok
+    assert results["urban_events"].value is None
+
+
+@pytest.mark.asyncio
+async def test_exception_is_captured_in_result():
+    results = await fan_out({"emergency": (fail(), 1.0), "mobility": (answer("trafic"), 1.0)})
+
+    assert isinstance(results["emergency"].error, ServiceError)
+    assert not results["emergency"].timed_out
+    assert results["mobility"].ok
+
+
+class FakeMobility:
+    async def get_trafic(self):
+        return {"lignes": [{"ligne": "metro 1", "etat": "normal"}]}
+
+    async def get_disponibilite(self):
+        return {"vehicules": [{"type_transport": "metro", "taux_disponibilite": 80}]}
+
+
+class FakeAirQuality:
+    async def get_aqi(self, zone):
+        return {"zone": zone, "aqi": 40, "category": "Good", "description": "ok", "timestamp": "2026-01-01T00:00:00"}
+
+
+class FailingEmergency:
+    async def get_active_alerts_batch(self, zones):
+        await fail()
+
+
+class SlowUrbanEvents:
+    async def get_events(self, **filters):
+        await asyncio.sleep(5)
+        return []
+
+
+@pytest_asyncio.fixture
+async def gateway(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "PLAN_TRIP_GRAPHQL_DEADLINE", 0.05)
+    registry = ClientRegistry()
+    registry.mobility = FakeMobility()
+    registry._air_quality = FakeAirQuality()
+    registry.emergency = FailingEmergency()
+    registry.urban_events = SlowUrbanEvents()
+    app.state.clients = registry
+    app.state.response_cache = ResponseCache(max_entries=10, invalidation_dir=str(tmp_path))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_plan_trip_reports_missing_services_in_warnings(gateway):
+    response = await gateway.post("/smart-city/plan-trip", json=PLAN)
+
+    assert response.status_code == 200
+    warnings = response.json()["warnings"]
+    assert "⚠️ Données d'événements indisponibles (délai dépassé)" in warnings
+    assert "⚠️ Données d'urgence indisponibles" in warnings
+    # Les services qui ont répondu restent exploités
+    assert not any("qualité de l'air" in warning or "mobilité" in warning for warning in warnings)
+    assert response.json()["analysis"]["air_quality_depart"]["aqi"] == 40
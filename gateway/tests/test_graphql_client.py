@@ -0,0 +1,88 @@
+"""
+Tests du client GraphQL : session persistante, documents pré-parsés, mise en lot
+"""
+import asyncio
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from clients import UrbanEventsGraphQLClient
+from clients import graphql_documents as documents
+from config import settings
+
+
+@pytest_asyncio.fixture
+async def graphql_server(unused_tcp_port):
+    """Faux service Événements Urbains qui enregistre les POST reçus"""
+    received = []
+
+    async def handle(request):
+        payload = await request.json()
+        received.append(payload)
+        if isinstance(payload, list):
+            results = []
+            for operation in payload:
+                if operation.get("variables", {}).get("status") == "UNKNOWN":
+                    results.append({"data": None, "errors": [{"message": "Unknown status"}]})
+                else:
+                    results.append({"data": {"events": [{"id": "evt-1"}]}})
+            return web.json_response(results)
+        return web.json_response({"data": {"events": [{"id": "evt-1"}]}})
+
+    app = web.Application()
+    app.router.add_post("/graphql", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", unused_tcp_port)
+    await site.start()
+    yield f"http://127.0.0.1:{unused_tcp_port}/graphql", received
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_each_query_costs_a_single_post(graphql_server, monkeypatch):
+    url, received = graphql_server
+    monkeypatch.setattr(settings, "URBAN_EVENTS_GRAPHQL_URL", url)
+    client = UrbanEventsGraphQLClient()
+    try:
+        for status in ("PENDING", "IN_PROGRESS", "RESOLVED"):
+            assert await client.get_events(zone_id="downtown", status=status) == [{"id": "evt-1"}]
+    finally:
+        await client.close()
+
+    # Pas d'introspection : un POST par requête, avec le document pré-imprimé
+    assert len(received) == 3
+    assert all(payload["query"] == documents.EVENTS.query for payload in received)
+    assert received[1]["variables"] == {"zoneId": "downtown", "status": "IN_PROGRESS"}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_queries_share_one_batched_post(graphql_server, monkeypatch):
+    url, received = graphql_server
+    monkeypatch.setattr(settings, "URBAN_EVENTS_GRAPHQL_URL", url)
+    client = UrbanEventsGraphQLClient()
+    try:
+        in_progress, pending, unknown = await asyncio.gather(
+            client.get_events(zone_id="downtown", status="IN_PROGRESS"),
+            client.get_events(zone_id="downtown", status="PENDING"),
+            client.get_events(zone_id="downtown", status="UNKNOWN"),
+            return_exceptions=True
+        )
+    finally:
+        await client.close()
+
+    assert len(received) == 1
+    assert [operation["variables"]["status"] for operation in received[0]] == ["IN_PROGRESS", "PENDING", "UNKNOWN"]
+    # Une opération en erreur n'affecte pas les autres opérations du lot
+    assert in_progress == pending == [{"id": "evt-1"}]
+    assert isinstance(unknown, Exception)
+
+
+def test_documents_are_validated_against_schema(tmp_path):
+    schema = tmp_path / "schema.graphql"
+    schema.write_text("type Query { zones: [String] }", encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        documents.validate_documents(str(schema))
+
+    documents.validate_documents(settings.URBAN_EVENTS_GRAPHQL_SCHEMA)
@@ -0,0 +1,122 @@
+"""
+Tests du client gRPC : channel partagé, retry des RPC idempotents, échec rapide
+"""
+import json
+import time
+import grpc
+import pytest
+import pytest_asyncio
+
+from clients import EmergencyGrpcClient
+from clients.grpc_client import build_channel_options
+from config import settings
+from protos import emergency_pb2, emergency_pb2_grpc
+from utils import ServiceError
+
+
+class FlakyEmergencyService(emergency_pb2_grpc.EmergencyAlertServiceServicer):
+    """Faux service Urgences : les premiers appels échouent en UNAVAILABLE"""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    async def GetActiveAlerts(self, request, context):
+        self.calls += 1
+        if self.calls <= self.failures:
+            await context.abort(grpc.StatusCode.UNAVAILABLE, "overloaded")
+        return emergency_pb2.AlertListResponse(total_count=0)
+
+    async def GetActiveAlertsBatch(self, request, context):
+        self.calls += 1
+        response = emergency_pb2.MultiZoneAlertResponse(total_count=len(request.zones))
+        for zone in request.zones:
+            alert = response.zones[zone].alerts.add(alert_id=f"alert-{zone}")
+            alert.location.zone = zone
+        return response
+
+    async def UpdateAlertStatus(self, request, context):
+        self.calls += 1
+        await context.abort(grpc.StatusCode.UNAVAILABLE, "overloaded")
+
+
+@pytest_asyncio.fixture
+async def emergency_server(unused_tcp_port, monkeypatch):
+    service = FlakyEmergencyService(failures=2)
+    server = grpc.aio.server()
+    emergency_pb2_grpc.add_EmergencyAlertServiceServicer_to_server(service, server)
+    server.add_insecure_port(f"127.0.0.1:{unused_tcp_port}")
+    await server.start()
+    monkeypatch.setattr(settings, "EMERGENCY_GRPC_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "EMERGENCY_GRPC_PORT", unused_tcp_port)
+    monkeypatch.setattr(settings, "GRPC_RETRY_INITIAL_BACKOFF", 0.01)
+    yield service
+    await server.stop(None)
+
+
+@pytest.mark.asyncio
+async def test_idempotent_reads_are_retried_by_the_channel(emergency_server):
+    client = EmergencyGrpcClient()
+    try:
+        assert await client.wait_until_ready(timeout=5)
+        assert await client.get_active_alerts(zone="downtown") == []
+    finally:
+        await client.close()
+
+    assert emergency_server.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_multi_zone_alerts_in_one_rpc(emergency_server):
+    client = EmergencyGrpcClient()
+    try:
+        alerts = await client.get_active_alerts_batch(["industrial", "downtown", "downtown"])
+    finally:
+        await client.close()
+
+    assert emergency_server.calls == 1
+    assert sorted(alerts) == ["downtown", "industrial"]
+    assert alerts["downtown"][0]["alert_id"] == "alert-downtown"
+
+
+@pytest.mark.asyncio
+async def test_mutations_are_not_retried(emergency_server):
+    client = EmergencyGrpcClient()
+    try:
+        with pytest.raises(ServiceError) as exc_info:
+            await client.update_alert_status("alert-1", "RESOLVED")
+    finally:
+        await client.close()
+
+    assert exc_info.value.status_code == 503
+    assert emergency_server.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_fail_fast_while_channel_is_in_transient_failure(unused_tcp_port, monkeypatch):
+    monkeypatch.setattr(settings, "EMERGENCY_GRPC_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "EMERGENCY_GRPC_PORT", unused_tcp_port)
+    client = EmergencyGrpcClient()
+    try:
+        assert not await client.wait_until_ready(timeout=0.5)
+        assert client.channel.get_state() == grpc.ChannelConnectivity.TRANSIENT_FAILURE
+
+        started = time.monotonic()
+        with pytest.raises(ServiceError) as exc_info:
+            await client.get_active_alerts(zone="downtown")
+    finally:
+        await client.close()
+
+    assert exc_info.value.status_code == 503
+    assert time.monotonic() - started < 0.1
+
+
+def test_retry_throttling_has_its_own_settings(monkeypatch):
+    monkeypatch.setattr(settings, "GRPC_RETRY_THROTTLE_MAX_TOKENS", 20)
+    monkeypatch.setattr(settings, "GRPC_RETRY_THROTTLE_TOKEN_RATIO", 0.5)
+    # Le budget du moteur de relances ne change pas celui du channel
+    monkeypatch.setattr(settings, "RETRY_BUDGET_RATIO", 0.9)
+
+    service_config = json.loads(dict(build_channel_options())["grpc.service_config"])
+
+    assert service_config["retryThrottling"] == {"maxTokens": 20, "tokenRatio": 0.5}
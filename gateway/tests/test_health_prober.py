@@ -0,0 +1,117 @@
+"""
+Tests des sondes de santé en arrière-plan : sondes parallèles et bornées,
+historique, /smart-city/health servi sans appel upstream
+"""
+import asyncio
+import httpx
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from main import app
+from clients import ClientRegistry, HealthProber, UrbanEventsGraphQLClient
+from config import settings
+from utils import ResponseCache
+
+
+class Check:
+    """Fausse sonde : réponse et durée réglables, appels comptés"""
+
+    def __init__(self, healthy=True, delay=0.0):
+        self.healthy = healthy
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.healthy
+
+
+@pytest.mark.asyncio
+async def test_slow_service_times_out_without_delaying_others(monkeypatch):
+    monkeypatch.setattr(settings, "HEALTH_PROBE_TIMEOUT", 0.05)
+    prober = HealthProber({"mobility": Check(), "emergency": Check(delay=1), "urban_events": Check(healthy=False)})
+
+    started = asyncio.get_running_loop().time()
+    results = await prober.probe_all()
+
+    assert asyncio.get_running_loop().time() - started < 0.5
+    assert results["mobility"].healthy
+    assert not results["emergency"].healthy and "0.05s" in results["emergency"].error
+    assert results["urban_events"].error == "health check failed"
+
+
+@pytest.mark.asyncio
+async def test_history_is_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "HEALTH_PROBE_HISTORY", 3)
+    check = Check()
+    prober = HealthProber({"mobility": check})
+
+    for healthy in (True, False, True, True):
+        check.healthy = healthy
+        await prober.probe("mobility")
+
+    report = prober.report()["mobility"]
+    assert [entry["healthy"] for entry in report["history"]] == [False, True, True]
+    assert report["success_ratio"] == pytest.approx(2 / 3, abs=0.001)
+    assert report["age_seconds"] is not None
+
+
+@pytest_asyncio.fixture
+async def gateway(tmp_path):
+    checks = {name: Check() for name in ("mobility", "air_quality", "emergency", "urban_events")}
+    checks["emergency"].healthy = False
+    registry = ClientRegistry()
+    registry.health = HealthProber(checks)
+    await registry.health.probe_all()
+    app.state.clients = registry
+    app.state.response_cache = ResponseCache(max_entries=10, invalidation_dir=str(tmp_path))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        yield client, checks
+
+
+@pytest.mark.asyncio
+async def test_health_endpoint_reads_last_probe(gateway):
+    client, checks = gateway
+
+    for _ in range(3):
+        response = await client.get("/smart-city/health")
+
+    body = response.json()
+    assert body["status"] == "degraded"
+    assert body["services"] == {"mobility": True, "air_quality": True, "emergency": False, "urban_events": True}
+    assert body["checks"]["emergency"]["age_seconds"] >= 0
+    assert all(check.calls == 1 for check in checks.values())
+
+
+@pytest_asyncio.fixture
+async def graphql_server(unused_tcp_port):
+    received = []
+
+    async def handle(request):
+        received.append((await request.json())["query"])
+        return web.json_response({"data": {"__typename": "Query"}})
+
+    server = web.Application()
+    server.router.add_post("/graphql", handle)
+    runner = web.AppRunner(server)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", unused_tcp_port).start()
+    yield f"http://127.0.0.1:{unused_tcp_port}/graphql", received
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_graphql_probe_runs_no_resolver(graphql_server, monkeypatch):
+    url, received = graphql_server
+    monkeypatch.setattr(settings, "URBAN_EVENTS_GRAPHQL_URL", url)
+    client = UrbanEventsGraphQLClient()
+    try:
+        assert await client.health_check()
+    finally:
+        await client.close()
+
+    assert "__typename" in received[0] and "zones" not in received[0]
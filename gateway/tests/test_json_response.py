@@ -0,0 +1,64 @@
+"""
+Tests des réponses orjson et du court-circuit de l'encodeur (routes pass-through)
+"""
+import json
+from decimal import Decimal
+import httpx
+import pytest
+from fastapi import Response
+
+from main import app
+from clients import ClientRegistry, MobilityRestClient
+from utils import FastJSONResponse, ResponseCache, passthrough
+
+LIGNES = [{"id": "L1", "nom": "Ligne 1", "arrets": ["Centre", "Gare"], "frequence": 7.5}]
+
+
+def test_render_matches_stdlib_json():
+    payload = {"alertes": LIGNES, "total": 1, "zone": "Médina", 3: None}
+    body = FastJSONResponse(payload).body
+    assert json.loads(body) == json.loads(json.dumps(payload))
+
+
+def test_decimal_is_rendered_as_number():
+    assert json.loads(FastJSONResponse({"aqi": Decimal("42.5")}).body) == {"aqi": 42.5}
+
+
+def test_passthrough_keeps_route_headers_but_not_body_headers():
+    injected = Response()
+    injected.headers["X-Cache"] = "HIT"
+
+    response = passthrough(LIGNES, injected)
+
+    assert response.headers["X-Cache"] == "HIT"
+    assert int(response.headers["content-length"]) == len(response.body)
+    assert response.headers["content-type"] == "application/json"
+
+
+@pytest.mark.asyncio
+async def test_cached_passthrough_route(tmp_path):
+    """Une route en cache relaie le JSON upstream et garde X-Cache / Age"""
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        return httpx.Response(200, json=LIGNES)
+
+    mobility = MobilityRestClient()
+    await mobility.client.aclose()
+    mobility.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    registry = ClientRegistry()
+    registry.mobility = mobility
+    app.state.clients = registry
+    app.state.response_cache = ResponseCache(max_entries=10, invalidation_dir=str(tmp_path))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        first = await client.get("/mobility/lignes")
+        second = await client.get("/mobility/lignes")
+    await mobility.close()
+
+    assert first.json() == second.json() == LIGNES
+    assert (first.headers["X-Cache"], second.headers["X-Cache"]) == ("MISS", "HIT")
+    assert "Age" in second.headers
+    assert calls == ["/lignes"]
@@ -0,0 +1,58 @@
+"""
+Tests des métriques Prometheus
+"""
+import os
+import subprocess
+import sys
+import pytest
+from prometheus_client import REGISTRY, CollectorRegistry, multiprocess
+
+from utils import ServiceError, UpstreamGuard
+from utils.circuit_breaker import CircuitBreaker
+
+GATEWAY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.asyncio
+async def test_upstream_calls_are_observed_by_outcome():
+    guard = UpstreamGuard("metrics-test")
+    guard.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+
+    async def ok():
+        return "ok"
+
+    async def down():
+        raise ServiceError("metrics-test", "down", status_code=503)
+
+    await guard.call(ok, "GetAQI")
+    with pytest.raises(ServiceError):
+        await guard.call(down, "GetAQI")
+    with pytest.raises(ServiceError):
+        await guard.call(ok, "GetAQI")
+
+    name = "gateway_upstream_call_duration_seconds_count"
+    assert sample(name, service="metrics-test", operation="GetAQI", outcome="success") == 1
+    assert sample(name, service="metrics-test", operation="GetAQI", outcome="failure") == 1
+    assert sample(name, service="metrics-test", operation="GetAQI", outcome="rejected") == 1
+    assert sample("gateway_upstream_calls_in_flight", service="metrics-test") == 0
+
+
+def test_metrics_are_aggregated_across_workers(tmp_path):
+    """Chaque worker écrit dans PROMETHEUS_MULTIPROC_DIR, /metrics additionne"""
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+    script = (
+        "from utils.metrics import CACHE_REQUESTS, render_metrics\n"
+        "CACHE_REQUESTS.labels('air.aqi', 'HIT').inc(3)\n"
+    )
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", script], cwd=GATEWAY_DIR, env=env, check=True)
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+    assert registry.get_sample_value(
+        "gateway_cache_requests_total", {"cache": "air.aqi", "status": "HIT"}
+    ) == 6
@@ -0,0 +1,159 @@
+"""
+Tests des réponses en flux NDJSON : décodage SOAP incrémental, pagination
+GraphQL, RPC gRPC server-streaming et signalement des erreurs
+"""
+import json
+import os
+import grpc
+import pytest
+import pytest_asyncio
+from aiohttp import web
+
+from clients import EmergencyGrpcClient, UrbanEventsGraphQLClient
+from clients.soap_codec import HistoryStreamDecoder, SoapFault
+from config import settings
+from protos import emergency_pb2, emergency_pb2_grpc
+from utils import ServiceError, ndjson_response
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "soap")
+
+FAULT_RESPONSE = (
+    b"<?xml version='1.0' encoding='UTF-8'?>"
+    b'<soap11env:Envelope xmlns:soap11env="http://schemas.xmlsoap.org/soap/envelope/">'
+    b"<soap11env:Body><soap11env:Fault><faultcode>soap11env:Client.ValidationError</faultcode>"
+    b"<faultstring>Date invalide</faultstring></soap11env:Fault>"
+    b"</soap11env:Body></soap11env:Envelope>"
+)
+
+
+async def body_lines(response):
+    chunks = [chunk async for chunk in response.body_iterator]
+    return [json.loads(line) for line in b"".join(chunks).splitlines()]
+
+
+def test_history_decoded_chunk_by_chunk():
+    """Chaque DataPoint est rendu dès sa balise fermante reçue"""
+    with open(os.path.join(FIXTURES_DIR, "GetHistoryResponse.xml"), "rb") as f:
+        content = f.read()
+
+    decoder = HistoryStreamDecoder()
+    batches = [decoder.feed(content[i:i + 16]) for i in range(0, len(content), 16)]
+    batches.append(decoder.close())
+    points = [point for batch in batches for point in batch]
+
+    assert [point["aqi"] for point in points] == [40, 41, 42]
+    assert points[0]["pm25"] == 10.5
+    # Champ absent de la réponse : None, comme le décodeur zeep
+    assert points[1]["so2"] is None
+    # Les points arrivent sur plusieurs morceaux, pas tous à la fin
+    assert sum(1 for batch in batches if batch) == 3
+
+
+def test_history_fault():
+    decoder = HistoryStreamDecoder()
+    with pytest.raises(SoapFault) as error:
+        decoder.feed(FAULT_RESPONSE)
+        decoder.close()
+
+    assert error.value.message == "Date invalide"
+
+
+@pytest.mark.asyncio
+async def test_error_before_first_item_is_a_plain_http_error():
+    async def items():
+        raise ServiceError("urban-events-graphql", "down", status_code=503)
+        yield
+
+    with pytest.raises(ServiceError):
+        await ndjson_response(items())
+
+
+@pytest.mark.asyncio
+async def test_error_mid_stream_is_the_last_line():
+    async def items():
+        yield {"id": 1}
+        yield {"id": 2}
+        raise ServiceError("emergency-grpc", "stream reset", status_code=503)
+
+    response = await ndjson_response(items())
+
+    assert response.media_type == "application/x-ndjson"
+    assert await body_lines(response) == [
+        {"id": 1},
+        {"id": 2},
+        {"error": {"service": "emergency-grpc", "message": "stream reset", "status_code": 503}}
+    ]
+
+
+class HistoryService(emergency_pb2_grpc.EmergencyAlertServiceServicer):
+    """Faux service Urgences : `limit` alertes, une par message"""
+
+    async def StreamAlertHistory(self, request, context):
+        for index in range(request.limit):
+            alert = emergency_pb2.AlertResponse(alert_id=f"alert-{index}")
+            alert.location.zone = request.zone
+            yield alert
+
+
+@pytest_asyncio.fixture
+async def history_server(unused_tcp_port, monkeypatch):
+    server = grpc.aio.server()
+    emergency_pb2_grpc.add_EmergencyAlertServiceServicer_to_server(HistoryService(), server)
+    server.add_insecure_port(f"127.0.0.1:{unused_tcp_port}")
+    await server.start()
+    monkeypatch.setattr(settings, "EMERGENCY_GRPC_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "EMERGENCY_GRPC_PORT", unused_tcp_port)
+    yield
+    await server.stop(None)
+
+
+@pytest.mark.asyncio
+async def test_alert_history_streamed_over_grpc(history_server):
+    client = EmergencyGrpcClient()
+    try:
+        response = await ndjson_response(client.stream_alert_history(zone="downtown", limit=5))
+        alerts = await body_lines(response)
+    finally:
+        await client.close()
+
+    assert [alert["alert_id"] for alert in alerts] == [f"alert-{index}" for index in range(5)]
+    assert alerts[0]["location"]["zone"] == "downtown"
+    assert client.guard.breaker.stats()["state"] == "closed"
+
+
+@pytest_asyncio.fixture
+async def paged_events_server(unused_tcp_port):
+    """Faux service Événements Urbains : 5 événements servis selon limit/offset"""
+    received = []
+
+    async def handle(request):
+        payload = await request.json()
+        received.append(payload["variables"])
+        offset, limit = payload["variables"]["offset"], payload["variables"]["limit"]
+        events = [{"id": f"evt-{index}"} for index in range(5)][offset:offset + limit]
+        return web.json_response({"data": {"events": events}})
+
+    app = web.Application()
+    app.router.add_post("/graphql", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", unused_tcp_port)
+    await site.start()
+    yield f"http://127.0.0.1:{unused_tcp_port}/graphql", received
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_events_streamed_page_by_page(paged_events_server, monkeypatch):
+    url, received = paged_events_server
+    monkeypatch.setattr(settings, "URBAN_EVENTS_GRAPHQL_URL", url)
+    client = UrbanEventsGraphQLClient()
+    try:
+        events = [event async for event in client.stream_events(zone_id="downtown", page_size=2)]
+    finally:
+        await client.close()
+
+    assert [event["id"] for event in events] == [f"evt-{index}" for index in range(5)]
+    assert [variables["offset"] for variables in received] == [0, 2, 4]
+    assert received[0] == {"zoneId": "downtown", "limit": 2, "offset": 0}
@@ -0,0 +1,131 @@
+"""
+Tests du plan-trip par lot : lectures partagées entre trajets, ordre des
+résultats, échecs propres à chaque trajet
+"""
+import httpx
+import pytest
+import pytest_asyncio
+
+from main import app
+from clients import ClientRegistry
+from config import settings
+from utils import ResponseCache, ServiceError
+
+
+def trip(depart, arrivee):
+    return {"zone_depart": depart, "zone_arrivee": arrivee, "heure_depart": "08:15", "preferences": ["metro"]}
+
+
+class FakeMobility:
+    def __init__(self):
+        self.calls = 0
+
+    async def get_trafic(self):
+        self.calls += 1
+        return {"lignes": [{"ligne": "metro 1", "etat": "normal"}]}
+
+    async def get_disponibilite(self):
+        return {"vehicules": [{"type_transport": "metro", "taux_disponibilite": 80}]}
+
+
+class FakeAirQuality:
+    def __init__(self):
+        self.zones = []
+        self.down = set()
+
+    async def get_aqi(self, zone):
+        self.zones.append(zone)
+        if zone in self.down:
+            raise ServiceError("air-quality-soap-service", "down", status_code=503)
+        return {"zone": zone, "aqi": 40, "category": "Good", "description": "ok", "timestamp": "2026-01-01T00:00:00"}
+
+
+class FakeEmergency:
+    def __init__(self):
+        self.batches = []
+        self.alerts = {}
+
+    async def get_active_alerts_batch(self, zones):
+        self.batches.append(list(zones))
+        return {zone: self.alerts.get(zone, []) for zone in zones}
+
+
+class FakeUrbanEvents:
+    def __init__(self):
+        self.zones = []
+
+    async def get_events(self, zone_id=None, status=None):
+        self.zones.append(zone_id)
+        return []
+
+
+@pytest_asyncio.fixture
+async def gateway(tmp_path):
+    registry = ClientRegistry()
+    registry.mobility = FakeMobility()
+    registry._air_quality = FakeAirQuality()
+    registry.emergency = FakeEmergency()
+    registry.urban_events = FakeUrbanEvents()
+    app.state.clients = registry
+    app.state.response_cache = ResponseCache(max_entries=10, invalidation_dir=str(tmp_path))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        yield client, registry
+
+
+@pytest.mark.asyncio
+async def test_each_zone_fetched_once_for_all_trips(gateway):
+    client, registry = gateway
+    trips = [trip("downtown", "industrial"), trip("industrial", "park"), trip("park", "downtown")]
+
+    response = await client.post("/smart-city/plan-trip/batch", json={"trips": trips})
+
+    body = response.json()
+    assert body["success"] and body["total"] == 3
+    assert [r["analysis"]["zone_depart"] for r in body["results"]] == ["downtown", "industrial", "park"]
+    assert sorted(registry._air_quality.zones) == ["downtown", "industrial", "park"]
+    assert sorted(registry.urban_events.zones) == ["downtown", "industrial", "park"]
+    assert registry.emergency.batches == [["downtown", "industrial", "park"]]
+    assert registry.mobility.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_zone_failure_only_warns_trips_crossing_it(gateway):
+    client, registry = gateway
+    registry._air_quality.down = {"park"}
+
+    response = await client.post("/smart-city/plan-trip/batch", json={
+        "trips": [trip("downtown", "industrial"), trip("industrial", "park")]
+    })
+
+    first, second = response.json()["results"]
+    assert first["warnings"] == []
+    assert second["warnings"] == ["⚠️ Données de qualité de l'air indisponibles"]
+
+
+@pytest.mark.asyncio
+async def test_failed_trip_reported_in_place(gateway):
+    client, registry = gateway
+    # Alerte incomplète : l'analyse des trajets qui traversent la zone échoue
+    registry.emergency.alerts = {"industrial": [{"alert_id": "a1"}]}
+
+    response = await client.post("/smart-city/plan-trip/batch", json={
+        "trips": [trip("downtown", "park"), trip("downtown", "industrial"), trip("park", "downtown")]
+    })
+
+    body = response.json()
+    assert response.status_code == 200
+    assert [r["success"] for r in body["results"]] == [True, False, True]
+    assert body["failed"] == 1 and not body["success"]
+    assert body["results"][1]["message"].startswith("Erreur lors de la planification du trajet")
+
+
+@pytest.mark.asyncio
+async def test_batch_size_is_bounded(gateway, monkeypatch):
+    client, _ = gateway
+    monkeypatch.setattr(settings, "PLAN_TRIP_BATCH_MAX_TRIPS", 2)
+
+    response = await client.post("/smart-city/plan-trip/batch", json={"trips": [trip("downtown", "park")] * 3})
+
+    assert response.status_code == 422
@@ -0,0 +1,129 @@
+"""
+Tests du cache des plans de trajet : créneaux horaires, invalidation, plans incomplets
+"""
+import httpx
+import pytest
+import pytest_asyncio
+
+from main import app
+from clients import ClientRegistry
+from utils import ResponseCache, ServiceError
+
+PLAN = {"zone_depart": "downtown", "zone_arrivee": "industrial", "preferences": ["metro"]}
+
+
+class FakeMobility:
+    def __init__(self):
+        self.calls = 0
+
+    async def get_trafic(self):
+        self.calls += 1
+        return {"lignes": [{"ligne": "metro 1", "etat": "normal"}]}
+
+    async def get_disponibilite(self):
+        return {"vehicules": [{"type_transport": "metro", "taux_disponibilite": 80}]}
+
+
+class FakeAirQuality:
+    def __init__(self):
+        self.down = False
+
+    async def get_aqi(self, zone):
+        if self.down:
+            raise ServiceError("air-quality-soap-service", "down", status_code=503)
+        return {"zone": zone, "aqi": 40, "category": "Good", "description": "ok", "timestamp": "2026-01-01T00:00:00"}
+
+
+class FakeEmergency:
+    async def get_active_alerts_batch(self, zones):
+        return {zone: [] for zone in zones}
+
+    async def create_alert(self, **alert):
+        return {"alert_id": "a1", "location": alert["location"]}
+
+
+class FakeUrbanEvents:
+    async def get_events(self, **filters):
+        return []
+
+
+@pytest_asyncio.fixture
+async def gateway(tmp_path):
+    registry = ClientRegistry()
+    registry.mobility = FakeMobility()
+    registry._air_quality = FakeAirQuality()
+    registry.emergency = FakeEmergency()
+    registry.urban_events = FakeUrbanEvents()
+    app.state.clients = registry
+    app.state.response_cache = ResponseCache(max_entries=10, invalidation_dir=str(tmp_path))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        yield client, registry
+
+
+async def plan(client, heure):
+    response = await client.post("/smart-city/plan-trip", json={**PLAN, "heure_depart": heure})
+    assert response.status_code == 200
+    return response
+
+
+@pytest.mark.asyncio
+async def test_same_time_slot_is_served_from_cache(gateway):
+    client, registry = gateway
+
+    first = await plan(client, "14:31")
+    second = await plan(client, "14:40")
+
+    assert first.json()["cache_status"] == "MISS"
+    assert second.json()["cache_status"] == "HIT"
+    assert second.headers["X-Cache"] == "HIT"
+    # Champs liés à l'heure exacte réécrits pour la requête servie
+    analysis = second.json()["analysis"]
+    assert analysis["heure_demandee"] == "14:40"
+    assert analysis["transports_disponibles"][0]["horaires_prochain_passage"][0] == "14:40"
+    assert registry.mobility.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_next_time_slot_is_recomputed(gateway):
+    client, registry = gateway
+
+    await plan(client, "14:31")
+    response = await plan(client, "14:50")
+
+    assert response.json()["cache_status"] == "MISS"
+    assert registry.mobility.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_new_alert_in_zone_invalidates_plan(gateway):
+    client, registry = gateway
+    await plan(client, "14:31")
+
+    created = await client.post("/emergency/alerts", json={
+        "type": "FIRE",
+        "description": "Incendie entrepôt",
+        "location": {"latitude": 36.8, "longitude": 10.1, "address": "Rue 1", "city": "Tunis", "zone": "industrial"},
+        "priority": "CRITICAL",
+        "reporter_name": "Agent",
+        "reporter_phone": "+21612345678"
+    })
+    assert created.status_code == 201
+
+    response = await plan(client, "14:35")
+    assert response.json()["cache_status"] == "MISS"
+    assert registry.mobility.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_incomplete_plan_is_not_cached(gateway):
+    client, registry = gateway
+    registry._air_quality.down = True
+
+    first = await plan(client, "14:31")
+    second = await plan(client, "14:31")
+
+    assert first.json()["warnings"]
+    assert second.json()["cache_status"] == "MISS"
+    assert registry.mobility.calls == 2
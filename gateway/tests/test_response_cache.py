@@ -0,0 +1,134 @@
+"""
+Tests du cache des réponses de lecture
+"""
+import asyncio
+import pytest
+
+from utils import ResponseCache, ServiceError
+from utils.response_cache import CACHE_HIT, CACHE_STALE, CACHE_MISS, CACHE_LAST_KNOWN_GOOD
+
+
+class Upstream:
+    """Faux appel upstream : compte les appels, peut tomber en panne"""
+
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+
+    async def fetch(self):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return {"version": self.calls}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(max_entries=3, invalidation_dir=str(tmp_path))
+
+
+@pytest.mark.asyncio
+async def test_fresh_entry_is_served_from_cache(cache):
+    upstream = Upstream()
+
+    _, first, _ = await cache.get_or_fetch("k", upstream.fetch, ttl=60)
+    value, second, _ = await cache.get_or_fetch("k", upstream.fetch, ttl=60)
+
+    assert (first, second) == (CACHE_MISS, CACHE_HIT)
+    assert value == {"version": 1}
+    assert upstream.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_served_while_refreshing(cache):
+    upstream = Upstream()
+    await cache.get_or_fetch("k", upstream.fetch, ttl=0.05)
+    await asyncio.sleep(0.06)
+
+    value, status, _ = await cache.get_or_fetch("k", upstream.fetch, ttl=0.05)
+    assert (value, status) == ({"version": 1}, CACHE_STALE)
+
+    await asyncio.sleep(0.01)
+    value, status, _ = await cache.get_or_fetch("k", upstream.fetch, ttl=0.05)
+    assert (value, status) == ({"version": 2}, CACHE_HIT)
+
+
+@pytest.mark.asyncio
+async def test_last_known_good_when_upstream_is_down(cache):
+    upstream = Upstream()
+    cache.stale_ratio = 0
+    await cache.get_or_fetch("k", upstream.fetch, ttl=0.01)
+    await asyncio.sleep(0.02)
+
+    upstream.error = ServiceError("mobility-service", "down", status_code=503)
+    value, status, _ = await cache.get_or_fetch("k", upstream.fetch, ttl=0.01)
+
+    assert (value, status) == ({"version": 1}, CACHE_LAST_KNOWN_GOOD)
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_masked(cache):
+    upstream = Upstream()
+    cache.stale_ratio = 0
+    await cache.get_or_fetch("k", upstream.fetch, ttl=0.01)
+    await asyncio.sleep(0.02)
+
+    upstream.error = ServiceError("mobility-service", "not found", status_code=404)
+    with pytest.raises(ServiceError):
+        await cache.get_or_fetch("k", upstream.fetch, ttl=0.01)
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction(cache):
+    upstream = Upstream()
+    for key in ("a", "b", "c"):
+        await cache.get_or_fetch(key, upstream.fetch, ttl=60)
+    await cache.get_or_fetch("a", upstream.fetch, ttl=60)
+    await cache.get_or_fetch("d", upstream.fetch, ttl=60)
+
+    _, status_a, _ = await cache.get_or_fetch("a", upstream.fetch, ttl=60)
+    _, status_b, _ = await cache.get_or_fetch("b", upstream.fetch, ttl=60)
+
+    assert (status_a, status_b) == (CACHE_HIT, CACHE_MISS)
+    assert cache.stats()["evictions"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_invalidation_reaches_other_workers(tmp_path):
+    """Une mutation traitée par un worker invalide le cache des autres"""
+    worker_a = ResponseCache(max_entries=10, invalidation_dir=str(tmp_path))
+    worker_b = ResponseCache(max_entries=10, invalidation_dir=str(tmp_path))
+    upstream = Upstream()
+    await worker_b.get_or_fetch("mobility.lignes", upstream.fetch, ttl=60, tags=["mobility.lignes"])
+
+    worker_a.invalidate("mobility.lignes")
+    _, status, _ = await worker_b.get_or_fetch("mobility.lignes", upstream.fetch, ttl=60, tags=["mobility.lignes"])
+
+    assert status == CACHE_MISS
+    assert upstream.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_remote_invalidation_lag_is_bounded(tmp_path):
+    """Les fichiers d'invalidation sont relus au plus une fois par intervalle"""
+    worker_a = ResponseCache(max_entries=10, invalidation_dir=str(tmp_path))
+    worker_b = ResponseCache(max_entries=10, invalidation_dir=str(tmp_path), invalidation_poll_interval=0.05)
+    upstream = Upstream()
+    reads = []
+    read_tag_mtime = worker_b._read_tag_mtime
+    worker_b._read_tag_mtime = lambda tag: reads.append(tag) or read_tag_mtime(tag)
+
+    async def get():
+        _, status, _ = await worker_b.get_or_fetch("plan", upstream.fetch, ttl=60, tags=["plan", "mobility"])
+        return status
+
+    await get()
+    for _ in range(10):
+        assert await get() == CACHE_HIT
+    # Une lecture de fichier par tag pour toutes ces lectures en cache
+    assert sorted(reads) == ["mobility", "plan"]
+
+    worker_a.invalidate("mobility")
+    await asyncio.sleep(0.06)
+    assert await get() == CACHE_MISS
+    assert upstream.calls == 2
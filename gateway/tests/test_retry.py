@@ -0,0 +1,85 @@
+"""
+Tests des relances, du budget de relances et du hedging
+"""
+import asyncio
+import time
+import pytest
+
+from utils import RetryBudget, RetryEngine, ServiceError, UpstreamRejectedError
+
+
+class Upstream:
+    """Faux upstream : échoue `failures` fois puis répond"""
+
+    def __init__(self, failures: int = 0, error: Exception = None):
+        self.failures = failures
+        self.error = error or ServiceError("mobility-service", "timeout", status_code=504)
+        self.calls = 0
+
+    async def fetch(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return {"attempt": self.calls}
+
+
+@pytest.fixture
+def engine():
+    engine = RetryEngine("mobility-service", max_retries=3, hedging=False)
+    engine.base_delay = 0.001
+    return engine
+
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_retried(engine):
+    upstream = Upstream(failures=2)
+
+    assert await engine.run(upstream.fetch) == {"attempt": 3}
+    assert engine.counters["retries"] == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error", [
+    ServiceError("mobility-service", "not found", status_code=404),
+    UpstreamRejectedError("mobility-service", "circuit ouvert", status_code=503)
+])
+async def test_client_errors_and_rejections_are_not_retried(engine, error):
+    upstream = Upstream(failures=1, error=error)
+
+    with pytest.raises(ServiceError):
+        await engine.run(upstream.fetch)
+    assert upstream.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_budget_caps_amplification(engine):
+    engine.budget = RetryBudget(ratio=0.1, min_retries=0, window=10)
+    upstream = Upstream(failures=1000)
+
+    for _ in range(20):
+        with pytest.raises(ServiceError):
+            await engine.run(upstream.fetch)
+
+    # 20 requêtes, au plus 10 % de relances en plus
+    assert engine.counters["retries"] <= 2
+    assert upstream.calls <= 22
+    assert engine.counters["budget_exhausted"] > 0
+
+
+@pytest.mark.asyncio
+async def test_slow_request_is_hedged_after_p95(engine):
+    engine.hedging = True
+    engine._latencies.extend([0.01] * 50)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        # La première tentative reste bloquée, la requête couverte répond vite
+        await asyncio.sleep(1.0 if calls == 1 else 0.01)
+        return calls
+
+    started = time.monotonic()
+    assert await engine.run(fetch) == 2
+    assert time.monotonic() - started < 0.5
+    assert engine.counters["hedge_wins"] == 1
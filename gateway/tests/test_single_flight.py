@@ -0,0 +1,99 @@
+"""
+Tests du regroupement des appels upstream identiques (single-flight)
+"""
+import asyncio
+import pytest
+
+from utils import SingleFlight, TrafficClass, current_traffic_class, traffic_class_scope
+
+
+class Upstream:
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+        self.completed = 0
+
+    async def fetch(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        self.completed += 1
+        return {"calls": self.calls}
+
+
+@pytest.mark.asyncio
+async def test_identical_calls_are_coalesced():
+    flights = SingleFlight("test")
+    upstream = Upstream()
+
+    results = await asyncio.gather(*[flights.do(("GET", "/trafic"), upstream.fetch) for _ in range(20)])
+
+    assert upstream.calls == 1
+    assert all(result == {"calls": 1} for result in results)
+    assert flights.stats()["coalesced"] == 19
+    assert flights.stats()["coalescing_ratio"] == 0.95
+    assert flights.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_distinct_keys_are_not_coalesced():
+    flights = SingleFlight("test")
+    upstream = Upstream()
+
+    await asyncio.gather(flights.do("a", upstream.fetch), flights.do("b", upstream.fetch))
+
+    assert upstream.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    flights = SingleFlight("test")
+    upstream = Upstream()
+
+    first = asyncio.create_task(flights.do("k", upstream.fetch))
+    second = asyncio.create_task(flights.do("k", upstream.fetch))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert await second == {"calls": 1}
+    assert first.cancelled()
+    assert upstream.completed == 1
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_not_cached():
+    flights = SingleFlight("test")
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(
+        flights.do("k", failing), flights.do("k", failing), return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    upstream = Upstream(delay=0)
+    assert await flights.do("k", upstream.fetch) == {"calls": 1}
+
+
+@pytest.mark.asyncio
+async def test_calls_are_coalesced_within_a_traffic_class_only():
+    flights = SingleFlight("test")
+    upstream = Upstream()
+    classes = []
+
+    async def fetch():
+        classes.append(current_traffic_class().name)
+        return await upstream.fetch()
+
+    async def read(traffic_class):
+        with traffic_class_scope(traffic_class):
+            return await flights.do(("GET", "/alerts"), fetch)
+
+    bulk = TrafficClass("bulk", max_in_flight=5, upstream_limit=1)
+    critical = TrafficClass("critical", max_in_flight=5, priority=True)
+    await asyncio.gather(read(bulk), read(bulk), read(critical))
+
+    # Un appel par classe, chacun avec le budget de sa propre classe
+    assert upstream.calls == 2
+    assert sorted(classes) == ["bulk", "critical"]
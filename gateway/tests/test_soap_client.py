@@ -0,0 +1,86 @@
+"""
+Tests du client SOAP : les appels zeep ne doivent pas bloquer la boucle d'événements
+"""
+import asyncio
+import threading
+import time
+import pytest
+import httpx
+
+from main import app
+from clients import ClientRegistry
+from config import settings
+
+
+SLOW_SOAP_SECONDS = 1.0
+HISTORY_REQUEST = {"zone": "downtown", "start_date": "2024-12-01", "end_date": "2024-12-04"}
+
+
+class SlowSoapService:
+    """Faux proxy zeep dont les opérations bloquent le thread appelant"""
+
+    def GetHistory(self, zone, startDate, endDate, granularity):
+        time.sleep(SLOW_SOAP_SECONDS)
+        return [{"zone": zone, "aqi": 42, "granularity": granularity}]
+
+
+@pytest.fixture
+def registry(soap_client):
+    soap_client.service = SlowSoapService()
+    registry = ClientRegistry()
+    registry._air_quality = soap_client
+    app.state.clients = registry
+    return registry
+
+
+def test_client_starts_from_bundled_seed(soap_client):
+    """Le WSDL embarqué suffit quand le service est injoignable"""
+    assert soap_client.using_seed
+
+
+@pytest.mark.asyncio
+async def test_slow_soap_call_does_not_block_other_routes(registry):
+    """Un appel SOAP lent n'empêche pas la Gateway de servir les autres routes"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        slow = asyncio.create_task(client.post("/air/history", json=HISTORY_REQUEST))
+        await asyncio.sleep(0.1)
+
+        start = time.perf_counter()
+        response = await client.get("/health")
+        elapsed = time.perf_counter() - start
+
+        assert response.status_code == 200
+        assert elapsed < SLOW_SOAP_SECONDS / 2
+        assert not slow.done()
+
+        slow_response = await slow
+        assert slow_response.status_code == 200
+        assert slow_response.json()[0]["aqi"] == 42
+
+
+@pytest.mark.asyncio
+async def test_soap_concurrency_is_bounded(soap_client):
+    """Le nombre d'appels SOAP en vol ne dépasse pas SOAP_MAX_CONCURRENCY"""
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def tracked_get_history(zone, startDate, endDate, granularity):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.05)
+        with lock:
+            in_flight -= 1
+        return [{"zone": zone}]
+
+    soap_client.service = SlowSoapService()
+    soap_client.service.GetHistory = tracked_get_history
+    await asyncio.gather(*[
+        soap_client.get_history(f"zone-{i}", "2024-12-01", "2024-12-04")
+        for i in range(30)
+    ])
+
+    assert peak <= settings.SOAP_MAX_CONCURRENCY
@@ -0,0 +1,100 @@
+"""
+Tests du codec SOAP spécialisé (GetAQI, GetPollutants, CompareZones)
+"""
+import os
+import pytest
+import httpx
+from lxml import etree
+
+from clients.soap_codec import build_envelope, decode_response, SoapFault
+from utils import ServiceError
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "soap")
+
+FAULT_RESPONSE = (
+    b"<?xml version='1.0' encoding='UTF-8'?>"
+    b'<soap11env:Envelope xmlns:soap11env="http://schemas.xmlsoap.org/soap/envelope/">'
+    b"<soap11env:Body><soap11env:Fault><faultcode>soap11env:Client.ResourceNotFound</faultcode>"
+    b"<faultstring>Zone inconnue</faultstring><faultactor></faultactor></soap11env:Fault>"
+    b"</soap11env:Body></soap11env:Envelope>"
+)
+
+
+def load_fixture(operation):
+    with open(os.path.join(FIXTURES_DIR, f"{operation}Response.xml"), "rb") as f:
+        return f.read()
+
+
+def test_envelope_escapes_parameters():
+    """Les valeurs sont échappées : l'enveloppe reste du XML valide"""
+    envelope = build_envelope("CompareZones", "a<b>&c", 'park"')
+    root = etree.fromstring(envelope)
+    values = [element.text for element in root.iter() if not len(element)]
+
+    assert values == ["a<b>&c", 'park"']
+
+
+def test_decode_aqi():
+    result = decode_response("GetAQI", load_fixture("GetAQI"))
+
+    assert result == {
+        "zone": "downtown",
+        "aqi": 85,
+        "category": "Moderate",
+        "timestamp": "2024-12-04T10:30:00",
+        "description": "Qualité de l'air acceptable"
+    }
+
+
+def test_decode_pollutants():
+    result = decode_response("GetPollutants", load_fixture("GetPollutants"))
+
+    assert result["zone"] == "downtown"
+    assert [p["name"] for p in result["pollutants"]] == ["PM2.5", "PM10", "O3", "NO2", "SO2", "CO"]
+    assert result["pollutants"][0]["value"] == 35.2
+
+
+def test_decode_comparison():
+    result = decode_response("CompareZones", load_fixture("CompareZones"))
+
+    assert result["cleanest_zone"] == "park"
+    assert (result["aqiA"], result["aqiB"], result["difference"]) == (85, 42, 43)
+
+
+def test_decode_fault():
+    with pytest.raises(SoapFault) as exc_info:
+        decode_response("GetAQI", FAULT_RESPONSE)
+
+    assert exc_info.value.message == "Zone inconnue"
+
+
+@pytest.mark.asyncio
+async def test_client_fast_path_bypasses_zeep(soap_client):
+    """GetAQI passe par le codec : aucun appel au proxy zeep"""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, content=load_fixture("GetAQI"))
+
+    await soap_client.http.aclose()
+    soap_client.http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    soap_client.service = None
+
+    result = await soap_client.get_aqi("downtown")
+
+    assert result["aqi"] == 85
+    assert requests[0].headers["SOAPAction"] == '"GetAQI"'
+    assert b"<tns:zone>downtown</tns:zone>" in requests[0].content
+
+
+@pytest.mark.asyncio
+async def test_client_fast_path_maps_faults(soap_client):
+    await soap_client.http.aclose()
+    soap_client.http = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(500, content=FAULT_RESPONSE))
+    )
+
+    with pytest.raises(ServiceError):
+        await soap_client.get_aqi("nowhere")
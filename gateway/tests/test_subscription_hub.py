@@ -0,0 +1,213 @@
+"""
+Tests du hub d'abonnements : flux upstream partagé, état rejoué, clients lents
+"""
+import asyncio
+import grpc
+import pytest
+import pytest_asyncio
+
+from clients import EmergencyGrpcClient
+from config import settings
+from protos import emergency_pb2, emergency_pb2_grpc
+from utils import SubscriptionHub, SubscriptionClosed
+from utils.subscription_hub import EVENT_STATUS
+
+
+class Upstream:
+    """Faux flux upstream alimenté par le test"""
+
+    def __init__(self):
+        self.opened = []
+        self.closed = 0
+        self.queue = asyncio.Queue()
+
+    async def open_stream(self, key):
+        self.opened.append(key)
+        try:
+            while True:
+                item = await self.queue.get()
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            self.closed += 1
+
+
+def make_hub(upstream, buffer=16):
+    return SubscriptionHub(
+        "test",
+        open_stream=upstream.open_stream,
+        event="alert",
+        buffer=buffer,
+        item_key=lambda alert: alert["alert_id"],
+        is_live=lambda alert: alert["status"] != "RESOLVED",
+        reconnect_delay=0.01
+    )
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_same_filter_shares_one_upstream_stream():
+    upstream = Upstream()
+    hub = make_hub(upstream)
+    first = hub.subscribe("downtown")
+    second = hub.subscribe("downtown")
+    await settle()
+
+    await upstream.queue.put({"alert_id": "a1", "status": "PENDING"})
+
+    assert await first.next(1) == ("alert", {"alert_id": "a1", "status": "PENDING"})
+    assert await second.next(1) == ("alert", {"alert_id": "a1", "status": "PENDING"})
+    assert upstream.opened == ["downtown"]
+    await hub.close()
+
+
+@pytest.mark.asyncio
+async def test_late_subscriber_receives_live_state_first():
+    upstream = Upstream()
+    hub = make_hub(upstream)
+    early = hub.subscribe("downtown")
+    await settle()
+    for alert in (
+        {"alert_id": "a1", "status": "PENDING"},
+        {"alert_id": "a2", "status": "PENDING"},
+        {"alert_id": "a1", "status": "RESOLVED"},
+    ):
+        await upstream.queue.put(alert)
+    for _ in range(3):
+        await early.next(1)
+
+    late = hub.subscribe("downtown")
+
+    # a1 est résolue : seule a2 fait partie de l'état rejoué
+    assert await late.next(1) == ("alert", {"alert_id": "a2", "status": "PENDING"})
+    assert await late.next(0.05) is None
+    await hub.close()
+
+
+@pytest.mark.asyncio
+async def test_retained_state_is_dropped_when_upstream_reconnects():
+    upstream = Upstream()
+    hub = make_hub(upstream)
+    early = hub.subscribe("downtown")
+    await settle()
+    await upstream.queue.put({"alert_id": "a1", "status": "PENDING"})
+    await early.next(1)
+
+    # a1 est résolue pendant la coupure : le flux rouvert ne renvoie que a2
+    await upstream.queue.put(ConnectionError("reset"))
+    assert (await early.next(1))[0] == EVENT_STATUS
+    await upstream.queue.put({"alert_id": "a2", "status": "PENDING"})
+    await early.next(1)
+
+    late = hub.subscribe("downtown")
+    assert await late.next(1) == ("alert", {"alert_id": "a2", "status": "PENDING"})
+    assert await late.next(0.05) is None
+    assert len(upstream.opened) == 2
+    await hub.close()
+
+
+@pytest.mark.asyncio
+async def test_slow_client_is_closed_without_holding_back_others():
+    upstream = Upstream()
+    hub = make_hub(upstream, buffer=2)
+    slow = hub.subscribe("downtown")
+    fast = hub.subscribe("downtown")
+    await settle()
+
+    for index in range(3):
+        await upstream.queue.put({"alert_id": f"a{index}", "status": "PENDING"})
+        assert (await fast.next(1))[1]["alert_id"] == f"a{index}"
+
+    with pytest.raises(SubscriptionClosed) as closed:
+        await slow.next(1)
+    assert closed.value.reason == "lagged"
+    assert hub.stats()["clients"] == 1
+    await hub.close()
+
+
+@pytest.mark.asyncio
+async def test_last_unsubscribe_closes_upstream_stream():
+    upstream = Upstream()
+    hub = make_hub(upstream)
+    subscriptions = [hub.subscribe("downtown") for _ in range(2)]
+    await settle()
+
+    hub.unsubscribe(subscriptions[0])
+    await settle()
+    assert upstream.closed == 0
+
+    hub.unsubscribe(subscriptions[1])
+    await settle()
+    assert upstream.closed == 1
+    assert hub.stats()["upstream_streams"] == 0
+
+
+@pytest.mark.asyncio
+async def test_upstream_failure_is_reported_and_stream_reopened():
+    upstream = Upstream()
+    hub = make_hub(upstream)
+    subscription = hub.subscribe("downtown")
+    await settle()
+
+    await upstream.queue.put(ConnectionError("reset"))
+    event, data = await subscription.next(1)
+    assert (event, data["upstream"]) == (EVENT_STATUS, "reconnecting")
+
+    await upstream.queue.put({"alert_id": "a1", "status": "PENDING"})
+    assert (await subscription.next(1))[1]["alert_id"] == "a1"
+    assert len(upstream.opened) == 2
+    await hub.close()
+
+
+class SubscribeService(emergency_pb2_grpc.EmergencyAlertServiceServicer):
+    """Faux service Urgences : une alerte active par zone, puis flux ouvert"""
+
+    def __init__(self):
+        self.subscriptions = 0
+
+    async def SubscribeAlerts(self, request, context):
+        self.subscriptions += 1
+        for zone in request.zones:
+            alert = emergency_pb2.AlertResponse(alert_id=f"alert-{zone}", status=emergency_pb2.PENDING)
+            alert.location.zone = zone
+            yield alert
+        await asyncio.Event().wait()
+
+
+@pytest_asyncio.fixture
+async def subscribe_server(unused_tcp_port, monkeypatch):
+    service = SubscribeService()
+    server = grpc.aio.server()
+    emergency_pb2_grpc.add_EmergencyAlertServiceServicer_to_server(service, server)
+    server.add_insecure_port(f"127.0.0.1:{unused_tcp_port}")
+    await server.start()
+    monkeypatch.setattr(settings, "EMERGENCY_GRPC_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "EMERGENCY_GRPC_PORT", unused_tcp_port)
+    yield service
+    await server.stop(None)
+
+
+@pytest.mark.asyncio
+async def test_browsers_share_one_subscribe_alerts_rpc(subscribe_server):
+    client = EmergencyGrpcClient()
+    hub = SubscriptionHub(
+        "emergency_alerts",
+        open_stream=lambda zones: client.subscribe_alerts(list(zones)),
+        event="alert",
+        buffer=16,
+        item_key=lambda alert: alert["alert_id"]
+    )
+    try:
+        browsers = [hub.subscribe(("downtown",)) for _ in range(3)]
+        received = [await browser.next(5) for browser in browsers]
+        await hub.close()
+    finally:
+        await client.close()
+
+    assert all(event == "alert" and data["alert_id"] == "alert-downtown" for event, data in received)
+    assert subscribe_server.subscriptions == 1
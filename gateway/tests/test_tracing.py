@@ -0,0 +1,113 @@
+"""
+Tests du traçage distribué : propagation du traceparent et export des spans
+"""
+import json
+import httpx
+import pytest
+
+from main import app
+from clients import ClientRegistry, MobilityRestClient
+from config import settings
+from utils import UpstreamGuard
+from utils import tracing
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+INCOMING = f"00-{TRACE_ID}-{PARENT_ID}-01"
+
+
+@pytest.fixture
+def exported(tmp_path, monkeypatch):
+    """Spans exportés pendant le test"""
+    path = tmp_path / "spans.jsonl"
+    monkeypatch.setattr(settings, "TRACE_EXPORT_PATH", str(path))
+
+    def read():
+        tracing.flush_spans()
+        if not path.exists():
+            return []
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+    return read
+
+
+@pytest.mark.parametrize("value", [
+    None,
+    "",
+    "garbage",
+    f"00-{'0' * 32}-{PARENT_ID}-01",
+    f"00-{TRACE_ID}-{'0' * 16}-01",
+    f"ff-{TRACE_ID}-{PARENT_ID}-01",
+])
+def test_invalid_traceparent_is_ignored(value):
+    assert tracing.parse_traceparent(value) is None
+
+
+def test_nested_spans_share_the_trace(exported):
+    with tracing.span("parent", traceparent=INCOMING) as parent:
+        with tracing.span("child", kind="client") as child:
+            headers = tracing.inject({"Accept": "application/json"})
+
+    assert (parent.trace_id, parent.parent_span_id) == (TRACE_ID, PARENT_ID)
+    assert (child.trace_id, child.parent_span_id) == (TRACE_ID, parent.span_id)
+    assert headers == {"Accept": "application/json", "traceparent": f"00-{TRACE_ID}-{child.span_id}-01"}
+    assert [s["name"] for s in exported()] == ["child", "parent"]
+    assert tracing.current_span() is None
+
+
+def test_exception_marks_span_as_error(exported):
+    with pytest.raises(ValueError):
+        with tracing.span("failing"):
+            raise ValueError("boom")
+
+    [span] = exported()
+    assert span["status"] == "error"
+    assert "boom" in span["attributes"]["error"]
+
+
+@pytest.mark.asyncio
+async def test_upstream_guard_opens_a_client_span(exported):
+    guard = UpstreamGuard("mobility-service")
+
+    async def call():
+        return tracing.inject()
+
+    with tracing.span("request", traceparent=INCOMING):
+        headers = await guard.call(call, "GET /lignes")
+
+    client_span, server_span = exported()
+    assert client_span["name"] == "mobility-service GET /lignes"
+    assert client_span["kind"] == "client"
+    assert client_span["parent_span_id"] == server_span["span_id"]
+    assert headers["traceparent"] == f"00-{TRACE_ID}-{client_span['span_id']}-01"
+
+
+@pytest.mark.asyncio
+async def test_traceparent_reaches_rest_upstream(exported):
+    """L'appel REST porte le traceparent du span client, rattaché à la requête entrante"""
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers.get("traceparent"))
+        return httpx.Response(200, json={"ligne": "L1", "horaires": []})
+
+    mobility = MobilityRestClient()
+    await mobility.client.aclose()
+    mobility.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    registry = ClientRegistry()
+    registry.mobility = mobility
+    app.state.clients = registry
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        response = await client.get("/mobility/horaires/L1", headers={"traceparent": INCOMING})
+    await mobility.close()
+
+    assert response.status_code == 200
+    assert response.headers["X-Trace-Id"] == TRACE_ID
+
+    spans = {s["kind"]: s for s in exported()}
+    assert spans["server"]["name"] == "GET /mobility/horaires/{ligne}"
+    assert spans["server"]["parent_span_id"] == PARENT_ID
+    assert spans["client"]["parent_span_id"] == spans["server"]["span_id"]
+    assert seen == [f"00-{TRACE_ID}-{spans['client']['span_id']}-01"]
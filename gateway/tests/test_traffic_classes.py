@@ -0,0 +1,165 @@
+"""
+Tests des classes de trafic : classement, voies d'admission séparées, budgets upstream
+"""
+import asyncio
+import httpx
+import pytest
+import pytest_asyncio
+
+from main import app
+from clients import ClientRegistry
+from config import settings
+from utils import (
+    AdmissionController,
+    AIMDLimiter,
+    ResponseCache,
+    ServiceError,
+    TrafficClass,
+    TrafficClassifier,
+    UpstreamGuard,
+    current_traffic_class,
+    parse_traffic_rules,
+    traffic_class_scope
+)
+
+CRITICAL = TrafficClass("critical", max_in_flight=5, priority=True)
+STANDARD = TrafficClass("standard", max_in_flight=5)
+BULK = TrafficClass("bulk", max_in_flight=5, upstream_limit=1)
+
+RULES = "POST /emergency/alerts/history=bulk,POST /emergency/*=critical,GET /urban/events=bulk"
+
+
+@pytest.fixture
+def classifier():
+    return TrafficClassifier([CRITICAL, STANDARD, BULK], parse_traffic_rules(RULES), "standard")
+
+
+def test_first_matching_rule_wins(classifier):
+    assert classifier.classify("POST", "/emergency/alerts").name == "critical"
+    assert classifier.classify("POST", "/emergency/alerts/history").name == "bulk"
+    assert classifier.classify("GET", "/urban/events").name == "bulk"
+    # Méthode différente ou aucune règle : classe par défaut
+    assert classifier.classify("GET", "/emergency/alerts/active").name == "standard"
+    assert classifier.classify("GET", "/mobility/trafic").name == "standard"
+
+
+def test_rules_must_name_known_classes():
+    with pytest.raises(ValueError):
+        TrafficClassifier([STANDARD], parse_traffic_rules("/air/*=bulk"), "standard")
+
+
+@pytest.mark.asyncio
+async def test_priority_calls_jump_the_limiter_queue():
+    limiter = AIMDLimiter(initial_limit=1, min_limit=1, max_limit=1, latency_threshold=1.0, max_wait=1.0)
+    assert await limiter.acquire()
+    regular = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    urgent = asyncio.create_task(limiter.acquire(priority=True))
+    await asyncio.sleep(0)
+
+    limiter.abandon()
+    await urgent
+    assert not regular.done()
+
+    limiter.abandon()
+    assert await regular
+
+
+@pytest.mark.asyncio
+async def test_bulk_budget_does_not_hold_back_critical_calls(monkeypatch):
+    monkeypatch.setattr(settings, "CONCURRENCY_MAX_WAIT", 0.02)
+    guard = UpstreamGuard("urban-events-service")
+    release = asyncio.Event()
+
+    async def slow():
+        await release.wait()
+        return "slow"
+
+    async def fast():
+        return "fast"
+
+    with traffic_class_scope(BULK):
+        first = asyncio.create_task(guard.call(slow))
+        await asyncio.sleep(0)
+        # Budget de la classe épuisé : refus rapide
+        with pytest.raises(ServiceError) as exc_info:
+            await guard.call(fast)
+        assert exc_info.value.status_code == 503
+
+    with traffic_class_scope(CRITICAL):
+        assert await guard.call(fast) == "fast"
+
+    release.set()
+    assert await first == "slow"
+    assert guard.stats()["class_budgets"]["bulk"]["in_flight"] == 0
+
+
+class SlowMobility:
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def get_lignes(self):
+        await self.release.wait()
+        return [{"ligne_id": "M1"}]
+
+
+class FakeEmergency:
+    def __init__(self):
+        self.classes = []
+
+    async def create_alert(self, **alert):
+        self.classes.append(current_traffic_class().name)
+        return {"alert_id": "a1", "location": alert["location"]}
+
+
+@pytest_asyncio.fixture
+async def gateway(tmp_path, classifier):
+    registry = ClientRegistry()
+    registry.mobility = SlowMobility()
+    registry.emergency = FakeEmergency()
+    app.state.clients = registry
+    app.state.response_cache = ResponseCache(max_entries=10, invalidation_dir=str(tmp_path))
+    app.state.traffic_classes = classifier
+    app.state.admission = AdmissionController(
+        max_in_flight=1,
+        route_limits={},
+        queue_size=0,
+        queue_timeout=1.0,
+        codel_target=0.05,
+        codel_interval=0.5,
+        traffic_classes=classifier.classes.values()
+    )
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        yield client, registry
+    app.state.admission = None
+    app.state.traffic_classes = None
+
+
+@pytest.mark.asyncio
+async def test_critical_writes_are_admitted_when_global_pool_is_full(gateway):
+    client, registry = gateway
+    slow = asyncio.create_task(client.get("/mobility/lignes"))
+    await asyncio.sleep(0.05)
+
+    # Plafond global atteint : une lecture standard est refusée...
+    rejected = await client.get("/mobility/lignes")
+    assert rejected.status_code == 503
+
+    # ...mais une alerte des secours passe par sa propre voie
+    created = await client.post("/emergency/alerts", json={
+        "type": "FIRE",
+        "description": "Incendie entrepôt",
+        "location": {"latitude": 36.8, "longitude": 10.1, "address": "Rue 1", "city": "Tunis", "zone": "industrial"},
+        "priority": "CRITICAL",
+        "reporter_name": "Agent",
+        "reporter_phone": "+21612345678"
+    })
+    assert created.status_code == 201
+    assert created.headers["X-Traffic-Class"] == "critical"
+    # La classe suit la requête jusqu'à l'appel upstream
+    assert registry.emergency.classes == ["critical"]
+
+    registry.mobility.release.set()
+    assert (await slow).headers["X-Traffic-Class"] == "standard"
@@ -0,0 +1,111 @@
+"""
+Tests du disjoncteur et de la limite de concurrence adaptative
+"""
+import asyncio
+import pytest
+
+from utils import AIMDLimiter, CircuitBreaker, ServiceError, UpstreamGuard
+from utils.circuit_breaker import CIRCUIT_CLOSED, CIRCUIT_HALF_OPEN, CIRCUIT_OPEN
+
+
+class BusinessError(Exception):
+    """Réponse métier de l'upstream (faute SOAP, erreur GraphQL)"""
+
+
+def upstream_down():
+    raise ServiceError("mobility-service", "down", status_code=503)
+
+
+async def ok():
+    return "ok"
+
+
+@pytest.fixture
+def guard():
+    guard = UpstreamGuard("mobility-service", answered=(BusinessError,))
+    guard.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+    return guard
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_after_consecutive_failures(guard):
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        upstream_down()
+
+    for _ in range(3):
+        with pytest.raises(ServiceError):
+            await guard.call(failing)
+    assert guard.breaker.state == CIRCUIT_OPEN
+
+    # Circuit ouvert : refus immédiat, l'upstream n'est plus appelé
+    with pytest.raises(ServiceError) as exc_info:
+        await guard.call(failing)
+    assert exc_info.value.status_code == 503
+    assert calls == 3
+
+
+@pytest.mark.asyncio
+async def test_half_open_trial_closes_the_circuit(guard):
+    for _ in range(3):
+        guard.breaker.record_failure()
+    await asyncio.sleep(0.06)
+
+    assert guard.breaker.allow()
+    assert guard.breaker.state == CIRCUIT_HALF_OPEN
+    # Un seul appel d'essai à la fois
+    assert not guard.breaker.allow()
+    guard.breaker.abandon()
+
+    assert await guard.call(ok) == "ok"
+    assert guard.breaker.state == CIRCUIT_CLOSED
+
+
+@pytest.mark.asyncio
+async def test_business_errors_do_not_trip_the_circuit(guard):
+    async def rejected():
+        raise BusinessError("Unknown zone")
+
+    async def not_found():
+        raise ServiceError("mobility-service", "not found", status_code=404)
+
+    for call in (rejected, not_found) * 3:
+        with pytest.raises(Exception):
+            await guard.call(call)
+
+    assert guard.breaker.state == CIRCUIT_CLOSED
+    assert guard.limiter.counters["decreases"] == 0
+
+
+def test_limit_decreases_on_slow_calls_and_grows_back():
+    limiter = AIMDLimiter(initial_limit=10, min_limit=2, max_limit=20, latency_threshold=1.0, backoff_ratio=0.5)
+
+    for _ in range(5):
+        limiter.in_flight += 1
+        limiter.release(latency=2.0, dropped=False)
+    assert limiter.stats()["limit"] == 2
+
+    for _ in range(3):
+        limiter.in_flight = 2
+        limiter.release(latency=0.01, dropped=False)
+    assert limiter.stats()["limit"] == 5
+
+
+@pytest.mark.asyncio
+async def test_calls_over_the_limit_wait_then_are_rejected():
+    limiter = AIMDLimiter(initial_limit=1, min_limit=1, max_limit=1, latency_threshold=1.0, max_wait=0.05)
+    assert await limiter.acquire()
+
+    # Place libérée pendant l'attente : l'appel passe
+    waiting = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0.01)
+    limiter.release(latency=0.01, dropped=False)
+    assert await waiting
+    assert limiter.in_flight == 1
+
+    # Aucune place libérée à temps : refus
+    assert not await limiter.acquire()
+    assert limiter.counters["rejected"] == 1
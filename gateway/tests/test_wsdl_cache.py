@@ -0,0 +1,126 @@
+"""
+Tests du cache WSDL : revalidation conditionnelle, rotation par hash,
+repli sur le cache puis le seed, revalidation rapprochée sur le seed
+"""
+import asyncio
+import os
+import pytest
+import requests
+
+from clients import AirQualitySoapClient, ClientRegistry
+from clients import registry as registry_module
+from clients.wsdl_cache import WsdlCache
+from config import settings
+
+WSDL_URL = "http://air-quality-soap-service:8000/?wsdl"
+
+
+def read_seed() -> bytes:
+    with open(settings.AIR_QUALITY_WSDL_SEED, "rb") as f:
+        return f.read()
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+
+class FakeSession:
+    """Fausse session requests : réponses servies dans l'ordre, en-têtes reçus gardés"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append(headers or {})
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def close(self):
+        pass
+
+
+def test_not_modified_keeps_cached_file(tmp_path):
+    cache = WsdlCache(WSDL_URL, str(tmp_path))
+    session = FakeSession(
+        FakeResponse(200, read_seed(), {"ETag": '"v1"'}),
+        FakeResponse(304)
+    )
+
+    path, changed = cache.fetch(session, timeout=1)
+    assert changed
+    revalidated, changed = cache.fetch(session, timeout=1)
+
+    assert (revalidated, changed) == (path, False)
+    assert session.requests[1]["If-None-Match"] == '"v1"'
+    assert os.path.exists(path)
+
+
+def test_changed_body_rotates_file_and_swaps_client(tmp_path):
+    original = read_seed()
+    updated = original + b"\n<!-- v2 -->\n"
+    cache = WsdlCache(WSDL_URL, str(tmp_path))
+    cache.fetch(FakeSession(FakeResponse(200, original)), timeout=1)
+
+    client = AirQualitySoapClient(wsdl_cache=cache)
+    try:
+        old_path, old_service = client.wsdl_path, client.service
+        client.session = FakeSession(FakeResponse(200, updated))
+
+        assert client.refresh_wsdl()
+        # Nouveau fichier nommé d'après le hash, l'ancien reste lisible
+        assert client.wsdl_path != old_path
+        assert client.wsdl_path == cache.cached_path()
+        assert os.path.exists(old_path)
+        assert client.service is not old_service
+    finally:
+        asyncio.run(client.close())
+
+
+def test_unreachable_url_falls_back_to_cache_then_seed(tmp_path):
+    unreachable = requests.ConnectionError("connection refused")
+    cache = WsdlCache(WSDL_URL, str(tmp_path), settings.AIR_QUALITY_WSDL_SEED)
+
+    # Cache vide : seed embarqué
+    path = cache.load(FakeSession(unreachable), timeout=1)
+    assert cache.is_seed(path)
+
+    # Cache rempli : le service n'est plus interrogé au démarrage
+    fetched, _ = cache.fetch(FakeSession(FakeResponse(200, read_seed())), timeout=1)
+    session = FakeSession(unreachable)
+    assert cache.load(session, timeout=1) == fetched
+    assert session.requests == []
+
+
+class FakeSoapClient:
+    def __init__(self, using_seed):
+        self.using_seed = using_seed
+        self.refreshes = 0
+
+    def refresh_wsdl(self):
+        self.refreshes += 1
+        return False
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("using_seed, refreshed", [(True, True), (False, False)])
+async def test_seed_shortens_refresh_interval(monkeypatch, using_seed, refreshed):
+    monkeypatch.setattr(settings, "WSDL_REFRESH_INTERVAL", 300)
+    monkeypatch.setattr(registry_module, "WSDL_SEED_RETRY_INTERVAL", 0.01)
+    registry = ClientRegistry()
+    registry._air_quality = FakeSoapClient(using_seed)
+
+    task = asyncio.create_task(registry._refresh_wsdl_loop())
+    await asyncio.sleep(0.1)
+    task.cancel()
+
+    assert (registry._air_quality.refreshes > 0) == refreshed
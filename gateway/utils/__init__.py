@@ -10,6 +10,26 @@ from .error_handler import (
     handle_soap_error,
     handle_graphql_error
 )
+from .fanout import FanOutResult, fan_out
+from .response_cache import ResponseCache, get_response_cache
+from .single_flight import SingleFlight
+from .circuit_breaker import CircuitBreaker
+from .concurrency_limiter import AIMDLimiter
+from .upstream_guard import UpstreamGuard, UpstreamRejectedError, is_upstream_failure
+from .retry import RetryBudget, RetryEngine
+from .json_response import FastJSONResponse, passthrough
+from .ndjson import wants_ndjson, ndjson_response
+from .subscription_hub import SubscriptionHub, Subscription, SubscriptionClosed
+from .traffic_classes import (
+    TrafficClass,
+    TrafficClassifier,
+    build_traffic_classes,
+    current_traffic_class,
+    parse_traffic_rules,
+    traffic_class_scope
+)
+from .admission import AdmissionController, AdmissionMiddleware, AdmissionQueue, AdmissionRejected, parse_route_limits
+from .sse import SSE_MEDIA_TYPE, SSE_HEADERS, EventStreamResponse, sse_event, sse_retry, sse_comment
 
 __all__ = [
     "logger",
@@ -22,5 +42,41 @@ __all__ = [
     "handle_rest_error",
     "handle_grpc_error",
     "handle_soap_error",
-    "handle_graphql_error"
+    "handle_graphql_error",
+    "FanOutResult",
+    "fan_out",
+    "ResponseCache",
+    "get_response_cache",
+    "SingleFlight",
+    "CircuitBreaker",
+    "AIMDLimiter",
+    "UpstreamGuard",
+    "UpstreamRejectedError",
+    "is_upstream_failure",
+    "RetryBudget",
+    "RetryEngine",
+    "FastJSONResponse",
+    "passthrough",
+    "wants_ndjson",
+    "ndjson_response",
+    "SubscriptionHub",
+    "Subscription",
+    "SubscriptionClosed",
+    "SSE_MEDIA_TYPE",
+    "SSE_HEADERS",
+    "EventStreamResponse",
+    "sse_event",
+    "sse_retry",
+    "sse_comment",
+    "AdmissionController",
+    "AdmissionMiddleware",
+    "AdmissionQueue",
+    "AdmissionRejected",
+    "parse_route_limits",
+    "TrafficClass",
+    "TrafficClassifier",
+    "build_traffic_classes",
+    "current_traffic_class",
+    "parse_traffic_rules",
+    "traffic_class_scope"
 ]
\ No newline at end of file
@@ -0,0 +1,320 @@
+"""Contrôle d'admission des requêtes entrantes : limites, file bornée, délestage"""
+import asyncio
+import time
+from collections import deque
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, List, Optional, Pattern, Tuple
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import compile_path
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from  utils.logger import logger
+from  utils.metrics import ADMISSION_QUEUE_DEPTH, ADMISSION_SHED
+from  utils.traffic_classes import TrafficClass, traffic_class_scope
+
+# Motifs de refus (label `reason` de ADMISSION_SHED)
+SHED_QUEUE_FULL = "queue_full"
+SHED_QUEUE_TIMEOUT = "queue_timeout"
+SHED_CODEL = "codel"
+
+def parse_route_limits(spec: str) -> Dict[str, int]:
+    """`/smart-city/plan-trip=50,/smart-city/plan-trip/batch=8` -> {gabarit: limite}"""
+    limits = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        path, _, limit = item.rpartition("=")
+        limits[path.strip()] = int(limit)
+    return limits
+
+class AdmissionRejected(Exception):
+    """Requête refusée par le contrôle d'admission"""
+    def __init__(self, scope: str, reason: str, retry_after: int):
+        self.scope = scope
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(f"{scope}: {reason}")
+
+class AdmissionQueue:
+    """
+    Plafond de requêtes en cours et file d'attente bornée devant lui.
+
+    Une requête au-delà du plafond attend une place dans la file (au plus
+    `queue_size` requêtes) ; file pleine, elle est refusée immédiatement.
+    Délestage à la CoDel : le temps passé dans la file est mesuré à chaque
+    sortie. S'il reste au-dessus de `target` pendant tout un `interval`, la
+    file est en surcharge : les requêtes qui ont attendu plus de `target` sont
+    refusées au lieu d'être servies (le client a sans doute déjà abandonné) et
+    les nouvelles n'attendent plus que `target`. La surcharge cesse dès qu'une
+    requête sort sous la cible ou que la file se vide.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        queue_size: int,
+        queue_timeout: float,
+        target: float,
+        interval: float,
+        retry_after: int = 1
+    ):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.target = target
+        self.interval = interval
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.overloaded = False
+        self._first_above = 0.0
+        self._waiters: Deque[Tuple[asyncio.Future, float]] = deque()
+        self._depth = ADMISSION_QUEUE_DEPTH.labels(name)
+        self.counters = {"admitted": 0, "queued": 0, SHED_QUEUE_FULL: 0, SHED_QUEUE_TIMEOUT: 0, SHED_CODEL: 0}
+
+    async def acquire(self):
+        """Réserve une place ; lève AdmissionRejected si la requête est délestée"""
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self.counters["admitted"] += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            raise self._reject(SHED_QUEUE_FULL)
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (waiter, time.monotonic())
+        self._waiters.append(entry)
+        self._depth.inc()
+        self.counters["queued"] += 1
+        # En surcharge, une nouvelle requête n'attend pas plus que la cible
+        timeout = self.target if self.overloaded else self.queue_timeout
+        try:
+            granted = await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # Sortie de file juste à l'expiration du délai
+                granted = waiter.result()
+            else:
+                self._remove(entry)
+                raise self._reject(SHED_QUEUE_TIMEOUT)
+        except asyncio.CancelledError:
+            if not waiter.done():
+                self._remove(entry)
+            elif waiter.result():
+                self.release()
+            raise
+        if not granted:
+            raise self._reject(SHED_CODEL)
+        self.counters["admitted"] += 1
+
+    def release(self):
+        """Libère la place et la passe aux requêtes en attente, dans l'ordre d'arrivée"""
+        self.in_flight -= 1
+        now = time.monotonic()
+        while self._waiters and self.in_flight < self.limit:
+            waiter, enqueued_at = self._waiters.popleft()
+            self._depth.dec()
+            if self._should_shed(now - enqueued_at, now):
+                waiter.set_result(False)
+                continue
+            self.in_flight += 1
+            waiter.set_result(True)
+        if not self._waiters:
+            self._drained()
+
+    def _should_shed(self, sojourn: float, now: float) -> bool:
+        """Décision CoDel à la sortie de file, d'après le temps d'attente"""
+        if sojourn < self.target:
+            self._drained()
+            return False
+        if self._first_above == 0.0:
+            self._first_above = now + self.interval
+            return False
+        if now >= self._first_above and not self.overloaded:
+            self.overloaded = True
+            logger.warning(
+                f"Admission: {self.name} queue overloaded, shedding requests "
+                f"waiting over {self.target * 1000:.0f}ms"
+            )
+        return self.overloaded
+
+    def _drained(self):
+        self._first_above = 0.0
+        self.overloaded = False
+
+    def _remove(self, entry: Tuple[asyncio.Future, float]):
+        self._waiters.remove(entry)
+        self._depth.dec()
+        entry[0].cancel()
+        if not self._waiters:
+            self._drained()
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        self.counters[reason] += 1
+        ADMISSION_SHED.labels(self.name, reason).inc()
+        return AdmissionRejected(self.name, reason, self.retry_after)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "queue_depth": len(self._waiters),
+            "queue_size": self.queue_size,
+            "overloaded": self.overloaded,
+            **self.counters
+        }
+
+class AdmissionController:
+    """
+    Admission des requêtes de la Gateway, par worker.
+
+    Chaque requête passe la file de sa route (si la route a une limite propre),
+    celle de sa classe de trafic puis la file globale : une route ou une
+    classe saturée ne consomme pas les places globales de ses requêtes en
+    attente. Une classe prioritaire ne passe pas par la file globale : sa
+    propre file est sa seule limite. Les chemins exemptés (sondes, métriques)
+    ne sont jamais limités.
+
+    Les places sont gardées jusqu'à la fin du corps de la réponse (voir
+    AdmissionMiddleware). Les abonnements longue durée (SSE, WebSocket) ne
+    prennent donc pas de place de requête : ils passent par leur propre
+    plafond, sans file d'attente.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        route_limits: Dict[str, int],
+        queue_size: int,
+        queue_timeout: float,
+        codel_target: float,
+        codel_interval: float,
+        retry_after: int = 1,
+        exempt_paths: Iterable[str] = (),
+        traffic_classes: Iterable[TrafficClass] = (),
+        subscription_paths: Iterable[str] = (),
+        max_subscriptions: int = 0
+    ):
+        def queue(name: str, limit: int) -> AdmissionQueue:
+            return AdmissionQueue(name, limit, queue_size, queue_timeout, codel_target, codel_interval, retry_after)
+
+        self.global_queue = queue("global", max_in_flight)
+        self.route_queues = {path: queue(path, limit) for path, limit in route_limits.items()}
+        self.class_queues = {
+            traffic_class.name: queue(f"class:{traffic_class.name}", traffic_class.max_in_flight)
+            for traffic_class in traffic_classes
+        }
+        self.exempt_paths = set(exempt_paths)
+        self.subscription_paths = set(subscription_paths)
+        self.subscription_queue = AdmissionQueue(
+            "subscriptions", max_subscriptions, 0, queue_timeout, codel_target, codel_interval, retry_after
+        )
+        # Gabarits compilés comme ceux du routeur (`{ligne_id}` : un segment)
+        self._route_patterns: List[Tuple[Pattern, AdmissionQueue]] = [
+            (compile_path(path)[0], queue) for path, queue in self.route_queues.items()
+        ]
+
+    def exempt(self, request: Request) -> bool:
+        return request.url.path in self.exempt_paths
+
+    def _route_queue(self, request: Request) -> Optional[AdmissionQueue]:
+        path = request.url.path
+        for pattern, queue in self._route_patterns:
+            if pattern.match(path):
+                return queue
+        return None
+
+    @asynccontextmanager
+    async def admit(self, request: Request, traffic_class: Optional[TrafficClass] = None) -> AsyncIterator[None]:
+        """Réserve les places de la requête pour la durée du bloc"""
+        if request.url.path in self.subscription_paths:
+            async with self.subscription():
+                yield
+            return
+        queues = [self._route_queue(request)]
+        if traffic_class is not None:
+            queues.append(self.class_queues.get(traffic_class.name))
+        if traffic_class is None or not traffic_class.priority:
+            queues.append(self.global_queue)
+        acquired = []
+        try:
+            for queue in queues:
+                if queue is not None:
+                    await queue.acquire()
+                    acquired.append(queue)
+            yield
+        finally:
+            for queue in reversed(acquired):
+                queue.release()
+
+    @asynccontextmanager
+    async def subscription(self) -> AsyncIterator[None]:
+        """Place d'abonnement longue durée (SSE, WebSocket) pour la durée du bloc, sans attente"""
+        await self.subscription_queue.acquire()
+        try:
+            yield
+        finally:
+            self.subscription_queue.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "global": self.global_queue.stats(),
+            "routes": {path: queue.stats() for path, queue in self.route_queues.items()},
+            "classes": {name: queue.stats() for name, queue in self.class_queues.items()},
+            "subscriptions": self.subscription_queue.stats()
+        }
+
+class AdmissionMiddleware:
+    """
+    Middleware ASGI : classe la requête et la fait passer par le contrôle d'admission.
+
+    Les places sont réservées autour de l'appel complet de l'application, pas
+    seulement jusqu'aux en-têtes : une réponse en flux (NDJSON, SSE) les garde
+    jusqu'à son dernier morceau, et elles sont libérées quoi qu'il arrive
+    (erreur, client déconnecté avant le premier morceau, réponse remplacée par
+    un middleware extérieur qui annule l'appel). Au-delà des limites, 503
+    immédiat avec `Retry-After`. Le contrôleur et les classes sont lus dans
+    `app.state` (`admission`, `traffic_classes`), absents = pas de limite.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = scope["app"].state
+        request = Request(scope)
+        classifier = getattr(state, "traffic_classes", None)
+        traffic_class = classifier.classify(request.method, request.url.path) if classifier else None
+        admission = getattr(state, "admission", None)
+
+        async def send_with_class(message: Message):
+            if message["type"] == "http.response.start" and traffic_class is not None:
+                MutableHeaders(scope=message).append("X-Traffic-Class", traffic_class.name)
+            await send(message)
+
+        with traffic_class_scope(traffic_class):
+            async with AsyncExitStack() as slots:
+                if admission is not None and not admission.exempt(request):
+                    try:
+                        await slots.enter_async_context(admission.admit(request, traffic_class))
+                    except AdmissionRejected as e:
+                        await _rejection(request, e)(scope, receive, send_with_class)
+                        return
+                await self.app(scope, receive, send_with_class)
+
+def _rejection(request: Request, error: AdmissionRejected) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(error.retry_after)},
+        content={
+            "error": True,
+            "message": f"Gateway saturée ({error.scope}: {error.reason}), réessayez plus tard",
+            "path": str(request.url)
+        }
+    )
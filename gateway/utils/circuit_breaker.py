@@ -0,0 +1,79 @@
+"""Disjoncteur par service upstream (fermé / ouvert / semi-ouvert)"""
+import time
+from typing import Any, Dict, Optional
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """
+    Coupe le trafic vers un upstream après `failure_threshold` échecs consécutifs.
+
+    - fermé: les appels passent, les échecs consécutifs sont comptés
+    - ouvert: les appels sont refusés immédiatement pendant `reset_timeout` secondes
+    - semi-ouvert: jusqu'à `half_open_max_calls` appels d'essai ; un succès
+      referme le circuit, un échec le rouvre
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CIRCUIT_CLOSED
+        self.consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_calls = 0
+        self.counters = {"rejected": 0, "opened": 0}
+
+    def allow(self) -> bool:
+        """Réserve le droit d'appeler l'upstream (à solder par record_* ou abandon)"""
+        if self.state == CIRCUIT_OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                self.counters["rejected"] += 1
+                return False
+            self.state = CIRCUIT_HALF_OPEN
+            self._trial_calls = 0
+
+        if self.state == CIRCUIT_HALF_OPEN:
+            if self._trial_calls >= self.half_open_max_calls:
+                self.counters["rejected"] += 1
+                return False
+            self._trial_calls += 1
+        return True
+
+    def record_success(self):
+        if self.state == CIRCUIT_HALF_OPEN:
+            self.state = CIRCUIT_CLOSED
+            self._opened_at = None
+        self.consecutive_failures = 0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == CIRCUIT_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def abandon(self):
+        """Appel autorisé mais jamais émis (ou annulé) : libère l'essai semi-ouvert"""
+        if self.state == CIRCUIT_HALF_OPEN and self._trial_calls > 0:
+            self._trial_calls -= 1
+
+    def _open(self):
+        if self.state != CIRCUIT_OPEN:
+            self.counters["opened"] += 1
+        self.state = CIRCUIT_OPEN
+        self._opened_at = time.monotonic()
+
+    def retry_in(self) -> float:
+        """Secondes avant le prochain appel d'essai (0 si le circuit n'est pas ouvert)"""
+        if self.state != CIRCUIT_OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "retry_in": round(self.retry_in(), 1),
+            **self.counters
+        }
@@ -0,0 +1,102 @@
+"""Limite adaptative des appels en vol par service upstream (AIMD)"""
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict
+
+class AIMDLimiter:
+    """
+    Plafond d'appels simultanés ajusté selon la latence observée.
+
+    Augmentation additive : +1 après un appel rapide, si le plafond était
+    réellement sollicité. Diminution multiplicative : ×`backoff_ratio` après un
+    échec ou un appel plus lent que `latency_threshold`. Au-delà du plafond, un
+    appel attend une place au plus `max_wait` secondes puis est refusé, au lieu
+    de s'empiler derrière un upstream lent. Les appels prioritaires (classe de
+    trafic critique) passent devant les autres dans la file d'attente.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        latency_threshold: float,
+        backoff_ratio: float = 0.9,
+        max_wait: float = 0.5
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_threshold = latency_threshold
+        self.backoff_ratio = backoff_ratio
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._priority_waiters: Deque[asyncio.Future] = deque()
+        self.counters = {"rejected": 0, "queued": 0, "increases": 0, "decreases": 0}
+
+    async def acquire(self, priority: bool = False) -> bool:
+        """Réserve une place ; False si aucune ne s'est libérée à temps"""
+        ahead = self._priority_waiters if priority else (self._priority_waiters or self._waiters)
+        if self.in_flight < int(self.limit) and not ahead:
+            self.in_flight += 1
+            return True
+
+        self.counters["queued"] += 1
+        waiter = asyncio.get_running_loop().create_future()
+        (self._priority_waiters if priority else self._waiters).append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.max_wait)
+            return True
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # Place attribuée juste à l'expiration du délai
+                return True
+            waiter.cancel()
+            self.counters["rejected"] += 1
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._free_slot()
+            else:
+                waiter.cancel()
+            raise
+
+    def release(self, latency: float, dropped: bool):
+        """Libère la place et ajuste le plafond (`dropped` : échec upstream)"""
+        saturated = self.in_flight * 2 >= self.limit
+
+        if dropped or latency > self.latency_threshold:
+            self.limit = max(float(self.min_limit), self.limit * self.backoff_ratio)
+            self.counters["decreases"] += 1
+        elif saturated and self.limit < self.max_limit:
+            self.limit = min(float(self.max_limit), self.limit + 1)
+            self.counters["increases"] += 1
+
+        self._free_slot()
+
+    def abandon(self):
+        """Appel annulé : libère la place sans mesure"""
+        self._free_slot()
+
+    def _free_slot(self):
+        self.in_flight -= 1
+        # Les places libres passent aux appels en attente, prioritaires d'abord,
+        # puis dans l'ordre d'arrivée
+        for waiters in (self._priority_waiters, self._waiters):
+            while waiters and self.in_flight < int(self.limit):
+                waiter = waiters.popleft()
+                if waiter.done():
+                    continue
+                self.in_flight += 1
+                waiter.set_result(True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "waiting": sum(1 for waiters in (self._priority_waiters, self._waiters) for waiter in waiters if not waiter.done()),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            **self.counters
+        }
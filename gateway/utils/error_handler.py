@@ -99,6 +99,8 @@ def handle_grpc_error(error: grpc.RpcError, service: str) -> ServiceError:
 
 def handle_soap_error(error: Exception, service: str) -> ServiceError:
     """Transforme une erreur SOAP en ServiceError"""
+    if isinstance(error, ServiceError):
+        return error
     return ServiceError(
         service=service,
         message=f"Erreur SOAP: {str(error)}",
@@ -107,6 +109,8 @@ def handle_soap_error(error: Exception, service: str) -> ServiceError:
 
 def handle_graphql_error(error: Exception, service: str) -> ServiceError:
     """Transforme une erreur GraphQL en ServiceError"""
+    if isinstance(error, ServiceError):
+        return error
     return ServiceError(
         service=service,
         message=f"Erreur GraphQL: {str(error)}",
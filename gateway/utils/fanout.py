@@ -0,0 +1,49 @@
+"""Exécution concurrente d'appels upstream avec délai par service"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Dict, Optional, Tuple
+from  utils.logger import logger
+
+@dataclass
+class FanOutResult:
+    """Résultat d'un appel de fan-out"""
+    value: Any = None
+    error: Optional[BaseException] = None
+    timed_out: bool = False
+    duration_ms: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.timed_out
+
+async def _run_with_deadline(name: str, call: Awaitable, deadline: float) -> FanOutResult:
+    """Exécute un appel en respectant son délai, sans jamais lever d'exception"""
+    start = time.perf_counter()
+    try:
+        value = await asyncio.wait_for(call, timeout=deadline)
+        return FanOutResult(value=value, duration_ms=(time.perf_counter() - start) * 1000)
+    except asyncio.TimeoutError:
+        logger.warning(f"Fan-out: {name} exceeded its {deadline}s deadline")
+        return FanOutResult(timed_out=True, duration_ms=(time.perf_counter() - start) * 1000)
+    except Exception as e:
+        logger.error(f"Fan-out: {name} failed: {str(e)}")
+        return FanOutResult(error=e, duration_ms=(time.perf_counter() - start) * 1000)
+
+async def fan_out(calls: Dict[str, Tuple[Awaitable, float]]) -> Dict[str, FanOutResult]:
+    """
+    Lance tous les appels simultanément, chacun avec son propre délai.
+
+    Args:
+        calls: nom du service -> (awaitable, délai en secondes)
+
+    Returns:
+        nom du service -> FanOutResult (un service lent ou en erreur
+        n'empêche pas les autres de répondre)
+    """
+    names = list(calls.keys())
+    results = await asyncio.gather(*[
+        _run_with_deadline(name, call, deadline)
+        for name, (call, deadline) in calls.items()
+    ])
+    return dict(zip(names, results))
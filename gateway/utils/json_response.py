@@ -0,0 +1,46 @@
+"""Réponses JSON sérialisées par orjson"""
+from decimal import Decimal
+from typing import Any, Optional
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+# En-têtes propres au corps, recalculés par la nouvelle réponse
+_BODY_HEADERS = {"content-length", "content-type"}
+
+def json_default(value: Any) -> Any:
+    """Types hors du périmètre d'orjson (xsd:decimal désérialisé par zeep)"""
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type non sérialisable en JSON: {type(value).__name__}")
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse sérialisée par orjson (bytes UTF-8, datetime et UUID natifs).
+
+    Volontairement pas la classe par défaut de l'application : une classe
+    personnalisée désactive la sérialisation directe par pydantic (`dump_json`)
+    des routes à `response_model`, plus rapide que validation + orjson
+    (voir `benchmarks/bench_json_response.py`).
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+
+def passthrough(content: Any, response: Optional[Response] = None, status_code: int = 200) -> FastJSONResponse:
+    """
+    Réponse pour une route qui relaie tel quel du JSON upstream de confiance.
+
+    Renvoyer une Response court-circuite la validation par `response_model` et
+    `jsonable_encoder` : la charge est sérialisée une seule fois, par orjson.
+    Le `response_model` reste déclaré pour la documentation OpenAPI. Les
+    en-têtes posés sur la `response` injectée (X-Cache, Age) sont recopiés,
+    FastAPI ne les fusionnant pas quand la route renvoie sa propre Response.
+    """
+    result = FastJSONResponse(content, status_code=status_code)
+    if response is not None:
+        for name, value in response.headers.items():
+            if name not in _BODY_HEADERS:
+                result.headers[name] = value
+    return result
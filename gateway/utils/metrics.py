@@ -0,0 +1,113 @@
+"""
+Métriques Prometheus de la Gateway.
+
+Avec plusieurs workers uvicorn, chaque processus écrit ses valeurs dans
+`PROMETHEUS_MULTIPROC_DIR` (variable lue par prometheus_client à l'import) et
+`/metrics` agrège tous les processus. Le répertoire doit être vidé avant le
+lancement des workers (voir le Dockerfile).
+"""
+import os
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess
+)
+
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# Bornes adaptées aux délais de la Gateway (fan-out 3-4 s, timeouts 10-15 s)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "gateway_http_request_duration_seconds",
+    "Durée des requêtes HTTP traitées par la Gateway",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "gateway_http_requests_in_flight",
+    "Requêtes HTTP en cours de traitement",
+    multiprocess_mode="livesum"
+)
+UPSTREAM_CALL_DURATION = Histogram(
+    "gateway_upstream_call_duration_seconds",
+    "Durée des appels vers les services upstream (une observation par tentative)",
+    ["service", "operation", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "gateway_upstream_calls_in_flight",
+    "Appels upstream en cours",
+    ["service"],
+    multiprocess_mode="livesum"
+)
+CACHE_REQUESTS = Counter(
+    "gateway_cache_requests_total",
+    "Lectures du cache de réponses par statut X-Cache",
+    ["cache", "status"]
+)
+PLAN_TRIP_WARNINGS = Counter(
+    "gateway_plan_trip_warnings_total",
+    "Données manquantes dans les réponses plan-trip",
+    ["service", "reason"]
+)
+SUBSCRIPTION_CLIENTS = Gauge(
+    "gateway_subscription_clients",
+    "Clients abonnés à un flux temps réel (SSE, WebSocket)",
+    ["hub"],
+    multiprocess_mode="livesum"
+)
+SUBSCRIPTION_UPSTREAMS = Gauge(
+    "gateway_subscription_upstream_streams",
+    "Flux upstream ouverts pour les abonnements (un par filtre distinct)",
+    ["hub"],
+    multiprocess_mode="livesum"
+)
+UPSTREAM_HEALTHY = Gauge(
+    "gateway_upstream_healthy",
+    "Résultat de la dernière sonde de santé de chaque service (1 : sain)",
+    ["service"],
+    multiprocess_mode="livemin"
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "gateway_admission_queue_depth",
+    "Requêtes en attente d'admission, par file (global ou gabarit de route)",
+    ["queue"],
+    multiprocess_mode="livesum"
+)
+ADMISSION_SHED = Counter(
+    "gateway_admission_shed_total",
+    "Requêtes refusées en 503 par le contrôle d'admission",
+    ["queue", "reason"]
+)
+SUBSCRIPTION_DROPS = Counter(
+    "gateway_subscription_drops_total",
+    "Abonnements fermés par la Gateway",
+    ["hub", "reason"]
+)
+
+# Issues d'un appel upstream
+OUTCOME_SUCCESS = "success"
+OUTCOME_ANSWERED = "answered_error"
+OUTCOME_FAILURE = "failure"
+OUTCOME_REJECTED = "rejected"
+
+def render_metrics() -> bytes:
+    """Exposition texte, agrégée sur tous les workers en mode multi-processus"""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+def mark_worker_dead():
+    """Retire les jauges `livesum` du worker qui s'arrête"""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
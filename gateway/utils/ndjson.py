@@ -0,0 +1,48 @@
+"""Réponses en flux NDJSON (un objet JSON par ligne) pour les grandes collections"""
+from typing import Any, AsyncIterator, Optional
+import orjson
+from fastapi.responses import StreamingResponse
+from  utils.logger import logger
+from  utils.error_handler import ServiceError
+from  utils.json_response import json_default
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def wants_ndjson(stream: bool = False, accept: Optional[str] = None) -> bool:
+    """Mode flux demandé par `?stream=true` ou `Accept: application/x-ndjson`"""
+    return stream or (accept is not None and NDJSON_MEDIA_TYPE in accept)
+
+async def ndjson_response(items: AsyncIterator[Any]) -> StreamingResponse:
+    """
+    Réponse NDJSON écrite au fil de l'itération de `items`.
+
+    Le premier élément est attendu avant d'envoyer les en-têtes : une erreur à
+    l'ouverture du flux (upstream injoignable, requête invalide) devient une
+    réponse d'erreur HTTP classique. Une fois le flux commencé, une erreur est
+    signalée par une dernière ligne `{"error": {...}}`.
+    """
+    try:
+        first = await items.__anext__()
+    except StopAsyncIteration:
+        return StreamingResponse(iter(()), media_type=NDJSON_MEDIA_TYPE)
+
+    return StreamingResponse(_lines(first, items), media_type=NDJSON_MEDIA_TYPE)
+
+def _line(item: Any) -> bytes:
+    return orjson.dumps(item, default=json_default, option=orjson.OPT_APPEND_NEWLINE)
+
+async def _lines(first: Any, items: AsyncIterator[Any]) -> AsyncIterator[bytes]:
+    sent = 1
+    try:
+        yield _line(first)
+        async for item in items:
+            sent += 1
+            yield _line(item)
+    except ServiceError as e:
+        logger.error(f"NDJSON stream interrupted after {sent} items: {e.message}")
+        yield _line({"error": {"service": e.service, "message": e.message, "status_code": e.status_code}})
+    except Exception as e:
+        logger.error(f"NDJSON stream interrupted after {sent} items: {str(e)}")
+        yield _line({"error": {"message": str(e), "status_code": 500}})
+    finally:
+        await items.aclose()
@@ -0,0 +1,294 @@
+"""Cache des réponses de lecture de la Gateway (TTL, stale-while-revalidate, last-known-good)"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+from fastapi import Request, Response
+from  utils.logger import logger
+from  utils.error_handler import ServiceError
+from  utils.metrics import CACHE_REQUESTS
+
+# Statuts renvoyés dans l'en-tête X-Cache
+CACHE_HIT = "HIT"
+CACHE_STALE = "STALE"
+CACHE_MISS = "MISS"
+CACHE_LAST_KNOWN_GOOD = "LAST-KNOWN-GOOD"
+
+@dataclass
+class CacheEntry:
+    """Réponse mise en cache"""
+    value: Any
+    stored_at: float
+    ttl: float
+    stale_ttl: float
+    tags: Tuple[str, ...] = ()
+
+    def age(self, now: float) -> float:
+        return now - self.stored_at
+
+    def is_fresh(self, now: float) -> bool:
+        return self.age(now) < self.ttl
+
+    def is_servable_stale(self, now: float) -> bool:
+        return self.age(now) < self.ttl + self.stale_ttl
+
+def _is_upstream_failure(error: Exception) -> bool:
+    """Erreurs pour lesquelles la dernière valeur connue reste préférable (5xx, timeouts)"""
+    if isinstance(error, ServiceError):
+        return error.status_code >= 500
+    return True
+
+class ResponseCache:
+    """
+    Cache LRU en mémoire des lectures upstream, un par worker.
+
+    Trois niveaux pour chaque entrée:
+    - fraîche (âge < ttl): servie directement
+    - périmée (âge < ttl + stale_ttl): servie, rafraîchie en arrière-plan
+    - expirée: rechargée de façon synchrone; si l'upstream est en panne,
+      la dernière valeur connue (last-known-good) est servie
+
+    Les entrées portent des tags invalidés par les routes de mutation.
+    L'invalidation est propagée aux autres workers uvicorn via la date de
+    modification d'un fichier par tag dans `invalidation_dir`. Ces dates sont
+    gardées en mémoire et relues au plus toutes les `invalidation_poll_interval`
+    secondes : une lecture en cache ne fait pas d'appel système, et une
+    invalidation venue d'un autre worker est vue avec au plus ce retard (celles
+    du worker lui-même sont immédiates).
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        stale_ratio: float = 1.0,
+        invalidation_dir: Optional[str] = None,
+        invalidation_poll_interval: float = 0.1
+    ):
+        self.max_entries = max_entries
+        self.stale_ratio = stale_ratio
+        self.invalidation_dir = invalidation_dir
+        self.invalidation_poll_interval = invalidation_poll_interval
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._invalidated_at: Dict[str, float] = {}
+        # Tag -> (date de lecture monotone, date de modification du fichier)
+        self._remote_invalidated_at: Dict[str, Tuple[float, float]] = {}
+        self.counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "last_known_good": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "refresh_failures": 0
+        }
+
+    # --------------------------------------------------------
+    # Lecture
+    # --------------------------------------------------------
+
+    async def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: float,
+        tags: Iterable[str] = (),
+        store_if: Optional[Callable[[Any], bool]] = None
+    ) -> Tuple[Any, str, float]:
+        """
+        Retourne la valeur en cache ou la charge depuis l'upstream.
+
+        `store_if` écarte du cache les valeurs qui ne doivent pas être resservies
+        (réponse partielle) : elles sont renvoyées à l'appelant sans être stockées.
+
+        Returns:
+            (valeur, statut X-Cache, âge en secondes)
+        """
+        now = time.time()
+        entry = self._lookup(key, now)
+
+        if entry is not None and entry.is_fresh(now):
+            self.counters["hits"] += 1
+            return entry.value, CACHE_HIT, entry.age(now)
+
+        if entry is not None and entry.is_servable_stale(now):
+            self.counters["stale_hits"] += 1
+            self._schedule_refresh(key, fetch, ttl, tags, store_if)
+            return entry.value, CACHE_STALE, entry.age(now)
+
+        self.counters["misses"] += 1
+        try:
+            value = await fetch()
+        except Exception as e:
+            if entry is None or not _is_upstream_failure(e):
+                raise
+            self.counters["last_known_good"] += 1
+            logger.warning(f"Cache: upstream failed for {key}, serving last known good value ({str(e)})")
+            return entry.value, CACHE_LAST_KNOWN_GOOD, entry.age(time.time())
+
+        if store_if is None or store_if(value):
+            self._store(key, value, ttl, tags)
+        return value, CACHE_MISS, 0.0
+
+    async def cached(
+        self,
+        response: Response,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: float,
+        tags: Iterable[str] = (),
+        store_if: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """`get_or_fetch` pour une route FastAPI : renseigne X-Cache et Age"""
+        value, status, age = await self.get_or_fetch(key, fetch, ttl, tags, store_if)
+        self.annotate(response, key, status, age)
+        return value
+
+    def annotate(self, response: Response, key: str, status: str, age: float):
+        """Renseigne X-Cache et Age et compte la lecture"""
+        # Libellé borné : préfixe de la clé, sans l'identifiant (air.aqi:downtown -> air.aqi)
+        CACHE_REQUESTS.labels(key.split(":", 1)[0], status).inc()
+        response.headers["X-Cache"] = status
+        response.headers["Age"] = str(int(age))
+
+    def _lookup(self, key: str, now: float) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self._is_invalidated(entry):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: str, value: Any, ttl: float, tags: Iterable[str]):
+        self._entries[key] = CacheEntry(
+            value=value,
+            stored_at=time.time(),
+            ttl=ttl,
+            stale_ttl=ttl * self.stale_ratio,
+            tags=tuple(tags)
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def _schedule_refresh(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: float,
+        tags: Iterable[str],
+        store_if: Optional[Callable[[Any], bool]] = None
+    ):
+        """Un seul rafraîchissement en arrière-plan par clé"""
+        if key in self._refreshing:
+            return
+        task = asyncio.create_task(self._refresh(key, fetch, ttl, tuple(tags), store_if))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    async def _refresh(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: float,
+        tags: Tuple[str, ...],
+        store_if: Optional[Callable[[Any], bool]] = None
+    ):
+        started_at = time.time()
+        try:
+            value = await fetch()
+        except Exception as e:
+            self.counters["refresh_failures"] += 1
+            logger.warning(f"Cache: background refresh failed for {key}: {str(e)}")
+            return
+        # Une mutation arrivée pendant le rafraîchissement rend la valeur douteuse
+        # (fichiers relus : une invalidation récente d'un autre worker compte)
+        if any(self._tag_invalidated_at(tag, max_lag=0.0) >= started_at for tag in tags):
+            return
+        # Une valeur partielle ne remplace pas la valeur complète encore servie
+        if store_if is not None and not store_if(value):
+            return
+        self._store(key, value, ttl, tags)
+
+    # --------------------------------------------------------
+    # Invalidation
+    # --------------------------------------------------------
+
+    def invalidate(self, *tags: str):
+        """Supprime les entrées portant un de ces tags, dans tous les workers"""
+        tag_set = set(tags)
+        stale_keys = [key for key, entry in self._entries.items() if tag_set.intersection(entry.tags)]
+        for key in stale_keys:
+            del self._entries[key]
+        self.counters["invalidations"] += len(stale_keys)
+
+        now = time.time()
+        for tag in tags:
+            self._invalidated_at[tag] = now
+            self._touch_tag(tag)
+        logger.info(f"Cache: invalidated {len(stale_keys)} entries for tags {sorted(tag_set)}")
+
+    def _tag_path(self, tag: str) -> str:
+        return os.path.join(self.invalidation_dir, tag.replace("/", "_"))
+
+    def _touch_tag(self, tag: str):
+        if not self.invalidation_dir:
+            return
+        try:
+            os.makedirs(self.invalidation_dir, exist_ok=True)
+            with open(self._tag_path(tag), "a"):
+                pass
+            os.utime(self._tag_path(tag), None)
+        except OSError as e:
+            logger.warning(f"Cache: could not propagate invalidation of {tag}: {str(e)}")
+
+    def _tag_invalidated_at(self, tag: str, max_lag: Optional[float] = None) -> float:
+        """Dernière invalidation du tag, par ce worker ou par un autre (vue avec au plus `max_lag` s de retard)"""
+        local = self._invalidated_at.get(tag, 0.0)
+        if not self.invalidation_dir:
+            return local
+        if max_lag is None:
+            max_lag = self.invalidation_poll_interval
+        now = time.monotonic()
+        checked_at, remote = self._remote_invalidated_at.get(tag, (None, 0.0))
+        if checked_at is None or now - checked_at >= max_lag:
+            remote = self._read_tag_mtime(tag)
+            self._remote_invalidated_at[tag] = (now, remote)
+        return max(local, remote)
+
+    def _read_tag_mtime(self, tag: str) -> float:
+        try:
+            return os.stat(self._tag_path(tag)).st_mtime
+        except OSError:
+            return 0.0
+
+    def invalidated_since(self, tag: str, timestamp: float) -> bool:
+        """Vrai si `tag` a été invalidé (dans n'importe quel worker) depuis `timestamp`"""
+        return self._tag_invalidated_at(tag) >= timestamp
+
+    def _is_invalidated(self, entry: CacheEntry) -> bool:
+        return any(self._tag_invalidated_at(tag) >= entry.stored_at for tag in entry.tags)
+
+    # --------------------------------------------------------
+    # Cycle de vie et statistiques
+    # --------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "max_entries": self.max_entries, **self.counters}
+
+    async def close(self):
+        """Annule les rafraîchissements en cours"""
+        tasks = list(self._refreshing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._entries.clear()
+
+def get_response_cache(request: Request) -> ResponseCache:
+    """Dependency FastAPI : cache attaché à l'application"""
+    return request.app.state.response_cache
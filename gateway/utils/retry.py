@@ -0,0 +1,156 @@
+"""Relances et requêtes couvertes (hedging) des lectures idempotentes"""
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, Type
+from  config import settings
+from  utils.logger import logger
+from  utils.upstream_guard import UpstreamRejectedError, is_upstream_failure
+
+# Latences conservées pour estimer le p95 d'un service
+LATENCY_SAMPLES = 200
+
+class RetryBudget:
+    """
+    Budget de relances sur une fenêtre glissante.
+
+    Les relances sont autorisées tant qu'elles restent sous
+    `min_retries + ratio × requêtes` sur les `window` dernières secondes : un
+    upstream déjà surchargé ne reçoit jamais plus de `ratio` de trafic en plus.
+    """
+
+    def __init__(self, ratio: float, min_retries: int, window: float):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._requests: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+
+    def _prune(self, now: float):
+        for events in (self._requests, self._retries):
+            while events and now - events[0] > self.window:
+                events.popleft()
+
+    def record_request(self):
+        self._requests.append(time.monotonic())
+
+    def try_withdraw(self) -> bool:
+        now = time.monotonic()
+        self._prune(now)
+        if len(self._retries) >= self.min_retries + self.ratio * len(self._requests):
+            return False
+        self._retries.append(now)
+        return True
+
+class RetryEngine:
+    """
+    Exécute une lecture idempotente avec relances et hedging optionnel.
+
+    - relances : backoff exponentiel à partir de `RETRY_DELAY` (plafonné à
+      `RETRY_MAX_DELAY`) avec jitter complet, au plus `MAX_RETRIES` fois, et
+      seulement pour les échecs upstream (5xx, timeout, connexion)
+    - hedging : si la première tentative n'a pas répondu après le p95 observé,
+      une seconde part en parallèle ; la première réponse gagne
+    - relances et requêtes couvertes consomment le même `RetryBudget`
+
+    À placer à l'extérieur de `UpstreamGuard.call` : chaque tentative passe par
+    le disjoncteur, et un circuit ouvert n'est jamais relancé.
+    """
+
+    def __init__(
+        self,
+        service: str,
+        answered: Tuple[Type[BaseException], ...] = (),
+        max_retries: Optional[int] = None,
+        hedging: Optional[bool] = None
+    ):
+        self.service = service
+        self.answered = answered
+        self.max_retries = settings.MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = settings.RETRY_DELAY
+        self.max_delay = settings.RETRY_MAX_DELAY
+        self.hedging = settings.HEDGING_ENABLED if hedging is None else hedging
+        self.budget = RetryBudget(
+            ratio=settings.RETRY_BUDGET_RATIO,
+            min_retries=settings.RETRY_BUDGET_MIN_RETRIES,
+            window=settings.RETRY_BUDGET_WINDOW
+        )
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.counters = {"requests": 0, "retries": 0, "hedged": 0, "hedge_wins": 0, "budget_exhausted": 0}
+
+    def _retryable(self, error: Exception) -> bool:
+        if isinstance(error, (UpstreamRejectedError,) + self.answered):
+            return False
+        return is_upstream_failure(error)
+
+    def _withdraw(self) -> bool:
+        if self.budget.try_withdraw():
+            return True
+        self.counters["budget_exhausted"] += 1
+        return False
+
+    def hedge_delay(self) -> Optional[float]:
+        """p95 des latences observées, None tant que l'échantillon est trop petit"""
+        if len(self._latencies) < settings.HEDGING_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    async def run(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Exécute `call()` (une tentative par appel) avec relances et hedging"""
+        self.counters["requests"] += 1
+        self.budget.record_request()
+        attempt = 0
+        while True:
+            try:
+                return await self._attempt(call)
+            except Exception as e:
+                if attempt >= self.max_retries or not self._retryable(e) or not self._withdraw():
+                    raise
+                attempt += 1
+                self.counters["retries"] += 1
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+                logger.warning(f"Retrying {self.service} in {delay:.2f}s (attempt {attempt + 1}): {str(e)}")
+                await asyncio.sleep(delay)
+
+    async def _timed(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        started = time.monotonic()
+        result = await call()
+        self._latencies.append(time.monotonic() - started)
+        return result
+
+    async def _attempt(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        delay = self.hedge_delay() if self.hedging else None
+        if delay is None:
+            return await self._timed(call)
+
+        first = asyncio.ensure_future(self._timed(call))
+        pending = {first}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done and self._withdraw():
+                self.counters["hedged"] += 1
+                pending.add(asyncio.ensure_future(self._timed(call)))
+
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.counters["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        delay = self.hedge_delay()
+        return {
+            **self.counters,
+            "hedging": self.hedging,
+            "p95_ms": round(delay * 1000, 1) if delay is not None else None
+        }
@@ -0,0 +1,56 @@
+"""Regroupement des appels upstream identiques en cours (single-flight)"""
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from  utils.traffic_classes import current_traffic_class
+
+class SingleFlight:
+    """
+    Un seul appel upstream par clé à un instant donné.
+
+    Tant qu'un appel pour une clé (opération, arguments) est en vol, les
+    appelants suivants attendent le même résultat au lieu d'émettre un doublon.
+    L'appel partagé est protégé par `asyncio.shield` : l'annulation d'un
+    appelant (client HTTP déconnecté, délai de fan-out) n'annule pas les autres.
+
+    L'appel partagé tourne dans le contexte de son premier appelant : classe de
+    trafic (budget upstream, priorité dans les limiteurs) comprise. Les appels
+    ne sont donc regroupés qu'au sein d'une même classe : une requête critique
+    ne rejoint pas un appel de masse qui peut être refusé faute de budget.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.upstream_calls = 0
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Exécute `call()` ou rejoint l'appel déjà en vol pour `key`"""
+        self.calls += 1
+        traffic_class = current_traffic_class()
+        key = (traffic_class.name if traffic_class is not None else None, key)
+        future = self._in_flight.get(key)
+        if future is None:
+            self.upstream_calls += 1
+            future = asyncio.ensure_future(call())
+            self._in_flight[key] = future
+            future.add_done_callback(functools.partial(self._forget, key))
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future):
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        # Si tous les appelants ont été annulés, personne ne lira l'exception
+        if not future.cancelled():
+            future.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        coalesced = self.calls - self.upstream_calls
+        return {
+            "calls": self.calls,
+            "upstream_calls": self.upstream_calls,
+            "coalesced": coalesced,
+            "coalescing_ratio": round(coalesced / self.calls, 4) if self.calls else 0.0,
+            "in_flight": len(self._in_flight)
+        }
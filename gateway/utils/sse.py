@@ -0,0 +1,44 @@
+"""Format Server-Sent Events (text/event-stream)"""
+from typing import Any
+import orjson
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+from  utils.json_response import json_default
+
+SSE_MEDIA_TYPE = "text/event-stream"
+
+# En-têtes empêchant la mise en tampon du flux par les proxys (nginx)
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def sse_event(event: str, data: Any) -> bytes:
+    """Un événement nommé, données en JSON sur une seule ligne"""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data, default=json_default) + b"\n\n"
+
+def sse_retry(milliseconds: int) -> bytes:
+    """Délai de reconnexion automatique d'EventSource"""
+    return f"retry: {milliseconds}\n\n".encode()
+
+def sse_comment(text: str = "") -> bytes:
+    """Commentaire ignoré par EventSource : garde la connexion ouverte"""
+    return f": {text}\n\n".encode()
+
+class EventStreamResponse(StreamingResponse):
+    """
+    Réponse `text/event-stream` qui ferme toujours son générateur.
+
+    StreamingResponse abandonne son itérateur là où il s'est arrêté quand le
+    client se déconnecte : le `finally` du générateur (désabonnement) n'est
+    alors exécuté qu'au passage du ramasse-miettes. Ici, il l'est dès la fin
+    de la réponse, quelle qu'en soit la cause.
+    """
+
+    def __init__(self, content, **kwargs):
+        kwargs.setdefault("media_type", SSE_MEDIA_TYPE)
+        kwargs.setdefault("headers", SSE_HEADERS)
+        super().__init__(content, **kwargs)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self.body_iterator.aclose()
@@ -0,0 +1,215 @@
+"""Diffusion d'un flux upstream partagé vers de nombreux clients (SSE, WebSocket)"""
+import asyncio
+import contextvars
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, Iterable, Optional, Tuple
+from  utils.logger import logger
+from  utils.metrics import SUBSCRIPTION_CLIENTS, SUBSCRIPTION_DROPS, SUBSCRIPTION_UPSTREAMS
+
+# Événements remis aux abonnés, en plus des éléments du flux
+EVENT_STATUS = "status"
+
+# Raisons de fermeture d'un abonnement
+CLOSED_LAGGED = "lagged"
+CLOSED_SHUTDOWN = "shutdown"
+
+class SubscriptionClosed(Exception):
+    """Abonnement fermé par le hub (client trop lent, arrêt de la Gateway)"""
+
+    def __init__(self, reason: str):
+        self.reason = reason
+        super().__init__(reason)
+
+_CLOSE = object()
+
+class Subscription:
+    """
+    File d'un client connecté.
+
+    L'itération rend des couples (événement, données) : d'abord l'état
+    retenu du sujet au moment de l'abonnement, puis les éléments du flux au
+    fil de l'eau. `SubscriptionClosed` est levée si le hub ferme l'abonnement.
+    """
+
+    def __init__(self, topic: "_Topic", buffer: int, replay: Iterable[Tuple[str, Any]]):
+        self.topic = topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer)
+        self.replay = deque(replay)
+        self.reason: Optional[str] = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Tuple[str, Any]:
+        if self.replay:
+            return self.replay.popleft()
+        message = await self.queue.get()
+        if message is _CLOSE:
+            raise SubscriptionClosed(self.reason)
+        return message
+
+    async def next(self, timeout: float) -> Optional[Tuple[str, Any]]:
+        """Prochain message, ou None si rien n'arrive avant `timeout` (heartbeat)"""
+        try:
+            return await asyncio.wait_for(self.__anext__(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def offer(self, message: Tuple[str, Any]) -> bool:
+        """Dépose un message sans attendre ; False si la file du client est pleine"""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def close(self, reason: str):
+        """Vide la file et y place le marqueur de fin (le client ne lira plus rien d'autre)"""
+        self.reason = reason
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(_CLOSE)
+
+class _Topic:
+    """Un flux upstream et ses abonnés, pour une clé de filtre"""
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.subscribers: set = set()
+        self.retained: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.task: Optional[asyncio.Task] = None
+        self.items = 0
+
+class SubscriptionHub:
+    """
+    Un seul flux upstream par filtre distinct, diffusé à tous ses abonnés.
+
+    Le premier abonné d'une clé ouvre le flux (`open_stream(key)`), le dernier
+    à partir le ferme. Chaque abonné a une file bornée à `buffer` messages :
+    la diffusion ne l'attend jamais, et un client qui ne suit pas est fermé
+    (`lagged`) plutôt que de ralentir les autres ; il se reconnecte et repart
+    de l'état retenu.
+
+    L'état retenu est le dernier élément de chaque identité (`item_key`) tant
+    que `is_live(item)` est vrai : un client qui rejoint un flux déjà ouvert
+    le reçoit d'abord, comme s'il avait ouvert son propre flux. Si le flux
+    upstream tombe, il est rouvert avec un délai croissant, les abonnés
+    reçoivent un événement `status` et l'état retenu repart de ce que renvoie
+    le flux rouvert.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        open_stream: Callable[[Hashable], AsyncIterator[Any]],
+        event: str,
+        buffer: int,
+        item_key: Callable[[Any], Hashable],
+        is_live: Callable[[Any], bool] = lambda item: True,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0
+    ):
+        self.name = name
+        self.open_stream = open_stream
+        self.event = event
+        self.buffer = buffer
+        self.item_key = item_key
+        self.is_live = is_live
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._topics: Dict[Hashable, _Topic] = {}
+        self.counters = {
+            "subscriptions": 0,
+            "upstream_opens": 0,
+            "upstream_failures": 0,
+            "lagged": 0
+        }
+
+    def subscribe(self, key: Hashable) -> Subscription:
+        """Abonne un client au flux `key`, ouvert s'il ne l'est pas déjà"""
+        topic = self._topics.get(key)
+        if topic is None:
+            topic = _Topic(key)
+            self._topics[key] = topic
+            # Contexte vierge : le flux partagé ne doit pas être rattaché
+            # à la trace du premier abonné
+            topic.task = asyncio.create_task(self._pump(topic), context=contextvars.Context())
+            SUBSCRIPTION_UPSTREAMS.labels(self.name).inc()
+
+        replay = [(self.event, item) for item in topic.retained.values()]
+        subscription = Subscription(topic, self.buffer, replay)
+        topic.subscribers.add(subscription)
+        self.counters["subscriptions"] += 1
+        SUBSCRIPTION_CLIENTS.labels(self.name).inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Retire un client ; le flux upstream est fermé avec son dernier abonné"""
+        topic = subscription.topic
+        if subscription not in topic.subscribers:
+            return
+        topic.subscribers.discard(subscription)
+        SUBSCRIPTION_CLIENTS.labels(self.name).dec()
+        if not topic.subscribers and self._topics.get(topic.key) is topic:
+            del self._topics[topic.key]
+            topic.task.cancel()
+            SUBSCRIPTION_UPSTREAMS.labels(self.name).dec()
+
+    async def _pump(self, topic: _Topic):
+        """Lit le flux upstream du sujet et le diffuse, en le rouvrant s'il tombe"""
+        delay = self.reconnect_delay
+        while True:
+            self.counters["upstream_opens"] += 1
+            try:
+                async for item in self.open_stream(topic.key):
+                    delay = self.reconnect_delay
+                    self._publish(topic, item)
+                reason = "stream ended"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.counters["upstream_failures"] += 1
+                reason = str(getattr(e, "message", e))
+
+            logger.warning(f"Subscription {self.name}{topic.key}: upstream lost ({reason}), reopening in {delay:.0f}s")
+            # Les changements survenus pendant la coupure ne seront jamais reçus
+            # (une alerte résolue entre-temps resterait active) : l'état retenu
+            # est abandonné, le flux rouvert renvoie l'état courant
+            topic.retained.clear()
+            self._broadcast(topic, (EVENT_STATUS, {"upstream": "reconnecting", "reason": reason}))
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _publish(self, topic: _Topic, item: Any):
+        topic.items += 1
+        identity = self.item_key(item)
+        topic.retained.pop(identity, None)
+        if self.is_live(item):
+            topic.retained[identity] = item
+        self._broadcast(topic, (self.event, item))
+
+    def _broadcast(self, topic: _Topic, message: Tuple[str, Any]):
+        for subscription in list(topic.subscribers):
+            if not subscription.offer(message):
+                # Client trop lent : fermé plutôt que de retarder le flux commun
+                self.counters["lagged"] += 1
+                SUBSCRIPTION_DROPS.labels(self.name, CLOSED_LAGGED).inc()
+                logger.warning(f"Subscription {self.name}{topic.key}: client lagging behind, closing it")
+                subscription.close(CLOSED_LAGGED)
+                self.unsubscribe(subscription)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "upstream_streams": len(self._topics),
+            "clients": sum(len(topic.subscribers) for topic in self._topics.values()),
+            **self.counters
+        }
+
+    async def close(self):
+        """Ferme les abonnements et les flux upstream"""
+        topics = list(self._topics.values())
+        for topic in topics:
+            for subscription in list(topic.subscribers):
+                subscription.close(CLOSED_SHUTDOWN)
+                self.unsubscribe(subscription)
+        await asyncio.gather(*(topic.task for topic in topics), return_exceptions=True)
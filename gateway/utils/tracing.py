@@ -0,0 +1,233 @@
+"""
+Traçage distribué : propagation W3C Trace Context et export des spans.
+
+Le span courant vit dans un `ContextVar` : les tâches asyncio créées pendant
+une requête (fan-out, single-flight) héritent de son contexte. Les clients
+ajoutent l'en-tête `traceparent` à chaque appel upstream (HTTP, métadonnées
+gRPC) ; chaque service le reprend pour rattacher ses propres spans à la trace.
+
+Si `TRACE_EXPORT_PATH` est défini, chaque span terminé est ajouté à ce fichier
+(une ligne JSON par span, champs inspirés d'OTLP) par un thread d'écriture :
+la boucle d'événements ne fait que déposer le span dans une file.
+`scripts/trace_waterfall.py` affiche une trace en cascade ou la convertit en
+OTLP/JSON.
+"""
+import atexit
+import json
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, Optional, Tuple
+from  config import settings
+
+TRACEPARENT_HEADER = "traceparent"
+
+_TRACEPARENT_RE = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+@dataclass
+class Span:
+    """Opération chronométrée d'une trace"""
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str]
+    start_time_unix_nano: int
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    end_time_unix_nano: Optional[int] = None
+    status: str = "ok"
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "service": settings.TRACE_SERVICE_NAME,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_time_unix_nano,
+            "end_time_unix_nano": self.end_time_unix_nano,
+            "status": self.status,
+            "attributes": self.attributes
+        }
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str]]:
+    """(trace_id, parent_span_id) d'un en-tête traceparent valide, sinon None"""
+    if not value:
+        return None
+    match = _TRACEPARENT_RE.match(value.strip().lower())
+    if not match:
+        return None
+    version, trace_id, span_id, _ = match.groups()
+    if version == "ff" or trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+def open_span(
+    name: str,
+    kind: str = "internal",
+    traceparent: Optional[str] = None,
+    attributes: Optional[Dict[str, Any]] = None
+) -> Span:
+    """
+    Crée un span enfant du span courant, ou de `traceparent` (requête entrante).
+
+    Le span n'est pas rendu courant : c'est le rôle de `span()`. Un flux itéré
+    (NDJSON) le garde tel quel, ses itérations pouvant reprendre dans une autre
+    tâche que celle qui l'a ouvert.
+    """
+    remote = parse_traceparent(traceparent)
+    parent = current_span()
+    if remote is not None:
+        trace_id, parent_span_id = remote
+    elif parent is not None:
+        trace_id, parent_span_id = parent.trace_id, parent.span_id
+    else:
+        trace_id, parent_span_id = secrets.token_hex(16), None
+
+    return Span(
+        name=name,
+        kind=kind,
+        trace_id=trace_id,
+        span_id=secrets.token_hex(8),
+        parent_span_id=parent_span_id,
+        start_time_unix_nano=time.time_ns(),
+        attributes=dict(attributes or {})
+    )
+
+def close_span(finished: Span, error: Optional[BaseException] = None):
+    """Termine le span (en erreur si `error`) et l'exporte"""
+    if error is not None:
+        finished.status = "error"
+        finished.attributes.setdefault("error", f"{type(error).__name__}: {error}")
+    finished.end_time_unix_nano = time.time_ns()
+    export_span(finished)
+
+@contextmanager
+def span(
+    name: str,
+    kind: str = "internal",
+    traceparent: Optional[str] = None,
+    attributes: Optional[Dict[str, Any]] = None
+) -> Iterator[Span]:
+    """
+    Ouvre un span enfant du span courant, ou de `traceparent` (requête entrante).
+
+    Sans parent, une nouvelle trace commence. Une exception marque le span en erreur.
+    """
+    current = open_span(name, kind, traceparent, attributes)
+    token = _current_span.set(current)
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current_span.reset(token)
+        close_span(current, error)
+
+def inject(headers: Optional[Dict[str, str]] = None, parent: Optional[Span] = None) -> Dict[str, str]:
+    """Copie de `headers` complétée du traceparent de `parent` (par défaut le span courant)"""
+    result = dict(headers or {})
+    current = parent or current_span()
+    if current is not None:
+        result[TRACEPARENT_HEADER] = current.traceparent
+    return result
+
+def grpc_metadata(parent: Optional[Span] = None) -> Optional[Tuple[Tuple[str, str], ...]]:
+    """Métadonnées gRPC portant le traceparent de `parent` (par défaut le span courant)"""
+    current = parent or current_span()
+    if current is None:
+        return None
+    return ((TRACEPARENT_HEADER, current.traceparent),)
+
+class _SpanWriter:
+    """
+    Écriture des spans hors de la boucle d'événements.
+
+    Un thread par processus (démarré au premier span, y compris dans chaque
+    worker forké) vide la file par lots dans des fichiers gardés ouverts, puis
+    les flushe : pas d'ouverture de fichier ni d'écriture bloquante par span.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    def put(self, path: str, record: Dict[str, Any]):
+        if self._pid != os.getpid():
+            self._start()
+        self._queue.put((path, record))
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Après un fork, la file et le thread du parent ne sont pas utilisables
+            self._queue = queue.Queue()
+            self._thread = threading.Thread(target=self._run, name="span-writer", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        files: Dict[str, Any] = {}
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                for path, record in batch:
+                    handle = files.get(path)
+                    if handle is None:
+                        directory = os.path.dirname(path)
+                        if directory:
+                            os.makedirs(directory, exist_ok=True)
+                        handle = files[path] = open(path, "a", encoding="utf-8")
+                    handle.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                for handle in files.values():
+                    handle.flush()
+            except OSError:
+                # Export au mieux : un disque plein ne doit pas bloquer le service
+                pass
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Attend que les spans déjà déposés soient écrits"""
+        if self._pid == os.getpid():
+            self._queue.join()
+
+_writer = _SpanWriter()
+atexit.register(_writer.flush)
+
+def export_span(finished: Span):
+    """Dépose le span pour le fichier d'export (une ligne JSON), si configuré"""
+    path = settings.TRACE_EXPORT_PATH
+    if not path:
+        return
+    _writer.put(path, finished.to_dict())
+
+def flush_spans():
+    """Attend l'écriture des spans terminés (tests, arrêt du worker)"""
+    _writer.flush()
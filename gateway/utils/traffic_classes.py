@@ -0,0 +1,102 @@
+"""
+Classes de trafic : voies séparées pour les requêtes critiques, interactives et de masse.
+
+Chaque requête est classée d'après sa méthode et son chemin (première règle
+qui correspond, sinon la classe par défaut). La classe courante vit dans un
+`ContextVar`, comme le span de traçage : les appels upstream lancés pendant la
+requête (fan-out, single-flight) savent pour quelle voie ils travaillent.
+
+Une classe a son propre plafond de requêtes en cours (contrôle d'admission)
+et, optionnellement, un plafond d'appels en vol par service upstream. Une
+classe prioritaire échappe au plafond global des requêtes et passe en tête
+de file des limiteurs upstream : le trafic de masse qui sature la Gateway ne
+retarde pas les alertes des secours.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+@dataclass
+class TrafficClass:
+    """Voie de trafic et ses budgets"""
+    name: str
+    max_in_flight: int
+    upstream_limit: Optional[int] = None
+    priority: bool = False
+
+@dataclass
+class TrafficRule:
+    """`POST /emergency/*=critical` : méthode optionnelle, motif de chemin, classe"""
+    method: Optional[str]
+    pattern: str
+    class_name: str
+
+    def matches(self, method: str, path: str) -> bool:
+        return (self.method is None or self.method == method) and fnmatchcase(path, self.pattern)
+
+_current_class: ContextVar[Optional[TrafficClass]] = ContextVar("traffic_class", default=None)
+
+def current_traffic_class() -> Optional[TrafficClass]:
+    """Classe de la requête en cours (None hors requête : tâches de fond)"""
+    return _current_class.get()
+
+@contextmanager
+def traffic_class_scope(traffic_class: Optional[TrafficClass]) -> Iterator[Optional[TrafficClass]]:
+    """Classe courante le temps du bloc (et des tâches qui y sont créées)"""
+    token = _current_class.set(traffic_class)
+    try:
+        yield traffic_class
+    finally:
+        _current_class.reset(token)
+
+def parse_traffic_rules(spec: str) -> List[TrafficRule]:
+    """`POST /emergency/*=critical,/smart-city/plan-trip*=interactive` -> règles, dans l'ordre"""
+    rules = []
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        target, _, class_name = item.rpartition("=")
+        method, _, pattern = target.strip().rpartition(" ")
+        rules.append(TrafficRule(method.strip().upper() or None, pattern, class_name.strip()))
+    return rules
+
+class TrafficClassifier:
+    """Règles de classement et classes de trafic d'un worker"""
+
+    def __init__(self, classes: Iterable[TrafficClass], rules: Iterable[TrafficRule], default_class: str):
+        self.classes: Dict[str, TrafficClass] = {traffic_class.name: traffic_class for traffic_class in classes}
+        self.rules = list(rules)
+        unknown = {rule.class_name for rule in self.rules} - set(self.classes)
+        if default_class not in self.classes or unknown:
+            raise ValueError(f"Classes de trafic inconnues: {sorted(unknown | ({default_class} - set(self.classes)))}")
+        self.default = self.classes[default_class]
+
+    def classify(self, method: str, path: str) -> TrafficClass:
+        for rule in self.rules:
+            if rule.matches(method, path):
+                return self.classes[rule.class_name]
+        return self.default
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                "max_in_flight": traffic_class.max_in_flight,
+                "upstream_limit": traffic_class.upstream_limit,
+                "priority": traffic_class.priority
+            }
+            for name, traffic_class in self.classes.items()
+        }
+
+def build_traffic_classes(
+    limits: Dict[str, int],
+    upstream_limits: Dict[str, int],
+    priority: Iterable[str]
+) -> List[TrafficClass]:
+    """Classes décrites par les réglages (`nom=limite`, listes de noms)"""
+    priority = set(priority)
+    return [
+        TrafficClass(name, limit, upstream_limits.get(name), name in priority)
+        for name, limit in limits.items()
+    ]
@@ -0,0 +1,244 @@
+"""Protection des appels upstream : disjoncteur et limite de concurrence adaptative"""
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple, Type
+import grpc
+import httpx
+from  config import settings
+from  utils.logger import logger
+from  utils.error_handler import ServiceError
+from  utils.circuit_breaker import CircuitBreaker, CIRCUIT_OPEN
+from  utils.concurrency_limiter import AIMDLimiter
+from  utils.tracing import Span, close_span, open_span, span
+from  utils.traffic_classes import TrafficClass, current_traffic_class
+from  utils.metrics import (
+    UPSTREAM_CALL_DURATION, UPSTREAM_IN_FLIGHT,
+    OUTCOME_SUCCESS, OUTCOME_ANSWERED, OUTCOME_FAILURE, OUTCOME_REJECTED
+)
+
+# Codes gRPC qui traduisent un upstream dégradé (les autres sont des réponses métier)
+GRPC_FAILURE_CODES = {
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.RESOURCE_EXHAUSTED,
+    grpc.StatusCode.INTERNAL,
+    grpc.StatusCode.UNKNOWN
+}
+
+class UpstreamRejectedError(ServiceError):
+    """Appel refusé par la Gateway elle-même (circuit ouvert, limite atteinte)"""
+
+def is_upstream_failure(error: Exception) -> bool:
+    """Échec imputable à l'upstream (5xx, timeout, connexion) et non à la requête"""
+    if isinstance(error, ServiceError):
+        return error.status_code >= 500
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    if isinstance(error, grpc.RpcError):
+        return error.code() in GRPC_FAILURE_CODES
+    return True
+
+class UpstreamGuard:
+    """
+    Point de passage de tous les appels d'un client vers son upstream.
+
+    Quand un service se dégrade, le disjoncteur coupe le trafic et le limiteur
+    réduit le nombre d'appels en vol : les requêtes échouent en 503 immédiatement
+    au lieu d'attendre chacune leur timeout et de bloquer les workers.
+
+    Une classe de trafic peut en plus avoir un budget fixe d'appels en vol
+    vers ce service (`upstream_limit`) : le trafic de masse ne monopolise pas
+    les places du limiteur au détriment des requêtes critiques, qui passent
+    en tête de sa file.
+    """
+
+    def __init__(self, service: str, answered: Tuple[Type[BaseException], ...] = ()):
+        """
+        Args:
+            service: nom du service dans les ServiceError levées
+            answered: exceptions signifiant que l'upstream a bien répondu
+                (faute SOAP, erreur GraphQL) et qui ne comptent pas comme échec
+        """
+        self.service = service
+        self.answered = answered
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.CIRCUIT_RESET_TIMEOUT,
+            half_open_max_calls=settings.CIRCUIT_HALF_OPEN_MAX_CALLS
+        )
+        self.limiter = AIMDLimiter(
+            initial_limit=settings.CONCURRENCY_INITIAL_LIMIT,
+            min_limit=settings.CONCURRENCY_MIN_LIMIT,
+            max_limit=settings.CONCURRENCY_MAX_LIMIT,
+            latency_threshold=settings.CONCURRENCY_LATENCY_THRESHOLD,
+            backoff_ratio=settings.CONCURRENCY_BACKOFF_RATIO,
+            max_wait=settings.CONCURRENCY_MAX_WAIT
+        )
+        # Budgets par classe de trafic : limiteurs fixes (min = max), créés au premier appel
+        self.class_budgets: Dict[str, AIMDLimiter] = {}
+
+    async def call(self, call: Callable[[], Awaitable[Any]], operation: str = "") -> Any:
+        """Exécute `call()` si le disjoncteur et le limiteur le permettent"""
+        # Un span client par tentative : le traceparent injecté par le client pointe dessus
+        with span(
+            f"{self.service} {operation}".strip(),
+            kind="client",
+            attributes={"peer.service": self.service, "operation": operation}
+        ):
+            return await self._guarded(call, operation)
+
+    async def _guarded(self, call: Callable[[], Awaitable[Any]], operation: str) -> Any:
+        self._check_breaker(operation)
+        traffic_class = current_traffic_class()
+        budget = self._class_budget(traffic_class)
+        if budget is None:
+            return await self._limited(call, operation, traffic_class)
+
+        try:
+            acquired = await budget.acquire()
+        except asyncio.CancelledError:
+            self.breaker.abandon()
+            raise
+        if not acquired:
+            self.breaker.abandon()
+            UPSTREAM_CALL_DURATION.labels(self.service, operation, OUTCOME_REJECTED).observe(budget.max_wait)
+            raise UpstreamRejectedError(
+                service=self.service,
+                message=f"Budget de la classe {traffic_class.name} épuisé pour {self.service} (limite {budget.max_limit})",
+                status_code=503
+            )
+        try:
+            return await self._limited(call, operation, traffic_class)
+        finally:
+            budget.abandon()
+
+    def _class_budget(self, traffic_class: Optional[TrafficClass]) -> Optional[AIMDLimiter]:
+        if traffic_class is None or traffic_class.upstream_limit is None:
+            return None
+        budget = self.class_budgets.get(traffic_class.name)
+        if budget is None:
+            limit = traffic_class.upstream_limit
+            budget = AIMDLimiter(
+                initial_limit=limit,
+                min_limit=limit,
+                max_limit=limit,
+                latency_threshold=float("inf"),
+                max_wait=settings.CONCURRENCY_MAX_WAIT
+            )
+            self.class_budgets[traffic_class.name] = budget
+        return budget
+
+    async def _limited(self, call: Callable[[], Awaitable[Any]], operation: str, traffic_class: Optional[TrafficClass]) -> Any:
+        try:
+            acquired = await self.limiter.acquire(priority=traffic_class is not None and traffic_class.priority)
+        except asyncio.CancelledError:
+            self.breaker.abandon()
+            raise
+        if not acquired:
+            self.breaker.abandon()
+            UPSTREAM_CALL_DURATION.labels(self.service, operation, OUTCOME_REJECTED).observe(self.limiter.max_wait)
+            raise UpstreamRejectedError(
+                service=self.service,
+                message=f"Trop d'appels en cours vers {self.service} (limite {int(self.limiter.limit)})",
+                status_code=503
+            )
+
+        in_flight = UPSTREAM_IN_FLIGHT.labels(self.service)
+        in_flight.inc()
+        started = time.monotonic()
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            in_flight.dec()
+            self.limiter.abandon()
+            self.breaker.abandon()
+            raise
+        except Exception as e:
+            in_flight.dec()
+            latency = time.monotonic() - started
+            failed = not isinstance(e, self.answered) and is_upstream_failure(e)
+            UPSTREAM_CALL_DURATION.labels(
+                self.service, operation, OUTCOME_FAILURE if failed else OUTCOME_ANSWERED
+            ).observe(latency)
+            self.limiter.release(latency, dropped=failed)
+            if failed:
+                was_open = self.breaker.state == CIRCUIT_OPEN
+                self.breaker.record_failure()
+                if not was_open and self.breaker.state == CIRCUIT_OPEN:
+                    logger.warning(f"Circuit opened for {self.service} after {self.breaker.consecutive_failures} failures")
+            else:
+                self.breaker.record_success()
+            raise
+
+        in_flight.dec()
+        latency = time.monotonic() - started
+        UPSTREAM_CALL_DURATION.labels(self.service, operation, OUTCOME_SUCCESS).observe(latency)
+        self.limiter.release(latency, dropped=False)
+        self.breaker.record_success()
+        return result
+
+    async def stream(self, open_stream: Callable[[Span], AsyncIterator[Any]], operation: str = "") -> AsyncIterator[Any]:
+        """
+        Itère un flux upstream (RPC server-streaming, réponse HTTP lue par morceaux).
+
+        Le disjoncteur s'applique comme pour `call` ; le limiteur AIMD non : la
+        durée d'un flux dépend du volume transféré, pas de la santé de l'upstream.
+        `open_stream` reçoit le span client, dont le traceparent doit être propagé.
+        """
+        self._check_breaker(operation)
+        client_span = open_span(
+            f"{self.service} {operation}".strip(),
+            kind="client",
+            attributes={"peer.service": self.service, "operation": operation, "stream": True}
+        )
+        in_flight = UPSTREAM_IN_FLIGHT.labels(self.service)
+        in_flight.inc()
+        started = time.monotonic()
+        items = 0
+        try:
+            async for item in open_stream(client_span):
+                items += 1
+                yield item
+        except (asyncio.CancelledError, GeneratorExit) as e:
+            # Client parti avant la fin du flux : rien à imputer à l'upstream
+            in_flight.dec()
+            self.breaker.abandon()
+            close_span(client_span, e if isinstance(e, asyncio.CancelledError) else None)
+            raise
+        except Exception as e:
+            in_flight.dec()
+            failed = not isinstance(e, self.answered) and is_upstream_failure(e)
+            UPSTREAM_CALL_DURATION.labels(
+                self.service, operation, OUTCOME_FAILURE if failed else OUTCOME_ANSWERED
+            ).observe(time.monotonic() - started)
+            if failed:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            close_span(client_span, e)
+            raise
+
+        in_flight.dec()
+        UPSTREAM_CALL_DURATION.labels(self.service, operation, OUTCOME_SUCCESS).observe(time.monotonic() - started)
+        self.breaker.record_success()
+        client_span.attributes["items"] = items
+        close_span(client_span)
+
+    def _check_breaker(self, operation: str):
+        if not self.breaker.allow():
+            UPSTREAM_CALL_DURATION.labels(self.service, operation, OUTCOME_REJECTED).observe(0)
+            raise UpstreamRejectedError(
+                service=self.service,
+                message=f"Circuit ouvert pour {self.service}, nouvel essai dans {self.breaker.retry_in():.0f}s",
+                status_code=503
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "circuit": self.breaker.stats(),
+            "concurrency": self.limiter.stats(),
+            "class_budgets": {
+                name: {key: value for key, value in budget.stats().items() if key in ("limit", "in_flight", "waiting", "rejected")}
+                for name, budget in self.class_budgets.items()
+            }
+        }
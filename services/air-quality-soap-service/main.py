@@ -15,6 +15,7 @@ from models.air_quality_models import (
 )
 from services.air_quality_service import AirQualityServiceImpl
 from utils.logger import setup_logger, get_request_logger
+from utils.tracing import install_spyne_tracing
 from spyne.model.primitive import Unicode, DateTime, Float
 
 # Import des fonctions d'initialisation de la base de données
@@ -110,6 +111,8 @@ def create_app():
         in_protocol=Soap11(validator='lxml'),
         out_protocol=Soap11()
     )
+    # Spans des appels @rpc rattachés au traceparent de la Gateway
+    install_spyne_tracing(application)
     return WsgiApplication(application)
 
 
@@ -0,0 +1,85 @@
+"""
+Tests de la reprise du traceparent par les méthodes @rpc Spyne
+"""
+import io
+import json
+import pytest
+from spyne import Application, ServiceBase, Unicode, rpc
+from spyne.protocol.soap import Soap11
+from spyne.server.wsgi import WsgiApplication
+
+from utils import tracing
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+class EchoService(ServiceBase):
+    @rpc(Unicode, _returns=Unicode)
+    def Echo(ctx, value):
+        if value == "boom":
+            raise ValueError("boom")
+        return value
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "EXPORT_PATH", str(tmp_path / "spans.jsonl"))
+    application = Application(
+        [EchoService],
+        tns="http://smartcity.test",
+        in_protocol=Soap11(),
+        out_protocol=Soap11()
+    )
+    tracing.install_spyne_tracing(application)
+    return WsgiApplication(application)
+
+
+def call(app, value):
+    body = (
+        '<soap:Envelope xmlns:soap="http://schemas.xmlsoap.org/soap/envelope/" xmlns:t="http://smartcity.test">'
+        f'<soap:Body><t:Echo><t:value>{value}</t:value></t:Echo></soap:Body></soap:Envelope>'
+    ).encode()
+    environ = {
+        "REQUEST_METHOD": "POST",
+        "PATH_INFO": "/",
+        "QUERY_STRING": "",
+        "CONTENT_TYPE": "text/xml",
+        "CONTENT_LENGTH": str(len(body)),
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "8000",
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(body),
+        "HTTP_TRACEPARENT": f"00-{TRACE_ID}-{PARENT_ID}-01"
+    }
+    return b"".join(app(environ, lambda *args: None))
+
+
+def exported_spans():
+    tracing.flush_spans()
+    with open(tracing.EXPORT_PATH, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_rpc_span_joins_gateway_trace(app):
+    call(app, "hello")
+
+    [span] = exported_spans()
+    assert (span["trace_id"], span["parent_span_id"]) == (TRACE_ID, PARENT_ID)
+    assert span["name"] == "Echo"
+    assert span["status"] == "ok"
+    assert tracing.current_span() is None
+
+
+def test_fault_marks_span_as_error(app):
+    call(app, "boom")
+
+    [span] = exported_spans()
+    assert span["status"] == "error"
+    assert "Server" in span["attributes"]["error"]
+
+
+def test_invalid_traceparent_starts_new_trace():
+    assert tracing.parse_traceparent("00-" + "0" * 32 + "-" + PARENT_ID + "-01") is None
+    assert tracing.parse_traceparent("garbage") is None
+    assert tracing.parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (TRACE_ID, PARENT_ID)
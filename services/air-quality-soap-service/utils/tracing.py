@@ -0,0 +1,218 @@
+"""
+Traçage distribué côté service : reprise du traceparent W3C envoyé par la Gateway.
+
+Chaque requête traitée ouvre un span serveur rattaché à la trace de l'appelant.
+Si la variable d'environnement TRACE_EXPORT_PATH est définie, les spans sont
+ajoutés à ce fichier (une ligne JSON par span), au même format que la Gateway,
+par un thread d'écriture.
+
+Ce module est dupliqué dans chaque service : chaque image Docker est construite
+depuis le répertoire de son service et n'a pas accès au code des autres.
+"""
+import atexit
+import json
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+TRACEPARENT_HEADER = "traceparent"
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "air-quality-soap-service")
+EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+
+_TRACEPARENT_RE = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_current_span: ContextVar[Optional[Dict[str, Any]]] = ContextVar("current_span", default=None)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str]]:
+    """(trace_id, parent_span_id) d'un en-tête traceparent valide, sinon None"""
+    if not value:
+        return None
+    match = _TRACEPARENT_RE.match(value.strip().lower())
+    if not match:
+        return None
+    version, trace_id, span_id, _ = match.groups()
+    if version == "ff" or trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id
+
+
+def current_span() -> Optional[Dict[str, Any]]:
+    return _current_span.get()
+
+
+def start_span(
+    name: str,
+    kind: str = "server",
+    traceparent: Optional[str] = None,
+    attributes: Optional[Dict[str, Any]] = None
+) -> Tuple[Dict[str, Any], Token]:
+    """Ouvre un span enfant de `traceparent`, ou du span courant, ou d'une nouvelle trace"""
+    remote = parse_traceparent(traceparent)
+    parent = current_span()
+    if remote is not None:
+        trace_id, parent_span_id = remote
+    elif parent is not None:
+        trace_id, parent_span_id = parent["trace_id"], parent["span_id"]
+    else:
+        trace_id, parent_span_id = secrets.token_hex(16), None
+
+    current = {
+        "service": SERVICE_NAME,
+        "trace_id": trace_id,
+        "span_id": secrets.token_hex(8),
+        "parent_span_id": parent_span_id,
+        "name": name,
+        "kind": kind,
+        "start_time_unix_nano": time.time_ns(),
+        "end_time_unix_nano": None,
+        "status": "ok",
+        "attributes": dict(attributes or {})
+    }
+    return current, _current_span.set(current)
+
+
+def finish_span(current: Dict[str, Any], token: Token):
+    """Ferme le span, restaure le span parent et exporte"""
+    current["end_time_unix_nano"] = time.time_ns()
+    _current_span.reset(token)
+    export_span(current)
+
+
+@contextmanager
+def span(
+    name: str,
+    kind: str = "server",
+    traceparent: Optional[str] = None,
+    attributes: Optional[Dict[str, Any]] = None
+) -> Iterator[Dict[str, Any]]:
+    """`start_span` / `finish_span` autour d'un bloc ; une exception marque le span en erreur"""
+    current, token = start_span(name, kind, traceparent, attributes)
+    try:
+        yield current
+    except Exception as e:
+        current["status"] = "error"
+        current["attributes"].setdefault("error", f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        finish_span(current, token)
+
+
+class _SpanWriter:
+    """
+    Écriture des spans hors du chemin des requêtes.
+
+    Un thread par processus (démarré au premier span, y compris après un fork)
+    vide la file par lots dans des fichiers gardés ouverts, puis les flushe : pas
+    d'ouverture de fichier ni d'écriture bloquante par span.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._pid: Optional[int] = None
+
+    def put(self, path: str, record: Dict[str, Any]):
+        if self._pid != os.getpid():
+            self._start()
+        self._queue.put((path, record))
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Après un fork, la file et le thread du parent ne sont pas utilisables
+            self._queue = queue.Queue()
+            threading.Thread(target=self._run, name="span-writer", daemon=True).start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        files: Dict[str, Any] = {}
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                for path, record in batch:
+                    handle = files.get(path)
+                    if handle is None:
+                        directory = os.path.dirname(path)
+                        if directory:
+                            os.makedirs(directory, exist_ok=True)
+                        handle = files[path] = open(path, "a", encoding="utf-8")
+                    handle.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                for handle in files.values():
+                    handle.flush()
+            except OSError:
+                # Export au mieux : un disque plein ne doit pas bloquer le service
+                pass
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Attend que les spans déjà déposés soient écrits"""
+        if self._pid == os.getpid():
+            self._queue.join()
+
+
+_writer = _SpanWriter()
+atexit.register(_writer.flush)
+
+
+def export_span(finished: Dict[str, Any]):
+    """Dépose le span pour le fichier d'export (une ligne JSON), si configuré"""
+    if not EXPORT_PATH:
+        return
+    _writer.put(EXPORT_PATH, finished)
+
+
+def flush_spans():
+    """Attend l'écriture des spans terminés (tests, arrêt du service)"""
+    _writer.flush()
+
+
+# ============================================================
+# Intégration Spyne : un span par appel @rpc
+# ============================================================
+
+def _on_method_call(ctx):
+    """Ouvre le span de l'opération avec le traceparent de l'en-tête HTTP"""
+    req_env = getattr(ctx.transport, "req_env", None) or {}
+    operation = ctx.descriptor.name if ctx.descriptor is not None else "unknown"
+    # udc : seul attribut du MethodContext réservé aux données applicatives
+    ctx.udc = start_span(
+        operation,
+        traceparent=req_env.get("HTTP_TRACEPARENT"),
+        attributes={"soap.operation": operation}
+    )
+
+
+def _on_method_return(ctx):
+    if ctx.udc is not None:
+        finish_span(*ctx.udc)
+        ctx.udc = None
+
+
+def _on_method_exception(ctx):
+    if ctx.udc is not None:
+        current, _ = ctx.udc
+        current["status"] = "error"
+        current["attributes"]["error"] = str(ctx.out_error)
+        finish_span(*ctx.udc)
+        ctx.udc = None
+
+
+def install_spyne_tracing(application):
+    """Trace toutes les méthodes @rpc d'une Application Spyne"""
+    application.event_manager.add_listener("method_call", _on_method_call)
+    application.event_manager.add_listener("method_return_object", _on_method_return)
+    application.event_manager.add_listener("method_exception_object", _on_method_exception)
@@ -13,6 +13,7 @@ from models.air_quality_models import (
 )
 from services.air_quality_service import AirQualityServiceImpl
 from utils.logger import setup_logger, get_request_logger
+from utils.tracing import install_spyne_tracing
 from spyne.model.primitive import Unicode, DateTime, Float
 from spyne import rpc, ServiceBase
 
@@ -152,6 +153,8 @@ application = Application(
     in_protocol=Soap11(validator='lxml'),
     out_protocol=Soap11()
 )
+# Spans des appels @rpc rattachés au traceparent de la Gateway
+install_spyne_tracing(application)
 
 app = WsgiApplication(application)
 
@@ -96,24 +96,40 @@ class AlertRepository:
         min_priority: Optional[Priority] = None
     ) -> List[Alert]:
         """Récupère les alertes actives d'une zone avec filtres"""
-        alert_ids = self._zone_index.get(zone, set())
-        alerts = [self._alerts[aid] for aid in alert_ids if aid in self._alerts]
-        
-        # Filtrer par statut actif
-        alerts = [a for a in alerts if a.status in [AlertStatus.PENDING, AlertStatus.IN_PROGRESS]]
-        
-        # Filtrer par type
-        if alert_type:
-            alerts = [a for a in alerts if a.alert_type == alert_type]
-        
-        # Filtrer par priorité minimale
-        if min_priority:
-            alerts = [a for a in alerts if a.priority.value >= min_priority.value]
+        return self.get_active_by_zones([zone], alert_type, min_priority)[zone]
+    
+    def get_active_by_zones(
+        self,
+        zones: List[str],
+        alert_type: Optional[AlertType] = None,
+        min_priority: Optional[Priority] = None
+    ) -> Dict[str, List[Alert]]:
+        """
+        Récupère les alertes actives de plusieurs zones en une seule passe
+        sur l'index de zones, groupées par zone (zones sans alerte incluses)
+        """
+        active_statuses = (AlertStatus.PENDING, AlertStatus.IN_PROGRESS)
+        result: Dict[str, List[Alert]] = {}
         
-        # Tri par priorité décroissante puis date décroissante
-        alerts.sort(key=lambda a: (-a.priority.value, -a.created_at.timestamp()))
+        for zone in zones:
+            if zone in result:
+                continue
+            alerts = []
+            for aid in self._zone_index.get(zone, set()):
+                alert = self._alerts.get(aid)
+                if alert is None or alert.status not in active_statuses:
+                    continue
+                if alert_type and alert.alert_type != alert_type:
+                    continue
+                if min_priority and alert.priority.value < min_priority.value:
+                    continue
+                alerts.append(alert)
+            
+            # Tri par priorité décroissante puis date décroissante
+            alerts.sort(key=lambda a: (-a.priority.value, -a.created_at.timestamp()))
+            result[zone] = alerts
         
-        return alerts
+        return result
     
     def get_history(
         self,
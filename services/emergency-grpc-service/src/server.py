@@ -9,6 +9,7 @@ import os
 
 from src.services.emergency_service import EmergencyAlertService
 from src.utils.logger import setup_logger
+from src.utils.tracing import TracingInterceptor
 from protos import emergency_pb2_grpc
 
 # Logger
@@ -20,11 +21,17 @@ def serve():
     # Configuration du serveur
     server = grpc.server(
         futures.ThreadPoolExecutor(max_workers=10),
+        # Spans des RPC rattachés au traceparent envoyé par la Gateway
+        interceptors=[TracingInterceptor()],
         options=[
             ('grpc.max_send_message_length', 50 * 1024 * 1024),
             ('grpc.max_receive_message_length', 50 * 1024 * 1024),
             ('grpc.so_reuseport', 1),
             ('grpc.use_local_subchannel_pool', 1),
+            # Accepte les pings keepalive de la Gateway (toutes les 30 s, même sans appel)
+            ('grpc.keepalive_permit_without_calls', 1),
+            ('grpc.http2.min_ping_interval_without_data_ms', 10000),
+            ('grpc.http2.max_ping_strikes', 0),
         ],
         compression=grpc.Compression.Gzip
     )
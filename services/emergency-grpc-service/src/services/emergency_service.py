@@ -249,6 +249,55 @@ class EmergencyAlertService(emergency_pb2_grpc.EmergencyAlertServiceServicer):
             context.set_details(str(e))
             return emergency_pb2.AlertListResponse()
     
+    # ========================================================================
+    # RPC: GetActiveAlertsBatch
+    # ========================================================================
+    
+    def GetActiveAlertsBatch(self, request, context):
+        """
+        Récupère les alertes actives de plusieurs zones en un seul appel
+        
+        Mêmes filtres que GetActiveAlerts, résultats groupés par zone
+        """
+        service_logger.info(
+            f"GetActiveAlertsBatch request for zones: {list(request.zones)}",
+            extra={"zones": list(request.zones)}
+        )
+        
+        try:
+            # Validation
+            if not request.zones or any(not zone.strip() for zone in request.zones):
+                context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+                context.set_details("Zones cannot be empty")
+                return emergency_pb2.MultiZoneAlertResponse()
+            
+            # Extraction des filtres
+            alert_type = self._map_alert_type_from_proto(request.type) if request.type else None
+            min_priority = self._map_priority_from_proto(request.min_priority) if request.min_priority else None
+            
+            # Récupération
+            alerts_by_zone = self.repository.get_active_by_zones(
+                zones=list(request.zones),
+                alert_type=alert_type,
+                min_priority=min_priority
+            )
+            
+            total_count = sum(len(alerts) for alerts in alerts_by_zone.values())
+            service_logger.info(f"Found {total_count} active alerts in {len(alerts_by_zone)} zones")
+            
+            # Construction de la réponse
+            response = emergency_pb2.MultiZoneAlertResponse(total_count=total_count)
+            for zone, alerts in alerts_by_zone.items():
+                response.zones[zone].alerts.extend(self._alert_to_response(alert) for alert in alerts)
+                response.zones[zone].total_count = len(alerts)
+            return response
+        
+        except Exception as e:
+            service_logger.error(f"Error getting active alerts batch: {str(e)}", exc_info=True)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+            return emergency_pb2.MultiZoneAlertResponse()
+    
     # ========================================================================
     # RPC: UpdateAlertStatus
     # ========================================================================
@@ -327,27 +376,14 @@ class EmergencyAlertService(emergency_pb2_grpc.EmergencyAlertServiceServicer):
         service_logger.info("GetAlertHistory request received")
         
         try:
-            # Conversion timestamps
-            start_date = datetime.fromtimestamp(request.start_date) if request.start_date else None
-            end_date = datetime.fromtimestamp(request.end_date) if request.end_date else None
-            
-            # Récupération historique
-            alert_type = self._map_alert_type_from_proto(request.type) if request.type else None
-            limit = request.limit if request.limit > 0 else 100
-            
-            alerts = self.repository.get_history(
-                zone=request.zone if request.zone else None,
-                alert_type=alert_type,
-                start_date=start_date,
-                end_date=end_date,
-                limit=limit
-            )
+            filters = self._history_filters(request)
+            alerts = self.repository.get_history(**filters)
             
             # Génération des statistiques
             statistics = self.repository.get_statistics(
-                zone=request.zone if request.zone else None,
-                start_date=start_date,
-                end_date=end_date
+                zone=filters["zone"],
+                start_date=filters["start_date"],
+                end_date=filters["end_date"]
             )
             
             service_logger.info(
@@ -367,6 +403,44 @@ class EmergencyAlertService(emergency_pb2_grpc.EmergencyAlertServiceServicer):
             context.set_details(str(e))
             return emergency_pb2.AlertHistoryResponse()
     
+    def _history_filters(self, request) -> dict:
+        """Filtres de l'historique (HistoryRequest -> arguments du repository)"""
+        return {
+            "zone": request.zone if request.zone else None,
+            "alert_type": self._map_alert_type_from_proto(request.type) if request.type else None,
+            "start_date": datetime.fromtimestamp(request.start_date) if request.start_date else None,
+            "end_date": datetime.fromtimestamp(request.end_date) if request.end_date else None,
+            "limit": request.limit if request.limit > 0 else 100
+        }
+    
+    # ========================================================================
+    # RPC: StreamAlertHistory (Streaming)
+    # ========================================================================
+    
+    def StreamAlertHistory(self, request, context):
+        """
+        Historique des alertes envoyé message par message.
+        
+        Mêmes filtres que GetAlertHistory, sans statistiques : le client
+        reçoit chaque alerte dès qu'elle est sérialisée, sans attendre la
+        construction d'une réponse unique.
+        """
+        service_logger.info("StreamAlertHistory request received")
+        
+        try:
+            sent = 0
+            for alert in self.repository.get_history(**self._history_filters(request)):
+                if not context.is_active():
+                    break
+                yield self._alert_to_response(alert)
+                sent += 1
+            service_logger.info(f"History streamed: {sent} alerts")
+        
+        except Exception as e:
+            service_logger.error(f"Error streaming alert history: {str(e)}", exc_info=True)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
+    
     # ========================================================================
     # RPC: SubscribeAlerts (Streaming)
     # ========================================================================
@@ -0,0 +1,244 @@
+"""
+Traçage distribué côté service : reprise du traceparent W3C envoyé par la Gateway.
+
+Chaque RPC ouvre un span serveur rattaché à la trace de l'appelant, lue dans les
+métadonnées gRPC.
+Si la variable d'environnement TRACE_EXPORT_PATH est définie, les spans sont
+ajoutés à ce fichier (une ligne JSON par span), au même format que la Gateway,
+par un thread d'écriture.
+
+Ce module est dupliqué dans chaque service : chaque image Docker est construite
+depuis le répertoire de son service et n'a pas accès au code des autres.
+"""
+import atexit
+import json
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Iterator, Optional, Tuple
+import grpc
+
+TRACEPARENT_HEADER = "traceparent"
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "emergency-grpc")
+EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+
+_TRACEPARENT_RE = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_current_span: ContextVar[Optional[Dict[str, Any]]] = ContextVar("current_span", default=None)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str]]:
+    """(trace_id, parent_span_id) d'un en-tête traceparent valide, sinon None"""
+    if not value:
+        return None
+    match = _TRACEPARENT_RE.match(value.strip().lower())
+    if not match:
+        return None
+    version, trace_id, span_id, _ = match.groups()
+    if version == "ff" or trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id
+
+
+def current_span() -> Optional[Dict[str, Any]]:
+    return _current_span.get()
+
+
+def start_span(
+    name: str,
+    kind: str = "server",
+    traceparent: Optional[str] = None,
+    attributes: Optional[Dict[str, Any]] = None
+) -> Tuple[Dict[str, Any], Token]:
+    """Ouvre un span enfant de `traceparent`, ou du span courant, ou d'une nouvelle trace"""
+    remote = parse_traceparent(traceparent)
+    parent = current_span()
+    if remote is not None:
+        trace_id, parent_span_id = remote
+    elif parent is not None:
+        trace_id, parent_span_id = parent["trace_id"], parent["span_id"]
+    else:
+        trace_id, parent_span_id = secrets.token_hex(16), None
+
+    current = {
+        "service": SERVICE_NAME,
+        "trace_id": trace_id,
+        "span_id": secrets.token_hex(8),
+        "parent_span_id": parent_span_id,
+        "name": name,
+        "kind": kind,
+        "start_time_unix_nano": time.time_ns(),
+        "end_time_unix_nano": None,
+        "status": "ok",
+        "attributes": dict(attributes or {})
+    }
+    return current, _current_span.set(current)
+
+
+def finish_span(current: Dict[str, Any], token: Token):
+    """Ferme le span, restaure le span parent et exporte"""
+    current["end_time_unix_nano"] = time.time_ns()
+    _current_span.reset(token)
+    export_span(current)
+
+
+@contextmanager
+def span(
+    name: str,
+    kind: str = "server",
+    traceparent: Optional[str] = None,
+    attributes: Optional[Dict[str, Any]] = None
+) -> Iterator[Dict[str, Any]]:
+    """`start_span` / `finish_span` autour d'un bloc ; une exception marque le span en erreur"""
+    current, token = start_span(name, kind, traceparent, attributes)
+    try:
+        yield current
+    except Exception as e:
+        current["status"] = "error"
+        current["attributes"].setdefault("error", f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        finish_span(current, token)
+
+
+class _SpanWriter:
+    """
+    Écriture des spans hors du chemin des requêtes.
+
+    Un thread par processus (démarré au premier span, y compris après un fork)
+    vide la file par lots dans des fichiers gardés ouverts, puis les flushe : pas
+    d'ouverture de fichier ni d'écriture bloquante par span.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._pid: Optional[int] = None
+
+    def put(self, path: str, record: Dict[str, Any]):
+        if self._pid != os.getpid():
+            self._start()
+        self._queue.put((path, record))
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Après un fork, la file et le thread du parent ne sont pas utilisables
+            self._queue = queue.Queue()
+            threading.Thread(target=self._run, name="span-writer", daemon=True).start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        files: Dict[str, Any] = {}
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                for path, record in batch:
+                    handle = files.get(path)
+                    if handle is None:
+                        directory = os.path.dirname(path)
+                        if directory:
+                            os.makedirs(directory, exist_ok=True)
+                        handle = files[path] = open(path, "a", encoding="utf-8")
+                    handle.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                for handle in files.values():
+                    handle.flush()
+            except OSError:
+                # Export au mieux : un disque plein ne doit pas bloquer le service
+                pass
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Attend que les spans déjà déposés soient écrits"""
+        if self._pid == os.getpid():
+            self._queue.join()
+
+
+_writer = _SpanWriter()
+atexit.register(_writer.flush)
+
+
+def export_span(finished: Dict[str, Any]):
+    """Dépose le span pour le fichier d'export (une ligne JSON), si configuré"""
+    if not EXPORT_PATH:
+        return
+    _writer.put(EXPORT_PATH, finished)
+
+
+def flush_spans():
+    """Attend l'écriture des spans terminés (tests, arrêt du service)"""
+    _writer.flush()
+
+
+# ============================================================
+# Intégration gRPC : un span par RPC, depuis les métadonnées
+# ============================================================
+
+def _status_code(context) -> Optional[grpc.StatusCode]:
+    """Code positionné par le servicer via context.set_code (None = OK)"""
+    try:
+        return context.code()
+    except (AttributeError, NotImplementedError):
+        return None
+
+
+class TracingInterceptor(grpc.ServerInterceptor):
+    """Ouvre un span serveur par RPC, rattaché au traceparent des métadonnées"""
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None or handler.request_streaming:
+            return handler
+
+        metadata = dict(handler_call_details.invocation_metadata or ())
+        traceparent = metadata.get(TRACEPARENT_HEADER)
+        method = handler_call_details.method.rsplit("/", 1)[-1]
+        attributes = {"rpc.system": "grpc", "rpc.method": method}
+
+        if handler.response_streaming:
+            behavior = handler.unary_stream
+
+            def unary_stream(request, context):
+                # Le span couvre toute la durée du flux
+                with span(method, traceparent=traceparent, attributes=attributes) as current:
+                    yield from behavior(request, context)
+                    _record_status(current, context)
+
+            return grpc.unary_stream_rpc_method_handler(
+                unary_stream,
+                request_deserializer=handler.request_deserializer,
+                response_serializer=handler.response_serializer
+            )
+
+        behavior = handler.unary_unary
+
+        def unary_unary(request, context):
+            with span(method, traceparent=traceparent, attributes=attributes) as current:
+                response = behavior(request, context)
+                _record_status(current, context)
+                return response
+
+        return grpc.unary_unary_rpc_method_handler(
+            unary_unary,
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer
+        )
+
+
+def _record_status(current: Dict[str, Any], context):
+    code = _status_code(context)
+    if code is not None and code != grpc.StatusCode.OK:
+        current["status"] = "error"
+        current["attributes"]["rpc.grpc.status_code"] = code.name
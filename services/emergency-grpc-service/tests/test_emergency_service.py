@@ -0,0 +1,90 @@
+"""
+Tests unitaires pour EmergencyAlertService (RPC multi-zones)
+"""
+import grpc
+
+from src.services.emergency_service import EmergencyAlertService
+from protos import emergency_pb2
+
+
+class FakeContext:
+    """Contexte gRPC minimal pour appeler le servicer directement"""
+    
+    def __init__(self):
+        self.code = None
+        self.details = None
+    
+    def set_code(self, code):
+        self.code = code
+    
+    def set_details(self, details):
+        self.details = details
+
+
+class ActiveContext(FakeContext):
+    """Contexte d'un RPC streaming dont le client reste connecté"""
+    
+    def is_active(self):
+        return True
+
+
+def test_get_active_alerts_batch_groups_by_zone():
+    """Test alertes actives de plusieurs zones en un seul appel"""
+    service = EmergencyAlertService()
+    context = FakeContext()
+    
+    response = service.GetActiveAlertsBatch(
+        emergency_pb2.MultiZoneRequest(zones=["Zone Centre", "Zone Nord", "Zone Inconnue"]),
+        context
+    )
+    
+    assert context.code is None
+    assert set(response.zones) == {"Zone Centre", "Zone Nord", "Zone Inconnue"}
+    assert [a.location.zone for a in response.zones["Zone Centre"].alerts] == ["Zone Centre"]
+    assert len(response.zones["Zone Inconnue"].alerts) == 0
+    assert response.total_count == sum(z.total_count for z in response.zones.values())
+    
+    single = service.GetActiveAlerts(emergency_pb2.ZoneRequest(zone="Zone Nord"), FakeContext())
+    assert list(response.zones["Zone Nord"].alerts) == list(single.alerts)
+
+
+def test_get_active_alerts_batch_with_filters():
+    """Test filtres type et priorité appliqués à toutes les zones"""
+    service = EmergencyAlertService()
+    
+    response = service.GetActiveAlertsBatch(
+        emergency_pb2.MultiZoneRequest(
+            zones=["Zone Centre", "Zone Nord", "Zone Sud"],
+            min_priority=emergency_pb2.CRITICAL
+        ),
+        FakeContext()
+    )
+    
+    assert len(response.zones["Zone Nord"].alerts) == 0
+    assert all(
+        alert.priority == emergency_pb2.CRITICAL
+        for zone in response.zones.values()
+        for alert in zone.alerts
+    )
+
+
+def test_get_active_alerts_batch_rejects_empty_zones():
+    """Test validation de la liste de zones"""
+    service = EmergencyAlertService()
+    context = FakeContext()
+    
+    service.GetActiveAlertsBatch(emergency_pb2.MultiZoneRequest(zones=[]), context)
+    
+    assert context.code == grpc.StatusCode.INVALID_ARGUMENT
+
+
+def test_stream_alert_history_matches_unary_history():
+    """Test historique diffusé : mêmes alertes, dans le même ordre"""
+    service = EmergencyAlertService()
+    request = emergency_pb2.HistoryRequest(limit=5)
+    
+    unary = service.GetAlertHistory(request, FakeContext())
+    streamed = list(service.StreamAlertHistory(request, ActiveContext()))
+    
+    assert [a.alert_id for a in streamed] == [a.alert_id for a in unary.alerts]
+    assert len(streamed) <= 5
@@ -97,6 +97,18 @@ def test_get_active_by_zone_with_filters():
     assert all(a.priority.value >= Priority.HIGH.value for a in active)
 
 
+def test_get_active_by_zones():
+    """Test récupération multi-zones groupée par zone"""
+    repo = AlertRepository()
+    
+    active = repo.get_active_by_zones(["Zone Centre", "Zone Nord", "Zone Inconnue"])
+    
+    assert set(active) == {"Zone Centre", "Zone Nord", "Zone Inconnue"}
+    assert active["Zone Centre"] == repo.get_active_by_zone("Zone Centre")
+    assert active["Zone Nord"] == repo.get_active_by_zone("Zone Nord")
+    assert active["Zone Inconnue"] == []
+
+
 def test_get_history():
     """Test récupération historique"""
     repo = AlertRepository()
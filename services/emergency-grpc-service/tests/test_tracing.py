@@ -0,0 +1,58 @@
+"""
+Tests de la reprise du traceparent par le serveur gRPC
+"""
+import json
+from concurrent import futures
+
+import grpc
+import pytest
+
+from src.services.emergency_service import EmergencyAlertService
+from src.utils import tracing
+from protos import emergency_pb2, emergency_pb2_grpc
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture
+def stub(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "EXPORT_PATH", str(tmp_path / "spans.jsonl"))
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=2),
+        interceptors=[tracing.TracingInterceptor()]
+    )
+    emergency_pb2_grpc.add_EmergencyAlertServiceServicer_to_server(EmergencyAlertService(), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    channel = grpc.insecure_channel(f"127.0.0.1:{port}")
+    yield emergency_pb2_grpc.EmergencyAlertServiceStub(channel)
+    channel.close()
+    server.stop(grace=None)
+
+
+def exported_spans():
+    tracing.flush_spans()
+    with open(tracing.EXPORT_PATH, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_rpc_span_joins_gateway_trace(stub):
+    stub.GetActiveAlerts(
+        emergency_pb2.ZoneRequest(zone="Zone Nord"),
+        metadata=((tracing.TRACEPARENT_HEADER, f"00-{TRACE_ID}-{PARENT_ID}-01"),)
+    )
+
+    [span] = exported_spans()
+    assert (span["trace_id"], span["parent_span_id"]) == (TRACE_ID, PARENT_ID)
+    assert span["name"] == "GetActiveAlerts"
+    assert span["status"] == "ok"
+
+
+def test_error_status_marks_span(stub):
+    with pytest.raises(grpc.RpcError):
+        stub.UpdateAlertStatus(emergency_pb2.StatusUpdateRequest(alert_id="inconnue", new_status=emergency_pb2.RESOLVED))
+
+    [span] = exported_spans()
+    assert span["status"] == "error"
+    assert span["parent_span_id"] is None
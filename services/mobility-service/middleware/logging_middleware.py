@@ -5,6 +5,7 @@ import time
 import logging
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
+from middleware.tracing import TRACEPARENT_HEADER, span
 
 # Configuration du logger
 logging.basicConfig(
@@ -26,8 +27,16 @@ class LoggingMiddleware(BaseHTTPMiddleware):
             f"- Client: {request.client.host if request.client else 'unknown'}"
         )
         
-        # Traitement de la requête
-        response = await call_next(request)
+        # Traitement de la requête, dans un span rattaché à la trace de la Gateway
+        with span(
+            f"{request.method} {request.url.path}",
+            traceparent=request.headers.get(TRACEPARENT_HEADER),
+            attributes={"http.method": request.method, "http.target": request.url.path}
+        ) as server_span:
+            response = await call_next(request)
+            server_span["attributes"]["http.status_code"] = response.status_code
+            if response.status_code >= 500:
+                server_span["status"] = "error"
         
         # Calcul du temps de traitement
         process_time = time.time() - start_time
@@ -41,5 +50,6 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         
         # Ajout d'un header custom avec le temps de traitement
         response.headers["X-Process-Time"] = str(process_time)
+        response.headers["X-Trace-Id"] = server_span["trace_id"]
         
         return response
\ No newline at end of file
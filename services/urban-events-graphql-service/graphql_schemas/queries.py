@@ -40,6 +40,8 @@ class Query(graphene.ObjectType):
         priority=graphene.String(),
         date_from=graphene.String(),
         date_to=graphene.String(),
+        limit=graphene.Int(),
+        offset=graphene.Int(),
         description="Liste des événements avec filtres optionnels"
     )
     event = graphene.Field(
@@ -76,13 +78,15 @@ class Query(graphene.ObjectType):
         status=None,
         priority=None,
         date_from=None,
-        date_to=None
+        date_to=None,
+        limit=None,
+        offset=None
     ):
-        """Résolveur pour la liste des événements avec filtres"""
+        """Résolveur pour la liste des événements avec filtres et pagination (limit/offset)"""
         service = info.context["event_service"]
         
         if any([event_type_id, zone_id, status, priority, date_from, date_to]):
-            return service.filter_events(
+            events = service.filter_events(
                 event_type_id=event_type_id,
                 zone_id=zone_id,
                 status=status,
@@ -90,7 +94,13 @@ class Query(graphene.ObjectType):
                 date_from=date_from,
                 date_to=date_to
             )
-        return service.get_all_events()
+        else:
+            events = service.get_all_events()
+        
+        # Pagination : la Gateway lit les gros résultats page par page
+        start = max(offset or 0, 0)
+        end = start + limit if limit is not None and limit >= 0 else None
+        return events[start:end]
     
     def resolve_event(self, info, event_id):
         """Résolveur pour un événement spécifique"""
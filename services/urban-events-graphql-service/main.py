@@ -506,35 +506,64 @@ async def graphql_ui():
     """
 
 
+def execute_operation(body: dict) -> dict:
+    """Exécute une opération GraphQL et construit sa réponse"""
+    query = body.get("query")
+    variables = body.get("variables")
+    operation_name = body.get("operationName")
+    
+    logger.info(f"GraphQL Query received: {query[:100]}...")
+    
+    # Exécution de la requête GraphQL
+    result = schema.execute(
+        query,
+        variable_values=variables,
+        operation_name=operation_name,
+        context_value={"event_service": event_service}
+    )
+    
+    # Préparation de la réponse
+    response_data = {"data": result.data}
+    if result.errors:
+        response_data["errors"] = [
+            {"message": str(error), "locations": getattr(error, 'locations', None)}
+            for error in result.errors
+        ]
+        logger.error(f"GraphQL Errors: {result.errors}")
+    
+    return response_data
+
+
 @app.post("/graphql")
 async def graphql_endpoint(request: Request):
-    """Endpoint POST pour les requêtes GraphQL"""
+    """
+    Endpoint POST pour les requêtes GraphQL.
+    
+    Accepte une opération ({"query": ...}) ou un lot d'opérations
+    ([{"query": ...}, ...]) : les entrées d'un lot sont exécutées dans l'ordre
+    et la réponse est un tableau de résultats dans le même ordre.
+    """
     try:
         body = await request.json()
-        query = body.get("query")
-        variables = body.get("variables")
-        operation_name = body.get("operationName")
-        
-        logger.info(f"GraphQL Query received: {query[:100]}...")
-        
-        # Exécution de la requête GraphQL
-        result = schema.execute(
-            query,
-            variable_values=variables,
-            operation_name=operation_name,
-            context_value={"event_service": event_service}
-        )
-        
-        # Préparation de la réponse
-        response_data = {"data": result.data}
-        if result.errors:
-            response_data["errors"] = [
-                {"message": str(error), "locations": getattr(error, 'locations', None)}
-                for error in result.errors
-            ]
-            logger.error(f"GraphQL Errors: {result.errors}")
         
-        return JSONResponse(response_data)
+        if isinstance(body, list):
+            if not body:
+                return JSONResponse(
+                    {"errors": [{"message": "Lot GraphQL vide"}]},
+                    status_code=400
+                )
+            logger.info(f"GraphQL batch received: {len(body)} operations")
+            results = []
+            for entry in body:
+                try:
+                    results.append(execute_operation(entry))
+                except Exception as e:
+                    # Une entrée invalide n'empêche pas l'exécution des autres
+                    logger.error(f"GraphQL Error in batch entry: {str(e)}", exc_info=True)
+                    results.append({"errors": [{"message": f"Erreur serveur: {str(e)}"}]})
+            return JSONResponse(results)
+        
+        return JSONResponse(execute_operation(body))
         
     except Exception as e:
         logger.error(f"GraphQL Error: {str(e)}", exc_info=True)
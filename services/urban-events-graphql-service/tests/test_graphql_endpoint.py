@@ -0,0 +1,72 @@
+"""
+Tests de l'endpoint POST /graphql (opération simple et lot)
+"""
+from fastapi.testclient import TestClient
+
+from main import app
+
+client = TestClient(app)
+
+
+def test_single_operation():
+    """Une opération simple renvoie un objet"""
+    response = client.post("/graphql", json={"query": "{ zones { id } }"})
+    assert response.status_code == 200
+    assert len(response.json()["data"]["zones"]) > 0
+
+
+def test_batch_is_executed_in_order():
+    """Un lot renvoie un tableau de résultats dans l'ordre des entrées"""
+    response = client.post("/graphql", json=[
+        {"query": "{ zones { id } }"},
+        {
+            "query": "query Zone($zoneId: String!) { zone(zoneId: $zoneId) { name } }",
+            "variables": {"zoneId": "zone-1"}
+        }
+    ])
+    assert response.status_code == 200
+    results = response.json()
+    assert len(results) == 2
+    assert "zones" in results[0]["data"]
+    assert results[1]["data"]["zone"]["name"] == "Centre-Ville"
+
+
+def test_invalid_batch_entry_does_not_fail_the_batch():
+    """Une entrée invalide renvoie ses erreurs sans bloquer les autres"""
+    response = client.post("/graphql", json=[{"variables": {}}, {"query": "{ zones { id } }"}])
+    results = response.json()
+    assert "errors" in results[0]
+    assert "zones" in results[1]["data"]
+
+
+def test_traceparent_is_picked_up(tmp_path, monkeypatch):
+    """La requête est tracée dans la trace envoyée par la Gateway"""
+    import json
+    from utils import tracing
+    monkeypatch.setattr(tracing, "EXPORT_PATH", str(tmp_path / "spans.jsonl"))
+    trace_id, parent_id = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+
+    client.post(
+        "/graphql",
+        json={"query": "{ zones { id } }"},
+        headers={"traceparent": f"00-{trace_id}-{parent_id}-01"}
+    )
+
+    tracing.flush_spans()
+    with open(tracing.EXPORT_PATH, encoding="utf-8") as f:
+        [span] = [json.loads(line) for line in f]
+    assert (span["trace_id"], span["parent_span_id"]) == (trace_id, parent_id)
+    assert span["name"] == "POST /graphql"
+
+
+def test_events_pagination():
+    """limit/offset découpent la liste complète sans trou ni doublon"""
+    query = "query Page($limit: Int, $offset: Int) { events(limit: $limit, offset: $offset) { id } }"
+    everything = client.post("/graphql", json={"query": "{ events { id } }"}).json()["data"]["events"]
+
+    pages = []
+    for offset in range(0, len(everything) + 2, 2):
+        page = client.post("/graphql", json={"query": query, "variables": {"limit": 2, "offset": offset}})
+        pages.extend(page.json()["data"]["events"])
+
+    assert pages == everything
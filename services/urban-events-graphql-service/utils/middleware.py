@@ -5,6 +5,7 @@ import time
 import logging
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
+from utils.tracing import TRACEPARENT_HEADER, span
 
 logger = logging.getLogger("urban-events-service")
 
@@ -25,8 +26,16 @@ class GraphQLLoggingMiddleware(BaseHTTPMiddleware):
             except:
                 pass
         
-        # Traitement de la requête
-        response = await call_next(request)
+        # Traitement de la requête, dans un span rattaché à la trace de la Gateway
+        with span(
+            f"{request.method} {request.url.path}",
+            traceparent=request.headers.get(TRACEPARENT_HEADER),
+            attributes={"http.method": request.method, "http.target": request.url.path}
+        ) as server_span:
+            response = await call_next(request)
+            server_span["attributes"]["http.status_code"] = response.status_code
+            if response.status_code >= 500:
+                server_span["status"] = "error"
         
         # Calcul de la durée
         duration = time.time() - start_time